@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+403 fallback benchmark: curl processes vs the in-process browser-like client
+
+Serves N teams from the fake athletics site with every page behind the
+"forbidden" fault (403 unless the request accepts text/html, as browsers
+and the fallbacks do), then fetches every roster page:
+
+  curl        rosters.fetch_url_with_curl, one process per page
+  client      fallback.BrowserClient.fetch, one page at a time on one
+              keep-alive session
+  batch       BrowserClient.fetch_many on -workers threads
+  impersonate the client and batch again through curl_cffi, if installed
+
+and reports wall time, pages per second and pages that came back whole.
+
+Usage:
+    python benchmarks/bench_fallback.py
+    python benchmarks/bench_fallback.py -limit 300 -latency-ms 80 -workers 16
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+from typing import List, Dict, Callable
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import rosters  # noqa: E402
+import throttle  # noqa: E402
+import fallback  # noqa: E402
+from fake_sidearm import TEAMS_FILE, PLAYERS_FILE, FakeSite, FaultProfile, start_server, base_url, load_teams  # noqa: E402
+
+
+def run(name: str, urls: List[str], fetch_all: Callable[[List[str]], List[str]]) -> Dict:
+    # A fresh controller per scenario, one "host" per team, starting at full
+    # rate so only the fetching itself is timed
+    throttle.controller = throttle.HostController(
+        initial_rate=throttle.MAX_RATE,
+        key=lambda url: f"{throttle.host_of(url)}/{url.split('/')[3]}")
+    start = time.perf_counter()
+    pages = fetch_all(urls)
+    seconds = time.perf_counter() - start
+    ok = sum(1 for page in pages if '</html>' in page)
+    print(f"{name:<22}{seconds:9.2f}s{len(urls) / seconds:10.1f}/s{ok:>8}/{len(urls)}")
+    return {'seconds': seconds, 'ok': ok}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='403 fallback benchmark')
+    parser.add_argument('-limit', dest='limit', type=int, default=100, help='Teams (pages) to fetch (default 100)')
+    parser.add_argument('-latency-ms', dest='latency_ms', type=float, default=20.0,
+                        help='Median per-request latency of the fake site (default 20)')
+    parser.add_argument('-workers', dest='workers', type=int, default=fallback.DEFAULT_WORKERS,
+                        help=f'Batch fetch threads (default {fallback.DEFAULT_WORKERS})')
+    parser.add_argument('-season', dest='season', default='2023-24')
+    results = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+
+    teams = [t for t in load_teams(TEAMS_FILE) if t.get('url') and 'roster' not in t][:results.limit]
+    profile = FaultProfile(latency_ms=results.latency_ms, forbidden=1.0, missing=0, slow=0, js_only=0, cards=0)
+    site = FakeSite(teams, PLAYERS_FILE, profile)
+    server = start_server(site)
+    urls = [f"{team['url']}/roster/{results.season}" for team in site.config(base_url(server))]
+    print(f"{len(urls)} pages behind 403s on {base_url(server)}\n")
+    print(f"{'':<22}{'wall':>10}{'pages':>12}{'whole':>10}")
+
+    plain = fallback.BrowserClient(workers=results.workers, impersonate=None)
+    run('curl', urls, lambda batch: [rosters.fetch_url_with_curl(url) for url in batch])
+    run('client', urls, lambda batch: [plain.fetch(url).text for url in batch])
+    run('batch', urls, lambda batch: [r.text for r in plain.fetch_many(batch)])
+    plain.close()
+
+    if fallback.curl_cffi_requests():
+        impersonating = fallback.BrowserClient(workers=results.workers)
+        run(f'client ({impersonating.impersonate})', urls,
+            lambda batch: [impersonating.fetch(url).text for url in batch])
+        run(f'batch ({impersonating.impersonate})', urls, lambda batch: [r.text for r in impersonating.fetch_many(batch)])
+        impersonating.close()
+    else:
+        print("\ncurl_cffi is not installed; skipping the impersonating client")
+
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-field FieldExtractors calls against normalize_batch()
+
+Runs the same normalization over every string column of a season CSV twice:
+once calling the FieldExtractors methods value by value (what Player.to_dict
+used to do) and once through the column-at-a-time batch API.
+
+Usage:
+    python benchmarks/bench_field_extractors.py
+    python benchmarks/bench_field_extractors.py -csv data/rosters_2023.csv -repeat 5
+"""
+
+import os
+import sys
+import csv
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from rosters import FieldExtractors  # noqa: E402
+
+# Column -> normalize_batch field, plus the per-value method it replaces
+FIELDS = {
+    'name': ('text', FieldExtractors.clean_text),
+    'team': ('text', FieldExtractors.clean_text),
+    'hometown': ('text', FieldExtractors.clean_text),
+    'high_school': ('text', FieldExtractors.clean_text),
+    'previous_school': ('text', FieldExtractors.clean_text),
+    'position': ('position', FieldExtractors.extract_position),
+    'height': ('height', FieldExtractors.extract_height),
+    'year': ('year', FieldExtractors.normalize_academic_year),
+    'jersey': ('jersey', FieldExtractors.extract_jersey_number),
+}
+
+
+def load_columns(path: str) -> dict:
+    with open(path, newline='') as f:
+        rows = list(csv.DictReader(f))
+    return {c: [r.get(c) or '' for r in rows] for c in FIELDS}
+
+
+def per_field(columns: dict):
+    for column, (_, func) in FIELDS.items():
+        [func(v) for v in columns[column]]
+
+
+def batch(columns: dict):
+    for column, (field, _) in FIELDS.items():
+        FieldExtractors.normalize_batch(columns[column], field)
+
+
+def best_of(func, columns: dict, repeat: int, clear_cache: bool = False) -> float:
+    timings = []
+    for _ in range(repeat):
+        if clear_cache:
+            FieldExtractors.clear_batch_cache()
+        start = time.perf_counter()
+        func(columns)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='FieldExtractors batch benchmark')
+    parser.add_argument('-csv', dest='csv', default='data/rosters_2023.csv',
+                        help='Season CSV to normalize (default data/rosters_2023.csv)')
+    parser.add_argument('-repeat', dest='repeat', type=int, default=3,
+                        help='Runs per mode; the best time is reported')
+    results = parser.parse_args()
+
+    columns = load_columns(results.csv)
+    n_values = sum(len(v) for v in columns.values())
+    n_distinct = sum(len(set(v)) for v in columns.values())
+
+    per_field_time = best_of(per_field, columns, results.repeat)
+    cold_time = best_of(batch, columns, results.repeat, clear_cache=True)
+    warm_time = best_of(batch, columns, results.repeat)
+
+    print(f"{results.csv}: {n_values} values, {n_distinct} distinct")
+    print(f"  per-field calls : {per_field_time * 1000:8.1f} ms")
+    print(f"  batch (cold)    : {cold_time * 1000:8.1f} ms  ({per_field_time / cold_time:.1f}x)")
+    print(f"  batch (warm)    : {warm_time * 1000:8.1f} ms  ({per_field_time / warm_time:.1f}x)")
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Season CSV output: the old per-row writer vs src/output.py
+
+Takes the teams in a season CSV (-csv) and writes them -repeat times,
+team by team as get_all_rosters() does, with:
+
+  - the old writer: csv.writer on a text file opened in place, one
+    writerow per player
+  - output.SeasonWriter, uncompressed and gzip (and zstd, with zstandard)
+
+reporting seconds, file size and whether each file reads back (through
+output.open_text) to the same rows. Then:
+
+  - atomicity: a SeasonWriter that raises halfway must leave the previous
+    file byte-for-byte as it was, and the rows it had in old.csv.partial
+  - concurrent append: -workers processes append every team through
+    output.append_rows() to one file; it must hold one header and every
+    team's rows exactly once, each team contiguous
+
+Nothing is written under data/.
+
+Usage:
+    python benchmarks/bench_output.py
+    python benchmarks/bench_output.py -csv data/rosters_2023.csv -repeat 5 -workers 8
+"""
+
+import os
+import sys
+import csv
+import time
+import argparse
+import tempfile
+import multiprocessing
+from itertools import groupby
+from typing import Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import output  # noqa: E402
+
+
+def load_teams(path: str) -> tuple:
+    """(header, rows per team in file order)"""
+    with open(path, newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        teams = [list(rows) for _, rows in groupby(reader, key=lambda row: row[0])]
+    return header, teams
+
+
+def read_back(path: str) -> List[list]:
+    with output.open_text(path) as f:
+        return list(csv.reader(f))
+
+
+def write_old(path: str, header: List[str], teams: List[List[list]], repeat: int):
+    with open(path, 'w') as output_file:
+        csv_file = csv.writer(output_file)
+        csv_file.writerow(header)
+        for _ in range(repeat):
+            for rows in teams:
+                for row in rows:
+                    csv_file.writerow(row)
+
+
+def write_new(path: str, header: List[str], teams: List[List[list]], repeat: int, compression) -> str:
+    with output.SeasonWriter(path, header, compression=compression) as season_file:
+        for _ in range(repeat):
+            for rows in teams:
+                season_file.write_rows(rows)
+    return season_file.path
+
+
+def append_worker(path: str, header: List[str], teams: List[List[list]], compression):
+    for rows in teams:
+        output.append_rows(path, header, rows, compression=compression)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Season CSV writer benchmark')
+    parser.add_argument('-csv', dest='csv', default='data/rosters_2023.csv',
+                        help='Season CSV to take teams from (default data/rosters_2023.csv)')
+    parser.add_argument('-repeat', dest='repeat', type=int, default=3, help='Write the season this many times')
+    parser.add_argument('-workers', dest='workers', type=int, default=4, help='Appending processes (default 4)')
+    results = parser.parse_args()
+
+    header, teams = load_teams(results.csv)
+    expected = [header] + [row for _ in range(results.repeat) for rows in teams for row in rows]
+    work_dir = tempfile.mkdtemp(prefix='output_')
+    compressions = [None, 'gzip'] + (['zstd'] if output.zstandard_module() else [])
+
+    print(f"{len(teams)} teams, {len(expected) - 1} rows written per file\n")
+    print(f"{'writer':<14}{'seconds':>9}{'MB':>8}  reads back")
+    start = time.perf_counter()
+    old_path = os.path.join(work_dir, 'old.csv')
+    write_old(old_path, header, teams, results.repeat)
+    elapsed = time.perf_counter() - start
+    print(f"{'writerow':<14}{elapsed:>9.3f}{os.path.getsize(old_path) / 1024 / 1024:>8.1f}  "
+          f"{'same rows' if read_back(old_path) == expected else 'DIFFERENT'}")
+    failures = 0
+    for compression in compressions:
+        start = time.perf_counter()
+        path = write_new(os.path.join(work_dir, 'new.csv'), header, teams, results.repeat, compression)
+        elapsed = time.perf_counter() - start
+        same = read_back(path) == expected
+        identical = compression is not None or open(path, 'rb').read() == open(old_path, 'rb').read()
+        failures += not same or not identical
+        print(f"{compression or 'plain':<14}{elapsed:>9.3f}{os.path.getsize(path) / 1024 / 1024:>8.1f}  "
+              f"{'same rows' if same else 'DIFFERENT'}{'' if identical else ', NOT byte-identical to writerow'}")
+
+    # A run that fails halfway leaves the last good file alone
+    before = open(old_path, 'rb').read()
+    try:
+        with output.SeasonWriter(old_path, header) as season_file:
+            season_file.write_rows(teams[0])
+            raise RuntimeError('scrape died')
+    except RuntimeError:
+        pass
+    untouched = open(old_path, 'rb').read() == before and not [
+        name for name in os.listdir(work_dir) if '.tmp.' in name]
+    kept = read_back(old_path + '.partial') == [header] + teams[0]
+    failures += not untouched or not kept
+    print(f"\nFailed write: previous file {'untouched, temp file gone' if untouched else 'CHANGED or temp left'}, "
+          f"{'rows so far kept in old.csv.partial' if kept else 'partial rows NOT kept'}")
+
+    # Several processes adding teams to one season file
+    context = multiprocessing.get_context('spawn')
+    for compression in compressions:
+        path = output.with_suffix(os.path.join(work_dir, 'adds.csv'), compression)
+        shares = [teams[i::results.workers] for i in range(results.workers)]
+        start = time.perf_counter()
+        workers = [context.Process(target=append_worker, args=(path, header, share, compression)) for share in shares]
+        for process in workers:
+            process.start()
+        for process in workers:
+            process.join()
+        elapsed = time.perf_counter() - start
+        rows = read_back(path)
+        by_team: Dict[str, List[list]] = {}
+        contiguous = True
+        for ncaa_id, group in groupby(rows[1:], key=lambda row: row[0]):
+            contiguous &= ncaa_id not in by_team
+            by_team[ncaa_id] = list(group)
+        complete = rows[0] == header and all(by_team.get(team[0][0]) == team for team in teams) \
+            and len(rows) - 1 == sum(len(team) for team in teams)
+        failures += not (complete and contiguous)
+        print(f"Append, {results.workers} processes, {compression or 'plain'}: {len(rows) - 1} rows in "
+              f"{elapsed:.2f}s; {'one header, every team once and contiguous' if complete and contiguous else 'BROKEN'}")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Parse-result memo: a cold run, a warm rerun, and invalidation
+
+Serves the fake athletics site, scrapes -limit teams twice through
+rosters.scrape_team() with a fresh memo (src/parsecache.py) in a temp
+directory, and reports for each pass:
+
+  - wall time and time in the parse phase (which now includes building the
+    BeautifulSoup tree)
+  - memo hits and misses
+  - whether the warm pass produced exactly the rows of the cold one
+
+Then it adds a HEADERS entry and checks that the fingerprints (and so the
+memo keys) of the parsers that read HEADERS change, that parse_roster's
+doesn't, and that all come back when the entry is removed. Last, it adds a
+POSITION_MAP entry, which the parsers only reach through FieldExtractors
+methods, rebuilds the memoized parsers as a restarted run would, and
+checks that a third pass misses on every page the warm pass hit.
+
+Nothing is written under data/.
+
+Usage:
+    python benchmarks/bench_parsecache.py
+    python benchmarks/bench_parsecache.py -limit 200
+"""
+
+import os
+import sys
+import time
+import inspect
+import logging
+import argparse
+import tempfile
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import rosters  # noqa: E402
+import metrics  # noqa: E402
+import throttle  # noqa: E402
+import archive  # noqa: E402
+import snapshots  # noqa: E402
+import parsecache  # noqa: E402
+from load_sidearm import DEFAULT_EXCLUDE  # noqa: E402
+from fake_sidearm import (TEAMS_FILE, PLAYERS_FILE, FakeSite, start_server, base_url,  # noqa: E402
+                          add_profile_arguments, profile_from_arguments, load_teams)
+
+
+def scrape_pass(config, season: str) -> tuple:
+    """Scrape every team once; returns (rows by team, wall seconds, parse seconds, hits, misses)"""
+    run_metrics = metrics.RunMetrics()
+    hits, misses = parsecache.cache.hits, parsecache.cache.misses
+    rows, parse = {}, 0.0
+    start = time.perf_counter()
+    for team in config:
+        with run_metrics.team(team, season) as team_metrics:
+            try:
+                rows[team['ncaa_id']] = [rosters.player_row(p, season) for p in rosters.scrape_team(team, season)]
+            except Exception as e:
+                # Custom scrapers the fake site has no pages for
+                rows[team['ncaa_id']] = type(e).__name__
+        parse += team_metrics.phases.get('parse', 0.0)
+    wall = time.perf_counter() - start
+    return rows, wall, parse, parsecache.cache.hits - hits, parsecache.cache.misses - misses
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Parse-result memo benchmark')
+    parser.add_argument('-season', dest='season', default='2023-24')
+    parser.add_argument('-teams-file', dest='teams_file', default=TEAMS_FILE)
+    parser.add_argument('-players', dest='players', default=PLAYERS_FILE)
+    parser.add_argument('-limit', dest='limit', type=int, default=100, help='Teams (default 100)')
+    add_profile_arguments(parser)
+    results = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    for name in ('rosters', 'throttle', 'fallback'):
+        logging.getLogger(name).setLevel(logging.CRITICAL)
+
+    teams = [t for t in load_teams(results.teams_file)
+             if t.get('url') and 'roster' not in t and t['ncaa_id'] not in DEFAULT_EXCLUDE][:results.limit]
+    site = FakeSite(teams, results.players, profile_from_arguments(results))
+    server = start_server(site)
+    config = site.config(base_url(server))
+    throttle.controller.key = lambda url: f"{throttle.host_of(url)}/{urlparse(url).path.split('/')[1]}"
+    snapshots.store = archive.store = None
+    parsecache.cache = parsecache.ParseCache(os.path.join(tempfile.mkdtemp(prefix='parsecache_'), 'parse_cache.db'))
+
+    cold, cold_wall, cold_parse, cold_hits, cold_misses = scrape_pass(config, results.season)
+    warm, warm_wall, warm_parse, warm_hits, warm_misses = scrape_pass(config, results.season)
+
+    print(f"{len(config)} teams, {sum(len(r) for r in cold.values() if isinstance(r, list))} players\n")
+    print(f"{'':<6}{'wall':>9}{'parse':>9}{'hits':>7}{'misses':>8}")
+    print(f"{'cold':<6}{cold_wall:>8.2f}s{cold_parse:>8.2f}s{cold_hits:>7}{cold_misses:>8}")
+    print(f"{'warm':<6}{warm_wall:>8.2f}s{warm_parse:>8.2f}s{warm_hits:>7}{warm_misses:>8}")
+    differing = [ncaa_id for ncaa_id in cold if cold[ncaa_id] != warm[ncaa_id]]
+    print(f"\nWarm rows {'identical to cold' if not differing else f'DIFFER for {differing[:10]}'}")
+
+    # parse_roster reads no HEADERS, so its entries must survive the edit
+    parsers = {'parse_roster': False, 'parse_roster_wbkb': True, 'parse_roster_baskbl': True}
+    before = {name: parsecache.fingerprint(getattr(rosters, name)) for name in parsers}
+    rosters.HEADERS['Benchmark Column'] = 'town'
+    after = {name: parsecache.fingerprint(getattr(rosters, name)) for name in parsers}
+    del rosters.HEADERS['Benchmark Column']
+    restored = {name: parsecache.fingerprint(getattr(rosters, name)) for name in parsers}
+    wrong = [name for name, uses in parsers.items() if (before[name] != after[name]) != uses]
+    print(f"Adding a HEADERS entry changes the fingerprints of "
+          f"{[name for name in parsers if before[name] != after[name]]}; "
+          f"removing it {'restores them' if restored == before else 'DOES NOT restore them'}")
+
+    # A lookup table used only inside FieldExtractors methods; the memo
+    # fingerprints a parser once per process, so rebuild them as a new run would
+    rosters.POSITION_MAP['Benchmark Position'] = 'Benchmark'
+    for name in parsers:
+        raw = inspect.unwrap(getattr(rosters, name))
+        setattr(rosters, name, metrics.timed('parse')(parsecache.memoized(rosters.Player)(raw)))
+    _, _, _, edited_hits, edited_misses = scrape_pass(config, results.season)
+    del rosters.POSITION_MAP['Benchmark Position']
+    stale = edited_hits or edited_misses != warm_hits
+    print(f"After a POSITION_MAP edit: {edited_hits} hits, {edited_misses} misses "
+          f"({'every page re-parsed' if not stale else 'STALE entries served'})")
+
+    server.shutdown()
+    server.server_close()
+    sys.exit(1 if differing or wrong or restored != before or stale else 0)
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Roster parser benchmark and regression check
+
+Runs every page in benchmarks/fixtures/ (see manifest.json) through its
+parser and reports, per page:
+
+  - parse time (best of -repeat runs, on a fresh soup each run; building
+    the soup is timed separately)
+  - Player.to_dict() time for the parsed rows (the FieldExtractors work)
+  - peak traced memory and allocated blocks during one parse
+  - rows returned, and a digest of the parsed rows
+
+and compares the results with benchmarks/baseline_parsers.json. A page whose
+row count or output digest changed has a broken template; a page more than
+-tolerance slower or heavier than the baseline is a performance regression.
+Either exits with status 1.
+
+Timings depend on the machine, so save a baseline on the machine you compare
+on before making a change, on an otherwise idle machine; the digest and row
+checks are exact wherever they run.
+
+Usage:
+    python benchmarks/bench_parsers.py
+    python benchmarks/bench_parsers.py -save
+    python benchmarks/bench_parsers.py -repeat 50 -tolerance 0.15 -only wvball
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import logging
+import argparse
+import tracemalloc
+from typing import List, Dict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+import rosters  # noqa: E402
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIR = os.path.join(BENCH_DIR, 'fixtures')
+MANIFEST_FILE = os.path.join(FIXTURES_DIR, 'manifest.json')
+BASELINE_FILE = os.path.join(BENCH_DIR, 'baseline_parsers.json')
+
+# Differences smaller than these are timer and allocator noise, whatever the ratio
+MIN_TIME_DELTA_MS = 0.5
+MIN_PEAK_DELTA_KB = 4.0
+
+
+def load_html(fixture: str) -> str:
+    with open(os.path.join(FIXTURES_DIR, fixture)) as f:
+        return f.read()
+
+
+def digest(players: List) -> str:
+    rows = [p.to_dict() for p in players]
+    return hashlib.sha1(json.dumps(rows, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def bench_fixture(spec: Dict, repeat: int) -> Dict:
+    """Time, trace and fingerprint one fixture"""
+    parser = getattr(rosters, spec['parser'])
+    html = load_html(spec['fixture'])
+
+    soup_times, parse_times, dict_times = [], [], []
+    players = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        soup = BeautifulSoup(html, 'html.parser')
+        soup_times.append(time.perf_counter() - start)
+
+        # Parsers decompose tags, so every run needs its own soup
+        start = time.perf_counter()
+        players = parser(spec['team'], soup, spec['season'])
+        parse_times.append(time.perf_counter() - start)
+
+        rosters.FieldExtractors.clear_batch_cache()
+        start = time.perf_counter()
+        [p.to_dict() for p in players]
+        dict_times.append(time.perf_counter() - start)
+
+    soup = BeautifulSoup(html, 'html.parser')
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    parser(spec['team'], soup, spec['season'])
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    blocks = sum(max(stat.count_diff, 0) for stat in after.compare_to(before, 'filename'))
+
+    return {
+        'parser': spec['parser'],
+        'rows': len(players),
+        'expected_rows': spec['rows'],
+        'digest': digest(players),
+        'soup_ms': round(min(soup_times) * 1000, 3),
+        'parse_ms': round(min(parse_times) * 1000, 3),
+        'to_dict_ms': round(min(dict_times) * 1000, 3),
+        'peak_kb': round(peak / 1024, 1),
+        'blocks': blocks,
+    }
+
+
+def compare(name: str, result: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Problems with one fixture, relative to the manifest and the baseline"""
+    problems = []
+    if result['rows'] != result['expected_rows']:
+        problems.append(f"{name}: {result['rows']} rows, manifest expects {result['expected_rows']}")
+    if not baseline:
+        return problems
+    if result['digest'] != baseline['digest']:
+        problems.append(f"{name}: parsed output changed ({baseline['digest']} -> {result['digest']})")
+    for metric in ('parse_ms', 'to_dict_ms'):
+        old, new = baseline[metric], result[metric]
+        if new > old * (1 + tolerance) and new - old > MIN_TIME_DELTA_MS:
+            problems.append(f"{name}: {metric} {old:.3f} -> {new:.3f} (+{(new / old - 1) * 100:.0f}%)")
+    old, new = baseline['peak_kb'], result['peak_kb']
+    if new > old * (1 + tolerance) and new - old > MIN_PEAK_DELTA_KB:
+        problems.append(f"{name}: peak_kb {old} -> {new}")
+    return problems
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Roster parser benchmark')
+    parser.add_argument('-repeat', dest='repeat', type=int, default=20,
+                        help='Runs per fixture; the best time is reported (default 20)')
+    parser.add_argument('-baseline', dest='baseline', default=BASELINE_FILE,
+                        help='Baseline JSON to compare with or save to')
+    parser.add_argument('-save', action='store_true', dest='save',
+                        help='Save these results as the new baseline')
+    parser.add_argument('-tolerance', dest='tolerance', type=float, default=0.25,
+                        help='Allowed slowdown or memory growth as a fraction (default 0.25)')
+    parser.add_argument('-only', dest='only', help='Only fixtures whose file name contains this')
+    results = parser.parse_args()
+
+    # Parsers log every unmapped column and skipped row; keep the report readable
+    logging.basicConfig(level=logging.ERROR)
+
+    with open(MANIFEST_FILE) as f:
+        manifest = json.load(f)
+    if results.only:
+        manifest = [m for m in manifest if results.only in m['fixture']]
+
+    baseline = {}
+    if os.path.exists(results.baseline) and not results.save:
+        with open(results.baseline) as f:
+            baseline = json.load(f)
+
+    columns = ['parser', 'rows', 'soup_ms', 'parse_ms', 'to_dict_ms', 'peak_kb', 'blocks']
+    widths = {c: 20 if c == 'parser' else max(11, len(c) + 2) for c in columns}
+    print(f"{'fixture':<36}" + ''.join(f"{c:>{widths[c]}}" for c in columns))
+
+    report = {}
+    problems = []
+    for spec in manifest:
+        name = spec['fixture']
+        result = bench_fixture(spec, results.repeat)
+        report[name] = result
+        problems.extend(compare(name, result, baseline.get(name), results.tolerance))
+        print(f"{name:<36}" + ''.join(f"{result[c]:>{widths[c]}}" for c in columns))
+
+    if results.save:
+        with open(results.baseline, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"\nSaved baseline for {len(report)} fixtures to {results.baseline}")
+    elif not baseline:
+        print(f"\nNo baseline at {results.baseline}; run with -save to create one")
+
+    missing = [n for n in baseline if n not in report and not results.only]
+    problems.extend(f"{n}: in the baseline but not in the manifest" for n in missing)
+
+    if problems:
+        print(f"\n{len(problems)} regressions:")
+        for problem in problems:
+            print(f"  {problem}")
+        sys.exit(1)
+    if baseline:
+        print(f"\nNo regressions against {results.baseline} (tolerance {results.tolerance:.0%})")
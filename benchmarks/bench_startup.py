@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Scraper startup benchmark
+
+Runs each scenario below in a fresh interpreter, -repeat times, and reports
+the best and median of each timing, plus which heavy optional modules the
+scenario ended up importing:
+
+  import           import rosters
+  first-parse      import rosters, load the team registry and parse one
+                   roster fixture (the work before a single-team run's first
+                   request is answered)
+  registry-cached  load the team registry from its cache file
+  registry-build   build the registry from teams.json (runs tldextract over
+                   every URL), as after teams.json changes
+
+Run it from the repository root, like the scraper. -importtime also prints
+the slowest imports behind "import rosters" (python -X importtime).
+
+Usage:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py -repeat 20 -importtime 15
+    python benchmarks/bench_startup.py -report startup.json
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+from typing import List, Dict
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(BENCH_DIR, '..', 'src')
+FIXTURES_DIR = os.path.join(BENCH_DIR, 'fixtures')
+
+HEAVY_MODULES = ['requests_html', 'pyppeteer', 'tldextract']
+
+# A fixture whose team is in data/teams.json, so first-parse hits the registry
+FIRST_PARSE_FIXTURE = 'sidearm_list.html'
+
+PRELUDE = f"""
+import sys, json, time
+start = time.perf_counter()
+sys.path.insert(0, {SRC_DIR!r})
+"""
+
+EPILOGUE = f"""
+timings['total_s'] = time.perf_counter() - start
+print(json.dumps({{'timings': timings, 'loaded': [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))
+"""
+
+SCENARIOS = {
+    'import': """
+import rosters
+timings = {'import_s': time.perf_counter() - start}
+""",
+    'first-parse': f"""
+import rosters
+timings = {{'import_s': time.perf_counter() - start}}
+with open({os.path.join(FIXTURES_DIR, 'manifest.json')!r}) as f:
+    spec = next(m for m in json.load(f) if m['fixture'] == {FIRST_PARSE_FIXTURE!r})
+with open({os.path.join(FIXTURES_DIR, FIRST_PARSE_FIXTURE)!r}) as f:
+    html = f.read()
+mark = time.perf_counter()
+rosters.team_registry()
+timings['registry_s'] = time.perf_counter() - mark
+mark = time.perf_counter()
+players = rosters.parse_roster(spec['team'], rosters.BeautifulSoup(html, 'html.parser'), spec['season'])
+timings['parse_s'] = time.perf_counter() - mark
+assert len(players) == spec['rows'], len(players)
+""",
+    'registry-cached': """
+import rosters
+rosters.TeamRegistry.load()
+mark = time.perf_counter()
+rosters.TeamRegistry.load()
+timings = {'registry_s': time.perf_counter() - mark}
+""",
+    'registry-build': """
+import rosters
+mark = time.perf_counter()
+rosters.TeamRegistry.load(cache_file=None)
+timings = {'registry_s': time.perf_counter() - mark}
+""",
+}
+
+
+def run_scenario(code: str) -> Dict:
+    result = subprocess.run([sys.executable, '-c', PRELUDE + code + EPILOGUE],
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def bench_scenario(name: str, repeat: int) -> Dict:
+    runs = [run_scenario(SCENARIOS[name]) for _ in range(repeat)]
+    report = {'loaded': sorted({m for run in runs for m in run['loaded']})}
+    for key in runs[0]['timings']:
+        values = [run['timings'][key] * 1000 for run in runs]
+        report[key.replace('_s', '_ms')] = {'best': round(min(values), 1),
+                                            'median': round(statistics.median(values), 1)}
+    return report
+
+
+def slowest_imports(module: str, top: int) -> List[tuple]:
+    """(cumulative ms, module) for the slowest imports under `module`"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+                            capture_output=True, text=True, cwd=SRC_DIR)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        rows.append((int(cumulative) / 1000, name.rstrip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Scraper startup benchmark')
+    parser.add_argument('-repeat', dest='repeat', type=int, default=10,
+                        help='Fresh interpreters per scenario (default 10)')
+    parser.add_argument('-only', nargs='+', dest='only', choices=list(SCENARIOS),
+                        help='Only these scenarios')
+    parser.add_argument('-importtime', dest='importtime', type=int, default=0,
+                        help='Also list the N slowest imports behind "import rosters"')
+    parser.add_argument('-report', dest='report', help='Also write the results as JSON')
+    results = parser.parse_args()
+
+    report = {}
+    print(f"{'scenario':<18}{'timing':<14}{'best ms':>10}{'median ms':>11}  heavy modules loaded")
+    for name in results.only or SCENARIOS:
+        report[name] = bench_scenario(name, results.repeat)
+        loaded = ', '.join(report[name]['loaded']) or '-'
+        for i, (key, value) in enumerate((k, v) for k, v in report[name].items() if k != 'loaded'):
+            print(f"{name if i == 0 else '':<18}{key:<14}{value['best']:>10.1f}{value['median']:>11.1f}"
+                  f"  {loaded if i == 0 else ''}")
+
+    if results.importtime:
+        print("\nSlowest imports behind 'import rosters' (cumulative):")
+        for ms, module in slowest_imports('rosters', results.importtime):
+            print(f"  {ms:8.1f} ms  {module}")
+
+    if results.report:
+        with open(results.report, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {results.report}")
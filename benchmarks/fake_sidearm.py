@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the athletics sites the roster scrapers fetch
+
+Serves a generated roster page for every team in a teams.json-style list,
+at the URL shapes URLBuilder and the fetch_* helpers build, under
+http://host:port/<ncaa_id>/<original path>. Pages use the same templates as
+the parser fixtures (see make_fixtures.py): Sidearm lists for default URLs,
+tables for wvball and w-baskbl URLs, the team-specific table variants for
+the teams parse_roster_wbkb and parse_roster_baskbl special-case, the
+Clemson and Miami layouts fetch_and_parse_clemson and fetch_and_parse_miami
+read, and s-person-card pages for a share of the rest. Players come from a
+season CSV.
+
+Miami's page, like every shot-scraper team's, is only read through a
+headless browser, so without shot-scraper on the PATH it comes back empty.
+Iowa State renders through pyppeteer and is left out by load_sidearm.py.
+
+Each team is assigned at most one fault, chosen from the seed so a run is
+reproducible:
+
+  forbidden  403 unless the request accepts text/html (the browser-like fallback does)
+  missing    404 for every roster URL
+  slow       the body trickles out over -slow-seconds
+  js_only    an empty app shell that only renders in a browser
+  throttled  429 with Retry-After: 1 for the first request to each URL
+  down       503 for every request
+
+and every request waits a lognormal latency (median -latency-ms, spread
+-tail) before it is answered. Roster pages carry an ETag and answer a
+matching If-None-Match with 304; change() swaps a player on a team's page,
+as a roster update would, and gives it a new ETag.
+
+Usage:
+    python benchmarks/fake_sidearm.py
+    python benchmarks/fake_sidearm.py -port 8098 -o benchmarks/fake_teams.json -forbidden 0.2
+"""
+
+import csv
+import json
+import hashlib
+import math
+import time
+import random
+import argparse
+import logging
+import threading
+from collections import Counter
+from html import escape
+from dataclasses import dataclass
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse
+from typing import List, Dict, Optional
+
+from make_fixtures import page, slug, sidearm_list, table, person_cards, fixtures, MAJORS
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================================
+# CONSTANTS
+# ============================================================================
+
+TEAMS_FILE = 'data/teams.json'
+PLAYERS_FILE = 'data/rosters_2023.csv'
+DEFAULT_PORT = 8098
+
+FAULTS = ['forbidden', 'missing', 'slow', 'js_only', 'throttled', 'down']
+
+# Fixture teams that exercise the generic templates rather than a special case
+GENERIC_FIXTURE_TEAMS = {697, 9}
+
+MAX_PLAYERS_PER_PAGE = 30
+SLOW_CHUNKS = 20
+
+# Clemson's roster table, before the MAJOR column and a coaches table that
+# fetch_and_parse_clemson trims off
+CLEMSON_HEADERS = ['No.', 'Name', 'Pos.', 'Ht.', 'Cl.', 'Hometown', 'High School', 'Previous School']
+CLEMSON_STAFF_HEADERS = ['Name', 'Title']
+
+
+# ============================================================================
+# SITE MODEL
+# ============================================================================
+
+@dataclass
+class FaultProfile:
+    """Latency and fault mix; the shares are fractions of teams"""
+    latency_ms: float = 40.0
+    tail: float = 0.6
+    forbidden: float = 0.05
+    missing: float = 0.03
+    slow: float = 0.05
+    js_only: float = 0.05
+    throttled: float = 0.0
+    down: float = 0.0
+    cards: float = 0.05
+    slow_seconds: float = 2.0
+    seed: int = 0
+
+    def team_random(self, ncaa_id: int, purpose: str) -> random.Random:
+        return random.Random(f"{self.seed}:{purpose}:{ncaa_id}")
+
+    def fault_for(self, ncaa_id: int) -> Optional[str]:
+        draw = self.team_random(ncaa_id, 'fault').random()
+        for fault in FAULTS:
+            share = getattr(self, fault)
+            if draw < share:
+                return fault
+            draw -= share
+        return None
+
+    def latency(self, rng: random.Random) -> float:
+        """Seconds to wait before answering one request"""
+        if self.latency_ms <= 0:
+            return 0.0
+        return self.latency_ms / 1000 * math.exp(rng.gauss(0, self.tail))
+
+
+def load_players(path: str) -> Dict[int, List[Dict[str, str]]]:
+    """ncaa_id -> roster rows"""
+    by_team: Dict[int, List[Dict[str, str]]] = {}
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            if row.get('ncaa_id') and row.get('name'):
+                by_team.setdefault(int(row['ncaa_id']), []).append(row)
+    return by_team
+
+
+def clemson_table(players: List[Dict[str, str]], team: str) -> str:
+    """Roster table and coaches table (fetch_and_parse_clemson)"""
+    head = ''.join(f'<th>{escape(h)}</th>' for h in CLEMSON_HEADERS + ['MAJOR'])
+    rows = []
+    for i, p in enumerate(players):
+        name = f'<a href="/sports/volleyball/roster/player/{slug(p["name"])}">{escape(p["name"])}</a>'
+        cells = [escape(p['jersey']), name, escape(p['position']), escape(p['height']), escape(p['year']),
+                 escape(p['hometown']), escape(p['high_school']), escape(p['previous_school']),
+                 MAJORS[i % len(MAJORS)]]
+        rows.append('<tr>' + ''.join(f'<td>{c}</td>' for c in cells) + '</tr>')
+    staff = ''.join(f'<th>{h}</th>' for h in CLEMSON_STAFF_HEADERS)
+    return page(f'<table class="roster">\n<tr>{head}</tr>\n' + '\n'.join(rows) + '\n</table>\n'
+                f'<table class="staff">\n<tr>{staff}</tr>\n<tr><td>Coach</td><td>Head Coach</td></tr>\n</table>', team)
+
+
+def players_table(players: List[Dict[str, str]], team: str) -> str:
+    """#players-table, as fetch_and_parse_miami's browser script reads it"""
+    rows = []
+    for p in players:
+        name = f'<a href="/sports/womens-volleyball/roster/{slug(p["name"])}">{escape(p["name"])}</a>'
+        cells = [escape(p['jersey']), name, escape(p['position']), escape(p['height']), escape(p['year']),
+                 escape(p['hometown']), escape(p['high_school']), escape(p['previous_school'])]
+        rows.append('<tr>' + ''.join(f'<td>{c}</td>' for c in cells) + '</tr>')
+    return page('<table id="players-table">\n<tbody>\n' + '\n'.join(rows) + '\n</tbody>\n</table>', team)
+
+
+# Template name -> page builder, for re-rendering a changed roster
+TEMPLATE_RENDERERS = {'sidearm_list': sidearm_list, 'person_card': person_cards,
+                      'wvball_table': table, 'wbaskbl_table': table,
+                      'clemson_table': clemson_table, 'players_table': players_table}
+
+# Teams whose own fetch_and_parse_* function reads a layout of its own
+SCRAPER_TEAM_TEMPLATES = {147: 'clemson_table', 415: 'players_table'}
+
+
+def js_shell(team: str) -> str:
+    return page('<div id="roster-app" data-sport="wvball"></div>\n'
+                '<script src="/static/roster-app.js"></script>', team)
+
+
+class FakeSite:
+    """Pages, faults and a request log for a list of teams"""
+
+    def __init__(self, teams: List[Dict], players_file: str = PLAYERS_FILE,
+                 profile: Optional[FaultProfile] = None):
+        self.profile = profile or FaultProfile()
+        self.teams = {t['ncaa_id']: t for t in teams if t.get('url')}
+        players = load_players(players_file)
+        pools = [rows for rows in players.values() if len(rows) >= 10]
+        self.special_teams = {spec['team']['ncaa_id'] for spec in fixtures(pools[0])} - GENERIC_FIXTURE_TEAMS
+
+        self.pools = pools
+        self.rosters: Dict[int, List[Dict[str, str]]] = {}
+        self.pages: Dict[int, str] = {}
+        self.etags: Dict[int, str] = {}
+        self.templates: Dict[int, str] = {}
+        self.faults: Dict[int, Optional[str]] = {}
+        self.changes: Counter = Counter()
+        for ncaa_id, team in self.teams.items():
+            rng = self.profile.team_random(ncaa_id, 'page')
+            roster = players.get(ncaa_id) or rng.choice(pools)
+            self.rosters[ncaa_id] = roster[:MAX_PLAYERS_PER_PAGE]
+            template, html = self.render(team, self.rosters[ncaa_id], rng)
+            self.templates[ncaa_id] = template
+            self.set_page(ncaa_id, html)
+            self.faults[ncaa_id] = self.profile.fault_for(ncaa_id)
+
+        self.log: List[Dict] = []
+        self._lock = threading.Lock()
+        self._request_counts: Counter = Counter()
+
+    def render(self, team: Dict, players: List[Dict[str, str]], rng: random.Random) -> tuple:
+        """(template name, html) for one team"""
+        url = team['url']
+        if team['ncaa_id'] in SCRAPER_TEAM_TEMPLATES:
+            template = SCRAPER_TEAM_TEMPLATES[team['ncaa_id']]
+            return template, TEMPLATE_RENDERERS[template](players, team['team'])
+        if team['ncaa_id'] in self.special_teams:
+            for spec in fixtures(players):
+                if spec['team']['ncaa_id'] == team['ncaa_id']:
+                    return spec['fixture'].rsplit('.', 1)[0], spec['html']
+        if 'wvball' in url:
+            return 'wvball_table', table(players, team['team'])
+        if 'w-baskbl' in url:
+            return 'wbaskbl_table', table(players, team['team'])
+        if rng.random() < self.profile.cards:
+            return 'person_card', person_cards(players, team['team'])
+        return 'sidearm_list', sidearm_list(players, team['team'])
+
+    def set_page(self, ncaa_id: int, html: str):
+        self.pages[ncaa_id] = html
+        self.etags[ncaa_id] = f'"{hashlib.sha1(html.encode()).hexdigest()[:16]}"'
+
+    def change(self, ncaa_id: int):
+        """Drop the first player on a team's page and add one from another roster"""
+        team = self.teams[ncaa_id]
+        with self._lock:
+            self.changes[ncaa_id] += 1
+            rng = self.profile.team_random(ncaa_id, f"change:{self.changes[ncaa_id]}")
+            players = self.rosters[ncaa_id][1:] + [rng.choice(rng.choice(self.pools))]
+            self.rosters[ncaa_id] = players
+            renderer = TEMPLATE_RENDERERS.get(self.templates[ncaa_id])
+            self.set_page(ncaa_id, renderer(players, team['team']) if renderer else self.render(team, players, rng)[1])
+
+    def config(self, base_url: str) -> List[Dict]:
+        """The teams list with every URL pointed at this site"""
+        entries = []
+        for ncaa_id, team in self.teams.items():
+            entry = dict(team)
+            entry['url'] = f"{base_url.rstrip('/')}/{ncaa_id}{urlparse(team['url']).path}"
+            entries.append(entry)
+        return entries
+
+    def request_random(self, path: str) -> tuple:
+        """
+        (random source, times the path has been requested)
+
+        Seeded by path and repeat count, so reruns see the same latencies
+        whatever order concurrent requests arrive in.
+        """
+        with self._lock:
+            self._request_counts[path] += 1
+            count = self._request_counts[path]
+        return random.Random(f"{self.profile.seed}:{path}:{count}"), count
+
+    def record(self, **entry):
+        with self._lock:
+            self.log.append(entry)
+
+
+# ============================================================================
+# HTTP SERVER
+# ============================================================================
+
+def make_handler(site: FakeSite):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Headers and body go out in separate writes; without this a
+        # keep-alive client waits out a delayed ACK on every response
+        disable_nagle_algorithm = True
+
+        def _send(self, status: int, body: str, slow: bool = False, etag: str = '') -> int:
+            payload = body.encode() if status != 304 else b''
+            self.send_response(status)
+            if status == 429:
+                self.send_header('Retry-After', '1')
+            if etag:
+                self.send_header('ETag', etag)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            if not slow:
+                self.wfile.write(payload)
+                return len(payload)
+            chunk = math.ceil(len(payload) / SLOW_CHUNKS)
+            for i in range(0, len(payload), chunk):
+                self.wfile.write(payload[i:i + chunk])
+                self.wfile.flush()
+                time.sleep(site.profile.slow_seconds / SLOW_CHUNKS)
+            return len(payload)
+
+        def do_GET(self):
+            start = time.perf_counter()
+            url = urlparse(self.path)
+            prefix = url.path.strip('/').split('/', 1)[0]
+            ncaa_id = int(prefix) if prefix.isdigit() else None
+            team = site.teams.get(ncaa_id)
+            fault = site.faults.get(ncaa_id)
+
+            rng, count = site.request_random(self.path)
+            time.sleep(site.profile.latency(rng))
+            if fault == 'down':
+                status, body = 503, page('<h1>Service Unavailable</h1>', 'Unavailable')
+            elif fault == 'throttled' and count == 1:
+                status, body = 429, page('<h1>Too Many Requests</h1>', 'Too Many Requests')
+            elif team is None or 'roster' not in self.path or fault == 'missing':
+                status, body = 404, page('<h1>Page Not Found</h1>', 'Not Found')
+            elif fault == 'forbidden' and 'text/html' not in self.headers.get('Accept', ''):
+                status, body = 403, page('<h1>Access Denied</h1>', 'Forbidden')
+            elif fault == 'js_only':
+                status, body = 200, js_shell(team['team'])
+            elif self.headers.get('If-None-Match') == site.etags[ncaa_id]:
+                status, body = 304, ''
+            else:
+                status, body = 200, site.pages[ncaa_id]
+
+            etag = site.etags[ncaa_id] if status in (200, 304) and fault != 'js_only' else ''
+            sent = self._send(status, body, slow=(fault == 'slow' and status == 200), etag=etag)
+            site.record(ncaa_id=ncaa_id, path=self.path, status=status, fault=fault, bytes=sent,
+                        agent=self.headers.get('User-Agent', ''),
+                        ms=round((time.perf_counter() - start) * 1000, 2))
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+    return Handler
+
+
+def start_server(site: FakeSite, host: str = '127.0.0.1', port: int = 0) -> ThreadingHTTPServer:
+    """Serve `site` from a daemon thread; port 0 picks a free port"""
+    server = ThreadingHTTPServer((host, port), make_handler(site))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def base_url(server: ThreadingHTTPServer) -> str:
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}"
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser):
+    defaults = FaultProfile()
+    parser.add_argument('-latency-ms', dest='latency_ms', type=float, default=defaults.latency_ms,
+                        help=f'Median per-request latency (default {defaults.latency_ms:g})')
+    parser.add_argument('-tail', dest='tail', type=float, default=defaults.tail,
+                        help=f'Lognormal spread of the latency; larger means a longer tail (default {defaults.tail:g})')
+    for fault in FAULTS + ['cards']:
+        parser.add_argument(f'-{fault.replace("_", "-")}', dest=fault, type=float, default=getattr(defaults, fault),
+                            help=f'Share of teams with {fault} pages (default {getattr(defaults, fault):g})')
+    parser.add_argument('-slow-seconds', dest='slow_seconds', type=float, default=defaults.slow_seconds,
+                        help=f'Time a slow body takes to arrive (default {defaults.slow_seconds:g})')
+    parser.add_argument('-seed', dest='seed', type=int, default=defaults.seed)
+
+
+def profile_from_arguments(results: argparse.Namespace) -> FaultProfile:
+    return FaultProfile(**{name: getattr(results, name) for name in FaultProfile.__dataclass_fields__})
+
+
+def load_teams(path: str = TEAMS_FILE) -> List[Dict]:
+    with open(path) as f:
+        return json.load(f)
+
+
+# ============================================================================
+# MAIN ENTRY POINT
+# ============================================================================
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description='Fake athletics site for offline scraper runs')
+    parser.add_argument('-host', dest='host', default='127.0.0.1')
+    parser.add_argument('-port', dest='port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('-teams-file', dest='teams_file', default=TEAMS_FILE,
+                        help=f'teams.json-style list to serve (default {TEAMS_FILE})')
+    parser.add_argument('-players', dest='players', default=PLAYERS_FILE,
+                        help=f'Season CSV the rosters are drawn from (default {PLAYERS_FILE})')
+    parser.add_argument('-o', dest='output',
+                        help='Write the teams list, pointed at this server, to this file')
+    add_profile_arguments(parser)
+    results = parser.parse_args()
+
+    site = FakeSite(load_teams(results.teams_file), results.players, profile_from_arguments(results))
+    server = ThreadingHTTPServer((results.host, results.port), make_handler(site))
+    if results.output:
+        with open(results.output, 'w') as f:
+            json.dump(site.config(base_url(server)), f, indent=2)
+        logger.info(f"Wrote {len(site.teams)} teams to {results.output}")
+
+    faults = Counter(f for f in site.faults.values() if f)
+    logger.info(f"Serving {len(site.teams)} teams on {base_url(server)} "
+                f"({', '.join(f'{n} {f}' for f, n in sorted(faults.items())) or 'no faults'})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
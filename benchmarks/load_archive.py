@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Raw-page archive test: archive a scrape, change some pages, re-parse offline
+
+Serves the fake athletics site and scrapes -limit teams through
+rosters.scrape_team() twice, with src/archive.py writing to a temp
+directory (with small segments, -segment-kb, so rollover happens). Between
+the scrapes -changed teams get new rosters. Then, with the server stopped:
+
+  - rosters.reparse_archive() re-parses the season from the archive, and
+    its rows are compared with the second scrape's
+  - every newest record is read back through the mmap'd segments, timed
+  - index.db is rebuilt from the segments and compared with the original
+
+Reports records appended and deduplicated, archive size and compression,
+read throughput, and whether the re-parse and rebuilt index match.
+
+Nothing is written under data/.
+
+Usage:
+    python benchmarks/load_archive.py
+    python benchmarks/load_archive.py -limit 200 -changed 20 -segment-kb 256
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import random
+import logging
+import argparse
+import tempfile
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import rosters  # noqa: E402
+import archive  # noqa: E402
+import throttle  # noqa: E402
+import snapshots  # noqa: E402
+import parsecache  # noqa: E402
+from load_sidearm import DEFAULT_EXCLUDE  # noqa: E402
+from fake_sidearm import (TEAMS_FILE, PLAYERS_FILE, FakeSite, start_server, base_url,  # noqa: E402
+                          add_profile_arguments, profile_from_arguments, load_teams)
+
+
+def scrape(config, season: str) -> dict:
+    """Rows per team, as a season run would write them"""
+    rows = {}
+    for team in config:
+        if not rosters.scrapeable(team, season):
+            continue
+        try:
+            rows[team['ncaa_id']] = [rosters.player_row(p, season) for p in rosters.scrape_team(team, season)]
+        except Exception:
+            # Custom scrapers the fake site has no pages for
+            pass
+    return rows
+
+
+def index_rows(page_archive: archive.PageArchive) -> list:
+    return [tuple(row) for row in page_archive._conn().execute(
+        "SELECT ncaa_id, season, url, kind, status, sha256, segment, offset, length, bytes FROM pages "
+        "ORDER BY segment, offset")]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Archive, change, and re-parse offline')
+    parser.add_argument('-season', dest='season', default='2023-24')
+    parser.add_argument('-teams-file', dest='teams_file', default=TEAMS_FILE)
+    parser.add_argument('-players', dest='players', default=PLAYERS_FILE)
+    parser.add_argument('-limit', dest='limit', type=int, default=80, help='Teams (default 80)')
+    parser.add_argument('-changed', dest='changed', type=int, default=10,
+                        help='Teams whose roster changes between the scrapes (default 10)')
+    parser.add_argument('-segment-kb', dest='segment_kb', type=int, default=512,
+                        help='Segment size in KB (default 512)')
+    add_profile_arguments(parser)
+    results = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    for name in ('rosters', 'throttle', 'fallback'):
+        logging.getLogger(name).setLevel(logging.CRITICAL)
+
+    teams = [t for t in load_teams(results.teams_file)
+             if t.get('url') and 'roster' not in t and t['ncaa_id'] not in DEFAULT_EXCLUDE][:results.limit]
+    site = FakeSite(teams, results.players, profile_from_arguments(results))
+    server = start_server(site)
+    config = site.config(base_url(server))
+    throttle.controller.key = lambda url: f"{throttle.host_of(url)}/{urlparse(url).path.split('/')[1]}"
+    rosters.team_registry()
+
+    # reparse_archive() reads data/teams.json and writes under data/, relative to here
+    work_dir = tempfile.mkdtemp(prefix='archive_')
+    os.chdir(work_dir)
+    os.makedirs('data')
+    with open(rosters.TEAMS_FILE, 'w') as f:
+        json.dump(config, f)
+    snapshots.store = parsecache.cache = None
+    page_archive = archive.store = archive.PageArchive(os.path.join(work_dir, 'archive'),
+                                                       segment_bytes=results.segment_kb * 1024)
+
+    scrape(config, results.season)
+    first = page_archive.appended
+    changed = random.Random(results.seed).sample([t['ncaa_id'] for t in config],
+                                                 min(results.changed, len(config)))
+    for ncaa_id in changed:
+        site.change(ncaa_id)
+    live = scrape(config, results.season)
+    server.shutdown()
+    server.server_close()
+
+    parsed, unparsed = rosters.reparse_archive(results.season)
+    with open(f"data/rosters_{results.season}_archived.csv") as f:
+        archived = {}
+        for row in list(csv.reader(f))[1:]:
+            archived.setdefault(int(row[0]), []).append(row)
+    expected = {ncaa_id: [[str(v) if v is not None else '' for v in row] for row in rows]
+                for ncaa_id, rows in live.items() if ncaa_id in parsed}
+    differing = [ncaa_id for ncaa_id in expected if expected[ncaa_id] != archived.get(ncaa_id, [])]
+    not_reparsed = sorted(ncaa_id for ncaa_id, rows in live.items() if rows and ncaa_id not in parsed)
+
+    entries = page_archive.lookup()
+    start = time.perf_counter()
+    body_bytes = sum(len(page_archive.read(entry).body) for entry in entries)
+    read_seconds = time.perf_counter() - start
+
+    before = index_rows(page_archive)
+    rebuilt = page_archive.rebuild()
+    after = index_rows(page_archive)
+
+    stored = sum(os.path.getsize(os.path.join(page_archive.root, s)) for s in page_archive.segments())
+    total = sum(row[9] for row in before)
+    print(f"{len(config)} teams, {len(changed)} changed between scrapes\n")
+    print(f"Records: {first} after the first scrape, {page_archive.appended - first} appended by the second, "
+          f"{page_archive.unchanged} identical pages not appended again")
+    print(f"Archive: {len(page_archive.segments())} segments, {total / 1024 / 1024:.1f} MB of pages in "
+          f"{stored / 1024 / 1024:.1f} MB ({total / max(stored, 1):.1f}x)")
+    print(f"Read {len(entries)} newest records ({body_bytes / 1024 / 1024:.1f} MB) in {read_seconds:.2f}s "
+          f"({body_bytes / 1024 / 1024 / max(read_seconds, 1e-9):.0f} MB/s)")
+    print(f"Re-parse from archive: {len(parsed)} teams, "
+          f"{'rows identical to the live scrape' if not differing else f'DIFFERENT rows for {differing[:10]}'}"
+          f"{f'; not re-parseable (custom scrapers): {not_reparsed}' if not_reparsed else ''}")
+    print(f"Rebuilt index: {rebuilt} records, {'identical' if before == after else 'DIFFERENT'}")
+    sys.exit(1 if differing or before != after else 0)
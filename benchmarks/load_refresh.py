@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Refresh daemon simulation: adaptive revisits vs a cron'd full rerun
+
+Serves the fake athletics site, marks a share of its teams (-volatile) as
+teams whose roster changes every -change-every seconds (with jitter) while
+the rest never change, and runs src/refresh.py's daemon against it for
+-duration seconds with its intervals scaled down to seconds. Reports:
+
+  - requests the site answered, and the share that were 304s
+  - changes made and detected, and the delay from a change to its update
+    (p50/p90/max); changes made again before the first was seen count as
+    one
+  - the revisit intervals the volatile and static teams settled at
+  - the same numbers for a cron job that reruns every team every
+    -cron-every seconds: one request per team per run and a delay of half
+    the period on average
+  - and for a cron job given the daemon's request budget, which is the
+    fair comparison for the delays
+
+The daemon's savings grow with -duration: static teams start at
+-initial-interval and only stretch towards -max-interval one unchanged
+visit at a time, so a run much shorter than that ramp mostly measures it.
+
+Nothing is written under data/.
+
+Usage:
+    python benchmarks/load_refresh.py
+    python benchmarks/load_refresh.py -limit 150 -volatile 0.1 -change-every 5 -duration 90 -workers 8
+"""
+
+import os
+import sys
+import time
+import random
+import logging
+import argparse
+import tempfile
+import statistics
+import threading
+from typing import List, Dict
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import throttle  # noqa: E402
+import archive  # noqa: E402
+import refresh  # noqa: E402
+import snapshots  # noqa: E402
+import parsecache  # noqa: E402
+from load_sidearm import percentile, DEFAULT_EXCLUDE  # noqa: E402
+from fake_sidearm import (TEAMS_FILE, PLAYERS_FILE, FakeSite, start_server, base_url,  # noqa: E402
+                          add_profile_arguments, profile_from_arguments, load_teams)
+
+
+def change_loop(site: FakeSite, volatile: List[int], every: float, stop: threading.Event,
+                changes: Dict[int, List[float]], seed: int):
+    """Change each volatile team about every `every` seconds until stopped"""
+    rng = random.Random(seed)
+    due = {ncaa_id: time.time() + rng.uniform(0, every) for ncaa_id in volatile}
+    while not stop.wait(0.05):
+        now = time.time()
+        for ncaa_id, at in due.items():
+            if at <= now:
+                site.change(ncaa_id)
+                changes[ncaa_id].append(now)
+                due[ncaa_id] = now + every * rng.uniform(0.5, 1.5)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Adaptive refresh vs cron simulation')
+    parser.add_argument('-season', dest='season', default='2025-26')
+    parser.add_argument('-teams-file', dest='teams_file', default=TEAMS_FILE)
+    parser.add_argument('-players', dest='players', default=PLAYERS_FILE)
+    parser.add_argument('-limit', dest='limit', type=int, default=100, help='Teams (default 100)')
+    parser.add_argument('-volatile', dest='volatile', type=float, default=0.1,
+                        help='Share of teams whose roster keeps changing (default 0.1)')
+    parser.add_argument('-change-every', dest='change_every', type=float, default=6.0,
+                        help='Mean seconds between a volatile team\'s changes (default 6)')
+    parser.add_argument('-duration', dest='duration', type=float, default=60.0, help='Seconds to run (default 60)')
+    parser.add_argument('-workers', dest='workers', type=int, default=4)
+    parser.add_argument('-min-interval', dest='min_interval', type=float, default=1.0)
+    parser.add_argument('-initial-interval', dest='initial_interval', type=float, default=5.0)
+    parser.add_argument('-max-interval', dest='max_interval', type=float, default=60.0)
+    parser.add_argument('-cron-every', dest='cron_every', type=float,
+                        help='Period of the cron rerun compared against (default -initial-interval)')
+    parser.add_argument('-verbose', action='store_true', dest='verbose')
+    add_profile_arguments(parser)
+    results = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if results.verbose else logging.WARNING)
+    if not results.verbose:
+        for name in ('rosters', 'throttle', 'refresh', 'fallback'):
+            logging.getLogger(name).setLevel(logging.CRITICAL)
+
+    teams = [t for t in load_teams(results.teams_file)
+             if t.get('url') and 'roster' not in t and t['ncaa_id'] not in DEFAULT_EXCLUDE][:results.limit]
+    site = FakeSite(teams, results.players, profile_from_arguments(results))
+    server = start_server(site)
+    config = site.config(base_url(server))
+    snapshots.store = parsecache.cache = archive.store = None
+    throttle.controller.key = lambda url: f"{throttle.host_of(url)}/{urlparse(url).path.split('/')[1]}"
+    work_dir = tempfile.mkdtemp(prefix='refresh_')
+    detected: Dict[int, List[float]] = {t['ncaa_id']: [] for t in config}
+    daemon = refresh.RefreshDaemon(
+        config, results.season, os.path.join(work_dir, 'state.json'), os.path.join(work_dir, 'updates.jsonl'),
+        workers=results.workers, min_interval=results.min_interval, initial_interval=results.initial_interval,
+        max_interval=results.max_interval, baseline_path='',
+        on_update=lambda update: detected[update['ncaa_id']].append(update['time']) if not update['first'] else None)
+
+    runner = threading.Thread(target=daemon.run, daemon=True)
+    # Let every team get its first visit (the baseline) before anything changes
+    start = time.time()
+    runner.start()
+    while daemon.status()['never_visited'] and time.time() - start < results.duration:
+        time.sleep(0.1)
+    baseline_requests = len(site.log)
+
+    # Only teams whose pages parsed can show a change
+    candidates = sorted(ncaa_id for ncaa_id, state in daemon.states.items() if state.digest)
+    volatile = random.Random(results.seed).sample(candidates, min(len(candidates),
+                                                                  max(1, int(len(config) * results.volatile))))
+    changes: Dict[int, List[float]] = {ncaa_id: [] for ncaa_id in volatile}
+    stop = threading.Event()
+    changer = threading.Thread(target=change_loop, args=(site, volatile, results.change_every, stop, changes,
+                                                         results.seed), daemon=True)
+    changer.start()
+    measured_from = time.time()
+    time.sleep(max(results.duration - (measured_from - start), 0))
+    stop.set()
+    daemon.stop()
+    runner.join()
+    elapsed = time.time() - measured_from
+    server.shutdown()
+    server.server_close()
+
+    # Match each detection to the earliest change it was the first to see
+    delays, coalesced, missed = [], 0, 0
+    for ncaa_id, times in changes.items():
+        seen = sorted(detected[ncaa_id])
+        pending = list(times)
+        for at in seen:
+            caught = [t for t in pending if t <= at]
+            if caught:
+                delays.append(at - caught[0])
+                coalesced += len(caught) - 1
+                pending = [t for t in pending if t > at]
+        missed += len(pending)
+
+    requests = site.log[baseline_requests:]
+    not_modified = sum(1 for entry in requests if entry['status'] == 304)
+    cron_every = results.cron_every or results.initial_interval
+    cron_requests = len(config) * elapsed / cron_every
+    # The cron period that would have cost as many requests as the daemon
+    budget_every = len(config) * elapsed / len(requests) if requests else elapsed
+    interval = {ncaa_id: state.interval for ncaa_id, state in daemon.states.items()}
+    static = [i for ncaa_id, i in interval.items() if ncaa_id not in changes]
+
+    print(f"{len(config)} teams, {len(volatile)} changing about every {results.change_every:.0f}s; "
+          f"measured {elapsed:.0f}s after {baseline_requests} baseline requests\n")
+    print(f"{'':<10}{'requests':>10}{'304s':>8}{'delay p50':>11}{'p90':>8}{'max':>8}")
+    print(f"{'daemon':<10}{len(requests):>10}{not_modified:>8}{percentile(delays, 50):>10.1f}s"
+          f"{percentile(delays, 90):>7.1f}s{max(delays, default=0):>7.1f}s")
+    print(f"{'cron':<10}{cron_requests:>10.0f}{0:>8}{cron_every / 2:>10.1f}s{cron_every * 0.9:>7.1f}s{cron_every:>7.1f}s"
+          f"   (every {cron_every:.0f}s)")
+    print(f"{'cron':<10}{len(requests):>10}{0:>8}{budget_every / 2:>10.1f}s{budget_every * 0.9:>7.1f}s"
+          f"{budget_every:>7.1f}s   (every {budget_every:.1f}s, the daemon's requests)")
+    print(f"\nChanges: {sum(len(t) for t in changes.values())} made, {len(delays)} detected "
+          f"({coalesced} more folded into those), {missed} not yet seen")
+    print(f"Intervals: volatile median {statistics.median([interval[i] for i in volatile]):.1f}s, "
+          f"static median {statistics.median(static):.1f}s")
+    print(f"Daemon visits: {dict(daemon.outcomes)}")
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+End-to-end scraper load test against the fake athletics site
+
+Starts fake_sidearm.py's server in-process, writes a teams.json-style config
+with every URL pointed at it, and runs rosters.scrape_team() (the same
+routing and fallbacks get_all_rosters uses) for every team in that config.
+Reports:
+
+  - throughput: teams and requests per second
+  - per-team latency percentiles, end to end including fallbacks
+  - outcome (parsed / empty / error) by injected fault, so fallback
+    behavior shows up as e.g. "forbidden: 46 parsed" once the browser-like fallback gets through
+  - server-side request counts by status
+  - the scraper's own per-phase report (see src/metrics.py): slowest
+    teams, slowest strategies and time lost to failed fallbacks
+
+Faults and latencies are drawn from -seed, so two runs with the same flags
+see the same sites. Nothing is written under data/.
+
+Usage:
+    python benchmarks/load_sidearm.py
+    python benchmarks/load_sidearm.py -limit 100 -workers 8 -latency-ms 150 -tail 1.0
+    python benchmarks/load_sidearm.py -forbidden 0.3 -config benchmarks/fake_teams.json -report load.json
+    python benchmarks/load_sidearm.py -metrics /tmp/load_metrics
+    python benchmarks/load_sidearm.py -workers 8 -schedule -history /tmp/load_metrics.jsonl
+    python benchmarks/load_sidearm.py -throttled 0.1 -down 0.05
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import rosters  # noqa: E402
+import metrics  # noqa: E402
+import throttle  # noqa: E402
+import archive  # noqa: E402
+import snapshots  # noqa: E402
+import parsecache  # noqa: E402
+from scheduler import TeamScheduler, CostModel  # noqa: E402
+from fake_sidearm import (TEAMS_FILE, PLAYERS_FILE, FakeSite, start_server, base_url,  # noqa: E402
+                          add_profile_arguments, profile_from_arguments, load_teams)
+
+# Iowa State renders through pyppeteer, which downloads Chromium on first
+# use; 532 is skipped by get_all_rosters
+DEFAULT_EXCLUDE = [311, 532]
+
+PARSED, EMPTY, ERROR = 'parsed', 'empty', 'error'
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(int(round(pct / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def run_team(team: Dict, season: str, run_metrics: metrics.RunMetrics) -> Dict:
+    start = time.perf_counter()
+    try:
+        with run_metrics.team(team, season) as team_metrics:
+            roster = rosters.scrape_team(team, season)
+            with metrics.phase('normalize'):
+                team_metrics.rows = len([rosters.player_row(player, season) for player in roster])
+        outcome, rows, error = (PARSED if roster else EMPTY), len(roster), ''
+    except Exception as e:
+        outcome, rows, error = ERROR, 0, f"{type(e).__name__}: {e}"
+    return {'ncaa_id': team['ncaa_id'], 'outcome': outcome, 'rows': rows, 'error': error,
+            'seconds': time.perf_counter() - start}
+
+
+def summarize(results: List[Dict], site: FakeSite, elapsed: float) -> Dict:
+    seconds = [r['seconds'] for r in results]
+    request_ms = [entry['ms'] for entry in site.log]
+    by_fault: Dict[str, Counter] = {}
+    for r in results:
+        fault = site.faults.get(r['ncaa_id']) or 'none'
+        by_fault.setdefault(fault, Counter())[r['outcome']] += 1
+    by_template: Dict[str, Counter] = {}
+    for r in results:
+        if not site.faults.get(r['ncaa_id']):
+            by_template.setdefault(site.templates[r['ncaa_id']], Counter())[r['outcome']] += 1
+
+    return {
+        'teams': len(results),
+        'seconds': round(elapsed, 2),
+        'teams_per_second': round(len(results) / elapsed, 2) if elapsed else 0.0,
+        'requests': len(site.log),
+        'requests_per_second': round(len(site.log) / elapsed, 2) if elapsed else 0.0,
+        'rows': sum(r['rows'] for r in results),
+        'team_seconds': {f"p{p}": round(percentile(seconds, p), 3) for p in (50, 90, 99, 100)},
+        'request_ms': {f"p{p}": round(percentile(request_ms, p), 1) for p in (50, 90, 99, 100)},
+        'statuses': dict(Counter(str(entry['status']) for entry in site.log)),
+        'outcomes_by_fault': {f: dict(c) for f, c in sorted(by_fault.items())},
+        'outcomes_by_template': {t: dict(c) for t, c in sorted(by_template.items())},
+        'errors': dict(Counter(r['error'].split(':')[0] for r in results if r['error'])),
+    }
+
+
+def print_summary(summary: Dict):
+    print(f"\n{summary['teams']} teams, {summary['requests']} requests, {summary['rows']} rows "
+          f"in {summary['seconds']}s")
+    print(f"  throughput      {summary['teams_per_second']} teams/s, {summary['requests_per_second']} requests/s")
+    print("  team latency    " + ', '.join(f"{p} {v:.2f}s" for p, v in summary['team_seconds'].items()))
+    print("  request latency " + ', '.join(f"{p} {v:.0f}ms" for p, v in summary['request_ms'].items()))
+    print("  statuses        " + ', '.join(f"{s}: {n}" for s, n in sorted(summary['statuses'].items())))
+    print("\n  outcome by fault")
+    for fault, outcomes in summary['outcomes_by_fault'].items():
+        print(f"    {fault:<12}" + ', '.join(f"{n} {o}" for o, n in sorted(outcomes.items())))
+    print("\n  outcome by template (teams without a fault)")
+    for template, outcomes in summary['outcomes_by_template'].items():
+        print(f"    {template:<28}" + ', '.join(f"{n} {o}" for o, n in sorted(outcomes.items())))
+    if summary['errors']:
+        print("\n  errors")
+        for error, n in sorted(summary['errors'].items(), key=lambda item: -item[1]):
+            print(f"    {n:>5}  {error}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Offline end-to-end scraper load test')
+    parser.add_argument('-season', dest='season', default='2023-24')
+    parser.add_argument('-teams-file', dest='teams_file', default=TEAMS_FILE,
+                        help=f'teams.json-style list to serve (default {TEAMS_FILE})')
+    parser.add_argument('-players', dest='players', default=PLAYERS_FILE,
+                        help=f'Season CSV the rosters are drawn from (default {PLAYERS_FILE})')
+    parser.add_argument('-limit', dest='limit', type=int, help='Only the first N teams')
+    parser.add_argument('-workers', dest='workers', type=int, default=1,
+                        help='Teams scraped at once (default 1, like get_all_rosters)')
+    parser.add_argument('-schedule', action='store_true', dest='schedule',
+                        help="Run through rosters' cost-aware scheduler (-workers HTTP workers) instead of in order")
+    parser.add_argument('-browser-workers', dest='browser_workers', type=int, default=1,
+                        help='Browser lane workers with -schedule (default 1)')
+    parser.add_argument('-history', nargs='+', dest='history', default=[],
+                        help='Metrics JSONL files -schedule estimates team costs from')
+    parser.add_argument('-exclude', nargs='*', type=int, dest='exclude', default=DEFAULT_EXCLUDE,
+                        help=f'Team IDs to leave out (default {DEFAULT_EXCLUDE})')
+    parser.add_argument('-config', dest='config',
+                        help='Keep the generated teams config at this path (default: a temp file)')
+    parser.add_argument('-report', dest='report', help='Also write the summary as JSON')
+    parser.add_argument('-metrics', dest='metrics',
+                        help='Write per-team phase timings to PREFIX.jsonl and PREFIX.prom')
+    parser.add_argument('-verbose', action='store_true', dest='verbose',
+                        help="Keep the scraper's own log output")
+    add_profile_arguments(parser)
+    results = parser.parse_args()
+
+    if not results.verbose:
+        for name in ('rosters', 'throttle'):
+            logging.getLogger(name).setLevel(logging.CRITICAL)
+
+    teams = [t for t in load_teams(results.teams_file)
+             if t.get('url') and 'roster' not in t and t['ncaa_id'] not in results.exclude]
+    if results.limit:
+        teams = teams[:results.limit]
+    site = FakeSite(teams, results.players, profile_from_arguments(results))
+    server = start_server(site)
+
+    # Point the scraper at the fake site the same way a real run is configured
+    config_path = results.config or os.path.join(tempfile.mkdtemp(), 'teams.json')
+    with open(config_path, 'w') as f:
+        json.dump(site.config(base_url(server)), f, indent=2)
+    config = load_teams(config_path)
+    print(f"Serving {len(config)} teams on {base_url(server)} (config {config_path})")
+
+    cost_model = CostModel.from_files(results.history)
+    # Measure fetching and parsing; nothing is read from or written to data/
+    snapshots.store = parsecache.cache = archive.store = None
+    # Every team is served from one address; give each its own host limits
+    throttle.controller.key = lambda url: f"{throttle.host_of(url)}/{urlparse(url).path.split('/')[1]}"
+    run_metrics = metrics.RunMetrics(*((f"{results.metrics}.jsonl", f"{results.metrics}.prom")
+                                       if results.metrics else ()), hosts=throttle.controller)
+    start = time.perf_counter()
+    if results.schedule:
+        scheduler = TeamScheduler(cost_model, results.workers, results.browser_workers)
+        team_results = [result for _, result, _ in
+                        scheduler.run(config, lambda team: run_team(team, results.season, run_metrics),
+                                      rosters.team_strategy)]
+    else:
+        with ThreadPoolExecutor(max_workers=results.workers) as pool:
+            team_results = list(pool.map(lambda team: run_team(team, results.season, run_metrics), config))
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+    server.server_close()
+
+    summary = summarize(team_results, site, elapsed)
+    print_summary(summary)
+    print(f"\n{run_metrics.summary()}")
+    if results.report:
+        with open(results.report, 'w') as f:
+            json.dump({'flags': vars(results), 'summary': summary, 'teams': team_results}, f, indent=2)
+        print(f"\nWrote {results.report}")
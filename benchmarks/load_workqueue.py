@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Sharded backfill test on one machine: several worker processes, one queue
+
+Serves the fake athletics site (fake_sidearm.py) in-process, queues every
+team in it for -seasons in a fresh queue file (src/workqueue.py), and
+starts -workers worker processes that lease and scrape until the queue is
+drained. With -kill-after, the first worker is killed (SIGKILL, mid-scrape)
+after that many seconds, so its leases have to run out and be taken over.
+
+Then it merges every season twice, into two directories, and reports:
+
+  - wall time and items per second
+  - items per state, and how many had to be leased more than once
+  - players per season and the merged files' SHA-256, which must match
+    between the two merges
+  - with -verify, whether every stored result equals a scrape of the same
+    team-season done in this process, one at a time
+
+Nothing is written under data/.
+
+Usage:
+    python benchmarks/load_workqueue.py
+    python benchmarks/load_workqueue.py -workers 4 -limit 100 -kill-after 3 -lease 5
+    python benchmarks/load_workqueue.py -seasons 2023-24 2022-23 2021-22 -verify
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import logging
+import argparse
+import tempfile
+import multiprocessing
+from collections import Counter
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import rosters  # noqa: E402
+import throttle  # noqa: E402
+import archive  # noqa: E402
+import snapshots  # noqa: E402
+import parsecache  # noqa: E402
+import workqueue  # noqa: E402
+from fake_sidearm import (TEAMS_FILE, PLAYERS_FILE, FakeSite, start_server, base_url,  # noqa: E402
+                          add_profile_arguments, profile_from_arguments, load_teams)
+
+# Iowa State renders through pyppeteer, which downloads Chromium on first use
+DEFAULT_EXCLUDE = [311]
+
+
+def quiet(verbose: bool):
+    logging.getLogger().setLevel(logging.INFO if verbose else logging.WARNING)
+    if not verbose:
+        for name in ('rosters', 'throttle', 'fallback'):
+            logging.getLogger(name).setLevel(logging.CRITICAL)
+
+
+def team_host(url: str) -> str:
+    # Every team is served from one address; give each its own host limits
+    return f"{throttle.host_of(url)}/{urlparse(url).path.split('/')[1]}"
+
+
+def worker_process(queue_path: str, worker: str, lease_seconds: float, verbose: bool):
+    quiet(verbose)
+    snapshots.store = parsecache.cache = archive.store = None
+    throttle.controller.key = team_host
+    workqueue.run_worker(workqueue.WorkQueue(queue_path), worker, lease_seconds=lease_seconds, poll_seconds=0.5)
+
+
+def sha256(path: str) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='One-machine sharded backfill test')
+    parser.add_argument('-seasons', nargs='+', dest='seasons', default=['2023-24', '2022-23'])
+    parser.add_argument('-teams-file', dest='teams_file', default=TEAMS_FILE,
+                        help='teams.json to take teams from (default data/teams.json)')
+    parser.add_argument('-players', dest='players', default=PLAYERS_FILE,
+                        help='Roster CSV the fake pages are built from')
+    parser.add_argument('-limit', dest='limit', type=int, default=60, help='Only the first N teams (default 60)')
+    parser.add_argument('-workers', dest='workers', type=int, default=3, help='Worker processes (default 3)')
+    parser.add_argument('-lease', dest='lease', type=float, default=5.0, help='Lease seconds (default 5)')
+    parser.add_argument('-kill-after', dest='kill_after', type=float,
+                        help='SIGKILL the first worker after this many seconds')
+    parser.add_argument('-verify', action='store_true', dest='verify',
+                        help='Compare every result with a one-at-a-time scrape in this process')
+    parser.add_argument('-verbose', action='store_true', dest='verbose', help="Keep the workers' log output")
+    add_profile_arguments(parser)
+    results = parser.parse_args()
+    quiet(results.verbose)
+
+    teams = [t for t in load_teams(results.teams_file)
+             if t.get('url') and 'roster' not in t and t['ncaa_id'] not in DEFAULT_EXCLUDE][:results.limit]
+    site = FakeSite(teams, results.players, profile_from_arguments(results))
+    server = start_server(site)
+    config = site.config(base_url(server))
+
+    work_dir = tempfile.mkdtemp(prefix='workqueue_')
+    queue_path = os.path.join(work_dir, 'backfill.db')
+    queue = workqueue.WorkQueue(queue_path)
+    for season in results.seasons:
+        queue.enqueue([t for t in config if rosters.scrapeable(t, season)], [season])
+    total = queue.remaining()
+    print(f"Queued {total} items ({len(config)} teams x {len(results.seasons)} seasons) in {queue_path}")
+
+    context = multiprocessing.get_context('spawn')
+    workers = [context.Process(target=worker_process, args=(queue_path, f"worker-{i}", results.lease, results.verbose))
+               for i in range(results.workers)]
+    start = time.perf_counter()
+    for process in workers:
+        process.start()
+    if results.kill_after is not None:
+        workers[0].join(results.kill_after)
+        if workers[0].is_alive():
+            workers[0].kill()
+            print(f"Killed worker-0 after {results.kill_after:.1f}s")
+    for process in workers:
+        process.join()
+    elapsed = time.perf_counter() - start
+
+    states = Counter(row[0] for row in queue.conn.execute("SELECT state FROM items"))
+    released = queue.conn.execute("SELECT COUNT(*) FROM items WHERE attempts > 1").fetchone()[0]
+    print(f"\n{total} items in {elapsed:.2f}s ({total / elapsed:.1f}/s) on {results.workers} workers")
+    print(f"States: {dict(states)}; leased more than once: {released}")
+
+    print(f"\n{'season':<10}{'teams':>7}{'players':>9}  sha256 (two merges)")
+    mismatched = 0
+    for season in results.seasons:
+        merged = [workqueue.merge_season(queue, season, os.path.join(work_dir, f"merge_{i}"),
+                                         os.path.join(work_dir, f"metrics_{i}"))
+                  for i in range(2)]
+        hashes = [sha256(os.path.join(work_dir, f"merge_{i}", f"rosters_{season}.csv")) for i in range(2)]
+        mismatched += hashes[0] != hashes[1]
+        print(f"{season:<10}{merged[0][workqueue.DONE]:>7}{merged[0]['players']:>9}  {hashes[0][:16]} "
+              f"{'same' if hashes[0] == hashes[1] else 'DIFFERENT ' + hashes[1][:16]}")
+
+    if results.verify:
+        throttle.controller.key = team_host
+        snapshots.store = parsecache.cache = archive.store = None
+        differing = []
+        for row in queue.conn.execute("SELECT ncaa_id, season, team_json, rows_json FROM items "
+                                      "WHERE state = 'done' ORDER BY id").fetchall():
+            season = row['season']
+            expected = [rosters.player_row(p, season) for p in rosters.scrape_team(json.loads(row['team_json']), season)]
+            if json.loads(json.dumps(expected)) != json.loads(row['rows_json']):
+                differing.append((row['ncaa_id'], season))
+        print(f"\nVerified {states['done']} results against one-at-a-time scrapes: "
+              f"{'all equal' if not differing else f'{len(differing)} differ: {differing[:10]}'}")
+        mismatched += len(differing)
+
+    server.shutdown()
+    server.server_close()
+    sys.exit(1 if mismatched or states[workqueue.PENDING] or states[workqueue.LEASED] else 0)
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Build the parser fixture corpus in benchmarks/fixtures/
+
+Renders one roster page per template and per team-specific branch of the
+parsers, using real players from a season CSV so names, hometowns and
+schools have the same shape as live pages. The pages are committed; rerun
+this only when a template changes (and then re-save the benchmark
+baseline).
+
+Usage:
+    python benchmarks/make_fixtures.py
+    python benchmarks/make_fixtures.py -csv data/rosters_2023.csv
+"""
+
+import os
+import csv
+import json
+import argparse
+from html import escape
+from typing import List, Dict
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+MANIFEST_FILE = os.path.join(FIXTURES_DIR, 'manifest.json')
+
+PLAYERS_PER_PAGE = 15
+SEASON = '2023-24'
+
+TABLE_HEADERS = ['No.', 'Name', 'Pos.', 'Ht.', 'Cl.', 'Hometown/High School']
+MAJORS = ['Nursing', 'Biology', 'Psychology', 'Business']
+
+
+# ============================================================================
+# PAGE TEMPLATES
+# ============================================================================
+
+def page(body: str, title: str) -> str:
+    return (f"<!DOCTYPE html>\n<html><head><title>{escape(title)}</title></head>\n"
+            f"<body>\n<nav><ul><li><a href=\"/\">Home</a></li></ul></nav>\n{body}\n</body></html>\n")
+
+
+def slug(name: str) -> str:
+    return '-'.join(name.lower().replace("'", '').split())
+
+
+def town(player: Dict[str, str]) -> str:
+    return f"{player['hometown']} / {player['high_school'] or 'Home School'}"
+
+
+def sidearm_list(players: List[Dict[str, str]], team: str) -> str:
+    """li.sidearm-roster-player (parse_roster)"""
+    items = []
+    for i, p in enumerate(players):
+        name = escape(p['name'])
+        previous = (f'<span class="sidearm-roster-player-previous-school">{escape(p["previous_school"])}</span>'
+                    if p['previous_school'] else '')
+        items.append(f"""<li class="sidearm-roster-player" data-player-id="{p['player_id'] or 1000 + i}">
+  <div class="sidearm-roster-player-image"><a href="/sports/womens-volleyball/roster/{slug(p['name'])}/{p['player_id'] or 1000 + i}" aria-label="{name} - View Full Bio"><img src="/images/{i}.jpg" alt=""></a></div>
+  <div class="sidearm-roster-player-position">
+    <span class="text-bold"><span class="sidearm-roster-player-position-long-short hide-on-small-down">{escape(p['position'])}</span></span>
+  </div>
+  <div class="sidearm-roster-player-name">
+    <span class="sidearm-roster-player-jersey"><span class="sidearm-roster-player-jersey-number">{escape(p['jersey'])}</span></span>
+    <h3><a href="/sports/womens-volleyball/roster/{slug(p['name'])}/{p['player_id'] or 1000 + i}">{name}</a></h3>
+  </div>
+  <div class="sidearm-roster-player-other">
+    <span class="sidearm-roster-player-academic-year hide-on-medium">{escape(p['year'][:2])}.</span>
+    <span class="sidearm-roster-player-academic-year">{escape(p['year'])}</span>
+    <span class="sidearm-roster-player-height">{escape(p['height'])}</span>
+    <span class="sidearm-roster-player-hometown">{escape(p['hometown'])}</span>
+    <span class="sidearm-roster-player-highschool">{escape(p['high_school'])}</span>
+    {previous}
+  </div>
+</li>""")
+    return page('<ul class="sidearm-roster-players">\n' + '\n'.join(items) + '\n</ul>', team)
+
+
+def table(players: List[Dict[str, str]], team: str, headers: List[str] = TABLE_HEADERS,
+          name_in_th: bool = False, before: str = '', extra_cell=None, blank_positions: bool = False,
+          town_with_school: bool = True, label_spans: bool = True) -> str:
+    """Sidearm wvball / w-baskbl table (parse_roster_wbkb, parse_roster_baskbl)"""
+    head = ''.join(f'<th scope="col">{escape(h)}</th>' for h in headers)
+    rows = []
+    for i, p in enumerate(players):
+        href = f"/sports/wvball/roster/{slug(p['name'])}/{1000 + i}"
+        name = f'<a href="{href}">{escape(p["name"])}</a>'
+        label = '<span class="label">Pos.:</span>' if label_spans else ''
+        position = '' if blank_positions and i % 3 == 0 else escape(p['position'])
+        hometown = town(p) if town_with_school else p['hometown']
+        cells = [f'<td>{escape(p["jersey"])}</td>',
+                 f'<th scope="row">{name}</th>' if name_in_th else f'<td>{name}</td>',
+                 f'<td>{label}{position}</td>',
+                 f'<td>{escape(p["height"])}</td>',
+                 f'<td>  {escape(p["year"])}\n   </td>',
+                 f'<td>{escape(hometown)}</td>']
+        if extra_cell:
+            cells = extra_cell(cells, i)
+        rows.append('<tr>' + ''.join(cells) + '</tr>')
+    return page(f"{before}<table class=\"sidearm-table\">\n<thead><tr>{head}</tr></thead>\n"
+                f"<tbody>\n" + '\n'.join(rows) + "\n</tbody>\n</table>", team)
+
+
+def person_cards(players: List[Dict[str, str]], team: str) -> str:
+    """.s-person-card (shotscraper_card; parse_roster is the HTML fallback)"""
+    cards = []
+    for p in players:
+        cards.append(f"""<div class="s-person-card"><div class="s-person-card__content">
+  <a href="/sports/womens-volleyball/roster/player/{slug(p['name'])}"><span class="s-stamp__text">{escape(p['jersey'])}</span></a>
+  <div class="s-person-details__personal-single-line">{escape(p['name'])}</div>
+  <div class="s-person-details__bio-stats-item">Position\n{escape(p['position'])}</div>
+  <div class="s-person-details__bio-stats-item">Academic Year\n {escape(p['year'])}</div>
+  <div class="s-person-details__bio-stats-item">Height\n {escape(p['height'])}</div>
+  <div class="s-person-card__content__person__location-item">Hometown\n{escape(p['hometown'])}</div>
+  <div class="s-person-card__content__person__location-item">Last School\n{escape(p['high_school'])}</div>
+</div></div>""")
+    return page('<div class="s-person-cards">\n' + '\n'.join(cards) + '\n</div>', team)
+
+
+# ============================================================================
+# CORPUS
+# ============================================================================
+
+def filler_tables(count: int) -> str:
+    """Layout tables without a tbody, ahead of the roster table"""
+    return ''.join(f'<table class="layout"><tr><td>Block {i}</td></tr></table>\n' for i in range(count))
+
+
+def fixtures(players: List[Dict[str, str]]) -> List[Dict]:
+    """(file name, parser, team, expected rows, html) for every template"""
+    n = len(players)
+
+    def with_major(cells, i):
+        return cells + [f'<td>{MAJORS[i % len(MAJORS)]}</td>']
+
+    def major_before_town(cells, i):
+        return cells[:4] + [f'<td>{MAJORS[i % len(MAJORS)]}</td>'] + cells[4:]
+
+    def trailing_cell(cells, i):
+        return cells + ['<td>Instagram</td>']
+
+    def middle_cell(cells, i):
+        return cells[:2] + ['<td>Pronoun</td>'] + cells[2:]
+
+    def jersey_43(cells, i):
+        return ['<td>43</td>'] + cells[1:] if i == 0 else cells
+
+    specs = [
+        ('sidearm_list.html', 'parse_roster', 697, 'Texas A&M', 'https://12thman.com/sports/womens-volleyball',
+         n, sidearm_list(players, 'Texas A&M')),
+        ('wvball_table.html', 'parse_roster_wbkb', 697, 'Default wvball', 'https://example.edu/sports/wvball/index',
+         n, table(players, 'Default wvball')),
+        ('wvball_second_table_30164.html', 'parse_roster_wbkb', 30164, 'Southern Va.', 'https://knightathletics.com/sports/womens-volleyball',
+         n, table(players, 'Southern Va.', before=filler_tables(1))),
+        ('wvball_thirteenth_table_326.html', 'parse_roster_wbkb', 326, 'Kalamazoo', 'https://hornets.kzoo.edu/sports/wvball/index',
+         n, table(players, 'Kalamazoo', before=filler_tables(12))),
+        ('wvball_name_in_th_1340.html', 'parse_roster_wbkb', 1340, "St. Joseph's (L.I.)", 'https://sjliathletics.com/sports/wvball/index',
+         n, table(players, "St. Joseph's (L.I.)", name_in_th=True)),
+        ('wvball_blank_cells_114.html', 'parse_roster_wbkb', 114, 'Calvin', 'https://calvinknights.com/sports/womens-volleyball',
+         n, table(players, 'Calvin', blank_positions=True, label_spans=False)),
+        ('wvball_skip_43_73.html', 'parse_roster_wbkb', 73, 'Brandeis', 'https://brandeisjudges.com/sports/womens-volleyball',
+         n - 1, table(players, 'Brandeis', extra_cell=jersey_43)),
+        ('wvball_trailing_cell_1036.html', 'parse_roster_wbkb', 1036, 'Concordia Wisconsin', 'https://www.cuwfalcons.com/sports/wvball/index',
+         n, table(players, 'Concordia Wisconsin', name_in_th=True, extra_cell=trailing_cell)),
+        ('wvball_trailing_cell_1096.html', 'parse_roster_wbkb', 1096, 'Georgia College', 'https://gcsubobcats.com/sports/womens-volleyball',
+         n, table(players, 'Georgia College', extra_cell=trailing_cell)),
+        ('wvball_extra_column_142.html', 'parse_roster_wbkb', 142, 'Claremont-M-S', 'https://www.cmsathletics.org/sports/wvball/index',
+         n, table(players, 'Claremont-M-S', extra_cell=middle_cell)),
+        ('wvball_major_column.html', 'parse_roster_wbkb', 697, 'Major column', 'https://example.edu/sports/wvball/index',
+         n, table(players, 'Major column', extra_cell=with_major)),
+        ('wvball_major_column_186.html', 'parse_roster_wbkb', 186, 'Major before hometown', 'https://example.edu/sports/wvball/index',
+         n, table(players, 'Major before hometown', extra_cell=major_before_town)),
+        ('wvball_no_high_school_2713.html', 'parse_roster_wbkb', 2713, 'Oglethorpe', 'https://gopetrels.com/sports/womens-volleyball',
+         n, table(players, 'Oglethorpe', headers=TABLE_HEADERS[:5] + ['Hometown'], town_with_school=False)),
+        ('wbaskbl_table.html', 'parse_roster_baskbl', 697, 'Default w-baskbl', 'https://example.edu/sports/w-baskbl/index',
+         n, table(players, 'Default w-baskbl')),
+        ('wbaskbl_social_255.html', 'parse_roster_baskbl', 255, 'Georgia Tech', 'https://ramblinwreck.com/sports/w-volley/',
+         n, table(players, 'Georgia Tech', headers=TABLE_HEADERS + ['Social'],
+                  extra_cell=lambda cells, i: cells + ['<td></td>'])),
+        # Rendered in the browser by shotscraper_card(); parse_roster() is the
+        # fallback and finds nothing, which is what this fixture pins down
+        ('person_card.html', 'parse_roster', 9, 'UAB', 'https://uabsports.com/sports/womens-volleyball',
+         0, person_cards(players, 'UAB')),
+    ]
+    return [{'fixture': name, 'parser': parser,
+             'team': {'ncaa_id': ncaa_id, 'team': team, 'url': url},
+             'season': SEASON, 'rows': rows, 'html': html}
+            for name, parser, ncaa_id, team, url, rows, html in specs]
+
+
+def load_players(path: str) -> List[Dict[str, str]]:
+    """First team in the CSV with a full set of fields for PLAYERS_PER_PAGE players"""
+    by_team: Dict[str, List[Dict[str, str]]] = {}
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            if all(row.get(c) for c in ('name', 'year', 'hometown', 'height', 'position', 'jersey')):
+                by_team.setdefault(row['ncaa_id'], []).append(row)
+                if len(by_team[row['ncaa_id']]) == PLAYERS_PER_PAGE:
+                    return by_team[row['ncaa_id']]
+    raise ValueError(f"No team in {path} has {PLAYERS_PER_PAGE} complete rows")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Build the parser fixture corpus')
+    parser.add_argument('-csv', dest='csv', default='data/rosters_2023.csv',
+                        help='Season CSV to take players from (default data/rosters_2023.csv)')
+    results = parser.parse_args()
+
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    manifest = []
+    for spec in fixtures(load_players(results.csv)):
+        with open(os.path.join(FIXTURES_DIR, spec['fixture']), 'w') as f:
+            f.write(spec.pop('html'))
+        manifest.append(spec)
+    with open(MANIFEST_FILE, 'w') as f:
+        json.dump(manifest, f, indent=2)
+        f.write('\n')
+    print(f"Wrote {len(manifest)} fixtures to {FIXTURES_DIR}")
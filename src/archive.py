@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+"""
+Raw-page archive: every roster page fetched or rendered, kept for re-parsing
+
+Once a school takes an old roster page down, the rows in rosters_2022.csv
+and rosters_2023.csv lose their source, and a better parser can't be run
+over them again. Every page fetched or rendered while scraping a team is
+now appended to the archive under data/archive/:
+
+  - segment-00001.warc.gz, ...: WARC/1.1 'resource' records, each its own
+    gzip member (as in .warc.gz files), so any record can be decompressed
+    alone from its offset; a segment is closed at SEGMENT_BYTES
+  - index.db: SQLite rows of (team, season, URL, kind, status, SHA-256,
+    segment, offset, length) to look records up by
+  - a page identical to the one last archived for the same team, season,
+    URL and kind isn't appended again; its last_seen time is updated
+
+Records carry the team, season, kind ('fetched' for plain and browser-like
+requests, 'rendered' for shot-scraper) and HTTP status as X-Roster-*
+headers, so `rebuild` can recreate index.db from the segments alone.
+
+Segments are read through mmap, one map per segment, and records are
+decompressed one at a time, so a bulk re-parse (`rosters.py
+-reparse-archive`) streams pages from disk in segment order without
+holding more than one in memory. Appends take an exclusive flock on the
+segment, so workers in several processes (workqueue.py) can share an
+archive.
+
+Pages are archived while scope() names the team being scraped, which
+scrape_team() and the refresh daemon do; bio pages (enrich.py) and one-off
+fetches aren't archived. Neither are the shotscraper_* extractors, which
+return JSON from the page rather than the page.
+
+Usage:
+    python src/archive.py stats
+    python src/archive.py list -season 2023-24 -team 255
+    python src/archive.py get -season 2023-24 -team 255 > page.html
+    python src/archive.py get -url https://example.com/sports/womens-volleyball/roster/2023-24
+    python src/archive.py rebuild
+    python src/rosters.py -season 2023-24 -reparse-archive
+    python src/rosters.py -season 2023-24 -no-archive
+"""
+
+import os
+import re
+import sys
+import mmap
+import time
+import uuid
+import zlib
+import fcntl
+import hashlib
+import sqlite3
+import logging
+import argparse
+import threading
+from datetime import datetime, timezone
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================================
+# CONSTANTS
+# ============================================================================
+
+ARCHIVE_DIR = 'data/archive'
+INDEX_FILE = 'index.db'
+
+# Size after which appends go to a new segment
+SEGMENT_BYTES = 1024 * 1024 * 1024
+
+SEGMENT_RE = re.compile(r'^segment-(\d{5})\.warc\.gz$')
+
+FETCHED = 'fetched'
+RENDERED = 'rendered'
+
+
+# ============================================================================
+# RECORDS
+# ============================================================================
+
+@dataclass
+class ArchivedPage:
+    """One archived page and where it came from"""
+    url: str
+    ncaa_id: Optional[int]
+    season: Optional[str]
+    kind: str
+    status: int
+    fetched_at: float
+    content_type: str
+    body: bytes
+
+    @property
+    def text(self) -> str:
+        charset = re.search(r'charset=([\w-]+)', self.content_type)
+        try:
+            return self.body.decode(charset.group(1) if charset else 'utf-8', errors='replace')
+        except LookupError:
+            return self.body.decode('utf-8', errors='replace')
+
+
+def encode_record(page: ArchivedPage) -> bytes:
+    """A WARC/1.1 resource record, gzipped as its own member"""
+    headers = [
+        ('WARC-Type', 'resource'),
+        ('WARC-Record-ID', f"<urn:uuid:{uuid.uuid4()}>"),
+        ('WARC-Date', datetime.fromtimestamp(page.fetched_at, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')),
+        ('WARC-Target-URI', page.url),
+        ('WARC-Block-Digest', f"sha256:{hashlib.sha256(page.body).hexdigest()}"),
+        ('Content-Type', page.content_type),
+        ('X-Roster-Team', '' if page.ncaa_id is None else str(page.ncaa_id)),
+        ('X-Roster-Season', page.season or ''),
+        ('X-Roster-Kind', page.kind),
+        ('X-Roster-Status', str(page.status)),
+        ('Content-Length', str(len(page.body))),
+    ]
+    head = 'WARC/1.1\r\n' + ''.join(f"{name}: {value}\r\n" for name, value in headers) + '\r\n'
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    return compressor.compress(head.encode('utf-8') + page.body + b'\r\n\r\n') + compressor.flush()
+
+
+def decode_record(data: bytes) -> ArchivedPage:
+    """The page in one record (the decompressed member)"""
+    head, _, rest = data.partition(b'\r\n\r\n')
+    lines = head.decode('utf-8').split('\r\n')
+    if lines[0] != 'WARC/1.1':
+        raise ValueError(f"Not a WARC/1.1 record: {lines[0][:40]!r}")
+    headers = dict(line.split(': ', 1) for line in lines[1:])
+    body = rest[:int(headers['Content-Length'])]
+    return ArchivedPage(
+        url=headers['WARC-Target-URI'],
+        ncaa_id=int(headers['X-Roster-Team']) if headers.get('X-Roster-Team') else None,
+        season=headers.get('X-Roster-Season') or None,
+        kind=headers.get('X-Roster-Kind', FETCHED),
+        status=int(headers.get('X-Roster-Status', 200)),
+        fetched_at=datetime.strptime(headers['WARC-Date'], '%Y-%m-%dT%H:%M:%S.%fZ')
+                           .replace(tzinfo=timezone.utc).timestamp(),
+        content_type=headers.get('Content-Type', 'text/html'),
+        body=body,
+    )
+
+
+# ============================================================================
+# ARCHIVE
+# ============================================================================
+
+class PageArchive:
+    """Segment files and their index"""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS pages (
+        id INTEGER PRIMARY KEY,
+        ncaa_id INTEGER,
+        season TEXT,
+        url TEXT NOT NULL,
+        kind TEXT NOT NULL,
+        status INTEGER NOT NULL,
+        sha256 TEXT NOT NULL,
+        fetched_at REAL NOT NULL,
+        last_seen REAL NOT NULL,
+        segment TEXT NOT NULL,
+        offset INTEGER NOT NULL,
+        length INTEGER NOT NULL,
+        bytes INTEGER NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS pages_team ON pages (ncaa_id, season);
+    CREATE INDEX IF NOT EXISTS pages_url ON pages (url, kind);
+    """
+
+    def __init__(self, root: str = ARCHIVE_DIR, segment_bytes: int = SEGMENT_BYTES):
+        self.root = root
+        self.segment_bytes = segment_bytes
+        self.appended = 0
+        self.unchanged = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._maps: Dict[str, mmap.mmap] = {}
+        self._segment: Optional[str] = None
+
+    def _conn(self) -> sqlite3.Connection:
+        # Opened on first use, so importing the scraper creates nothing
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(self.root, exist_ok=True)
+            conn = sqlite3.connect(os.path.join(self.root, INDEX_FILE), timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self.SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        with self._lock:
+            for segment_map in self._maps.values():
+                segment_map.close()
+            self._maps.clear()
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def segments(self) -> List[str]:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root) if SEGMENT_RE.match(name))
+
+    def _next_segment(self, after: Optional[str]) -> str:
+        number = int(SEGMENT_RE.match(after).group(1)) + 1 if after else 1
+        return f"segment-{number:05d}.warc.gz"
+
+    def _append(self, data: bytes) -> tuple:
+        """Write one record at the end of the open segment; returns (segment, offset)"""
+        with self._lock:
+            if self._segment is None:
+                existing = self.segments()
+                self._segment = existing[-1] if existing else self._next_segment(None)
+            while True:
+                with open(os.path.join(self.root, self._segment), 'ab') as f:
+                    # Other processes append to the same segment
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                    offset = f.seek(0, os.SEEK_END)
+                    if offset == 0 or offset + len(data) <= self.segment_bytes:
+                        f.write(data)
+                        f.flush()
+                        return self._segment, offset
+                # Full: move to the newest segment, or start one
+                newest = self.segments()[-1]
+                self._segment = newest if newest != self._segment else self._next_segment(newest)
+
+    def add(self, url: str, body: bytes, ncaa_id: Optional[int], season: Optional[str], kind: str = FETCHED,
+            status: int = 200, content_type: str = 'text/html') -> bool:
+        """Archive a page; False if it's the same as the one last archived for it"""
+        digest = hashlib.sha256(body).hexdigest()
+        now = time.time()
+        conn = self._conn()
+        last = conn.execute("SELECT id, sha256 FROM pages WHERE url = ? AND kind = ? AND ncaa_id IS ? AND season IS ? "
+                            "ORDER BY fetched_at DESC LIMIT 1", (url, kind, ncaa_id, season)).fetchone()
+        if last is not None and last['sha256'] == digest:
+            with conn:
+                conn.execute("UPDATE pages SET last_seen = ? WHERE id = ?", (now, last['id']))
+            self.unchanged += 1
+            return False
+
+        page = ArchivedPage(url, ncaa_id, season, kind, status, now, content_type, body)
+        data = encode_record(page)
+        segment, offset = self._append(data)
+        with conn:
+            conn.execute("INSERT INTO pages (ncaa_id, season, url, kind, status, sha256, fetched_at, last_seen, "
+                         "segment, offset, length, bytes) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                         (ncaa_id, season, url, kind, status, digest, now, now, segment, offset, len(data), len(body)))
+        self.appended += 1
+        return True
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def _map(self, segment: str, end: int) -> mmap.mmap:
+        """The segment's memory map, remapped if it has grown past `end` since it was mapped"""
+        with self._lock:
+            segment_map = self._maps.get(segment)
+            if segment_map is None or len(segment_map) < end:
+                if segment_map is not None:
+                    segment_map.close()
+                with open(os.path.join(self.root, segment), 'rb') as f:
+                    segment_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._maps[segment] = segment_map
+            return segment_map
+
+    def read(self, entry: sqlite3.Row) -> ArchivedPage:
+        """The page an index row points at"""
+        offset, length = entry['offset'], entry['length']
+        segment_map = self._map(entry['segment'], offset + length)
+        return decode_record(zlib.decompress(segment_map[offset:offset + length], 31))
+
+    def lookup(self, ncaa_id: Optional[int] = None, season: Optional[str] = None, url: Optional[str] = None,
+               kind: Optional[str] = None, latest: bool = True) -> List[sqlite3.Row]:
+        """
+        Index rows matching the filters, in segment order; with latest, only
+        the newest record per team, season, URL and kind
+        """
+        conditions, values = [], []
+        for column, value in (('ncaa_id', ncaa_id), ('season', season), ('url', url), ('kind', kind)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                values.append(value)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        if latest:
+            query = (f"SELECT * FROM pages WHERE id IN (SELECT id FROM (SELECT id, ROW_NUMBER() OVER ("
+                     f"PARTITION BY ncaa_id, season, url, kind ORDER BY fetched_at DESC) AS n FROM pages {where}) "
+                     f"WHERE n = 1) ORDER BY segment, offset")
+        else:
+            query = f"SELECT * FROM pages {where} ORDER BY segment, offset"
+        return self._conn().execute(query, values).fetchall()
+
+    def pages(self, **filters) -> Iterator[ArchivedPage]:
+        """lookup(), read one page at a time"""
+        for entry in self.lookup(**filters):
+            yield self.read(entry)
+
+    def stats(self) -> List[sqlite3.Row]:
+        return self._conn().execute(
+            "SELECT season, kind, COUNT(*) AS records, COUNT(DISTINCT ncaa_id) AS teams, SUM(bytes) AS bytes, "
+            "SUM(length) AS stored FROM pages GROUP BY season, kind ORDER BY season DESC, kind").fetchall()
+
+    def rebuild(self) -> int:
+        """Recreate index.db from the segments; returns the records indexed"""
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM pages")
+        count = 0
+        for segment in self.segments():
+            with open(os.path.join(self.root, segment), 'rb') as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else b''
+            offset = 0
+            rows = []
+            while offset < len(data):
+                decompressor = zlib.decompressobj(31)
+                record = decompressor.decompress(data[offset:offset + 64 * 1024])
+                # Feed the member until it ends; what follows is the next record
+                end = offset + 64 * 1024
+                while not decompressor.eof and end < len(data):
+                    record += decompressor.decompress(data[end:end + 64 * 1024])
+                    end += 64 * 1024
+                length = min(end, len(data)) - offset - len(decompressor.unused_data)
+                page = decode_record(record)
+                rows.append((page.ncaa_id, page.season, page.url, page.kind, page.status,
+                             hashlib.sha256(page.body).hexdigest(), page.fetched_at, page.fetched_at,
+                             segment, offset, length, len(page.body)))
+                offset += length
+            if isinstance(data, mmap.mmap):
+                data.close()
+            with conn:
+                conn.executemany("INSERT INTO pages (ncaa_id, season, url, kind, status, sha256, fetched_at, "
+                                 "last_seen, segment, offset, length, bytes) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                 rows)
+            count += len(rows)
+        return count
+
+
+# ============================================================================
+# SCRAPE HOOKS
+# ============================================================================
+
+# Used by the rosters fetchers; None turns archiving off
+store: Optional[PageArchive] = PageArchive()
+
+_scope = threading.local()
+
+
+@contextmanager
+def scope(team: Dict, season: str):
+    """Archive the pages fetched on this thread as this team's"""
+    previous = getattr(_scope, 'team', None)
+    _scope.team = (team.get('ncaa_id'), season)
+    try:
+        yield
+    finally:
+        _scope.team = previous
+
+
+def record(url: str, body, kind: str = FETCHED, status: int = 200, content_type: str = 'text/html'):
+    """Archive a page for the team in scope, if any; never raises"""
+    team = getattr(_scope, 'team', None)
+    if store is None or team is None or not body:
+        return
+    try:
+        store.add(url, body.encode('utf-8') if isinstance(body, str) else body, team[0], team[1], kind,
+                  status, content_type)
+    except Exception as e:
+        logger.warning(f"Could not archive {url}: {e}")
+
+
+# ============================================================================
+# MAIN ENTRY POINT
+# ============================================================================
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description='Inspect the raw-page archive')
+    parser.add_argument('-dir', dest='root', default=ARCHIVE_DIR, help=f'Archive directory (default {ARCHIVE_DIR})')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('stats', help='Records and bytes per season and kind')
+    for name, description in (('list', 'Index rows matching the filters'), ('get', 'Print the newest matching page')):
+        sub = subparsers.add_parser(name, help=description)
+        sub.add_argument('-season', dest='season')
+        sub.add_argument('-team', dest='team', type=int)
+        sub.add_argument('-url', dest='url')
+        sub.add_argument('-kind', dest='kind', choices=[FETCHED, RENDERED])
+        sub.add_argument('-all', action='store_true', dest='all', help='Every record, not only the newest')
+    subparsers.add_parser('rebuild', help='Recreate index.db from the segment files')
+    results = parser.parse_args()
+
+    archive = PageArchive(results.root)
+    if results.command == 'stats':
+        for row in archive.stats():
+            print(f"{row['season'] or '-':<10}{row['kind']:<10}{row['records']:>8} records{row['teams']:>6} teams"
+                  f"{row['bytes'] / 1024 / 1024:>9.1f} MB{row['stored'] / 1024 / 1024:>8.1f} MB stored")
+        print(f"{len(archive.segments())} segments in {results.root}")
+    elif results.command == 'rebuild':
+        logger.info(f"Indexed {archive.rebuild()} records")
+    else:
+        entries = archive.lookup(results.team, results.season, results.url, results.kind, latest=not results.all)
+        if results.command == 'list':
+            for entry in entries:
+                print(f"{entry['ncaa_id']!s:>8}  {entry['season'] or '-':<8} {entry['kind']:<9}{entry['status']:>4}  "
+                      f"{datetime.fromtimestamp(entry['fetched_at']).strftime('%Y-%m-%d %H:%M')}  "
+                      f"{entry['bytes'] / 1024:>6.0f} KB  {entry['url']}")
+        elif not entries:
+            sys.exit("No archived page matches")
+        else:
+            newest = max(entries, key=lambda entry: entry['fetched_at'])
+            sys.stdout.write(archive.read(newest).text)
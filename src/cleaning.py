@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Roster cleaning stage - Python port of analysis/cleaning.qmd
+
+Works on whole columns at once: every transform is computed once per distinct
+value and then mapped back over the column, so a full season cleans in well
+under a second instead of a manual hand-off to R.
+
+The output has the notebook's columns (CLEANED_COLUMNS) followed by the
+latitude/longitude/city/state/county/country columns finished_rosters.csv
+carries (geocode.GEO_COLUMNS), filled by the offline geocoder from each
+player's original hometown. -no-geocode leaves them out.
+
+Usage:
+    python src/cleaning.py data/rosters_2023.csv
+    python src/cleaning.py data/rosters_2023.csv -o data/rosters_2023_cleaned.csv
+    python src/cleaning.py data/rosters_2023.csv -no-geocode
+"""
+
+import re
+import csv
+import argparse
+import logging
+from typing import List, Dict, Optional, Callable, Iterable
+
+from places import US_STATES, COUNTRY_FIXES
+from hometown import parse_hometowns, USA
+from output import open_text
+from geocode import Geocoder, GEO_COLUMNS, load_geocoder
+
+logger = logging.getLogger(__name__)
+
+Columns = Dict[str, List[Optional[str]]]
+
+
+# ============================================================================
+# CONSTANTS
+# ============================================================================
+
+POSITIONS_FILE = 'data/cleaned_positions.csv'
+YEARS_FILE = 'data/years_cleaned.csv'
+
+# readr::read_csv() treats these as missing
+NA_VALUES = ('', 'NA')
+
+# Column order of the cleaned output (same as the notebook's final data frame),
+# before GEO_COLUMNS
+CLEANED_COLUMNS = [
+    'ncaa_id', 'team', 'player_id', 'name', 'year', 'hometown', 'homestate',
+    'high_school', 'previous_school_clean', 'height_clean', 'position', 'jersey',
+    'url', 'season', 'height_ft', 'height_in', 'total_inches', 'primary_position',
+    'secondary_position', 'position_full', 'year_clean', 'redshirt', 'hs_clean',
+    'hometown_clean', 'state_clean', 'country_clean'
+]
+
+NUMERIC_RE = re.compile(r'^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$')
+
+
+# ============================================================================
+# COLUMN HELPERS
+# ============================================================================
+
+def map_distinct(func: Callable, values: Iterable) -> list:
+    """Apply func once per distinct value and map the results back"""
+    values = list(values)
+    lookup = {v: func(v) for v in set(values)}
+    return [lookup[v] for v in values]
+
+
+def read_columns(path: str) -> Columns:
+    """Read a roster CSV into a dict of columns, with readr's NA handling"""
+    with open_text(path) as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        # Short rows are padded with NA, like readr does
+        rows = [r + [''] * (len(header) - len(r)) for r in reader]
+    columns = {}
+    for i, name in enumerate(header):
+        columns[name] = [None if r[i] in NA_VALUES else r[i] for r in rows]
+    return columns
+
+
+def write_columns(columns: Columns, path: str, order: List[str] = CLEANED_COLUMNS):
+    """Write columns as CSV (write_csv(quote="all", na=""))"""
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+        writer.writerow(order)
+        writer.writerows(zip(*[columns[c] for c in order]))
+
+
+def as_numeric(text: Optional[str]) -> Optional[float]:
+    """R's as.numeric(): surrounding whitespace allowed, anything else is NA"""
+    if text is None:
+        return None
+    text = text.strip()
+    if not NUMERIC_RE.match(text):
+        return None
+    return float(text)
+
+
+def format_number(value: Optional[float]) -> Optional[str]:
+    """Format numbers the way write_csv() does (74, not 74.0)"""
+    if value is None:
+        return None
+    return str(int(value)) if value == int(value) else str(value)
+
+
+def split_once(text: Optional[str], sep: str) -> tuple:
+    """tidyr::separate(..., extra='merge') into two pieces"""
+    if text is None:
+        return None, None
+    if sep not in text:
+        return text, None
+    first, rest = text.split(sep, 1)
+    return first, rest
+
+
+def load_lookup(path: str, key: str, value_columns: List[str]) -> Dict[str, tuple]:
+    """Load a cleaning lookup CSV keyed on one column"""
+    lookup = {}
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            values = tuple(None if row[c] in NA_VALUES else row[c] for c in value_columns)
+            # years_cleaned.csv lists 'Rs.' twice; keep the row that has a cleaned value
+            if row[key] in lookup and values[0] is None:
+                continue
+            lookup[row[key]] = values
+    return lookup
+
+
+# ============================================================================
+# HEIGHT
+# ============================================================================
+
+def parse_height(height: Optional[str]) -> tuple:
+    """6'2\" / 6-2 / 6’2 -> (feet, inches, total inches)"""
+    if height is None:
+        return None, None, None
+    cleaned = (height.replace("'", '-', 1).replace('’', '-', 1)
+               .replace("''", '', 1).replace('"', '', 1))
+    ft, inches = split_once(cleaned, '-')
+    ft, inches = as_numeric(ft), as_numeric(inches)
+    total = ft * 12 + inches if ft is not None and inches is not None else None
+    return format_number(ft), format_number(inches), format_number(total)
+
+
+def clean_heights(columns: Columns):
+    parsed = map_distinct(parse_height, columns['height'])
+    columns['height_ft'] = [p[0] for p in parsed]
+    columns['height_in'] = [p[1] for p in parsed]
+    columns['total_inches'] = [p[2] for p in parsed]
+
+
+# ============================================================================
+# POSITION AND YEAR
+# ============================================================================
+
+def clean_positions(columns: Columns, positions_file: str = POSITIONS_FILE):
+    lookup = load_lookup(positions_file, 'position', ['cleaned_position'])
+
+    def split_position(position):
+        cleaned = lookup.get(position, (None,))[0]
+        primary, secondary = split_once(None if cleaned == 'N/A' else cleaned, '/')
+        return cleaned, primary, secondary
+
+    parsed = map_distinct(split_position, columns['position'])
+    columns['position_full'] = [p[0] for p in parsed]
+    columns['primary_position'] = [p[1] for p in parsed]
+    columns['secondary_position'] = [p[2] for p in parsed]
+
+
+def clean_years(columns: Columns, years_file: str = YEARS_FILE):
+    lookup = load_lookup(years_file, 'year', ['year-clean', 'redshirt'])
+    parsed = [lookup.get(y, (None, None)) for y in columns['year']]
+    columns['year_clean'] = [p[0] for p in parsed]
+    columns['redshirt'] = [p[1] for p in parsed]
+
+
+# ============================================================================
+# PREVIOUS SCHOOL
+# ============================================================================
+
+def clean_previous_schools(columns: Columns):
+    """
+    Move high schools listed as the previous school into hs_clean
+
+    Mirrors the notebook's ifelse(previous_school == hs_clean, NA, ...): in R a
+    comparison with NA is NA, so previous_school is only kept when both it and
+    hs_clean are present and different.
+    """
+    hs_clean = []
+    previous_clean = []
+    for high_school, previous in zip(columns['high_school'], columns['previous_school']):
+        if high_school is None and previous is not None and 'HS' in previous:
+            hs = previous
+        else:
+            hs = high_school
+        hs_clean.append(hs)
+        previous_clean.append(previous if previous is not None and hs is not None and previous != hs else None)
+    columns['hs_clean'] = hs_clean
+    columns['previous_school_clean'] = previous_clean
+
+
+# ============================================================================
+# HOMETOWN, STATE AND COUNTRY
+# ============================================================================
+
+def normalize_hometown(hometown: Optional[str]) -> Optional[str]:
+    """Upper-case, de-punctuated hometown (the notebook's hometown_cleaned)"""
+    if hometown is None:
+        return None
+    cleaned = hometown.replace('.', '', 1).upper()
+    cleaned = cleaned.replace('.', '', 1)
+    cleaned = re.sub(r'/.*', '', cleaned, count=1)
+    cleaned = re.sub(r'\.$', '', cleaned)
+    cleaned = cleaned.replace(',', ', ', 1)
+    cleaned = cleaned.replace('-', ' ', 1)
+    return re.sub(r'\s+', ' ', cleaned).strip()
+
+
+def split_homestate(hometown: Optional[str]) -> tuple:
+    """Split hometown at the first comma and expand postal abbreviations"""
+    town, homestate = split_once(hometown, ',')
+    if homestate is not None:
+        homestate = homestate.strip().replace('.', '', 1)
+        homestate = US_STATES.get(homestate, homestate)
+    return town, homestate
+
+
+def last_part(hometown_clean: Optional[str]) -> Optional[str]:
+    """Last ", "-separated piece of the hometown, where a country would be"""
+    if hometown_clean is None:
+        return None
+    parts = hometown_clean.split(', ')
+    if parts and parts[-1] == '':
+        parts.pop()
+    if not parts or parts[-1] in NA_VALUES:
+        return None
+    return parts[-1]
+
+
+def clean_hometowns(columns: Columns):
+    """
+    Split hometowns into town, state and country
+
+    The state comes from the hometown parser, which replaces the notebook's
+    postmastr step and hand fixes. The country follows the notebook's rule:
+    'USA' when a state was found and the hometown has a last piece, that last
+    piece otherwise (the parser's own country is not used).
+    """
+    hometown_clean = map_distinct(normalize_hometown, columns['hometown'])
+    parsed = parse_hometowns(columns['hometown'])
+    split = map_distinct(split_homestate, columns['hometown'])
+    homestate = [s[1] for s in split]
+
+    state_clean = [p.state for p in parsed]
+    countries = []
+    for place, temp in zip(parsed, map_distinct(last_part, hometown_clean)):
+        country = USA if place.state is not None and temp is not None else temp
+        countries.append(COUNTRY_FIXES.get(country, country))
+
+    columns['hometown'] = [s[0] for s in split]
+    columns['homestate'] = homestate
+    columns['hometown_clean'] = hometown_clean
+    columns['state_clean'] = state_clean
+    columns['country_clean'] = countries
+
+
+# ============================================================================
+# PIPELINE
+# ============================================================================
+
+def geocode_hometowns(columns: Columns, geocoder: Geocoder):
+    """Add GEO_COLUMNS, located from the hometowns as scraped"""
+    rows = geocoder.geocode_rows([{'hometown': hometown} for hometown in columns['hometown']])
+    for name in GEO_COLUMNS:
+        columns[name] = [row[name] for row in rows]
+
+
+def clean_rosters(columns: Columns, geocoder: Optional[Geocoder] = None) -> Columns:
+    """Run every cleaning step over a season's columns, geocoding first if given a geocoder"""
+    if geocoder is not None:
+        geocode_hometowns(columns, geocoder)
+    clean_heights(columns)
+    clean_positions(columns)
+    clean_years(columns)
+    clean_previous_schools(columns)
+    clean_hometowns(columns)
+    columns['height_clean'] = columns.pop('height')
+    columns.pop('previous_school')
+    return columns
+
+
+def clean_file(input_path: str, output_path: Optional[str] = None, geocode: bool = True) -> str:
+    """Clean (and geocode) a scraped roster CSV and write the cleaned CSV next to it"""
+    if output_path is None:
+        output_path = re.sub(r'\.csv(\.gz|\.zst)?$', '', input_path) + '_cleaned.csv'
+    columns = clean_rosters(read_columns(input_path), load_geocoder() if geocode else None)
+    write_columns(columns, output_path, CLEANED_COLUMNS + GEO_COLUMNS if geocode else CLEANED_COLUMNS)
+    logger.info(f"Cleaned {len(columns['ncaa_id'])} rows from {input_path} into {output_path}")
+    return output_path
+
+
+# ============================================================================
+# MAIN ENTRY POINT
+# ============================================================================
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description='Clean a scraped roster CSV')
+    parser.add_argument('input', help='Roster CSV such as data/rosters_2023.csv')
+    parser.add_argument('-o', action='store', dest='output',
+                        help='Output path (default: <input>_cleaned.csv)')
+    parser.add_argument('-no-geocode', action='store_false', dest='geocode',
+                        help='Leave out the geocoded columns')
+    results = parser.parse_args()
+
+    clean_file(results.input, results.output, results.geocode)
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Aggregate cube for roster analytics
+
+Materializes player counts, height sums and sums of squares and
+international player counts for every
+
+    season x division x conference x primary position x year class
+
+cell, joined with data/vb_teams.csv for division and conference. Seasons
+are normalized ("2023", "2023-2024" -> "2023-24") so one season is one
+slice however the roster CSV spelled it. The cube
+lives next to the players table in the roster store and is updated one team
+at a time: RosterStore.upsert_team() subtracts the team's previous
+contribution and adds the new one, so re-scraping a team never rebuilds the
+whole cube. Questions such as "average height by position and division per
+season" are then a GROUP BY over a few thousand rows.
+
+Usage:
+    python src/cube.py build
+    python src/cube.py query -by season division primary_position
+    python src/cube.py query -by conference -season 2023-24 -division I
+"""
+
+import csv
+import sys
+import math
+import time
+import sqlite3
+import argparse
+import logging
+from typing import List, Dict, Any, Optional
+
+from cleaning import POSITIONS_FILE, YEARS_FILE, load_lookup, parse_height
+from hometown import parse_hometown, USA
+from identity import normalize_season
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================================
+# SCHEMA
+# ============================================================================
+
+VB_TEAMS_FILE = 'data/vb_teams.csv'
+
+DIMENSIONS = ['season', 'division', 'conference', 'primary_position', 'year_class']
+MEASURES = ['players', 'heights', 'height_sum', 'height_sq_sum', 'international']
+
+# Value used for a missing dimension so every player lands in some cell
+UNKNOWN = 'NA'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cube_team_cells (
+    ncaa_id INTEGER NOT NULL,
+    team_season TEXT NOT NULL,
+    season TEXT NOT NULL,
+    division TEXT NOT NULL,
+    conference TEXT NOT NULL,
+    primary_position TEXT NOT NULL,
+    year_class TEXT NOT NULL,
+    players INTEGER NOT NULL,
+    heights INTEGER NOT NULL,
+    height_sum REAL NOT NULL,
+    height_sq_sum REAL NOT NULL,
+    international INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_cube_team_cells_team ON cube_team_cells (ncaa_id, team_season);
+CREATE TABLE IF NOT EXISTS cube (
+    season TEXT NOT NULL,
+    division TEXT NOT NULL,
+    conference TEXT NOT NULL,
+    primary_position TEXT NOT NULL,
+    year_class TEXT NOT NULL,
+    players INTEGER NOT NULL,
+    heights INTEGER NOT NULL,
+    height_sum REAL NOT NULL,
+    height_sq_sum REAL NOT NULL,
+    international INTEGER NOT NULL,
+    PRIMARY KEY (season, division, conference, primary_position, year_class)
+);
+"""
+
+Cell = Dict[str, Any]
+
+
+# ============================================================================
+# CELL COMPUTATION
+# ============================================================================
+
+def load_team_dimensions(path: str = VB_TEAMS_FILE) -> Dict[int, tuple]:
+    """ncaa_id -> (division, conference)"""
+    with open(path, newline='') as f:
+        return {int(row['ncaa_id']): (row['division'] or UNKNOWN, row['conference'] or UNKNOWN)
+                for row in csv.DictReader(f) if row.get('ncaa_id')}
+
+
+class RosterCube:
+    """Incrementally maintained aggregate cube inside a roster store database"""
+
+    def __init__(self, conn: sqlite3.Connection, teams_file: str = VB_TEAMS_FILE):
+        self.conn = conn
+        self.teams_file = teams_file
+        self.conn.executescript(SCHEMA)
+        self._teams: Optional[Dict[int, tuple]] = None
+        self._positions: Optional[Dict[str, tuple]] = None
+        self._years: Optional[Dict[str, tuple]] = None
+
+    def _load_lookups(self):
+        # Loaded on first use so opening a store never depends on data/ files
+        if self._teams is None:
+            self._teams = load_team_dimensions(self.teams_file)
+            self._positions = load_lookup(POSITIONS_FILE, 'position', ['cleaned_position'])
+            self._years = load_lookup(YEARS_FILE, 'year', ['year-clean', 'redshirt'])
+
+    def team_cells(self, ncaa_id: int, season: str, players: List[sqlite3.Row]) -> Dict[tuple, Cell]:
+        """Aggregate one team-season's players into cube cells"""
+        self._load_lookups()
+        division, conference = self._teams.get(int(ncaa_id), (UNKNOWN, UNKNOWN))
+        season = normalize_season(season) or UNKNOWN
+        cells: Dict[tuple, Cell] = {}
+        for player in players:
+            position = self._positions.get(player['position'], (None,))[0]
+            primary = position.split('/')[0] if position and position != 'N/A' else UNKNOWN
+            year_class = self._years.get(player['year'], (None,))[0] or UNKNOWN
+            key = (season, division, conference, primary, year_class)
+            cell = cells.setdefault(key, dict.fromkeys(MEASURES, 0))
+
+            cell['players'] += 1
+            total_inches = parse_height(player['height'])[2]
+            if total_inches is not None:
+                inches = float(total_inches)
+                cell['heights'] += 1
+                cell['height_sum'] += inches
+                cell['height_sq_sum'] += inches * inches
+            country = parse_hometown(player['hometown']).country
+            if country and country != USA:
+                cell['international'] += 1
+        return cells
+
+    def refresh_team(self, ncaa_id: int, season: str):
+        """
+        Replace one team-season's contribution to the cube
+
+        Runs inside the caller's transaction (RosterStore wraps it together
+        with the players update).
+        """
+        measures = ', '.join(MEASURES)
+        old = self.conn.execute(
+            f"SELECT {', '.join(DIMENSIONS)}, {measures} FROM cube_team_cells WHERE ncaa_id = ? AND team_season = ?",
+            (ncaa_id, season)).fetchall()
+        subtract = ', '.join(f"{m} = {m} - ?" for m in MEASURES)
+        where = ' AND '.join(f"{d} = ?" for d in DIMENSIONS)
+        self.conn.executemany(f"UPDATE cube SET {subtract} WHERE {where}",
+                              [tuple(row)[len(DIMENSIONS):] + tuple(row)[:len(DIMENSIONS)] for row in old])
+        self.conn.execute("DELETE FROM cube WHERE players <= 0")
+        self.conn.execute("DELETE FROM cube_team_cells WHERE ncaa_id = ? AND team_season = ?", (ncaa_id, season))
+
+        players = self.conn.execute(
+            "SELECT position, year, height, hometown FROM players WHERE ncaa_id = ? AND season = ?",
+            (ncaa_id, season)).fetchall()
+        cells = self.team_cells(ncaa_id, season, players)
+        rows = [key + tuple(cell[m] for m in MEASURES) for key, cell in cells.items()]
+        placeholders = ', '.join('?' for _ in DIMENSIONS + MEASURES)
+        self.conn.executemany(
+            f"INSERT INTO cube_team_cells (ncaa_id, team_season, {', '.join(DIMENSIONS)}, {measures}) "
+            f"VALUES (?, ?, {placeholders})",
+            [(ncaa_id, season) + row for row in rows])
+        add = ', '.join(f"{m} = {m} + excluded.{m}" for m in MEASURES)
+        self.conn.executemany(
+            f"INSERT INTO cube ({', '.join(DIMENSIONS)}, {measures}) VALUES ({placeholders}) "
+            f"ON CONFLICT ({', '.join(DIMENSIONS)}) DO UPDATE SET {add}",
+            rows)
+
+    def rebuild(self) -> int:
+        """Recompute the whole cube from the players table"""
+        with self.conn:
+            self.conn.execute("DELETE FROM cube")
+            self.conn.execute("DELETE FROM cube_team_cells")
+            teams = self.conn.execute("SELECT DISTINCT ncaa_id, season FROM players").fetchall()
+            for ncaa_id, season in teams:
+                self.refresh_team(ncaa_id, season)
+        return len(teams)
+
+    # ========================================================================
+    # QUERIES
+    # ========================================================================
+
+    def query(self, by: List[str], **filters: Optional[str]) -> List[Dict[str, Any]]:
+        """
+        Roll the cube up to the `by` dimensions
+
+        Keyword filters restrict any dimension to one value. Each result row
+        has the dimension values plus players, avg_height, sd_height (inches)
+        and international_share.
+        """
+        unknown = [d for d in list(by) + list(filters) if d not in DIMENSIONS]
+        if unknown:
+            raise ValueError(f"Unknown dimensions {unknown}; choose from {DIMENSIONS}")
+
+        clauses = [f"{d} = ?" for d, v in filters.items() if v is not None]
+        params = [v for v in filters.values() if v is not None]
+        sql = f"SELECT {', '.join(list(by) + [f'SUM({m}) AS {m}' for m in MEASURES])} FROM cube"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        if by:
+            sql += f" GROUP BY {', '.join(by)} ORDER BY {', '.join(by)}"
+
+        results = []
+        for row in self.conn.execute(sql, params):
+            row = dict(zip(list(by) + MEASURES, row))
+            if not row['players']:
+                continue
+            n = row['heights']
+            mean = row['height_sum'] / n if n else None
+            variance = max(row['height_sq_sum'] / n - mean * mean, 0.0) if n else None
+            results.append({
+                **{d: row[d] for d in by},
+                'players': row['players'],
+                'avg_height': round(mean, 2) if mean is not None else None,
+                'sd_height': round(math.sqrt(variance), 2) if variance is not None else None,
+                'international_share': round(row['international'] / row['players'], 4),
+            })
+        return results
+
+
+# ============================================================================
+# MAIN ENTRY POINT
+# ============================================================================
+
+if __name__ == "__main__":
+    from store import RosterStore, DEFAULT_DB
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description='Roster aggregate cube')
+    parser.add_argument('-db', action='store', dest='db', default=DEFAULT_DB,
+                        help=f'Path to the SQLite database (default {DEFAULT_DB})')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    commands.add_parser('build', help='Rebuild the cube from every team-season in the store')
+
+    query_cmd = commands.add_parser('query', help='Roll up the cube and print CSV')
+    query_cmd.add_argument('-by', nargs='*', dest='by', default=['season'], choices=DIMENSIONS,
+                           help='Dimensions to group by (default season)')
+    for dimension in DIMENSIONS:
+        query_cmd.add_argument(f'-{dimension}', dest=dimension, help=f'Only this {dimension}')
+
+    results = parser.parse_args()
+
+    with RosterStore(results.db) as store:
+        if results.command == 'build':
+            start = time.perf_counter()
+            teams = store.cube.rebuild()
+            logger.info(f"Rebuilt the cube from {teams} team-seasons in {time.perf_counter() - start:.2f}s")
+        else:
+            start = time.perf_counter()
+            rows = store.cube.query(results.by, **{d: getattr(results, d) for d in DIMENSIONS})
+            elapsed = time.perf_counter() - start
+            columns = results.by + ['players', 'avg_height', 'sd_height', 'international_share']
+            writer = csv.writer(sys.stdout)
+            writer.writerow(columns)
+            for row in rows:
+                writer.writerow([row[c] for c in columns])
+            logger.info(f"{len(rows)} rows in {elapsed * 1000:.1f} ms")
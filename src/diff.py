@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Season-over-season roster diff
+
+Compares two season CSVs team by team: players who joined, players who left
+and returning players whose details changed. Departed players who turn up on
+another team with a previous_school naming their old team are reported as
+transfers, along with a league-wide team-to-team transfer flow table.
+
+Rows are keyed by (ncaa_id, player_id). Players whose ID changed between
+seasons (common after a site redesign) are paired up by (ncaa_id, name)
+instead. Every match is a dictionary lookup, so a full two-season diff runs in
+a fraction of a second.
+
+Usage:
+    python src/diff.py data/rosters_2023.csv data/rosters_2025-26.csv
+    python src/diff.py data/rosters_2023.csv data/rosters_2025-26.csv -o data/diff_2023_2025-26
+"""
+
+import os
+import re
+import csv
+import time
+import argparse
+import logging
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import List, Dict, Tuple
+
+from identity import normalize_name
+from schools import TEAMS_FILE, load_team_aliases, school_key
+from output import open_text, existing, without_suffix
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================================
+# CONSTANTS
+# ============================================================================
+
+# Fields compared for returning players
+COMPARED_FIELDS = ['name', 'year', 'position', 'jersey', 'height', 'hometown', 'high_school']
+
+DIFF_COLUMNS = ['ncaa_id', 'team', 'change', 'player_id', 'name', 'changes']
+TRANSFER_COLUMNS = ['name', 'from_ncaa_id', 'from_team', 'to_ncaa_id', 'to_team', 'previous_school']
+FLOW_COLUMNS = ['from_ncaa_id', 'from_team', 'to_ncaa_id', 'to_team', 'players']
+
+ADDED, DEPARTED, CHANGED = 'added', 'departed', 'changed'
+
+Row = Dict[str, str]
+
+
+# ============================================================================
+# DIFF
+# ============================================================================
+
+@dataclass
+class SeasonDiff:
+    """Result of comparing an old season with a new one"""
+    added: List[Row] = field(default_factory=list)
+    departed: List[Row] = field(default_factory=list)
+    # (old row, new row, {field: (old value, new value)})
+    changed: List[Tuple[Row, Row, Dict[str, tuple]]] = field(default_factory=list)
+    # (old row, new row)
+    transfers: List[Tuple[Row, Row]] = field(default_factory=list)
+    # Teams with rows in only one of the two seasons (usually a failed scrape)
+    skipped_teams: List[str] = field(default_factory=list)
+
+    def flows(self) -> Counter:
+        """(from ncaa_id, from team, to ncaa_id, to team) -> players"""
+        return Counter((old['ncaa_id'], old['team'], new['ncaa_id'], new['team'])
+                       for old, new in self.transfers)
+
+
+def load_season(path: str) -> List[Row]:
+    """Rows of a season CSV, plain, .gz or .zst"""
+    with open_text(existing(path) or path) as f:
+        return [r for r in csv.DictReader(f) if r.get('ncaa_id') and r.get('name')]
+
+
+def name_key(row: Row) -> str:
+    return normalize_name(row.get('name'))
+
+
+def index_rows(rows: List[Row]) -> Tuple[Dict[tuple, Row], Dict[tuple, Row]]:
+    """Hash tables on (ncaa_id, player_id) and (ncaa_id, name); first row wins"""
+    by_id: Dict[tuple, Row] = {}
+    by_name: Dict[tuple, Row] = {}
+    for row in rows:
+        if row.get('player_id'):
+            by_id.setdefault((row['ncaa_id'], row['player_id']), row)
+        by_name.setdefault((row['ncaa_id'], name_key(row)), row)
+    return by_id, by_name
+
+
+def compare(old: Row, new: Row) -> Dict[str, tuple]:
+    """Fields that differ between two rows of the same player"""
+    return {f: (old.get(f, ''), new.get(f, '')) for f in COMPARED_FIELDS
+            if (old.get(f) or '').strip() != (new.get(f) or '').strip()}
+
+
+def match_players(old_rows: List[Row], new_rows: List[Row]) -> Tuple[List[Tuple[Row, Row]], List[Row], List[Row]]:
+    """
+    Pair up returning players
+
+    Returns:
+        (matched (old, new) pairs, unmatched old rows, unmatched new rows)
+    """
+    old_by_id, old_by_name = index_rows(old_rows)
+    matched = []
+    seen_old = set()
+    unmatched_new = []
+    # Join on (ncaa_id, player_id), then retry the leftovers on (ncaa_id, name)
+    for row in new_rows:
+        old = old_by_id.get((row['ncaa_id'], row.get('player_id'))) if row.get('player_id') else None
+        if old is not None and id(old) not in seen_old:
+            seen_old.add(id(old))
+            matched.append((old, row))
+        else:
+            unmatched_new.append(row)
+
+    still_unmatched = []
+    for row in unmatched_new:
+        old = old_by_name.get((row['ncaa_id'], name_key(row)))
+        if old is not None and id(old) not in seen_old:
+            seen_old.add(id(old))
+            matched.append((old, row))
+        else:
+            still_unmatched.append(row)
+
+    departed = [r for r in old_rows if id(r) not in seen_old and old_by_name.get((r['ncaa_id'], name_key(r))) is r]
+    added = []
+    seen_new = set()
+    for row in still_unmatched:
+        key = (row['ncaa_id'], name_key(row))
+        if key not in seen_new:
+            seen_new.add(key)
+            added.append(row)
+    return matched, departed, added
+
+
+def find_transfers(departed: List[Row], added: List[Row], teams: Dict[str, tuple]) -> List[Tuple[Row, Row]]:
+    """
+    Departed players who joined another team that names their old team
+
+    The new row's previous_school must resolve to the old team's ncaa_id, or
+    share its match key with the old team name.
+    """
+    departed_by_name: Dict[str, List[Row]] = {}
+    for row in departed:
+        departed_by_name.setdefault(name_key(row), []).append(row)
+
+    transfers = []
+    for row in added:
+        previous = row.get('previous_school')
+        if not previous:
+            continue
+        previous_key = school_key(previous)
+        previous_id = teams.get(previous_key, (None, None))[1]
+        for old in departed_by_name.get(name_key(row), ()):
+            if old['ncaa_id'] == row['ncaa_id']:
+                continue
+            if previous_id == old['ncaa_id'] or previous_key == school_key(old['team']):
+                transfers.append((old, row))
+                break
+    return transfers
+
+
+def diff_seasons(old_rows: List[Row], new_rows: List[Row], teams_file: str = TEAMS_FILE) -> SeasonDiff:
+    """
+    Diff two seasons; see the module docstring
+
+    Added and departed players are only reported for teams present in both
+    seasons, but players joining a team new to the data still count as
+    transfers.
+    """
+    matched, departed, added = match_players(old_rows, new_rows)
+    old_teams = {r['ncaa_id'] for r in old_rows}
+    new_teams = {r['ncaa_id'] for r in new_rows}
+    departed = [r for r in departed if r['ncaa_id'] in new_teams]
+    result = SeasonDiff(added=[r for r in added if r['ncaa_id'] in old_teams], departed=departed,
+                        skipped_teams=sorted(old_teams ^ new_teams))
+    for old, new in matched:
+        changes = compare(old, new)
+        if changes:
+            result.changed.append((old, new, changes))
+    result.transfers = find_transfers(departed, added, load_team_aliases(teams_file))
+    return result
+
+
+# ============================================================================
+# OUTPUT
+# ============================================================================
+
+def diff_rows(result: SeasonDiff) -> List[list]:
+    """Per-team rows, sorted by team then change type"""
+    rows = []
+    for row in result.added:
+        rows.append([row['ncaa_id'], row['team'], ADDED, row.get('player_id', ''), row['name'], ''])
+    for row in result.departed:
+        rows.append([row['ncaa_id'], row['team'], DEPARTED, row.get('player_id', ''), row['name'], ''])
+    for old, new, changes in result.changed:
+        described = '; '.join(f"{f}: {a} -> {b}" for f, (a, b) in changes.items())
+        rows.append([new['ncaa_id'], new['team'], CHANGED, new.get('player_id', ''), new['name'], described])
+    order = {ADDED: 0, DEPARTED: 1, CHANGED: 2}
+    rows.sort(key=lambda r: (r[1], order[r[2]], r[4]))
+    return rows
+
+
+def write_diff(result: SeasonDiff, prefix: str):
+    """Write <prefix>.csv, <prefix>_transfers.csv and <prefix>_flows.csv"""
+    with open(f"{prefix}.csv", 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(DIFF_COLUMNS)
+        writer.writerows(diff_rows(result))
+
+    with open(f"{prefix}_transfers.csv", 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(TRANSFER_COLUMNS)
+        for old, new in sorted(result.transfers, key=lambda t: (t[0]['team'], t[1]['name'])):
+            writer.writerow([new['name'], old['ncaa_id'], old['team'], new['ncaa_id'], new['team'],
+                             new.get('previous_school', '')])
+
+    with open(f"{prefix}_flows.csv", 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(FLOW_COLUMNS)
+        for (from_id, from_team, to_id, to_team), players in sorted(
+                result.flows().items(), key=lambda item: (-item[1], item[0][1], item[0][3])):
+            writer.writerow([from_id, from_team, to_id, to_team, players])
+
+
+def season_label(path: str) -> str:
+    return re.sub(r'^rosters_', '', os.path.splitext(os.path.basename(without_suffix(path)))[0])
+
+
+# ============================================================================
+# MAIN ENTRY POINT
+# ============================================================================
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description='Diff two season roster CSVs')
+    parser.add_argument('old', help='Earlier season CSV such as data/rosters_2023.csv')
+    parser.add_argument('new', help='Later season CSV such as data/rosters_2025-26.csv')
+    parser.add_argument('-o', dest='output',
+                        help='Output prefix (default: data/diff_<old season>_<new season>)')
+    parser.add_argument('-teams', dest='teams', default=TEAMS_FILE,
+                        help=f'Team list used to resolve previous schools (default {TEAMS_FILE})')
+    results = parser.parse_args()
+
+    start = time.perf_counter()
+    result = diff_seasons(load_season(results.old), load_season(results.new), results.teams)
+    elapsed = time.perf_counter() - start
+
+    prefix = results.output or f"data/diff_{season_label(results.old)}_{season_label(results.new)}"
+    write_diff(result, prefix)
+
+    if result.skipped_teams:
+        logger.info(f"Skipped {len(result.skipped_teams)} teams found in only one season")
+    logger.info(f"{len(result.added)} added, {len(result.departed)} departed, "
+                f"{len(result.changed)} changed, {len(result.transfers)} transfers "
+                f"across {len(result.flows())} team pairs ({elapsed:.2f}s)")
+    logger.info(f"Wrote {prefix}.csv, {prefix}_transfers.csv and {prefix}_flows.csv")
@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+"""
+Fill missing roster fields from players' bio pages
+
+Many roster templates leave out a player's high school or height (the
+Sidearm container layout has no height at all) even though her bio page,
+which every row links to in `url`, lists them. This stage reads season
+CSVs, and for rows missing any of the chosen fields:
+
+  - collects their bio URLs across every input file, so a player who appears
+    in several seasons (or twice in one) is fetched once
+  - answers what it can from the bio cache (data/bio_cache.db), which keeps
+    every page's parsed fields; failed fetches are retried after
+    RETRY_FAILED_AFTER, and -max-age re-fetches older pages
+  - crawls the rest through the host controller (throttle.py) with at most
+    -per-host fetches in flight to any one athletics site, taking hosts in
+    turn so the workers stay spread across sites
+  - fills only the fields that were missing, never overwriting a value the
+    roster page gave, and writes each filled value's source (bio URL, the
+    label it was found under, when the page was fetched) to a sidecar CSV
+
+Bio pages are read by their label/value pairs (dt/dd, th/td, a title span
+and its value, "Hometown:" followed by text), which covers the classic and
+current Sidearm bio layouts and most others.
+
+previous_school is off by default: it is blank for most freshmen, whose bios
+have nothing to add, so asking for it crawls most of a roster.
+
+Usage:
+    python src/enrich.py data/rosters_2025-26.csv
+    python src/enrich.py data/rosters_2024-25.csv data/rosters_2025-26.csv -workers 16 -per-host 2
+    python src/enrich.py data/rosters_2025-26.csv -fields high_school previous_school -dry-run
+
+Writes data/rosters_2025-26_enriched.csv and data/rosters_2025-26_enriched_sources.csv.
+"""
+
+import os
+import re
+import csv
+import json
+import time
+import sqlite3
+import logging
+import argparse
+import threading
+from collections import Counter, deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit, urlunsplit
+from typing import List, Dict, Optional, Iterable, Tuple
+
+from bs4 import BeautifulSoup, Tag
+
+import rosters
+import throttle
+from rosters import FieldExtractors
+from output import open_text, existing, without_suffix
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================================
+# CONSTANTS
+# ============================================================================
+
+CACHE_FILE = 'data/bio_cache.db'
+
+ENRICH_FIELDS = ['high_school', 'previous_school', 'hometown', 'height', 'position']
+DEFAULT_FIELDS = ['high_school', 'hometown', 'height', 'position']
+
+MISSING_VALUES = ('', 'NA', 'N/A', 'None', '-', '--')
+
+DEFAULT_WORKERS = 16
+PER_HOST = 2
+
+# Seconds before a bio page that couldn't be fetched is tried again
+RETRY_FAILED_AFTER = 7 * 86400
+
+# Longer than any real value; a match this long picked up a paragraph
+MAX_VALUE_LENGTH = 120
+
+# Normalized bio labels -> field
+BIO_LABELS = {
+    'height': 'height', 'ht': 'height',
+    'position': 'position', 'pos': 'position',
+    'hometown': 'hometown', 'home town': 'hometown',
+    'high school': 'high_school', 'highschool': 'high_school', 'hs': 'high_school',
+    'previous school': 'previous_school', 'last school': 'previous_school', 'previous college': 'previous_school',
+    'former school': 'previous_school', 'previous schools': 'previous_school',
+}
+
+# Labels whose value is "Hometown / High School[ / Previous School]"
+COMBINED_LABELS = {'hometown/high school', 'hometown/high school/previous school', 'hometown/last school',
+                   'hometown/previous school'}
+
+LABEL_RE = re.compile(r'[\s:.]+$')
+SLASH_RE = re.compile(r'\s*/\s*')
+
+SOURCE_COLUMNS = ['ncaa_id', 'season', 'player_id', 'name', 'field', 'value', 'source_url', 'label', 'fetched_at']
+
+
+def missing(value: Optional[str]) -> bool:
+    return value is None or value.strip() in MISSING_VALUES
+
+
+def normalize_url(url: str) -> str:
+    """One key per bio page: lower-case host, no query, fragment or trailing slash"""
+    parts = urlsplit(url.strip())
+    return urlunsplit((parts.scheme.lower() or 'https', parts.netloc.lower(), parts.path.rstrip('/'), '', ''))
+
+
+def normalize_label(text: str) -> str:
+    return SLASH_RE.sub('/', LABEL_RE.sub('', ' '.join(text.split()).lower()))
+
+
+# ============================================================================
+# BIO PAGE PARSING
+# ============================================================================
+
+def clean_value(field_name: str, text: str) -> str:
+    value = FieldExtractors.clean_text(text)
+    if len(value) > MAX_VALUE_LENGTH:
+        return ''
+    if field_name == 'height':
+        return FieldExtractors.extract_height(value)
+    if field_name == 'position':
+        return FieldExtractors.extract_position(value)
+    return value
+
+
+def header_row(tag) -> bool:
+    """True inside a <thead> or a table row of <th> cells only (column headers, not labels)"""
+    if tag.find_parent('thead') is not None:
+        return True
+    row = tag.find_parent('tr')
+    return row is not None and all(cell.name == 'th' for cell in row.find_all(['th', 'td']))
+
+
+def label_pairs(html: BeautifulSoup) -> Iterable[Tuple[str, str]]:
+    """(label, value text) for every leaf element whose text is a known label, in page order"""
+    for tag in html.find_all(True):
+        if tag.find(True) is not None:
+            continue
+        label = normalize_label(tag.get_text())
+        if label not in BIO_LABELS and label not in COMBINED_LABELS:
+            continue
+        if header_row(tag):
+            continue
+        # dt/dd, th/td, <span>Label</span><span>Value</span>
+        sibling = tag.find_next_sibling()
+        if sibling is not None and sibling.get_text(strip=True):
+            value = sibling.get_text(' ', strip=True)
+        else:
+            # <li><strong>Hometown:</strong> Omaha, Neb.</li>
+            value = ' '.join(' '.join(
+                node.get_text(' ') if isinstance(node, Tag) else str(node) for node in tag.next_siblings
+            ).split())
+        # A header row's next cell is the next label, not a value
+        if value and normalize_label(value) not in BIO_LABELS:
+            yield label, value
+
+
+def bio_fields(html: BeautifulSoup) -> Dict[str, Tuple[str, str]]:
+    """field -> (value, label it was found under); the first label on the page wins"""
+    found: Dict[str, Tuple[str, str]] = {}
+    for label, text in label_pairs(html):
+        if label in COMBINED_LABELS:
+            parts = FieldExtractors.parse_hometown_school(text)
+            candidates = [(name, parts[name]) for name in ('hometown', 'high_school', 'previous_school')]
+        else:
+            candidates = [(BIO_LABELS[label], text)]
+        for name, raw in candidates:
+            value = clean_value(name, raw) if raw else ''
+            if value and name not in found:
+                found[name] = (value, label)
+    return found
+
+
+# ============================================================================
+# CACHE
+# ============================================================================
+
+@dataclass
+class BioPage:
+    url: str
+    status: Optional[int]  # None if the host never answered
+    fetched_at: float
+    fields: Dict[str, Tuple[str, str]] = field(default_factory=dict)
+    cached: bool = False
+
+
+class BioCache:
+    """Parsed bio pages by normalized URL"""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS bios (
+        url TEXT PRIMARY KEY,
+        status INTEGER,
+        fetched_at REAL NOT NULL,
+        fields_json TEXT NOT NULL
+    );
+    """
+
+    def __init__(self, path: str = CACHE_FILE):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(self.SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def get(self, url: str, max_age: Optional[float] = None) -> Optional[BioPage]:
+        """The cached page, unless it is older than max_age or a failure due for a retry"""
+        row = self.conn.execute("SELECT status, fetched_at, fields_json FROM bios WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return None
+        status, fetched_at, fields_json = row
+        age = time.time() - fetched_at
+        if (max_age is not None and age > max_age) or (status != 200 and age > RETRY_FAILED_AFTER):
+            return None
+        fields = {name: tuple(pair) for name, pair in json.loads(fields_json).items()}
+        return BioPage(url, status, fetched_at, fields, cached=True)
+
+    def put(self, page: BioPage):
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO bios (url, status, fetched_at, fields_json) VALUES (?, ?, ?, ?)",
+                              (page.url, page.status, page.fetched_at, json.dumps(page.fields)))
+
+
+# ============================================================================
+# CRAWLER
+# ============================================================================
+
+class HostSlots:
+    """At most `limit` fetches in flight per host"""
+
+    def __init__(self, limit: int = PER_HOST):
+        self.limit = max(limit, 1)
+        self._slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def hold(self, url: str):
+        host = throttle.host_of(url)
+        with self._lock:
+            slot = self._slots.setdefault(host, threading.BoundedSemaphore(self.limit))
+        with slot:
+            yield
+
+
+def interleave_by_host(urls: Iterable[str]) -> List[str]:
+    """urls reordered to take one per host in turn, so a pool doesn't queue up on a single host"""
+    by_host: Dict[str, deque] = {}
+    for url in urls:
+        by_host.setdefault(throttle.host_of(url), deque()).append(url)
+    queues = deque(by_host.values())
+    ordered = []
+    while queues:
+        host_urls = queues.popleft()
+        ordered.append(host_urls.popleft())
+        if host_urls:
+            queues.append(host_urls)
+    return ordered
+
+
+def fetch_bio(url: str) -> BioPage:
+    """Fetch and parse one bio page (throttle.CircuitOpen propagates)"""
+    fetched_at = time.time()
+    try:
+        r = rosters.fetch_url(url)
+    except throttle.CircuitOpen:
+        raise
+    except Exception as e:
+        logger.warning(f"Bio fetch failed for {url}: {e}")
+        return BioPage(url, None, fetched_at)
+    if r.status_code != 200:
+        return BioPage(url, r.status_code, fetched_at)
+    return BioPage(url, 200, fetched_at, bio_fields(BeautifulSoup(r.text, features="html.parser")))
+
+
+class BioCrawler:
+    """Cached, per-host bounded crawl of bio pages"""
+
+    def __init__(self, cache: BioCache, workers: int = DEFAULT_WORKERS, per_host: int = PER_HOST,
+                 max_age: Optional[float] = None):
+        self.cache = cache
+        self.workers = max(workers, 1)
+        self.slots = HostSlots(per_host)
+        self.max_age = max_age
+        self.stats: Counter = Counter()
+
+    def _fetch(self, url: str) -> BioPage:
+        with self.slots.hold(url):
+            return fetch_bio(url)
+
+    def crawl(self, urls: Iterable[str]) -> Dict[str, BioPage]:
+        """Normalized URL -> page, for every URL that was cached or could be fetched"""
+        pages: Dict[str, BioPage] = {}
+        to_fetch = []
+        for url in dict.fromkeys(urls):
+            page = self.cache.get(url, self.max_age)
+            if page is None:
+                to_fetch.append(url)
+            else:
+                pages[url] = page
+        self.stats['cached'] += len(pages)
+        logger.info(f"{len(pages)} bio pages cached, fetching {len(to_fetch)} from "
+                    f"{len({throttle.host_of(url) for url in to_fetch})} hosts")
+
+        # Results are cached from this thread only; the connection isn't shared
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='bio') as pool:
+            futures = {pool.submit(self._fetch, url): url for url in interleave_by_host(to_fetch)}
+            for done, future in enumerate(as_completed(futures), 1):
+                url = futures[future]
+                try:
+                    page = future.result()
+                except throttle.CircuitOpen as e:
+                    # Not cached: the host is failing, not the page
+                    self.stats['circuit_open'] += 1
+                    logger.warning(f"Skipping {url}: {e}")
+                    continue
+                self.stats['fetched' if page.status == 200 else 'failed'] += 1
+                self.cache.put(page)
+                pages[url] = page
+                if done % 100 == 0:
+                    logger.info(f"Fetched {done}/{len(to_fetch)} bio pages")
+        return pages
+
+
+# ============================================================================
+# ENRICHMENT
+# ============================================================================
+
+def enrich_rows(rows: List[Dict[str, str]], pages: Dict[str, BioPage], fields: List[str]) -> List[Dict]:
+    """
+    Fill the missing `fields` of `rows` in place from their bio pages
+
+    Returns a source record (SOURCE_COLUMNS) for every value filled.
+    """
+    sources = []
+    for row in rows:
+        page = pages.get(normalize_url(row['url'])) if not missing(row.get('url')) else None
+        if page is None:
+            continue
+        for name in fields:
+            if not missing(row.get(name)) or name not in page.fields:
+                continue
+            value, label = page.fields[name]
+            row[name] = value
+            sources.append({'ncaa_id': row['ncaa_id'], 'season': row['season'], 'player_id': row['player_id'],
+                            'name': row['name'], 'field': name, 'value': value, 'source_url': page.url,
+                            'label': label, 'fetched_at': round(page.fetched_at)})
+    return sources
+
+
+def read_rows(path: str) -> Tuple[List[str], List[Dict[str, str]]]:
+    """(columns, rows) of a season CSV, plain, .gz or .zst"""
+    with open_text(existing(path) or path) as f:
+        reader = csv.DictReader(f)
+        return reader.fieldnames, list(reader)
+
+
+def output_paths(path: str, output_dir: Optional[str] = None) -> Tuple[str, str]:
+    stem = os.path.splitext(os.path.basename(without_suffix(path)))[0]
+    directory = output_dir or os.path.dirname(path)
+    return (os.path.join(directory, f"{stem}_enriched.csv"),
+            os.path.join(directory, f"{stem}_enriched_sources.csv"))
+
+
+def needed_urls(rows: Iterable[Dict[str, str]], fields: List[str]) -> Counter:
+    """Normalized bio URL -> rows that would use it"""
+    return Counter(normalize_url(row['url']) for row in rows
+                   if not missing(row.get('url')) and any(missing(row.get(name)) for name in fields))
+
+
+# ============================================================================
+# MAIN ENTRY POINT
+# ============================================================================
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description='Fill missing roster fields from bio pages')
+    parser.add_argument('inputs', nargs='+', help='Season CSVs written by rosters.py')
+    parser.add_argument('-fields', nargs='+', dest='fields', default=DEFAULT_FIELDS, choices=ENRICH_FIELDS,
+                        help=f'Fields to fill (default {" ".join(DEFAULT_FIELDS)})')
+    parser.add_argument('-cache', dest='cache', default=CACHE_FILE, help=f'Bio cache (default {CACHE_FILE})')
+    parser.add_argument('-max-age', dest='max_age', type=float,
+                        help='Re-fetch cached pages older than this many days')
+    parser.add_argument('-workers', dest='workers', type=int, default=DEFAULT_WORKERS,
+                        help=f'Fetches in flight overall (default {DEFAULT_WORKERS})')
+    parser.add_argument('-per-host', dest='per_host', type=int, default=PER_HOST,
+                        help=f'Fetches in flight per host (default {PER_HOST})')
+    parser.add_argument('-o', dest='output_dir', help='Directory for the output files (default beside each input)')
+    parser.add_argument('-dry-run', action='store_true', dest='dry_run',
+                        help='Report what would be fetched and stop')
+    results = parser.parse_args()
+
+    files = {path: read_rows(path) for path in results.inputs}
+    needed = Counter()
+    for _, rows in files.values():
+        needed.update(needed_urls(rows, results.fields))
+    missing_counts = Counter(name for _, rows in files.values() for row in rows
+                             for name in results.fields if missing(row.get(name)))
+    logger.info(f"Missing: {dict(missing_counts)}; {sum(needed.values())} rows need "
+                f"{len(needed)} distinct bio pages")
+
+    cache = BioCache(results.cache)
+    if results.dry_run:
+        cached = sum(1 for url in needed if cache.get(url, results.max_age and results.max_age * 86400))
+        hosts = Counter(throttle.host_of(url) for url in needed)
+        logger.info(f"{cached} cached, {len(needed) - cached} to fetch from {len(hosts)} hosts; busiest: "
+                    + ', '.join(f"{host} {n}" for host, n in hosts.most_common(5)))
+        cache.close()
+    else:
+        crawler = BioCrawler(cache, results.workers, results.per_host,
+                             results.max_age * 86400 if results.max_age else None)
+        pages = crawler.crawl(needed)
+        cache.close()
+        logger.info(f"Bio pages: {dict(crawler.stats)}")
+
+        for path, (columns, rows) in files.items():
+            sources = enrich_rows(rows, pages, results.fields)
+            enriched_path, sources_path = output_paths(path, results.output_dir)
+            with open(enriched_path, 'w', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=columns)
+                writer.writeheader()
+                writer.writerows(rows)
+            with open(sources_path, 'w', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=SOURCE_COLUMNS)
+                writer.writeheader()
+                writer.writerows(sources)
+            filled = Counter(source['field'] for source in sources)
+            logger.info(f"{path}: filled {dict(filled) or 'nothing'} -> {enriched_path}")
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+In-process browser-like fetches for hosts that refuse the scraper
+
+Some athletics CDNs answer 403 to the Python user agent. The scraper used to
+start a curl process for every such page, each with a cold TLS handshake.
+BrowserClient does the same job in process:
+
+  - with curl_cffi installed (the "impersonate" extra in pyproject.toml,
+    or the commented line in requirements.txt) it impersonates
+    Chrome's TLS and HTTP/2 fingerprint as well as its headers; otherwise a
+    requests Session sends the same browser headers curl did
+  - one session per thread, so connections to a host stay open from one
+    fetch to the next
+  - fetch_many() fetches a batch of URLs concurrently on a shared pool,
+    each under the same REQUEST_TIMEOUT bound
+  - every fetch goes through the host controller (throttle.py), and bytes
+    and timings count toward the team being scraped
+
+Without curl_cffi the TLS handshake is still Python's, so a host that keeps
+refusing it is left to the curl subprocess (rosters.fetch_url_as_browser).
+
+Usage:
+    python src/fallback.py https://example.edu/sports/womens-volleyball/roster/2023-24
+    python src/fallback.py -teams 255 326 -season 2023-24 -workers 8
+"""
+
+import time
+import logging
+import argparse
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Iterable
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+import throttle
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================================
+# CONSTANTS
+# ============================================================================
+
+REQUEST_TIMEOUT = 30
+DEFAULT_WORKERS = 8
+IMPERSONATE = 'chrome'
+
+# What the curl fallback sent, plus the headers a browser adds to a navigation
+BROWSER_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept-Encoding': 'gzip, deflate',
+    'Upgrade-Insecure-Requests': '1',
+}
+
+
+@lru_cache(maxsize=1)
+def curl_cffi_requests():
+    """curl_cffi's requests module, or None if it isn't installed"""
+    try:
+        from curl_cffi import requests as curl_requests
+    except ImportError:
+        return None
+    return curl_requests
+
+
+# ============================================================================
+# CLIENT
+# ============================================================================
+
+@dataclass
+class FetchResult:
+    url: str
+    status: Optional[int]  # None if the host never answered
+    text: str = ''
+    error: str = ''
+    seconds: float = 0.0
+
+
+class BrowserClient:
+    """Browser-like HTTP client with per-thread keep-alive sessions"""
+
+    def __init__(self, timeout: float = REQUEST_TIMEOUT, workers: int = DEFAULT_WORKERS,
+                 impersonate: Optional[str] = IMPERSONATE):
+        """impersonate: curl_cffi browser target, or None to use requests even if curl_cffi is installed"""
+        self.timeout = timeout
+        self.workers = workers
+        self.impersonate = impersonate if curl_cffi_requests() else None
+        self._local = threading.local()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            if self.impersonate:
+                session = curl_cffi_requests().Session(impersonate=self.impersonate)
+            else:
+                session = requests.Session()
+                session.headers.update(BROWSER_HEADERS)
+                adapter = HTTPAdapter(pool_connections=self.workers, pool_maxsize=self.workers)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+            self._local.session = session
+        return session
+
+    def _get(self, url: str):
+        start = time.perf_counter()
+        r = self._session().get(url, timeout=self.timeout, allow_redirects=True)
+        total = time.perf_counter() - start
+        # requests and curl_cffi both stop elapsed at the response headers
+        elapsed = r.elapsed.total_seconds() if hasattr(r.elapsed, 'total_seconds') else float(r.elapsed or 0)
+        connect = min(elapsed, total)
+        metrics.add_phase('connect', connect)
+        metrics.add_phase('download', total - connect)
+        metrics.add_bytes(len(r.content))
+        return r
+
+    def fetch(self, url: str) -> FetchResult:
+        """
+        One page, under the host's rate limit and retries
+
+        Raises throttle.CircuitOpen for a host that is failing; other errors
+        come back in FetchResult.error.
+        """
+        start = time.perf_counter()
+        try:
+            r = throttle.controller.call(url, lambda: self._get(url), lambda r: r.status_code,
+                                         lambda r: throttle.retry_after(r.headers))
+        except throttle.CircuitOpen:
+            raise
+        except Exception as e:
+            return FetchResult(url, None, error=f"{type(e).__name__}: {e}", seconds=time.perf_counter() - start)
+        return FetchResult(url, r.status_code, r.text, seconds=time.perf_counter() - start)
+
+    def fetch_many(self, urls: Iterable[str]) -> List[FetchResult]:
+        """Fetch a batch concurrently; results are in the order of `urls`"""
+        record = metrics.current()
+
+        def fetch(url: str) -> FetchResult:
+            with metrics.attach(record):
+                try:
+                    return self.fetch(url)
+                except throttle.CircuitOpen as e:
+                    return FetchResult(url, None, error=f"CircuitOpen: {e}")
+
+        return list(self.pool().map(fetch, urls))
+
+    def pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='fallback')
+            return self._pool
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+# Shared by every fetch in the process
+client = BrowserClient()
+
+
+# ============================================================================
+# MAIN ENTRY POINT
+# ============================================================================
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description='Fetch pages with the in-process browser-like client')
+    parser.add_argument('urls', nargs='*', help='Pages to fetch')
+    parser.add_argument('-teams', nargs='+', type=int, dest='teams', default=[],
+                        help='Also fetch these teams\' default roster pages')
+    parser.add_argument('-season', dest='season', default='2023-24')
+    parser.add_argument('-workers', dest='workers', type=int, default=DEFAULT_WORKERS)
+    parser.add_argument('-no-impersonate', action='store_true', dest='no_impersonate',
+                        help='Use requests even if curl_cffi is installed')
+    results = parser.parse_args()
+
+    import json
+    from rosters import TEAMS_FILE
+
+    urls = list(results.urls)
+    if results.teams:
+        with open(TEAMS_FILE) as f:
+            teams: Dict[int, Dict] = {t['ncaa_id']: t for t in json.load(f) if t.get('url')}
+        urls += [f"{teams[i]['url']}/roster/{results.season}" for i in results.teams if i in teams]
+
+    fetcher = BrowserClient(workers=results.workers, impersonate=None if results.no_impersonate else IMPERSONATE)
+    logger.info(f"Fetching {len(urls)} pages with {'curl_cffi as ' + fetcher.impersonate if fetcher.impersonate else 'requests'}")
+    start = time.perf_counter()
+    for result in fetcher.fetch_many(urls):
+        print(f"{result.status or '-':>4}  {len(result.text):8d} chars  {result.seconds:6.2f}s  {result.url}"
+              f"{'  ' + result.error if result.error else ''}")
+    print(f"{len(urls)} pages in {time.perf_counter() - start:.2f}s")
+    fetcher.close()
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Offline hometown geocoder
+
+Fills the latitude/longitude/city/state/county/country columns that
+finished_rosters.csv carries, without calling an external geocoding service.
+Locations come from two in-memory indexes:
+
+  1. hometowns that were already geocoded (finished_rosters.csv), keyed by
+     the parsed (city, state) so "Omaha, Neb." and "Omaha, NE" match
+  2. the bundled gazetteer, data/gazetteer.csv
+
+The gazetteer is not an independent source: `gazetteer` builds it from the
+same finished_rosters.csv the first index learns from, one row per geocoded
+place, so it only adds matches on the geocoded city name where that differs
+from the hometown as written, and never knows a town no earlier player came
+from. It also covers only the US and Canada, the only countries with
+coordinates in finished_rosters.csv; every other hometown is a miss. Seed it
+from a real gazetteer (same GAZETTEER_COLUMNS) for wider coverage.
+
+Usage:
+    python src/geocode.py locate data/rosters_2025-26.csv
+    python src/geocode.py locate data/rosters_2025-26.csv -o data/rosters_2025-26_geocoded.csv
+    python src/geocode.py gazetteer data/finished_rosters.csv
+"""
+
+import re
+import csv
+import argparse
+import logging
+from collections import Counter
+from dataclasses import dataclass
+from typing import List, Dict, Optional, Tuple, Iterable
+
+from places import STATE_LOOKUP, COUNTRY_FIXES, USA_VARIANTS
+from hometown import parse_hometown, USA
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================================
+# CONSTANTS
+# ============================================================================
+
+GAZETTEER_FILE = 'data/gazetteer.csv'
+GEOCODED_FILE = 'data/finished_rosters.csv'
+
+GAZETTEER_COLUMNS = ['city', 'state', 'county', 'country', 'latitude', 'longitude']
+
+# Columns added to a roster, in finished_rosters.csv order
+GEO_COLUMNS = ['latitude', 'longitude', 'city', 'state', 'county', 'country', 'zip',
+               'country_2', 'source']
+
+NA = 'NA'
+
+# Hawai‘i, O‘ahu, etc.
+QUOTES_RE = re.compile(r"[‘’`']")
+PUNCTUATION_RE = re.compile(r'[.]')
+WHITESPACE_RE = re.compile(r'\s+')
+
+HometownKey = Tuple[str, Optional[str]]
+
+
+# ============================================================================
+# NORMALIZATION
+# ============================================================================
+
+def _normalize_part(text: str) -> str:
+    text = QUOTES_RE.sub('', PUNCTUATION_RE.sub('', text.upper()))
+    return WHITESPACE_RE.sub(' ', text).strip()
+
+
+def normalize_region(region: Optional[str]) -> Optional[str]:
+    """State variants to postal codes ("Neb." -> "NE"), country variants to names"""
+    if not region:
+        return None
+    region = _normalize_part(region)
+    if region in STATE_LOOKUP:
+        return STATE_LOOKUP[region]
+    return COUNTRY_FIXES.get(region, region) or None
+
+
+def normalize_country(country: Optional[str]) -> Optional[str]:
+    """One code for the US ("US", "United States" -> "USA"); other countries as given"""
+    if country and _normalize_part(country) in USA_VARIANTS:
+        return USA
+    return country
+
+
+def hometown_key(hometown: Optional[str]) -> Optional[HometownKey]:
+    """
+    Normalize a hometown into (CITY, REGION)
+
+    The region is a postal code for US hometowns, the country for hometowns
+    the parser can place, and the last comma-separated piece otherwise.
+    """
+    if not hometown or hometown == NA:
+        return None
+    place = parse_hometown(hometown)
+    city = _normalize_part(place.city)
+    if not city:
+        return None
+    if place.state or place.country:
+        return city, place.state or place.country
+    parts = [p for p in hometown.split('/')[0].split(',') if p.strip()]
+    region = normalize_region(parts[-1]) if len(parts) > 1 else None
+    return city, region
+
+
+# ============================================================================
+# GEOCODER
+# ============================================================================
+
+@dataclass
+class Location:
+    """A geocoded place"""
+    latitude: str
+    longitude: str
+    city: str = NA
+    state: str = NA
+    county: str = NA
+    country: str = NA
+
+
+def _present(value: Optional[str]) -> bool:
+    return value not in (None, '', NA)
+
+
+class Geocoder:
+    """In-memory hometown -> location index with memoized lookups"""
+
+    def __init__(self):
+        self.index: Dict[HometownKey, Location] = {}
+        self.gazetteer: Dict[HometownKey, Location] = {}
+        # City alone -> location, only for city names that are unambiguous
+        self.by_city: Dict[str, Optional[Location]] = {}
+        self.memo: Dict[Optional[str], Tuple[Optional[Location], str]] = {}
+        self.stats: Counter = Counter()
+
+    def _add(self, table: Dict[HometownKey, Location], key: Optional[HometownKey], location: Location):
+        if key is None or key in table:
+            return
+        table[key] = location
+        if key[0] in self.by_city and self.by_city[key[0]] != location:
+            self.by_city[key[0]] = None
+        else:
+            self.by_city.setdefault(key[0], location)
+
+    def load_gazetteer(self, path: str = GAZETTEER_FILE):
+        """Load the bundled gazetteer (city, state/country -> coordinates)"""
+        with open(path, newline='') as f:
+            for row in csv.DictReader(f):
+                location = Location(**{c: row[c] for c in GAZETTEER_COLUMNS})
+                region = row['state'] if _present(row['state']) else row['country']
+                self._add(self.gazetteer, (_normalize_part(row['city']), normalize_region(region)), location)
+        self.memo.clear()
+
+    def learn(self, rows: Iterable[Dict[str, str]]):
+        """Index hometowns from rows that already carry coordinates"""
+        for row in rows:
+            if not _present(row.get('latitude')) or not _present(row.get('longitude')):
+                continue
+            location = Location(**{c: row.get(c) or NA for c in GAZETTEER_COLUMNS})
+            location.country = normalize_country(location.country)
+            self._add(self.index, hometown_key(row.get('hometown')), location)
+        self.memo.clear()
+
+    def lookup(self, hometown: Optional[str]) -> Tuple[Optional[Location], str]:
+        """Resolve one hometown; returns (location, matched index name)"""
+        key = hometown_key(hometown)
+        if key is None:
+            return None, 'empty'
+        if key in self.index:
+            return self.index[key], 'index'
+        if key in self.gazetteer:
+            return self.gazetteer[key], 'gazetteer'
+        if key[1] is None and self.by_city.get(key[0]):
+            return self.by_city[key[0]], 'city'
+        return None, 'miss'
+
+    def geocode(self, hometown: Optional[str]) -> Optional[Location]:
+        """Memoized lookup that also counts hits for report()"""
+        if hometown not in self.memo:
+            self.memo[hometown] = self.lookup(hometown)
+        location, source = self.memo[hometown]
+        self.stats[source] += 1
+        return location
+
+    def geocode_rows(self, rows: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """Add GEO_COLUMNS to every row of a season"""
+        for row in rows:
+            location = self.geocode(row.get('hometown'))
+            if location is None:
+                row.update({c: NA for c in GEO_COLUMNS})
+            else:
+                row.update({c: getattr(location, c) for c in GAZETTEER_COLUMNS})
+                row.update({'zip': NA, 'country_2': NA, 'source': 'offline geocoder'})
+        return rows
+
+    def report(self) -> Dict[str, float]:
+        """Hit rate per index over all geocode() calls so far"""
+        total = sum(self.stats.values())
+        rates = {k: (v / total if total else 0.0) for k, v in self.stats.items()}
+        rates['hit_rate'] = 1 - rates.get('miss', 0.0) - rates.get('empty', 0.0)
+        rates['distinct'] = len(self.memo)
+        rates['rows'] = total
+        return rates
+
+
+def load_geocoder(gazetteer: str = GAZETTEER_FILE, learn: Iterable[str] = (GEOCODED_FILE,)) -> Geocoder:
+    """Geocoder over the gazetteer and the hometowns of already-geocoded CSVs"""
+    geocoder = Geocoder()
+    geocoder.load_gazetteer(gazetteer)
+    for path in learn:
+        with open(path, newline='') as f:
+            geocoder.learn(csv.DictReader(f))
+    return geocoder
+
+
+# ============================================================================
+# GAZETTEER BUILD
+# ============================================================================
+
+def build_gazetteer(paths: List[str], output: str = GAZETTEER_FILE) -> int:
+    """Collapse geocoded roster rows into one gazetteer row per place"""
+    places: Dict[tuple, Counter] = {}
+    for path in paths:
+        with open(path, newline='') as f:
+            for row in csv.DictReader(f):
+                if not _present(row.get('latitude')) or not _present(row.get('city')):
+                    continue
+                # finished_rosters.csv has both "US" and "USA"
+                key = (row['city'], row.get('state') or NA, normalize_country(row.get('country')) or NA)
+                coords = (row.get('county') or NA, row['latitude'], row['longitude'])
+                places.setdefault(key, Counter())[coords] += 1
+
+    with open(output, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(GAZETTEER_COLUMNS)
+        for (city, state, country), counts in sorted(places.items()):
+            county, latitude, longitude = counts.most_common(1)[0][0]
+            writer.writerow([city, state, county, country, latitude, longitude])
+    logger.info(f"Wrote {len(places)} places to {output}")
+    return len(places)
+
+
+# ============================================================================
+# MAIN ENTRY POINT
+# ============================================================================
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description='Offline hometown geocoder')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    locate_cmd = commands.add_parser('locate', help='Geocode a roster CSV')
+    locate_cmd.add_argument('input', help='Roster CSV such as data/rosters_2025-26.csv')
+    locate_cmd.add_argument('-o', dest='output', help='Output path (default: <input>_geocoded.csv)')
+    locate_cmd.add_argument('-learn', nargs='*', dest='learn', default=[GEOCODED_FILE],
+                            help=f'Already-geocoded CSVs to index (default {GEOCODED_FILE})')
+    locate_cmd.add_argument('-gazetteer', dest='gazetteer', default=GAZETTEER_FILE,
+                            help=f'Gazetteer CSV (default {GAZETTEER_FILE})')
+
+    gazetteer_cmd = commands.add_parser('gazetteer', help='Rebuild the gazetteer from geocoded CSVs')
+    gazetteer_cmd.add_argument('inputs', nargs='+', help='Geocoded CSVs such as data/finished_rosters.csv')
+    gazetteer_cmd.add_argument('-o', dest='output', default=GAZETTEER_FILE)
+
+    results = parser.parse_args()
+
+    if results.command == 'gazetteer':
+        build_gazetteer(results.inputs, results.output)
+    else:
+        geocoder = load_geocoder(results.gazetteer, results.learn)
+
+        with open(results.input, newline='') as f:
+            reader = csv.DictReader(f)
+            fieldnames = [c for c in reader.fieldnames if c not in GEO_COLUMNS] + GEO_COLUMNS
+            rows = geocoder.geocode_rows(list(reader))
+
+        output = results.output or re.sub(r'\.csv$', '', results.input) + '_geocoded.csv'
+        with open(output, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(rows)
+
+        report = geocoder.report()
+        logger.info(f"Geocoded {report['rows']} rows ({report['distinct']} distinct hometowns) into {output}")
+        for source in ('index', 'gazetteer', 'city', 'miss', 'empty'):
+            logger.info(f"  {source:>9}: {report.get(source, 0.0):6.1%}")
+        logger.info(f"  hit rate : {report['hit_rate']:6.1%}")
@@ -0,0 +1,135 @@
+"""
+Hometown parser
+
+Splits a roster hometown ("Omaha, Neb.", "Calgary, Alberta, Canada",
+"Honolulu, Hawai‘i / Punahou") into city, US state and country without any
+network access. State names, postal and AP-style abbreviations, known
+misspellings and countries are compiled once into a token trie that is
+walked backwards from the end of the hometown, so each lookup only touches
+the last few words.
+"""
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Dict, Optional, Iterable, Tuple
+
+from places import STATE_LOOKUP, COUNTRIES, USA_VARIANTS, COUNTRY_FIXES, COUNTRY_ALIASES
+
+# Hometowns remembered by parse_hometown()
+PARSE_CACHE_SIZE = 16384
+
+USA = 'USA'
+
+# Periods and the various apostrophes in Hawai‘i / O‘ahu / Coeur d'Alene
+STRIP_RE = re.compile(r"[.‘’`']")
+WORD_RE = re.compile(r'[^\s,]+')
+
+
+@dataclass(frozen=True)
+class Hometown:
+    """Parsed hometown"""
+    city: str = ''
+    state: Optional[str] = None  # Postal abbreviation, US only
+    country: Optional[str] = None
+
+
+# ============================================================================
+# TRIE
+# ============================================================================
+
+# Entry kinds; on equal-length matches a state wins over a country ("Georgia")
+STATE, COUNTRY = 0, 1
+TERMINAL = ''
+
+
+def _normalize_word(word: str) -> str:
+    return STRIP_RE.sub('', word).upper()
+
+
+def _build_trie() -> Dict:
+    """Reverse-token trie: 'NEW YORK' is stored as YORK -> NEW -> terminal"""
+    entries: Dict[str, Tuple[int, str]] = {}
+    for name in COUNTRIES + list(COUNTRY_FIXES):
+        entries[name] = (COUNTRY, COUNTRY_FIXES.get(name, name))
+    for name, country in COUNTRY_ALIASES.items():
+        entries[name] = (COUNTRY, country)
+    for name in USA_VARIANTS:
+        entries[name] = (COUNTRY, USA)
+    for name, abbr in STATE_LOOKUP.items():
+        entries[name] = (STATE, abbr)
+
+    trie: Dict = {}
+    for phrase, entry in entries.items():
+        tokens = [_normalize_word(t) for t in WORD_RE.findall(phrase)]
+        node = trie
+        for token in reversed(tokens):
+            node = node.setdefault(token, {})
+        node[TERMINAL] = entry
+    return trie
+
+
+TRIE = _build_trie()
+
+
+def match_suffix(tokens: List[str], end: int) -> Tuple[Optional[Tuple[int, str]], int]:
+    """
+    Longest trie match ending at tokens[end - 1]
+
+    Returns:
+        (entry, start index of the match) or (None, end)
+    """
+    node = TRIE
+    best, best_start = None, end
+    for i in range(end - 1, -1, -1):
+        node = node.get(tokens[i])
+        if node is None:
+            break
+        if TERMINAL in node:
+            best, best_start = node[TERMINAL], i
+    return best, best_start
+
+
+# ============================================================================
+# PARSER
+# ============================================================================
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_hometown(text: Optional[str]) -> Hometown:
+    """
+    Parse one hometown into city, state and country
+
+    Anything after a '/' (high school, previous school) is ignored. US
+    hometowns get country 'USA'; a hometown with no recognizable state or
+    country keeps only its city.
+    """
+    if not text:
+        return Hometown()
+
+    text = text.split('/')[0]
+    words = WORD_RE.findall(text)
+    tokens = [_normalize_word(w) for w in words]
+    end = len(tokens)
+
+    state = country = None
+    entry, start = match_suffix(tokens, end)
+    if entry and entry[0] == COUNTRY:
+        country, end = entry[1], start
+        if country == USA:
+            entry, start = match_suffix(tokens, end)
+    if entry and entry[0] == STATE and start < end:
+        state, country, end = entry[1], country or USA, start
+    # Province or region between the city and the country ("Calgary, Alberta, Canada")
+    if country and country != USA and ',' in text:
+        end = min(end, len(WORD_RE.findall(text.split(',')[0])))
+
+    # A bare state or country with no city ("Texas") leaves city empty
+    city = ' '.join(words[:end]).strip(' ,')
+    return Hometown(city=city, state=state, country=country)
+
+
+def parse_hometowns(values: Iterable[Optional[str]]) -> List[Hometown]:
+    """Parse a whole column, once per distinct hometown"""
+    values = list(values)
+    distinct = {v: parse_hometown(v) for v in set(values)}
+    return [distinct[v] for v in values]
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Cross-season player identity resolution
+
+Assigns a player key to every roster row across seasons and teams,
+including transfers whose previous_school names their old team. Instead of
+comparing every pair of names, candidate pairs come from blocking indexes:
+
+  - (ncaa_id, player_id): Sidearm player IDs usually survive a season
+  - (surname, hometown state)
+  - sorted neighborhood over "surname first-name" keys
+
+and each candidate pair gets a cheap similarity score. Records are merged
+with union-find, never joining two clusters that already have the same
+season on different teams. A player's key is derived from their earliest
+row: it holds as later seasons are added, but changes when an earlier
+season that has the player is added.
+
+Usage:
+    python src/identity.py
+    python src/identity.py data/rosters_2022.csv data/rosters_2023.csv -o data/player_seasons.csv
+"""
+
+import os
+import re
+import csv
+import glob
+import hashlib
+import argparse
+import logging
+import unicodedata
+from dataclasses import dataclass
+from itertools import combinations
+from typing import List, Dict, Optional, Iterable, Tuple
+
+from hometown import parse_hometown
+from output import SUFFIXES, open_text, existing, without_suffix
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================================
+# CONSTANTS
+# ============================================================================
+
+DEFAULT_INPUTS = 'data/rosters_*.csv'
+# The scraper's season files; DEFAULT_INPUTS also matches derived outputs
+# (rosters_2023-24_cleaned.csv, ..._reparsed, ..._archived, ..._enriched, ..._adds)
+SEASON_FILE_RE = re.compile(r'^rosters_\d{4}(-\d{2}|-\d{4})?\.csv$')
+DEFAULT_OUTPUT = 'data/player_seasons.csv'
+
+OUTPUT_COLUMNS = ['player_key', 'season', 'ncaa_id', 'team', 'player_id', 'name',
+                  'year', 'hometown', 'previous_school', 'source']
+
+# Pairs scoring at least this much are the same player
+MATCH_THRESHOLD = 0.9
+
+# First names must be at least this similar before anything else counts
+FIRST_NAME_GATE = 0.85
+
+# Sorted-neighborhood window
+WINDOW = 4
+
+NAME_SUFFIXES = {'jr', 'sr', 'ii', 'iii', 'iv'}
+NON_ALNUM_RE = re.compile(r'[^a-z0-9 ]+')
+SEASON_RE = re.compile(r'^(\d{4})')
+SCHOOL_STOPWORDS = {'university', 'of', 'the', 'college', 'at', 'state', 'u'}
+
+
+# ============================================================================
+# NORMALIZATION
+# ============================================================================
+
+def normalize_name(text: Optional[str]) -> str:
+    """Lower-case ASCII name without punctuation ("D'Ambrosio" -> "dambrosio")"""
+    if not text:
+        return ''
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode()
+    text = NON_ALNUM_RE.sub('', text.lower().replace('-', ' '))
+    return ' '.join(text.split())
+
+
+def normalize_season(season: Optional[str], default: Optional[str] = None) -> Optional[str]:
+    """'2023', '2023-24' and '2023-2024' all become '2023-24'"""
+    match = SEASON_RE.match(season or '') or SEASON_RE.match(default or '')
+    if not match:
+        return None
+    year = int(match.group(1))
+    return f"{year}-{(year + 1) % 100:02d}"
+
+
+def school_tokens(text: Optional[str]) -> frozenset:
+    """Distinctive words of a school name, for transfer matching"""
+    return frozenset(normalize_name(text).split()) - SCHOOL_STOPWORDS
+
+
+def jaro_winkler(a: str, b: str) -> float:
+    """Jaro-Winkler similarity in [0, 1]"""
+    if a == b:
+        return 1.0
+    if not a or not b:
+        return 0.0
+    window = max(len(a), len(b)) // 2 - 1
+    a_matched = [False] * len(a)
+    b_matched = [False] * len(b)
+    matches = 0
+    for i, ch in enumerate(a):
+        for j in range(max(0, i - window), min(len(b), i + window + 1)):
+            if not b_matched[j] and b[j] == ch:
+                a_matched[i] = b_matched[j] = True
+                matches += 1
+                break
+    if not matches:
+        return 0.0
+    a_seq = [ch for ch, m in zip(a, a_matched) if m]
+    b_seq = [ch for ch, m in zip(b, b_matched) if m]
+    transpositions = sum(x != y for x, y in zip(a_seq, b_seq)) / 2
+    jaro = (matches / len(a) + matches / len(b) + (matches - transpositions) / matches) / 3
+    prefix = 0
+    for x, y in zip(a[:4], b[:4]):
+        if x != y:
+            break
+        prefix += 1
+    return jaro + prefix * 0.1 * (1 - jaro)
+
+
+# ============================================================================
+# RECORDS
+# ============================================================================
+
+@dataclass
+class Record:
+    """One roster row, with the normalized fields used for matching"""
+    index: int
+    row: Dict[str, str]
+    season: str
+    ncaa_id: str
+    first: str
+    last: str
+    state: Optional[str]
+    city: str
+    high_school: str
+    team_tokens: frozenset
+    previous_tokens: frozenset
+
+
+def make_record(index: int, row: Dict[str, str], season: str) -> Record:
+    words = [w for w in normalize_name(row.get('name')).split() if w not in NAME_SUFFIXES]
+    place = parse_hometown(row.get('hometown'))
+    return Record(
+        index=index,
+        row=row,
+        season=season,
+        ncaa_id=row.get('ncaa_id') or '',
+        first=words[0] if words else '',
+        last=words[-1] if words else '',
+        state=place.state or place.country,
+        city=normalize_name(place.city),
+        high_school=normalize_name(row.get('high_school')),
+        team_tokens=school_tokens(row.get('team')),
+        previous_tokens=school_tokens(row.get('previous_school')),
+    )
+
+
+def season_files(pattern: str = DEFAULT_INPUTS) -> List[str]:
+    """
+    Raw season CSVs matching a glob, without the files derived from them;
+    each as written (plain, .gz or .zst, the newest if there are several)
+    """
+    paths = glob.glob(pattern) + [path for suffix in SUFFIXES.values() for path in glob.glob(pattern + suffix)]
+    bases = {without_suffix(path) for path in paths}
+    return sorted(existing(base) for base in bases if SEASON_FILE_RE.match(os.path.basename(base)))
+
+
+def load_records(paths: Iterable[str]) -> List[Record]:
+    """Read season CSVs; rows with an unreadable season take it from the file name"""
+    records = []
+    for path in paths:
+        with open_text(path) as f:
+            for row in csv.DictReader(f):
+                season = normalize_season(row.get('season'), default=path.rsplit('_', 1)[-1])
+                if not season or not row.get('name'):
+                    continue
+                row['source'] = path
+                records.append(make_record(len(records), row, season))
+    return records
+
+
+# ============================================================================
+# MATCHING
+# ============================================================================
+
+def is_transfer(a: Record, b: Record) -> bool:
+    """Did the later record's previous school name the earlier record's team?"""
+    earlier, later = (a, b) if a.season <= b.season else (b, a)
+    if not later.previous_tokens or not earlier.team_tokens:
+        return False
+    return earlier.team_tokens <= later.previous_tokens or later.previous_tokens <= earlier.team_tokens
+
+
+def score(a: Record, b: Record) -> float:
+    """Similarity of two roster rows; MATCH_THRESHOLD or more means same player"""
+    if not a.last or not b.last or a.season == b.season:
+        return 0.0
+    first = jaro_winkler(a.first, b.first)
+    if first < FIRST_NAME_GATE:
+        return 0.0
+    last = jaro_winkler(a.last, b.last)
+    if last < FIRST_NAME_GATE:
+        return 0.0
+
+    total = first * 0.5 + last * 0.3
+    if a.state and a.state == b.state:
+        total += 0.1
+    if a.city and a.city == b.city:
+        total += 0.1
+    if a.high_school and a.high_school == b.high_school:
+        total += 0.1
+    if a.ncaa_id == b.ncaa_id:
+        total += 0.1
+    elif is_transfer(a, b):
+        total += 0.1
+    return total
+
+
+def candidate_pairs(records: List[Record]) -> Iterable[Tuple[int, int]]:
+    """Yield candidate pairs from the blocking indexes (may repeat pairs)"""
+    blocks: Dict[tuple, List[int]] = {}
+    for r in records:
+        if r.row.get('player_id'):
+            blocks.setdefault(('id', r.ncaa_id, r.row['player_id']), []).append(r.index)
+        if r.last:
+            blocks.setdefault(('surname', r.last, r.state), []).append(r.index)
+    for members in blocks.values():
+        yield from combinations(members, 2)
+
+    ordered = sorted(records, key=lambda r: (r.last, r.first))
+    for i, r in enumerate(ordered):
+        for other in ordered[i + 1:i + 1 + WINDOW]:
+            yield r.index, other.index
+
+
+class Clusters:
+    """Union-find over records that refuses to put one season on two teams"""
+
+    def __init__(self, records: List[Record]):
+        self.parent = list(range(len(records)))
+        self.seasons = [{r.season: r.ncaa_id} for r in records]
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i: int, j: int) -> bool:
+        a, b = self.find(i), self.find(j)
+        if a == b:
+            return True
+        seasons_a, seasons_b = self.seasons[a], self.seasons[b]
+        if any(seasons_a[s] != t for s, t in seasons_b.items() if s in seasons_a):
+            return False
+        if len(seasons_a) < len(seasons_b):
+            a, b, seasons_a, seasons_b = b, a, seasons_b, seasons_a
+        self.parent[b] = a
+        seasons_a.update(seasons_b)
+        return True
+
+
+def resolve(records: List[Record]) -> Dict[int, str]:
+    """
+    Cluster records into players
+
+    Returns:
+        Record index -> player key
+    """
+    clusters = Clusters(records)
+
+    # Same row scraped twice (rosters_2023.csv and rosters_2023-24.csv overlap)
+    seen: Dict[tuple, int] = {}
+    for r in records:
+        key = (r.season, r.ncaa_id, r.first, r.last)
+        if key in seen:
+            clusters.union(seen[key], r.index)
+        else:
+            seen[key] = r.index
+
+    checked = set()
+    for i, j in candidate_pairs(records):
+        pair = (i, j) if i < j else (j, i)
+        if pair in checked:
+            continue
+        checked.add(pair)
+        if score(records[i], records[j]) >= MATCH_THRESHOLD:
+            clusters.union(i, j)
+    logger.info(f"Scored {len(checked)} candidate pairs for {len(records)} rows")
+
+    # Key each player by their earliest row, so keys survive adding later
+    # seasons; adding an earlier season that has the player re-keys them
+    members: Dict[int, List[Record]] = {}
+    for r in records:
+        members.setdefault(clusters.find(r.index), []).append(r)
+    keys = {}
+    for group in members.values():
+        first = min(group, key=lambda r: (r.season, r.ncaa_id, r.last, r.first))
+        seed = f"{first.season}|{first.ncaa_id}|{first.first} {first.last}"
+        player_key = hashlib.sha1(seed.encode()).hexdigest()[:12]
+        for r in group:
+            keys[r.index] = player_key
+    return keys
+
+
+def write_player_seasons(records: List[Record], keys: Dict[int, str], path: str):
+    """Write the player-to-seasons mapping table"""
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(OUTPUT_COLUMNS)
+        for r in sorted(records, key=lambda r: (keys[r.index], r.season)):
+            writer.writerow([keys[r.index], r.season] + [r.row.get(c, '') for c in OUTPUT_COLUMNS[2:]])
+
+
+# ============================================================================
+# MAIN ENTRY POINT
+# ============================================================================
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description='Resolve players across seasons')
+    parser.add_argument('inputs', nargs='*', help=f'Season CSVs (default {DEFAULT_INPUTS})')
+    parser.add_argument('-o', dest='output', default=DEFAULT_OUTPUT,
+                        help=f'Output CSV (default {DEFAULT_OUTPUT})')
+    results = parser.parse_args()
+
+    paths = results.inputs or season_files()
+    records = load_records(paths)
+    keys = resolve(records)
+    write_player_seasons(records, keys, results.output)
+
+    players = len(set(keys.values()))
+    multi = len(records) - players
+    logger.info(f"{len(records)} rows -> {players} players ({multi} rows linked to an earlier season)")
@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""
+Per-team scrape metrics
+
+Times every phase of a team's scrape:
+
+    connect    DNS, TCP/TLS connect and wait for the response headers
+    download   reading the response body (and 403 fallbacks)
+    render     JavaScript rendering (shot-scraper, requests_html)
+    parse      HTML -> Player objects
+    normalize  Player -> CSV row (FieldExtractors)
+    write      CSV and roster store writes
+    wait       waiting on a host's rate limit or backing off before a retry
+
+along with the strategy the scraper routed the team to, every fallback it
+triggered, bytes fetched, rows and the outcome. The scraper calls the
+module-level helpers (phase, attempt, add_bytes, timed); they record into the
+team that RunMetrics.team() opened on the calling thread and do nothing
+outside one, so the fetch and parse functions stay usable on their own.
+
+Each finished team is appended to a JSONL file and the totals are rewritten
+as a Prometheus textfile snapshot (atomically, so a node_exporter textfile
+collector never reads a partial file). summary() gives the end-of-run report:
+slowest teams, slowest strategies and time lost to attempts that failed and
+fell back. Given the host controller (throttle.py), the snapshot and summary
+also carry each host's request rate, throttled responses and circuit state.
+
+Usage:
+    python src/rosters.py -season 2023-24 -metrics data/metrics/scrape_2023-24
+    python src/metrics.py data/metrics/scrape_2023-24.jsonl
+"""
+
+import os
+import json
+import time
+import argparse
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field, asdict
+from functools import wraps
+from typing import List, Dict, Optional, Iterable
+
+PHASES = ['connect', 'download', 'render', 'parse', 'normalize', 'write', 'wait']
+
+PARSED, EMPTY, ERROR = 'parsed', 'empty', 'error'
+
+# Upper bounds, in seconds, of the team duration histogram
+DURATION_BUCKETS = [0.5, 1, 2, 5, 10, 30, 60, 120, 300]
+
+_local = threading.local()
+
+
+# ============================================================================
+# TEAM RECORD
+# ============================================================================
+
+@dataclass
+class TeamMetrics:
+    """Everything measured while scraping one team"""
+    ncaa_id: int
+    team: str
+    season: str
+    strategy: str = ''
+    fallbacks: List[str] = field(default_factory=list)
+    # (strategy or fallback name, seconds, succeeded)
+    attempts: List[tuple] = field(default_factory=list)
+    phases: Dict[str, float] = field(default_factory=lambda: dict.fromkeys(PHASES, 0.0))
+    requests: int = 0
+    bytes: int = 0
+    # Retried requests, and 429/403/5xx answers from the team's hosts
+    retries: int = 0
+    throttled: int = 0
+    rows: int = 0
+    outcome: str = ''
+    error: str = ''
+    started_at: float = 0.0
+    seconds: float = 0.0
+    _start: float = field(default=0.0, repr=False)
+    _attempt_start: float = field(default=0.0, repr=False)
+
+    def attempt(self, name: str):
+        """Start a new strategy or fallback; the one before it counts as failed"""
+        now = time.perf_counter()
+        if self.strategy:
+            previous = self.fallbacks[-1] if self.fallbacks else self.strategy
+            self.attempts.append((previous, now - self._attempt_start, False))
+            self.fallbacks.append(name)
+        else:
+            self.strategy = name
+        self._attempt_start = now
+
+    def finish(self, outcome: str, error: str = ''):
+        now = time.perf_counter()
+        self.outcome = outcome
+        self.error = error
+        if self.strategy:
+            last = self.fallbacks[-1] if self.fallbacks else self.strategy
+            self.attempts.append((last, now - self._attempt_start, outcome == PARSED))
+        self.seconds = now - self._start
+
+    def to_dict(self) -> Dict:
+        record = asdict(self)
+        record.pop('_start')
+        record.pop('_attempt_start')
+        record['phases'] = {p: round(s, 4) for p, s in self.phases.items()}
+        record['attempts'] = [{'name': n, 'seconds': round(s, 4), 'ok': ok} for n, s, ok in self.attempts]
+        record['seconds'] = round(self.seconds, 4)
+        return record
+
+
+def current() -> Optional[TeamMetrics]:
+    """The team being scraped on this thread, if any"""
+    return getattr(_local, 'team', None)
+
+
+@contextmanager
+def attach(record: Optional[TeamMetrics]):
+    """Record into `record` on this thread too, e.g. from a pool fetching for that team"""
+    previous = current()
+    _local.team = record
+    try:
+        yield record
+    finally:
+        _local.team = previous
+
+
+# ============================================================================
+# INSTRUMENTATION HELPERS
+# ============================================================================
+
+def add_phase(name: str, seconds: float):
+    record = current()
+    if record is not None:
+        record.phases[name] = record.phases.get(name, 0.0) + seconds
+
+
+@contextmanager
+def phase(name: str):
+    """Time the block as part of `name` for the current team"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_phase(name, time.perf_counter() - start)
+
+
+def timed(name: str):
+    """Decorator form of phase()"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def attempt(name: str):
+    """Record the strategy the scraper is about to try (the first call) or a fallback"""
+    record = current()
+    if record is not None:
+        record.attempt(name)
+
+
+def add_bytes(count: int, requests: int = 1):
+    record = current()
+    if record is not None:
+        record.bytes += count
+        record.requests += requests
+
+
+def add_retry():
+    record = current()
+    if record is not None:
+        record.retries += 1
+
+
+def add_throttled():
+    record = current()
+    if record is not None:
+        record.throttled += 1
+
+
+# ============================================================================
+# RUN COLLECTOR
+# ============================================================================
+
+class RunMetrics:
+    """Collects TeamMetrics for a run and exports them"""
+
+    def __init__(self, jsonl_path: Optional[str] = None, prom_path: Optional[str] = None, hosts=None):
+        """hosts: optional throttle.HostController whose per-host state is exported too"""
+        self.jsonl_path = jsonl_path
+        self.prom_path = prom_path
+        self.hosts = hosts
+        self.records: List[TeamMetrics] = []
+        self._lock = threading.Lock()
+        for path in (jsonl_path, prom_path):
+            if path and os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+        if jsonl_path:
+            open(jsonl_path, 'w').close()
+
+    @contextmanager
+    def team(self, team: Dict, season: str):
+        """
+        Measure one team's scrape on this thread
+
+        The caller sets `rows` (and the outcome follows from it); an exception
+        escaping the block is recorded as an error and re-raised.
+        """
+        record = TeamMetrics(ncaa_id=team.get('ncaa_id'), team=team.get('team', ''), season=season,
+                             started_at=time.time(), _start=time.perf_counter())
+        _local.team = record
+        try:
+            yield record
+        except Exception as e:
+            record.finish(ERROR, f"{type(e).__name__}: {e}")
+            raise
+        else:
+            record.finish(PARSED if record.rows else EMPTY)
+        finally:
+            _local.team = None
+            self.add(record)
+
+    def add(self, record: TeamMetrics):
+        with self._lock:
+            self.records.append(record)
+            if self.jsonl_path:
+                with open(self.jsonl_path, 'a') as f:
+                    f.write(json.dumps(record.to_dict()) + '\n')
+            if self.prom_path:
+                write_prometheus(self.records, self.prom_path, self.host_states())
+
+    def host_states(self) -> List[Dict]:
+        return self.hosts.snapshot() if self.hosts else []
+
+    def summary(self, top: int = 10) -> str:
+        return summarize(self.records, top, self.host_states())
+
+
+# ============================================================================
+# EXPORT AND REPORTING
+# ============================================================================
+
+def _labels(**labels) -> str:
+    escaped = {k: str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', ' ') for k, v in labels.items()}
+    return '{' + ','.join(f'{k}="{v}"' for k, v in escaped.items()) + '}'
+
+
+def prometheus_lines(records: Iterable[TeamMetrics], hosts: Iterable[Dict] = ()) -> List[str]:
+    """Prometheus text exposition format for a set of team records and host states"""
+    records = list(records)
+    lines = []
+
+    def metric(name: str, kind: str, help_text: str, samples: Iterable[tuple]):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            lines.append(f"{name}{_labels(**labels) if labels else ''} {round(value, 6)}")
+
+    def totals(key) -> Dict[str, float]:
+        result: Dict[str, float] = {}
+        for record in records:
+            for name, value in key(record):
+                result[name] = result.get(name, 0.0) + value
+        return result
+
+    metric('roster_scrape_team_seconds', 'gauge', 'Wall time of the last scrape of each team',
+           [({'ncaa_id': r.ncaa_id, 'team': r.team, 'strategy': r.strategy, 'outcome': r.outcome}, r.seconds)
+            for r in records])
+    metric('roster_scrape_team_rows', 'gauge', 'Rows parsed for each team',
+           [({'ncaa_id': r.ncaa_id, 'team': r.team}, r.rows) for r in records])
+    metric('roster_scrape_phase_seconds_total', 'counter', 'Time spent in each scrape phase',
+           [({'phase': p}, s) for p, s in totals(lambda r: r.phases.items()).items()])
+    metric('roster_scrape_strategy_seconds_total', 'counter', 'Wall time of teams by routed strategy',
+           [({'strategy': s}, v) for s, v in totals(lambda r: [(r.strategy or 'none', r.seconds)]).items()])
+    metric('roster_scrape_teams_total', 'counter', 'Teams scraped by outcome',
+           [({'outcome': o}, n) for o, n in totals(lambda r: [(r.outcome, 1)]).items()])
+    metric('roster_scrape_fallbacks_total', 'counter', 'Fallbacks triggered',
+           [({'fallback': f}, n) for f, n in totals(lambda r: [(f, 1) for f in r.fallbacks]).items()])
+    metric('roster_scrape_failed_attempt_seconds_total', 'counter',
+           'Time spent in strategies and fallbacks that did not produce the roster',
+           [({'attempt': a}, s) for a, s in totals(lambda r: [(n, s) for n, s, ok in r.attempts if not ok]).items()])
+    metric('roster_scrape_bytes_total', 'counter', 'Response bytes fetched',
+           [({}, sum(r.bytes for r in records))])
+    metric('roster_scrape_requests_total', 'counter', 'Fetches made (HTTP, curl and renders)',
+           [({}, sum(r.requests for r in records))])
+    metric('roster_scrape_rows_total', 'counter', 'Rows parsed',
+           [({}, sum(r.rows for r in records))])
+    metric('roster_scrape_retries_total', 'counter', 'Requests retried after a throttled or failed answer',
+           [({}, sum(r.retries for r in records))])
+
+    hosts = list(hosts)
+    if hosts:
+        metric('roster_host_rate', 'gauge', 'Requests per second currently allowed to each host',
+               [({'host': h['host']}, h['rate']) for h in hosts])
+        metric('roster_host_circuit_open', 'gauge', '1 while the host circuit is open (0.5 half-open)',
+               [({'host': h['host']}, {'open': 1, 'half_open': 0.5}.get(h['state'], 0)) for h in hosts])
+        metric('roster_host_requests_total', 'counter', 'Requests sent to each host',
+               [({'host': h['host']}, h['requests']) for h in hosts])
+        metric('roster_host_throttled_total', 'counter', '429/403/5xx answers from each host',
+               [({'host': h['host']}, h['throttled']) for h in hosts])
+        metric('roster_host_failures_total', 'counter', 'Timeouts and connection errors per host',
+               [({'host': h['host']}, h['errors']) for h in hosts])
+        metric('roster_host_circuit_opened_total', 'counter', 'Times each host circuit opened',
+               [({'host': h['host']}, h['opened']) for h in hosts])
+        metric('roster_host_latency_seconds', 'gauge', 'Moving average response time per host',
+               [({'host': h['host']}, h['latency']) for h in hosts])
+
+    name = 'roster_scrape_team_duration_seconds'
+    lines.append(f"# HELP {name} Distribution of per-team wall time")
+    lines.append(f"# TYPE {name} histogram")
+    for bound in DURATION_BUCKETS:
+        lines.append(f'{name}_bucket{{le="{bound}"}} {sum(1 for r in records if r.seconds <= bound)}')
+    lines.append(f'{name}_bucket{{le="+Inf"}} {len(records)}')
+    lines.append(f"{name}_sum {round(sum(r.seconds for r in records), 6)}")
+    lines.append(f"{name}_count {len(records)}")
+    lines.append(f"roster_scrape_last_update_timestamp_seconds {round(time.time(), 3)}")
+    return lines
+
+
+def write_prometheus(records: Iterable[TeamMetrics], path: str, hosts: Iterable[Dict] = ()):
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        f.write('\n'.join(prometheus_lines(records, hosts)) + '\n')
+    os.replace(tmp, path)
+
+
+def summarize(records: List[TeamMetrics], top: int = 10, hosts: Iterable[Dict] = ()) -> str:
+    """End-of-run report"""
+    if not records:
+        return "No teams scraped"
+    total = sum(r.seconds for r in records)
+    outcomes: Dict[str, int] = {}
+    for r in records:
+        outcomes[r.outcome] = outcomes.get(r.outcome, 0) + 1
+    lines = [f"{len(records)} teams in {total:.1f}s of scraping ("
+             + ', '.join(f"{n} {o}" for o, n in sorted(outcomes.items())) + ")"]
+
+    phase_totals = {p: sum(r.phases.get(p, 0.0) for r in records) for p in PHASES}
+    lines.append("Time by phase: " + ', '.join(f"{p} {s:.1f}s" for p, s in phase_totals.items()))
+
+    lines.append(f"Slowest {min(top, len(records))} teams:")
+    for r in sorted(records, key=lambda r: -r.seconds)[:top]:
+        route = ' -> '.join([r.strategy] + r.fallbacks) or '-'
+        busiest = max(r.phases.items(), key=lambda item: item[1])
+        lines.append(f"  {r.seconds:7.2f}s  {r.team} ({r.ncaa_id})  {route}  {r.outcome}, "
+                     f"{r.rows} rows, mostly {busiest[0]} ({busiest[1]:.2f}s)")
+
+    strategies: Dict[str, List[TeamMetrics]] = {}
+    for r in records:
+        strategies.setdefault(r.strategy or 'none', []).append(r)
+    lines.append("Slowest strategies (total, mean, teams, parsed):")
+    for name, group in sorted(strategies.items(), key=lambda item: -sum(r.seconds for r in item[1]))[:top]:
+        spent = sum(r.seconds for r in group)
+        parsed = sum(1 for r in group if r.outcome == PARSED)
+        lines.append(f"  {spent:8.1f}s  {spent / len(group):6.2f}s  {len(group):4d}  {parsed:4d}  {name}")
+
+    failed: Dict[str, List[float]] = {}
+    for r in records:
+        for name, seconds, ok in r.attempts:
+            if not ok:
+                failed.setdefault(name, []).append(seconds)
+    lost = sum(sum(v) for v in failed.values())
+    lines.append(f"Time lost to failed attempts: {lost:.1f}s ({lost / total:.0%} of the run)" if total else
+                 "Time lost to failed attempts: 0.0s")
+    for name, times in sorted(failed.items(), key=lambda item: -sum(item[1])):
+        lines.append(f"  {sum(times):8.1f}s  {len(times):4d} x {name}")
+
+    troubled = [h for h in hosts if h['throttled'] or h['errors'] or h['opened']]
+    if troubled:
+        lines.append(f"Throttled or failing hosts ({sum(r.retries for r in records)} retries, "
+                     f"{sum(r.phases.get('wait', 0.0) for r in records):.1f}s waiting):")
+        for h in sorted(troubled, key=lambda h: -(h['throttled'] + h['errors']))[:top]:
+            lines.append(f"  {h['host']}  {h['state']}, {h['rate']:.2f} req/s, {h['requests']} requests, "
+                         f"{h['throttled']} throttled, {h['errors']} errors, circuit opened {h['opened']}x")
+    return '\n'.join(lines)
+
+
+def load_jsonl(path: str) -> List[TeamMetrics]:
+    """Read back a metrics JSONL file"""
+    records = []
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            row['attempts'] = [(a['name'], a['seconds'], a['ok']) for a in row['attempts']]
+            records.append(TeamMetrics(**row))
+    return records
+
+
+# ============================================================================
+# MAIN ENTRY POINT
+# ============================================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Summarize a scrape metrics JSONL file')
+    parser.add_argument('jsonl', help='Metrics file written by rosters.py -metrics')
+    parser.add_argument('-top', dest='top', type=int, default=10, help='Teams and strategies to list (default 10)')
+    parser.add_argument('-prom', dest='prom', help='Also (re)write a Prometheus textfile snapshot here')
+    results = parser.parse_args()
+
+    records = load_jsonl(results.jsonl)
+    if results.prom:
+        write_prometheus(records, results.prom)
+    print(summarize(records, results.top))
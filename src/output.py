@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Roster CSV output: buffered, optionally compressed, and never half-written
+
+get_all_rosters() wrote data/rosters_{season}.csv in place, so a run that
+died, or a reader that looked early, left a truncated season file; and
+write_one_team() appended to rosters_{season}_adds.csv in whatever
+directory it was run from, unlocked. Both now go through this module:
+
+  - SeasonWriter formats each team's rows into a buffer, writes it out
+    (compressed, if asked) once it passes BUFFER_BYTES, and on close
+    fsyncs the temp file and renames it over the destination; a run that
+    raises (or is interrupted) leaves the previous file as it was and keeps
+    the rows written so far next to it, as rosters_{season}.csv.partial
+    (.csv.partial.gz compressed)
+  - append_rows() adds one batch of rows to a shared file under an
+    exclusive flock, writing the header if the file is new, so several
+    threads or worker processes can add teams to the same season output;
+    each batch is one write, and for compressed files its own gzip member
+    or zstd frame, which readers of concatenated members take in stride
+  - open_text() reads any of them back, picking the codec from the suffix,
+    and existing() finds a season file whichever suffix it was written with
+
+Compression is chosen by suffix: .gz for gzip (stdlib), .zst for zstd,
+which needs the optional zstandard package.
+
+None of this makes plain output faster: text files were already buffered,
+and benchmarks/bench_output.py times the two writers about the same. What
+it buys is smaller files, whole-or-nothing seasons and safe appends.
+
+Usage:
+    python src/rosters.py -season 2023-24 -compress gzip
+    python src/output.py data/rosters_2023-24.csv.gz | head
+"""
+
+import io
+import os
+import csv
+import sys
+import zlib
+import fcntl
+import logging
+import argparse
+import threading
+from functools import lru_cache
+from typing import Iterable, List, Optional, TextIO
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================================
+# CONSTANTS
+# ============================================================================
+
+# Formatted rows held before they're compressed and written
+BUFFER_BYTES = 1024 * 1024
+
+SUFFIXES = {'gzip': '.gz', 'zstd': '.zst'}
+
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 10
+
+
+# ============================================================================
+# CODECS
+# ============================================================================
+
+@lru_cache(maxsize=1)
+def zstandard_module():
+    """The zstandard module, or None if it isn't installed"""
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def compression_for(path: str) -> Optional[str]:
+    """'gzip', 'zstd' or None, from the file's suffix"""
+    for compression, suffix in SUFFIXES.items():
+        if path.endswith(suffix):
+            return compression
+    return None
+
+
+def with_suffix(path: str, compression: Optional[str]) -> str:
+    """path with the compression's suffix added, e.g. rosters_2023-24.csv.gz"""
+    if compression is None or path.endswith(SUFFIXES[compression]):
+        return path
+    return path + SUFFIXES[compression]
+
+
+def without_suffix(path: str) -> str:
+    """path with its compression suffix, if any, taken off"""
+    compression = compression_for(path)
+    return path[:-len(SUFFIXES[compression])] if compression else path
+
+
+def _zstandard():
+    zstandard = zstandard_module()
+    if zstandard is None:
+        raise RuntimeError("zstd output needs the zstandard package (pip install zstandard)")
+    return zstandard
+
+
+def compressor(compression: Optional[str]):
+    """An object with compress(bytes) and flush() for the codec; None compresses nothing"""
+    if compression == 'gzip':
+        return zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    if compression == 'zstd':
+        return _zstandard().ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+    return None
+
+
+def compress(data: bytes, compression: Optional[str]) -> bytes:
+    """data as one complete gzip member or zstd frame"""
+    codec = compressor(compression)
+    return data if codec is None else codec.compress(data) + codec.flush()
+
+
+def open_text(path: str) -> TextIO:
+    """Open a CSV written here (or any CSV) for reading as text"""
+    compression = compression_for(path)
+    if compression == 'gzip':
+        import gzip
+        return gzip.open(path, 'rt', newline='', encoding='utf-8')
+    if compression == 'zstd':
+        # read_across_frames: appended batches are separate frames
+        reader = _zstandard().ZstdDecompressor().stream_reader(open(path, 'rb'), read_across_frames=True,
+                                                                closefd=True)
+        return io.TextIOWrapper(reader, newline='', encoding='utf-8')
+    return open(path, newline='', encoding='utf-8')
+
+
+def existing(path: str) -> Optional[str]:
+    """
+    path, or its .gz or .zst version, whichever exists (the newest if
+    several do); None if none does
+    """
+    candidates = [candidate for candidate in [path] + [path + suffix for suffix in SUFFIXES.values()]
+                  if os.path.exists(candidate)]
+    return max(candidates, key=os.path.getmtime) if candidates else None
+
+
+def format_rows(rows: Iterable[list], header: Optional[List[str]] = None) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(header)
+    writer.writerows(rows)
+    return buffer.getvalue().encode('utf-8')
+
+
+# ============================================================================
+# WRITERS
+# ============================================================================
+
+class SeasonWriter:
+    """
+    A CSV written through a buffer to a temp file and renamed into place on
+    close(); as a context manager, an exception keeps it as a .partial file
+    next to the destination instead. Safe to call from several threads.
+    """
+
+    def __init__(self, path: str, columns: List[str], compression: Optional[str] = None,
+                 buffer_bytes: int = BUFFER_BYTES):
+        self.path = with_suffix(path, compression)
+        self.compression = compression or compression_for(self.path)
+        self.buffer_bytes = buffer_bytes
+        self.rows = 0
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # Per process, so two runs writing the same season don't share a temp file
+        self._temp_path = f"{self.path}.tmp.{os.getpid()}"
+        self._compressor = compressor(self.compression)
+        self._file = open(self._temp_path, 'wb')
+        self._buffer = io.StringIO()
+        self._csv = csv.writer(self._buffer)
+        self._lock = threading.Lock()
+        self._csv.writerow(columns)
+
+    def write_rows(self, rows: Iterable[list]):
+        """Add a batch of rows, typically one team's"""
+        rows = list(rows)
+        with self._lock:
+            self._csv.writerows(rows)
+            self.rows += len(rows)
+            if self._buffer.tell() >= self.buffer_bytes:
+                self._flush()
+
+    def _flush(self):
+        data = self._buffer.getvalue().encode('utf-8')
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        self._file.write(self._compressor.compress(data) if self._compressor else data)
+
+    def close(self) -> str:
+        """Write what's buffered and move the file into place; returns its path"""
+        with self._lock:
+            self._flush()
+            if self._compressor:
+                self._file.write(self._compressor.flush())
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            os.replace(self._temp_path, self.path)
+        return self.path
+
+    def abort(self) -> Optional[str]:
+        """
+        Keep what was written as x.csv.partial (x.csv.partial.gz, ...),
+        leaving the destination untouched; returns the partial file's path, None if no rows were written
+        """
+        with self._lock:
+            if self.rows:
+                self._flush()
+                if self._compressor:
+                    self._file.write(self._compressor.flush())
+            self._file.close()
+            if not self.rows:
+                os.remove(self._temp_path)
+                return None
+            # Before the codec's suffix, so open_text() still reads it
+            suffix = SUFFIXES.get(self.compression, '')
+            partial_path = with_suffix(f"{self.path[:len(self.path) - len(suffix)]}.partial", self.compression)
+            os.replace(self._temp_path, partial_path)
+        logger.warning(f"Kept the {self.rows} rows written before the failure in {partial_path}; "
+                       f"{self.path} is unchanged")
+        return partial_path
+
+    def __enter__(self) -> 'SeasonWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def append_rows(path: str, columns: List[str], rows: List[list], compression: Optional[str] = None) -> int:
+    """
+    Append rows to a shared CSV in one locked write, with the header if the
+    file is new; returns the rows written
+    """
+    path = with_suffix(path, compression)
+    compression = compression or compression_for(path)
+    if not rows:
+        return 0
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'ab') as f:
+        # flock locks conflict across processes and across separate opens in one
+        fcntl.flock(f, fcntl.LOCK_EX)
+        header = columns if f.seek(0, os.SEEK_END) == 0 else None
+        f.write(compress(format_rows(rows, header), compression))
+        f.flush()
+    return len(rows)
+
+
+# ============================================================================
+# MAIN ENTRY POINT
+# ============================================================================
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description='Print a roster CSV, compressed or not')
+    parser.add_argument('path', help='CSV, .csv.gz or .csv.zst')
+    results = parser.parse_args()
+
+    with open_text(results.path) as f:
+        for line in f:
+            sys.stdout.write(line)
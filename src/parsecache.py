@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Parse-result memo for roster pages
+
+Re-running a season whose pages haven't changed still parsed every one of
+them, building a BeautifulSoup tree for each. The parsers are now memoized
+in data/parse_cache.db on a key made of:
+
+  - the SHA-256 of the page's markup
+  - a fingerprint of the parser: its source, and transitively the source of
+    the functions and classes it uses from this repo (team_domain, Player,
+    FieldExtractors, parse_hometown, ...) and the value of the data they use
+    (HEADERS, POSITION_MAP, the places tables, ...), following the methods
+    of classes too, so editing a parser, a normalizer or a lookup table
+    invalidates its entries without anyone bumping a version
+  - the team entry and the season, which the players are built from
+
+The players are stored as zlib-compressed JSON rows in Player field order.
+The database is SQLite in WAL mode with one connection per thread, so
+workers in several threads or processes (see workqueue.py) can share it.
+
+Fetchers hand the parsers a Page rather than a BeautifulSoup: it hashes the
+markup up front and builds the tree only when a parser actually runs, so a
+hit costs a hash and a lookup. Anything else passed as the page (a
+BeautifulSoup, None) is parsed as before, uncached.
+
+The wbkb and baskbl parsers decompose parts of the tree they're given;
+entries stay correct because the fetch-and-parse order for a strategy is
+fixed, so a parser always sees the same tree for the same markup.
+
+Usage:
+    python src/rosters.py -season 2023-24 -no-parse-cache
+    python src/parsecache.py
+    python src/parsecache.py -clear
+"""
+
+import os
+import json
+import zlib
+import time
+import types
+import inspect
+import hashlib
+import sqlite3
+import logging
+import argparse
+import threading
+from functools import wraps
+from dataclasses import fields
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from bs4 import BeautifulSoup
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================================
+# CONSTANTS
+# ============================================================================
+
+CACHE_FILE = 'data/parse_cache.db'
+
+# Functions and classes from modules in this directory are fingerprinted by source
+SOURCE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+# ============================================================================
+# PAGES
+# ============================================================================
+
+class Page:
+    """Fetched markup whose BeautifulSoup tree is built on first use"""
+
+    def __init__(self, markup: str):
+        self.markup = markup or ''
+        self.digest = hashlib.sha256(self.markup.encode('utf-8', 'surrogatepass')).hexdigest()
+        self._soup = None
+
+    @property
+    def soup(self) -> BeautifulSoup:
+        if self._soup is None:
+            self._soup = BeautifulSoup(self.markup, features="html.parser")
+        return self._soup
+
+    def __getattr__(self, name: str):
+        # Only reached for names Page doesn't have: find, find_all, select, ...
+        if name.startswith('__') or name == '_soup':
+            raise AttributeError(name)
+        return getattr(self.soup, name)
+
+    def __call__(self, *args, **kwargs):
+        return self.soup(*args, **kwargs)
+
+    def __iter__(self):
+        return iter(self.soup)
+
+    def __bool__(self) -> bool:
+        # Like a BeautifulSoup, a page is truthy even when empty
+        return True
+
+    def __str__(self) -> str:
+        return str(self.soup)
+
+
+# ============================================================================
+# FINGERPRINTS
+# ============================================================================
+
+def _local(obj: Any) -> bool:
+    """True for functions and classes defined in this repository's modules"""
+    try:
+        path = inspect.getsourcefile(obj)
+    except TypeError:
+        return False
+    return bool(path) and os.path.dirname(os.path.abspath(path)) == SOURCE_DIR
+
+
+def _names(code: types.CodeType) -> Set[str]:
+    """Global names a code object and the functions nested in it use"""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names |= _names(const)
+    return names
+
+
+def _methods(member: Any) -> List[types.FunctionType]:
+    """The functions behind a class attribute: methods, static and class methods, properties"""
+    if isinstance(member, (staticmethod, classmethod)):
+        member = member.__func__
+    if isinstance(member, property):
+        return [f for m in (member.fget, member.fset, member.fdel) if m is not None for f in _methods(m)]
+    member = inspect.unwrap(member) if hasattr(member, '__wrapped__') else member
+    return [member] if inspect.isfunction(member) else []
+
+
+def _describe_globals(func: types.FunctionType, seen: Set[int], parts: List[str]):
+    """Append the globals a function uses (other than modules), by name and value"""
+    for name in sorted(_names(func.__code__)):
+        if name in func.__globals__ and not isinstance(func.__globals__[name], types.ModuleType):
+            parts.append(name)
+            _describe(func.__globals__[name], seen, parts)
+
+
+def _describe(obj: Any, seen: Set[int], parts: List[str]):
+    """Append what `obj` contributes to a fingerprint"""
+    if isinstance(obj, (str, bytes, int, float, bool, type(None))):
+        parts.append(repr(obj))
+        return
+    if id(obj) in seen:
+        return
+    seen.add(id(obj))
+    if hasattr(obj, '__wrapped__'):
+        # lru_cache and functools.wraps decorators
+        obj = inspect.unwrap(obj)
+    if isinstance(obj, dict):
+        parts.append('{')
+        for key, value in obj.items():
+            _describe(key, seen, parts)
+            _describe(value, seen, parts)
+        parts.append('}')
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        parts.append('[')
+        for value in (sorted(obj, key=repr) if isinstance(obj, (set, frozenset)) else obj):
+            _describe(value, seen, parts)
+        parts.append(']')
+    elif hasattr(obj, 'pattern') and hasattr(obj, 'flags'):
+        parts.append(f"re({obj.pattern!r}, {obj.flags})")
+    elif inspect.isfunction(obj) or inspect.isclass(obj):
+        if not _local(obj):
+            parts.append(f"{getattr(obj, '__module__', '')}.{obj.__qualname__}")
+            return
+        parts.append(inspect.getsource(obj))
+        if inspect.isfunction(obj):
+            _describe_globals(obj, seen, parts)
+        else:
+            # The class source covers its methods' code, not the globals they use
+            for name, member in sorted(vars(obj).items()):
+                for method in _methods(member):
+                    parts.append(f"{obj.__qualname__}.{name}")
+                    _describe_globals(method, seen, parts)
+    else:
+        # Loggers, locks, registries: state, not logic
+        parts.append(type(obj).__name__)
+
+
+def fingerprint(func: Callable) -> str:
+    """Hash of a parser's source, and of the local code and data it reaches"""
+    parts: List[str] = []
+    _describe(func, set(), parts)
+    return hashlib.sha256('\n'.join(parts).encode()).hexdigest()
+
+
+# ============================================================================
+# CACHE
+# ============================================================================
+
+class ParseCache:
+    """Parser results by page hash, parser fingerprint, team and season"""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS results (
+        key TEXT PRIMARY KEY,
+        parser TEXT NOT NULL,
+        players INTEGER NOT NULL,
+        rows BLOB NOT NULL,
+        created_at REAL NOT NULL
+    );
+    """
+
+    def __init__(self, path: str = CACHE_FILE):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _conn(self) -> sqlite3.Connection:
+        # Opened on first use, so importing the scraper creates nothing
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(self.SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[List[list]]:
+        row = self._conn().execute("SELECT rows FROM results WHERE key = ?", (key,)).fetchone()
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, key: str, parser: str, rows: List[list]):
+        blob = zlib.compress(json.dumps(rows, separators=(',', ':')).encode(), 6)
+        with self._conn() as conn:
+            conn.execute("INSERT OR REPLACE INTO results (key, parser, players, rows, created_at) VALUES (?, ?, ?, ?, ?)",
+                         (key, parser, len(rows), blob, time.time()))
+
+    def stats(self) -> List[tuple]:
+        """(parser, entries, players, stored bytes) per parser"""
+        return self._conn().execute("SELECT parser, COUNT(*), SUM(players), SUM(LENGTH(rows)) FROM results "
+                                    "GROUP BY parser ORDER BY parser").fetchall()
+
+    def clear(self):
+        with self._conn() as conn:
+            conn.execute("DELETE FROM results")
+        self._conn().execute("VACUUM")
+
+
+# Used by memoized parsers; None turns the memo off
+cache: Optional[ParseCache] = ParseCache()
+
+
+def memoized(result_type: type) -> Callable:
+    """Decorator for parser(team, html, season) -> List[result_type], result_type a dataclass"""
+    names = [f.name for f in fields(result_type)]
+
+    def decorator(parser: Callable) -> Callable:
+        state: Dict[str, str] = {}
+
+        @wraps(parser)
+        def wrapper(team: Dict, html, season: str):
+            if cache is None or not isinstance(html, Page):
+                return parser(team, html, season)
+            if 'fingerprint' not in state:
+                # Computed on first use, once every global the parser names exists
+                state['fingerprint'] = fingerprint(parser)
+            key = hashlib.sha256('\0'.join([
+                html.digest, state['fingerprint'], season, json.dumps(team, sort_keys=True, default=str)
+            ]).encode()).hexdigest()
+
+            rows = cache.get(key)
+            if rows is not None:
+                return [result_type(*row) for row in rows]
+            roster = parser(team, html, season)
+            if all(type(player) is result_type for player in roster):
+                cache.put(key, parser.__name__, [[getattr(player, name) for name in names] for player in roster])
+            return roster
+
+        return wrapper
+
+    return decorator
+
+
+# ============================================================================
+# MAIN ENTRY POINT
+# ============================================================================
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description='Show or clear the parse-result memo')
+    parser.add_argument('-cache', dest='cache', default=CACHE_FILE, help=f'Memo database (default {CACHE_FILE})')
+    parser.add_argument('-clear', action='store_true', dest='clear', help='Delete every entry')
+    results = parser.parse_args()
+
+    parse_cache = ParseCache(results.cache)
+    if results.clear:
+        parse_cache.clear()
+        logger.info(f"Cleared {results.cache}")
+    else:
+        for name, entries, players, size in parse_cache.stats():
+            print(f"{name:<24}{entries:>8} pages{players:>9} players{size / 1024:>10.0f} KB")
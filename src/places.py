@@ -0,0 +1,137 @@
+"""
+Reference tables for hometown cleaning
+
+State names, postal and AP-style abbreviations and the non-standard spellings
+that show up in roster hometowns, plus the country list and country fixes
+from analysis/cleaning.qmd.
+"""
+
+from typing import Dict
+
+
+# ============================================================================
+# US STATES
+# ============================================================================
+
+# Postal abbreviation -> state name (usdata::abbr2state)
+US_STATES: Dict[str, str] = {
+    'AL': 'Alabama', 'AK': 'Alaska', 'AZ': 'Arizona', 'AR': 'Arkansas',
+    'CA': 'California', 'CO': 'Colorado', 'CT': 'Connecticut', 'DE': 'Delaware',
+    'DC': 'District of Columbia', 'FL': 'Florida', 'GA': 'Georgia', 'HI': 'Hawaii',
+    'ID': 'Idaho', 'IL': 'Illinois', 'IN': 'Indiana', 'IA': 'Iowa', 'KS': 'Kansas',
+    'KY': 'Kentucky', 'LA': 'Louisiana', 'ME': 'Maine', 'MD': 'Maryland',
+    'MA': 'Massachusetts', 'MI': 'Michigan', 'MN': 'Minnesota', 'MS': 'Mississippi',
+    'MO': 'Missouri', 'MT': 'Montana', 'NE': 'Nebraska', 'NV': 'Nevada',
+    'NH': 'New Hampshire', 'NJ': 'New Jersey', 'NM': 'New Mexico', 'NY': 'New York',
+    'NC': 'North Carolina', 'ND': 'North Dakota', 'OH': 'Ohio', 'OK': 'Oklahoma',
+    'OR': 'Oregon', 'PA': 'Pennsylvania', 'RI': 'Rhode Island', 'SC': 'South Carolina',
+    'SD': 'South Dakota', 'TN': 'Tennessee', 'TX': 'Texas', 'UT': 'Utah', 'VT': 'Vermont',
+    'VA': 'Virginia', 'WA': 'Washington', 'WV': 'West Virginia', 'WI': 'Wisconsin',
+    'WY': 'Wyoming',
+}
+
+# Non-standard state spellings appended to the postmastr dictionary
+STATES_NON_STANDARD: Dict[str, str] = {
+    'SD.': 'SD', 'MASS': 'MA', 'CALIF': 'CA', 'MICH': 'MI', 'NEB': 'NE', 'IND': 'IN',
+    'MINN': 'MN', 'ORE': 'OR', 'OHIO': 'OH', 'FLA': 'FL', 'MISS': 'MS', 'TENN': 'TN',
+    'ARIZ': 'AZ', 'KAN': 'KS', 'ALA': 'AL', 'OKLA': 'OK', 'WIS': 'WI', 'ILL': 'IL',
+    'WASH': 'WA', 'ARK': 'AR', 'COLO': 'CO', 'NEV': 'NV', 'CONN': 'CT', 'WISC': 'WI',
+    'WVA': 'WV', 'DEL': 'DE', 'WYO': 'WY', 'CALI': 'CA', 'LOUIS': 'LA', 'VIRG': 'VA',
+    'MONT': 'MT', 'PENN': 'PA', 'TEX': 'TX', 'KANS': 'KS', 'NEBR': 'NE', 'IDA': 'ID',
+    'COL': 'CO',
+}
+
+# AP-style abbreviations with the periods removed ("Neb." -> "NEB", "W.Va." -> "WVA")
+AP_STATES: Dict[str, str] = {
+    'ALA': 'AL', 'ARIZ': 'AZ', 'ARK': 'AR', 'CALIF': 'CA', 'COLO': 'CO', 'CONN': 'CT',
+    'DEL': 'DE', 'FLA': 'FL', 'ILL': 'IL', 'IND': 'IN', 'KAN': 'KS', 'MASS': 'MA',
+    'MICH': 'MI', 'MINN': 'MN', 'MISS': 'MS', 'MONT': 'MT', 'NEB': 'NE', 'NEV': 'NV',
+    'OKLA': 'OK', 'ORE': 'OR', 'TENN': 'TN', 'WASH': 'WA', 'WVA': 'WV', 'WIS': 'WI',
+    'WYO': 'WY',
+}
+
+# Misspellings and local forms seen in roster hometowns (cleaning.qmd's hand fixes)
+STATE_MISSPELLINGS: Dict[str, str] = {
+    'HAWAII': 'HI', 'OAHU': 'HI', 'KEN': 'KY', 'ILLNOIS': 'IL', 'OREG': 'OR',
+    'N C': 'NC', 'USVI': 'USVI', 'CALFIORNIA': 'CA', 'CALIFONIA': 'CA',
+}
+
+# Upper-case state name, abbreviation or variant -> postal abbreviation
+STATE_LOOKUP: Dict[str, str] = {
+    **{abbr: abbr for abbr in US_STATES},
+    **{name.upper(): abbr for abbr, name in US_STATES.items()},
+    **STATES_NON_STANDARD,
+    **AP_STATES,
+    **STATE_MISSPELLINGS,
+}
+
+
+# ============================================================================
+# COUNTRIES
+# ============================================================================
+
+CANADA_VARIANTS = [
+    'BC', 'QUEBEC', 'BRITISH COLUMBIA', 'ALBERTA', 'ONTARIO', 'NOVA SCOTIA', 'ONT',
+    'QUÉBEC', 'MANITOBA', 'QUE', 'ON', 'QC', 'ALBERTA (AB)', 'ONT CANADA', 'BC CANADA',
+    'BC,CANADA', 'ON CANADA', 'ALBERTA CANADA', 'SASKATCHEWAN',
+]
+
+AUSTRALIA_VARIANTS = [
+    'VICTORIA', 'SOUTH AUSTRALIA', 'WESTERN AUSTRALIA', 'TASMANIA', 'AUSTRAILA', 'AU',
+    'QUEENSLAND AUSTRALIA', 'AUS', 'AUSTRAILIA',
+]
+
+# FIBA member nations (the notebook's starting list) plus the ones it added by hand
+COUNTRIES = [
+    'AFGHANISTAN', 'ALBANIA', 'ALGERIA', 'ANDORRA', 'ANGOLA', 'ANTIGUA AND BARBUDA',
+    'ARGENTINA', 'ARMENIA', 'ARUBA', 'AUSTRALIA', 'AUSTRIA', 'AZERBAIJAN', 'BAHAMAS',
+    'BAHRAIN', 'BANGLADESH', 'BARBADOS', 'BELARUS', 'BELGIUM', 'BELIZE', 'BENIN',
+    'BERMUDA', 'BHUTAN', 'BOLIVIA', 'BOSNIA AND HERZEGOVINA', 'BOTSWANA', 'BRAZIL',
+    'BRUNEI', 'BULGARIA', 'BURKINA FASO', 'BURUNDI', 'CAMBODIA', 'CAMEROON', 'CANADA',
+    'CAPE VERDE', 'CAYMAN ISLANDS', 'CENTRAL AFRICAN REPUBLIC', 'CHAD', 'CHILE', 'CHINA',
+    'CHINESE TAIPEI', 'COLOMBIA', 'CONGO', 'COSTA RICA', "COTE D'IVOIRE", 'CROATIA',
+    'CUBA', 'CURACAO', 'CYPRUS', 'CZECH REPUBLIC', 'CZECHIA', 'DENMARK', 'DJIBOUTI',
+    'DOMINICA', 'DOMINICAN REPUBLIC', 'ECUADOR', 'EGYPT', 'EL SALVADOR', 'ENGLAND',
+    'ESTONIA', 'ETHIOPIA', 'FIJI', 'FINLAND', 'FRANCE', 'GABON', 'GAMBIA', 'GEORGIA',
+    'GERMANY', 'GHANA', 'GREAT BRITAIN', 'GREECE', 'GRENADA', 'GUAM', 'GUATEMALA',
+    'GUINEA', 'GUYANA', 'HAITI', 'HONDURAS', 'HONG KONG', 'HUNGARY', 'ICELAND', 'INDIA',
+    'INDONESIA', 'IRAN', 'IRAQ', 'IRELAND', 'ISRAEL', 'ITALY', 'JAMAICA', 'JAPAN',
+    'JORDAN', 'KAZAKHSTAN', 'KENYA', 'KOREA', 'KOSOVO', 'KUWAIT', 'KYRGYZSTAN', 'LATVIA',
+    'LEBANON', 'LESOTHO', 'LIBERIA', 'LIBYA', 'LITHUANIA', 'LUXEMBOURG', 'MACAU',
+    'MADAGASCAR', 'MALAWI', 'MALAYSIA', 'MALDIVES', 'MALI', 'MALTA', 'MAURITANIA',
+    'MAURITIUS', 'MEXICO', 'MOLDOVA', 'MONACO', 'MONGOLIA', 'MONTENEGRO', 'MOROCCO',
+    'MOZAMBIQUE', 'NAMIBIA', 'NEPAL', 'NETHERLANDS', 'NEW ZEALAND', 'NICARAGUA', 'NIGER',
+    'NIGERIA', 'NORTH MACEDONIA', 'NORTHERN IRELAND', 'NORWAY', 'OMAN', 'PAKISTAN',
+    'PALESTINE', 'PANAMA', 'PAPUA NEW GUINEA', 'PARAGUAY', 'PERU', 'PHILIPPINES',
+    'POLAND', 'PORTUGAL', 'PUERTO RICO', 'QATAR', 'ROMANIA', 'RUSSIA', 'RWANDA',
+    'SAINT LUCIA', 'SAMOA', 'SAN MARINO', 'SAUDI ARABIA', 'SCOTLAND', 'SENEGAL',
+    'SERBIA', 'SEYCHELLES', 'SIERRA LEONE', 'SINGAPORE', 'SLOVAKIA', 'SLOVENIA',
+    'SOMALIA', 'SOUTH AFRICA', 'SOUTH KOREA', 'SOUTH SUDAN', 'SPAIN', 'SRI LANKA',
+    'SUDAN', 'SURINAME', 'SWEDEN', 'SWITZERLAND', 'SYRIA', 'TAHITI', 'TAIWAN',
+    'TAJIKISTAN', 'TANZANIA', 'THAILAND', 'TOGO', 'TONGA', 'TRINIDAD AND TOBAGO',
+    'TUNISIA', 'TURKEY', 'TÜRKIYE', 'TURKMENISTAN', 'UGANDA', 'UKRAINE',
+    'UNITED ARAB EMIRATES', 'UNITED KINGDOM', 'URUGUAY', 'UZBEKISTAN', 'VANUATU',
+    'VENEZUELA', 'VIETNAM', 'WALES', 'YEMEN', 'ZAMBIA', 'ZIMBABWE',
+]
+
+# Ways rosters write the United States itself
+USA_VARIANTS = ['USA', 'US', 'UNITED STATES', 'UNITED STATES OF AMERICA', 'AMERICA']
+
+# Upper-case country text -> standardized country
+COUNTRY_FIXES: Dict[str, str] = {
+    **{c: 'CANADA' for c in CANADA_VARIANTS},
+    **{c: 'AUSTRALIA' for c in AUSTRALIA_VARIANTS},
+    'BARCELONA': 'SPAIN', 'BRASIL': 'BRAZIL', "HAWAI'I": 'USA', 'SWEEDEN': 'SWEDEN',
+    'CZECHIA': 'CZECH REPUBLIC', 'GREAT BRITAIN': 'UNITED KINGDOM',
+    'ENGLAND': 'UNITED KINGDOM', 'UK': 'UNITED KINGDOM', 'WEST AFRICA': 'SENEGAL',
+    'BOSNIA': 'BOSNIA & HERZEGOVINA', 'BOSNIA AND HERZEGOVINA': 'BOSNIA & HERZEGOVINA',
+    'BOSNIA HERZEGOVINA': 'BOSNIA & HERZEGOVINA', 'TAURANGA BAY OF PLENTY': 'NEW ZEALAND',
+    'THE NETHERLANDS': 'NETHERLANDS', 'TÜRKIYE': 'TURKEY',
+}
+
+# Further spellings recognized by the hometown parser
+COUNTRY_ALIASES: Dict[str, str] = {
+    'PR': 'PUERTO RICO', 'DR': 'DOMINICAN REPUBLIC', 'REPUBLIC OF GEORGIA': 'GEORGIA',
+    'BOSNIA & HERZEGOVINA': 'BOSNIA & HERZEGOVINA', 'REPUBLIC OF KOREA': 'SOUTH KOREA',
+    'HOLLAND': 'NETHERLANDS', 'NZ': 'NEW ZEALAND',
+}
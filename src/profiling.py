@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Opt-in profiling of individual team scrapes
+
+Wraps chosen teams (by ID, a seeded random sample of N, or every team whose
+routed strategy matches) in a sampling CPU profiler and a tracemalloc
+snapshot, and writes for each team:
+
+  <dir>/<ncaa_id>.collapsed  collapsed stacks for flamegraph.pl or speedscope
+                             (all teams merged in <dir>/profile.collapsed)
+  <dir>/<ncaa_id>.prof       the same samples in pstats format (pstats, snakeviz)
+  <dir>/<ncaa_id>.txt        top functions by own and cumulative time, peak
+                             traced memory and the top allocation sites
+
+The profiler samples only the thread scraping the team. cProfile is not
+used because on Python 3.12 it instruments every thread (the fake-site
+server, the sampler itself), which buries the scrape in noise and slows it
+several times over.
+
+Teams that are not selected run under contextlib.nullcontext, and without
+a profiler get_all_rosters does not touch this module at all, so profiling
+costs nothing unless it is switched on. tracemalloc is process-wide, so
+one team is profiled at a time; a selected team that
+starts while another is being profiled (in a threaded run) is skipped.
+
+Library use:
+
+    profiler = TeamProfiler('data/profiles', teams=[255, 326])
+    get_all_rosters('2023-24', profiler=profiler)
+
+    with profiler.team(team, season):
+        scrape_team(team, season)
+
+Usage:
+    python src/rosters.py -season 2023-24 -profile data/profiles -profile-teams 255 326
+    python src/rosters.py -season 2023-24 -profile data/profiles -profile-sample 20
+    python src/rosters.py -season 2023-24 -profile data/profiles -profile-strategy javascript
+"""
+
+import io
+import os
+import sys
+import time
+import random
+import marshal
+import logging
+import threading
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from typing import List, Dict, Optional, Iterable
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================================
+# CONSTANTS
+# ============================================================================
+
+SAMPLE_INTERVAL = 0.002
+TRACEMALLOC_FRAMES = 10
+TOP_FUNCTIONS = 30
+TOP_ALLOCATIONS = 30
+MERGED_FILE = 'profile.collapsed'
+
+
+# ============================================================================
+# STACK SAMPLER
+# ============================================================================
+
+Frame = tuple  # (filename, first line, function name), as pstats keys functions
+
+
+def frame_label(frame: Frame) -> str:
+    filename, line, name = frame
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+
+class StackSampler:
+    """Samples one thread's Python stack at a fixed interval"""
+
+    def __init__(self, thread_id: int, interval: float = SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        # root-to-leaf stack -> (samples, seconds)
+        self.samples: Counter = Counter()
+        self.seconds: Dict[tuple, float] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            now = time.perf_counter()
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                frame = frame.f_back
+            if stack:
+                stack = tuple(reversed(stack))
+                self.samples[stack] += 1
+                self.seconds[stack] = self.seconds.get(stack, 0.0) + now - last
+            last = now
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self, root: str = '') -> List[str]:
+        """Lines of "frame;frame;frame count", optionally under a root frame"""
+        prefix = [root.replace(';', ',')] if root else []
+        return [f"{';'.join(prefix + [frame_label(f) for f in stack])} {count}"
+                for stack, count in self.samples.most_common()]
+
+    def pstats_dict(self) -> Dict:
+        """
+        The samples as a pstats stats dict
+
+        {func: (primitive calls, calls, own time, cumulative time, {caller: (...)})}
+        where "calls" are samples. Recursive frames count once per stack.
+        """
+        stats: Dict[Frame, list] = {}
+        callers: Dict[Frame, Dict[Frame, list]] = {}
+        for stack, count in self.samples.items():
+            seconds = self.seconds[stack]
+            seen = set()
+            for i, func in enumerate(stack):
+                entry = stats.setdefault(func, [0, 0, 0.0, 0.0])
+                if func not in seen:
+                    seen.add(func)
+                    entry[0] += count
+                    entry[1] += count
+                    entry[3] += seconds
+                    if i:
+                        edge = callers.setdefault(func, {}).setdefault(stack[i - 1], [0, 0, 0.0, 0.0])
+                        edge[0] += count
+                        edge[1] += count
+                        edge[3] += seconds
+            stats[stack[-1]][2] += seconds
+            if len(stack) > 1:
+                callers.setdefault(stack[-1], {}).setdefault(stack[-2], [0, 0, 0.0, 0.0])[2] += seconds
+        return {func: (cc, nc, tt, ct, {c: tuple(v) for c, v in callers.get(func, {}).items()})
+                for func, (cc, nc, tt, ct) in stats.items()}
+
+
+# ============================================================================
+# TEAM PROFILER
+# ============================================================================
+
+class TeamProfiler:
+    """Decides which teams to profile and writes their profiles"""
+
+    def __init__(self, output_dir: str, teams: Optional[Iterable[int]] = None, sample: Optional[int] = None,
+                 strategies: Optional[Iterable[str]] = None, seed: int = 0, memory: bool = True):
+        self.output_dir = output_dir
+        self.teams = set(teams or ())
+        self.sample = sample
+        self.strategies = set(strategies or ())
+        self.seed = seed
+        self.memory = memory
+        self.profiled: List[int] = []
+        if not (self.teams or sample or self.strategies):
+            logger.warning("TeamProfiler has no teams, sample or strategies; nothing will be profiled")
+        self._lock = threading.Lock()
+        self._busy = threading.Lock()
+        os.makedirs(output_dir, exist_ok=True)
+        open(os.path.join(output_dir, MERGED_FILE), 'w').close()
+
+    def choose(self, team_ids: Iterable[int]):
+        """Add a seeded random sample of `sample` teams from the run's team list"""
+        if self.sample:
+            candidates = sorted(set(team_ids) - self.teams)
+            rng = random.Random(self.seed)
+            self.teams.update(rng.sample(candidates, min(self.sample, len(candidates))))
+
+    def selected(self, team: Dict) -> bool:
+        # Strategy filters need the routing to happen first, so every team is
+        # profiled and only the matching ones are kept
+        return team.get('ncaa_id') in self.teams or bool(self.strategies)
+
+    def team(self, team: Dict, season: str):
+        """Context manager profiling one team's scrape if it is selected"""
+        if not self.selected(team):
+            return nullcontext()
+        if not self._busy.acquire(blocking=False):
+            logger.warning(f"Not profiling {team.get('team')}: another team is being profiled")
+            return nullcontext()
+        return self._profile(team, season)
+
+    @contextmanager
+    def _profile(self, team: Dict, season: str):
+        try:
+            tracing = self.memory and not tracemalloc.is_tracing()
+            if tracing:
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+                tracemalloc.reset_peak()
+            sampler = StackSampler(threading.get_ident())
+            start = time.perf_counter()
+            sampler.start()
+            try:
+                yield
+            finally:
+                sampler.stop()
+                seconds = time.perf_counter() - start
+                snapshot, peak = None, 0
+                if tracing:
+                    snapshot = tracemalloc.take_snapshot()
+                    peak = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+        finally:
+            self._busy.release()
+
+        record = metrics.current()
+        strategy = record.strategy if record else ''
+        if team.get('ncaa_id') in self.teams or strategy in self.strategies:
+            self.write(team, season, strategy, seconds, sampler, snapshot, peak)
+
+    def write(self, team: Dict, season: str, strategy: str, seconds: float, sampler: StackSampler,
+              snapshot: Optional[tracemalloc.Snapshot], peak: int):
+        base = os.path.join(self.output_dir, str(team.get('ncaa_id')))
+        stats = sampler.pstats_dict()
+        with open(f"{base}.prof", 'wb') as f:
+            marshal.dump(stats, f)
+
+        out = io.StringIO()
+        out.write(f"{team.get('team')} ({team.get('ncaa_id')}) {season}, strategy {strategy or '-'}, "
+                  f"{seconds:.2f}s, {sum(sampler.samples.values())} samples every "
+                  f"{sampler.interval * 1000:.0f} ms\n")
+        for title, column in (('own', 2), ('cumulative', 3)):
+            out.write(f"\nTop functions by {title} time:\n")
+            for func, row in sorted(stats.items(), key=lambda item: -item[1][column])[:TOP_FUNCTIONS]:
+                out.write(f"  {row[column]:8.3f}s {row[column] / seconds if seconds else 0:6.1%}  "
+                          f"{frame_label(func)}  {func[0]}\n")
+        if snapshot is not None:
+            out.write(f"\nPeak traced memory {peak / 1024:.1f} KiB; top allocation sites still held:\n")
+            snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+            for stat in snapshot.statistics('lineno')[:TOP_ALLOCATIONS]:
+                out.write(f"  {stat.size / 1024:9.1f} KiB {stat.count:7d} blocks  {stat.traceback}\n")
+        with open(f"{base}.txt", 'w') as f:
+            f.write(out.getvalue())
+
+        lines = sampler.collapsed(f"{team.get('team')} ({team.get('ncaa_id')})")
+        text = '\n'.join(lines) + ('\n' if lines else '')
+        with open(f"{base}.collapsed", 'w') as f:
+            f.write(text)
+        with self._lock:
+            with open(os.path.join(self.output_dir, MERGED_FILE), 'a') as f:
+                f.write(text)
+            self.profiled.append(team.get('ncaa_id'))
+        logger.info(f"Profiled {team.get('team')} ({seconds:.2f}s) -> {base}.collapsed, .prof, .txt")
@@ -0,0 +1,513 @@
+#!/usr/bin/env python3
+"""
+Continuous roster refresh, each team revisited as often as it changes
+
+A cron'd `rosters.py -season` rerun fetches every team every time, although
+in the preseason a few schools update their rosters daily and most never do.
+The refresh daemon instead keeps a revisit interval per team:
+
+  - a visit that finds the roster changed halves the interval (down to
+    MIN_INTERVAL); one that finds it unchanged stretches it by half again
+    (up to MAX_INTERVAL), so each team's visits settle near the rate its
+    roster actually changes
+  - teams on the default and wvball strategies are fetched with the
+    ETag/Last-Modified of their last visit, and a 304 settles the visit
+    without a download or a parse; every other team runs through
+    rosters.scrape_team()
+  - "changed" means the parsed rows differ (by digest), not the page bytes,
+    so a rotated ad or timestamp doesn't count
+  - a visit that fails (an error, or a page with no players) is retried
+    after ERROR_RETRY or the team's interval, whichever is sooner, doubling
+    with each failure in a row up to MAX_INTERVAL; an open host circuit
+    (throttle.py) is retried when it is due to half-open
+
+Each change is emitted as it is found: appended to the updates JSONL file
+(the team's full new rows and the names added and removed), upserted into
+the roster store with -store, and kept for GET /updates. The per-team state
+is saved after every visit, so a restart picks up where it left off. A
+team with no saved state is due at once, compared against its rows in
+data/rosters_{season}.csv if there are any, so a first start (with -once
+too) visits every team; the workers' pace staggers the visits after it.
+
+The status server answers:
+
+    GET /status           queue, visits by outcome, requests, interval spread
+    GET /teams            every team's freshness and next visit, soonest first
+    GET /teams/<ncaa_id>
+    GET /updates          the most recent changes
+
+Usage:
+    python src/refresh.py -season 2025-26
+    python src/refresh.py -season 2025-26 -workers 8 -store data/rosters.db -port 8096
+    python src/refresh.py -season 2025-26 -teams 255 326 -once
+"""
+
+import os
+import csv
+import json
+import time
+import heapq
+import signal
+import hashlib
+import logging
+import argparse
+import threading
+import statistics
+from collections import Counter, deque
+from dataclasses import dataclass, asdict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse
+from typing import List, Dict, Any, Optional, Callable
+
+from bs4 import BeautifulSoup
+
+import rosters
+import archive
+import output
+import throttle
+from store import RosterStore, ROSTER_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================================
+# CONSTANTS
+# ============================================================================
+
+STATE_FILE = 'data/refresh_{season}.json'
+UPDATES_FILE = 'data/refresh_updates_{season}.jsonl'
+DEFAULT_PORT = 8096
+DEFAULT_WORKERS = 4
+
+# Seconds between visits to one team
+MIN_INTERVAL = 3600.0
+INITIAL_INTERVAL = 86400.0
+MAX_INTERVAL = 7 * 86400.0
+SPEEDUP = 0.5
+SLOWDOWN = 1.5
+
+# Seconds before a visit that failed is first tried again (at most the team's interval)
+ERROR_RETRY = 1800.0
+
+# Longest an idle worker sleeps before checking the queue again
+MAX_IDLE = 30.0
+
+# Strategies whose whole visit is one GET of fetch_roster()'s URL, so it can be conditional
+CONDITIONAL_STRATEGIES = {'default', 'wvball'}
+
+CHANGED, UNCHANGED, NOT_MODIFIED, EMPTY, ERROR = 'changed', 'unchanged', 'not_modified', 'empty', 'error'
+
+RECENT_UPDATES = 100
+
+
+def roster_digest(rows: List[list]) -> str:
+    """Digest of CSV rows, the same whether they came from a scrape or back from a CSV file"""
+    digest = hashlib.sha1()
+    for row in rows:
+        digest.update('\x1f'.join('' if value is None else str(value) for value in row).encode())
+        digest.update(b'\x1e')
+    return digest.hexdigest()
+
+
+def player_names(rows: List[list]) -> List[str]:
+    name = ROSTER_COLUMNS.index('name')
+    return sorted(str(row[name]) for row in rows if row[name])
+
+
+# ============================================================================
+# TEAM STATE
+# ============================================================================
+
+@dataclass
+class TeamState:
+    """What the daemon knows about one team's roster page"""
+    ncaa_id: int
+    team: str
+    interval: float
+    next_visit: float
+    last_visit: float = 0.0
+    last_change: float = 0.0
+    digest: str = ''
+    players: tuple = ()
+    etag: str = ''
+    last_modified: str = ''
+    visits: int = 0
+    changes: int = 0
+    not_modified: int = 0
+    errors: int = 0
+    failures: int = 0  # in a row
+    last_outcome: str = ''
+    last_error: str = ''
+
+    def freshness(self, now: float) -> Dict[str, Any]:
+        return {'ncaa_id': self.ncaa_id, 'team': self.team, 'players': len(self.players),
+                'interval': round(self.interval), 'age': round(now - self.last_visit) if self.last_visit else None,
+                'changed_ago': round(now - self.last_change) if self.last_change else None,
+                'next_visit_in': round(self.next_visit - now), 'visits': self.visits, 'changes': self.changes,
+                'not_modified': self.not_modified, 'errors': self.errors, 'last_outcome': self.last_outcome,
+                'last_error': self.last_error}
+
+
+def baseline_from_csv(path: str) -> Dict[int, List[list]]:
+    """ncaa_id -> rows of a season CSV written by get_all_rosters (plain, .gz or .zst)"""
+    by_team: Dict[int, List[list]] = {}
+    path = output.existing(path)
+    if not path:
+        return by_team
+    with output.open_text(path) as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header != ROSTER_COLUMNS:
+            logger.warning(f"{path} doesn't have the scraper's columns; starting without a baseline")
+            return by_team
+        for row in reader:
+            if row and row[0].isdigit():
+                by_team.setdefault(int(row[0]), []).append(row)
+    return by_team
+
+
+# ============================================================================
+# DAEMON
+# ============================================================================
+
+class RefreshDaemon:
+    """Revisits a season's teams on adaptive per-team intervals"""
+
+    def __init__(self, teams: List[Dict], season: str, state_path: Optional[str] = None,
+                 updates_path: Optional[str] = None, store_path: Optional[str] = None,
+                 workers: int = DEFAULT_WORKERS, min_interval: float = MIN_INTERVAL,
+                 initial_interval: float = INITIAL_INTERVAL, max_interval: float = MAX_INTERVAL,
+                 baseline_path: Optional[str] = None, on_update: Optional[Callable[[Dict], None]] = None):
+        """
+        baseline_path: season CSV a first start takes its baseline from
+            (default data/rosters_{season}.csv; '' for none)
+        on_update: also called with every update as it is emitted
+        """
+        self.season = season
+        self.teams = {t['ncaa_id']: t for t in teams if rosters.scrapeable(t, season)}
+        self.state_path = state_path or STATE_FILE.format(season=season)
+        self.updates_path = updates_path or UPDATES_FILE.format(season=season)
+        self.workers = max(workers, 1)
+        self.min_interval = min_interval
+        self.initial_interval = min(max(initial_interval, min_interval), max_interval)
+        self.max_interval = max_interval
+        self.on_update = on_update
+        self.baseline_path = f"data/rosters_{season}.csv" if baseline_path is None else baseline_path
+        self.store = RosterStore(store_path, check_same_thread=False) if store_path else None
+
+        self.states = self._load()
+        self.outcomes: Counter = Counter()
+        self.recent: deque = deque(maxlen=RECENT_UPDATES)
+        self.in_flight: set = set()
+        self.started_at = time.time()
+        self.stopping = threading.Event()
+        self._heap = [(state.next_visit, ncaa_id) for ncaa_id, state in self.states.items()]
+        heapq.heapify(self._heap)
+        self._cond = threading.Condition()
+        self._save_lock = threading.Lock()
+        self._emit_lock = threading.Lock()
+        for path in (self.state_path, self.updates_path):
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    # ------------------------------------------------------------------ state
+
+    def _load(self) -> Dict[int, TeamState]:
+        now = time.time()
+        saved: Dict[int, Dict] = {}
+        if os.path.exists(self.state_path):
+            with open(self.state_path) as f:
+                data = json.load(f)
+            if data.get('season') == self.season:
+                saved = {entry['ncaa_id']: entry for entry in data['teams']}
+        baseline = baseline_from_csv(self.baseline_path) if self.baseline_path and not saved else {}
+
+        states = {}
+        for ncaa_id, team in self.teams.items():
+            if ncaa_id in saved:
+                entry = dict(saved[ncaa_id], players=tuple(saved[ncaa_id]['players']))
+                states[ncaa_id] = TeamState(**entry)
+                continue
+            rows = baseline.get(ncaa_id)
+            states[ncaa_id] = TeamState(ncaa_id, team.get('team', ''), self.initial_interval, now,
+                                        digest=roster_digest(rows) if rows else '',
+                                        players=tuple(player_names(rows)) if rows else ())
+        logger.info(f"Tracking {len(states)} teams for {self.season} ({len(saved)} from {self.state_path}, "
+                    f"{sum(1 for s in states.values() if s.digest and s.ncaa_id not in saved)} with a CSV baseline)")
+        return states
+
+    def save(self):
+        with self._save_lock:
+            data = {'season': self.season, 'saved_at': time.time(),
+                    'teams': [asdict(state) for state in self.states.values()]}
+            temp_file = f"{self.state_path}.tmp"
+            with open(temp_file, 'w') as f:
+                json.dump(data, f)
+            os.replace(temp_file, self.state_path)
+
+    # ----------------------------------------------------------------- visits
+
+    def visit(self, state: TeamState) -> str:
+        """Fetch one team, compare with what it had, and schedule its next visit"""
+        team = self.teams[state.ncaa_id]
+        strategy = rosters.team_strategy(team)
+        validators = {}
+        try:
+            if strategy in CONDITIONAL_STRATEGIES:
+                roster, validators = self._conditional_scrape(team, state, strategy)
+                if roster is None:
+                    return self._finish(state, NOT_MODIFIED)
+            else:
+                roster = rosters.scrape_team(team, self.season)
+            rows = [rosters.player_row(player, self.season) for player in roster]
+        except throttle.CircuitOpen as e:
+            return self._finish(state, ERROR, str(e), retry_at=e.retry_at)
+        except Exception as e:
+            logger.error(f"Error refreshing {state.team}: {e}")
+            return self._finish(state, ERROR, f"{type(e).__name__}: {e}")
+
+        if not rows:
+            # An empty page is more often a broken fetch than a team with no players
+            return self._finish(state, EMPTY, 'no players parsed')
+        state.etag = validators.get('etag', '')
+        state.last_modified = validators.get('last_modified', '')
+        digest = roster_digest(rows)
+        if digest == state.digest:
+            return self._finish(state, UNCHANGED)
+        self._emit(state, rows)
+        state.digest = digest
+        state.players = tuple(player_names(rows))
+        return self._finish(state, CHANGED)
+
+    def _conditional_scrape(self, team: Dict, state: TeamState, strategy: str) -> tuple:
+        """(roster, validators), with roster None if the page hasn't changed since the last visit"""
+        url = f"{team['url']}/roster/{self.season}"
+        headers = dict(rosters.DEFAULT_HEADERS)
+        if state.etag:
+            headers['If-None-Match'] = state.etag
+        if state.last_modified:
+            headers['If-Modified-Since'] = state.last_modified
+        with archive.scope(team, self.season):
+            r = rosters.http_get(url, headers)
+            if r.status_code == 304:
+                return None, {}
+            if r.status_code == 403:
+                html = rosters.fetch_url_as_browser(url)
+                validators = {}
+            else:
+                html = r.text
+                validators = {'etag': r.headers.get('ETag', ''), 'last_modified': r.headers.get('Last-Modified', '')}
+        roster = rosters.parse_roster_page(team, BeautifulSoup(html, features="html.parser"), self.season, strategy)
+        return roster, validators
+
+    def _finish(self, state: TeamState, outcome: str, error: str = '', retry_at: Optional[float] = None) -> str:
+        now = time.time()
+        state.visits += 1
+        state.last_visit = now
+        state.last_outcome = outcome
+        state.last_error = error
+        if outcome == CHANGED:
+            state.changes += 1
+            state.last_change = now
+            state.interval = max(self.min_interval, state.interval * SPEEDUP)
+        elif outcome in (UNCHANGED, NOT_MODIFIED):
+            state.not_modified += outcome == NOT_MODIFIED
+            state.interval = min(self.max_interval, state.interval * SLOWDOWN)
+        else:
+            state.errors += 1
+        if outcome in (EMPTY, ERROR):
+            state.failures += 1
+            backoff = min(min(state.interval, ERROR_RETRY) * 2 ** (state.failures - 1), self.max_interval)
+            state.next_visit = retry_at or now + backoff
+        else:
+            state.failures = 0
+            state.next_visit = now + state.interval
+        self.outcomes[outcome] += 1
+        logger.info(f"{state.team}: {outcome}{' (' + error + ')' if error else ''}, "
+                    f"next visit in {state.next_visit - now:.0f}s")
+        return outcome
+
+    def _emit(self, state: TeamState, rows: List[list]):
+        names = player_names(rows)
+        update = {'time': time.time(), 'season': self.season, 'ncaa_id': state.ncaa_id, 'team': state.team,
+                  'rows': len(rows), 'first': not state.digest,
+                  'added': sorted(set(names) - set(state.players)),
+                  'removed': sorted(set(state.players) - set(names)),
+                  'players': [dict(zip(ROSTER_COLUMNS, row)) for row in rows]}
+        with self._emit_lock:
+            with open(self.updates_path, 'a') as f:
+                f.write(json.dumps(update) + '\n')
+            if self.store:
+                self.store.upsert_team(state.ncaa_id, self.season, update['players'])
+            self.recent.append({k: v for k, v in update.items() if k != 'players'})
+        logger.info(f"{state.team} changed: +{len(update['added'])} -{len(update['removed'])} players")
+        if self.on_update:
+            self.on_update(update)
+
+    # -------------------------------------------------------------- scheduling
+
+    def _take_due(self) -> Optional[TeamState]:
+        """The team most overdue for a visit, if any is due; call with _cond held"""
+        if self._heap and self._heap[0][0] <= time.time():
+            _, ncaa_id = heapq.heappop(self._heap)
+            self.in_flight.add(ncaa_id)
+            return self.states[ncaa_id]
+        return None
+
+    def _work(self, once: bool):
+        while not self.stopping.is_set():
+            with self._cond:
+                state = self._take_due()
+                if state is None:
+                    if once:
+                        return
+                    wait = self._heap[0][0] - time.time() if self._heap else MAX_IDLE
+                    self._cond.wait(min(max(wait, 0.01), MAX_IDLE))
+                    continue
+            try:
+                self.visit(state)
+            finally:
+                with self._cond:
+                    self.in_flight.discard(state.ncaa_id)
+                    heapq.heappush(self._heap, (state.next_visit, state.ncaa_id))
+                    self._cond.notify_all()
+            self.save()
+
+    def run(self, once: bool = False):
+        """Visit teams as they come due until stop(); with once, only those due now"""
+        threads = [threading.Thread(target=self._work, args=(once,), name=f"refresh-{i}", daemon=True)
+                   for i in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.save()
+        if self.store:
+            self.store.close()
+
+    def stop(self):
+        self.stopping.set()
+        with self._cond:
+            self._cond.notify_all()
+
+    # ------------------------------------------------------------------ status
+
+    def status(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._cond:
+            in_flight = len(self.in_flight)
+            due = sum(1 for at, _ in self._heap if at <= now)
+            next_visit = self._heap[0][0] if self._heap else None
+        states = list(self.states.values())
+        intervals = [s.interval for s in states] or [0]
+        hosts = throttle.controller.snapshot()
+        return {
+            'season': self.season,
+            'teams': len(states),
+            'in_flight': in_flight,
+            'due': due,
+            'next_visit_in': round(next_visit - now, 1) if next_visit else None,
+            'uptime': round(now - self.started_at),
+            'visits': dict(self.outcomes),
+            'requests': sum(h['requests'] for h in hosts),
+            'open_circuits': sum(1 for h in hosts if h['state'] != throttle.CLOSED),
+            'interval': {'min': round(min(intervals)), 'median': round(statistics.median(intervals)),
+                         'max': round(max(intervals))},
+            'never_visited': sum(1 for s in states if not s.last_visit),
+            'overdue': sum(1 for s in states if s.next_visit < now - s.interval),
+        }
+
+    def team_status(self) -> List[Dict[str, Any]]:
+        now = time.time()
+        return [state.freshness(now) for state in sorted(self.states.values(), key=lambda s: s.next_visit)]
+
+
+# ============================================================================
+# STATUS SERVER
+# ============================================================================
+
+def make_handler(daemon: RefreshDaemon):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status: int, body: Any):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            path = urlparse(self.path).path.rstrip('/')
+            if path == '/status':
+                self._send(200, daemon.status())
+            elif path == '/teams':
+                self._send(200, daemon.team_status())
+            elif path.startswith('/teams/'):
+                ncaa_id = path.rsplit('/', 1)[1]
+                state = daemon.states.get(int(ncaa_id)) if ncaa_id.isdigit() else None
+                if state is None:
+                    self._send(404, {'error': f"not tracking team {ncaa_id}"})
+                else:
+                    self._send(200, state.freshness(time.time()))
+            elif path == '/updates':
+                self._send(200, list(daemon.recent))
+            else:
+                self._send(404, {'error': 'not found'})
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+    return Handler
+
+
+# ============================================================================
+# MAIN ENTRY POINT
+# ============================================================================
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description='Continuously refresh a season\'s rosters')
+    parser.add_argument('-season', dest='season', required=True, help='Season string such as "2025-26"')
+    parser.add_argument('-teams', nargs='+', type=int, dest='teams', help='Only these team IDs')
+    parser.add_argument('-teams-file', dest='teams_file', default=rosters.TEAMS_FILE)
+    parser.add_argument('-state', dest='state', help=f'Per-team state file (default {STATE_FILE})')
+    parser.add_argument('-updates', dest='updates', help=f'Changes are appended here (default {UPDATES_FILE})')
+    parser.add_argument('-store', dest='store', help='Also upsert every change into this SQLite database')
+    parser.add_argument('-baseline', dest='baseline',
+                        help='Season CSV a first start compares against (default data/rosters_{season}.csv)')
+    parser.add_argument('-workers', dest='workers', type=int, default=DEFAULT_WORKERS,
+                        help=f'Teams visited at once (default {DEFAULT_WORKERS})')
+    parser.add_argument('-min-interval', dest='min_interval', type=float, default=MIN_INTERVAL,
+                        help=f'Seconds (default {MIN_INTERVAL:.0f})')
+    parser.add_argument('-initial-interval', dest='initial_interval', type=float, default=INITIAL_INTERVAL,
+                        help=f'Seconds (default {INITIAL_INTERVAL:.0f})')
+    parser.add_argument('-max-interval', dest='max_interval', type=float, default=MAX_INTERVAL,
+                        help=f'Seconds (default {MAX_INTERVAL:.0f})')
+    parser.add_argument('-host', dest='host', default='127.0.0.1')
+    parser.add_argument('-port', dest='port', type=int, default=DEFAULT_PORT,
+                        help=f'Status server port, 0 for none (default {DEFAULT_PORT})')
+    parser.add_argument('-once', action='store_true', dest='once',
+                        help='Visit the teams that are due now, then exit')
+    results = parser.parse_args()
+
+    with open(results.teams_file) as f:
+        teams = [t for t in json.load(f) if not results.teams or t['ncaa_id'] in results.teams]
+    daemon = RefreshDaemon(teams, results.season, results.state, results.updates, results.store,
+                           results.workers, results.min_interval, results.initial_interval, results.max_interval,
+                           results.baseline)
+
+    server = None
+    if results.port and not results.once:
+        server = ThreadingHTTPServer((results.host, results.port), make_handler(daemon))
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        logger.info(f"Status on http://{results.host}:{results.port}/status")
+
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *args: daemon.stop())
+    daemon.run(once=results.once)
+    if server:
+        server.shutdown()
+        server.server_close()
+    logger.info(f"Stopped after {dict(daemon.outcomes)}")
@@ -6,6 +6,14 @@ Adapted from Soccer scraper architecture for volleyball-specific needs
 Usage:
     python rosters.py -season 2023-24
     python rosters.py -season 2023-24 -teams 255 326
+    python rosters.py -season 2023-24 -store data/rosters.db
+    python rosters.py -season 2023-24 -metrics data/metrics/scrape_2023-24
+    python rosters.py -season 2023-24 -teams 255 326 -profile data/profiles -profile-teams 255
+    python rosters.py -season 2023-24 -workers 8 -browser-workers 2
+    python rosters.py -season 2023-24 -clean
+    python rosters.py -season 2023-24 -compress gzip
+    python rosters.py -season 2023-24 -reparse-only
+    python rosters.py -season 2023-24 -reparse-archive
     python rosters.py -url https://example.com/sports/w-volley -season 2023-24
 """
 
@@ -13,20 +21,35 @@ import os
 import re
 import csv
 import json
+import hashlib
+import time
 import argparse
 import logging
 import subprocess
-from typing import List, Dict, Any, Optional
+import threading
+from functools import lru_cache
+from contextlib import nullcontext
+from typing import List, Dict, Any, Optional, Iterable, Tuple
 from dataclasses import dataclass, asdict
 from pathlib import Path
 
 import requests
-from requests_html import HTMLSession
 from bs4 import BeautifulSoup
-import tldextract
 
-# Configure tldextract to not fetch updates (to avoid 403 errors)
-tldextract.extract = tldextract.TLDExtract(suffix_list_urls=None)
+from store import RosterStore, ROSTER_COLUMNS
+from cleaning import clean_file
+from hometown import parse_hometown
+import metrics
+import throttle
+import fallback
+import snapshots
+import archive
+import output
+import parsecache
+from parsecache import Page
+from throttle import CircuitOpen
+from profiling import TeamProfiler
+from scheduler import TeamScheduler, CostModel
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -75,6 +98,24 @@ HEADERS = {
     'Hometown/Previous School/Club Team': 'town'
 }
 
+TEAMS_FILE = 'data/teams.json'
+
+# Seconds before a request or curl gives up on a host
+REQUEST_TIMEOUT = 30
+
+# Headers for every plain requests fetch
+DEFAULT_HEADERS = {
+    "user-agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/95.0.4638.69 Safari/537.36"
+}
+
+# Longest a run waits for open circuits before its second pass
+MAX_DEFERRED_WAIT = 300
+
+# Per-team routing precomputed from TEAMS_FILE; rebuilt whenever teams.json
+# or the TeamConfig tables change
+REGISTRY_FILE = 'data/team_registry.json'
+REGISTRY_VERSION = 1
+
 
 # ============================================================================
 # DATA STRUCTURES
@@ -104,7 +145,7 @@ class Player:
         # Clean string fields
         for k, v in list(d.items()):
             if isinstance(v, str):
-                d[k] = FieldExtractors.clean_text(v)
+                d[k] = BATCH_NORMALIZERS['text'](v)
 
         return d
 
@@ -113,6 +154,71 @@ class Player:
 # FIELD EXTRACTORS
 # ============================================================================
 
+# Patterns compiled once at import instead of on every call
+JERSEY_PATTERNS = [re.compile(p) for p in [
+    r'Jersey Number[:\s]+(\d+)',
+    r'#(\d{1,2})\b',
+    r'No\.?[:\s]*(\d{1,2})\b',
+    r'\b(\d{1,2})\s+(?=[A-Z])',
+    r'^\s*(\d{1,2})\s*$',
+]]
+
+HEIGHT_PATTERNS = [re.compile(p) for p in [
+    r"(\d+['\′]\s*\d+[\"\″']{1,2}(?:\s*/\s*\d+\.\d+m)?)",
+    r"(\d+['\′]\s*\d+[\"\″']{1,2})",
+    r"(\d+-\d+)",
+    r"(\d+\.\d+m)",
+    r"Height:\s*([^\,\n]+)",
+]]
+
+POSITION_RE = re.compile(
+    r'\b(S|SETTER|OH|OUTSIDE|OUTSIDE HITTER|MB|MIDDLE|MIDDLE BLOCKER|'
+    r'RS|RIGHT SIDE|RIGHT SIDE HITTER|L|LIBERO|DS|DEFENSIVE SPECIALIST|'
+    r'OPP|OPPOSITE)\b',
+    re.IGNORECASE
+)
+
+POSITION_MAP = {
+    'S': 'S', 'SETTER': 'S',
+    'OH': 'OH', 'OUTSIDE': 'OH', 'OUTSIDE HITTER': 'OH',
+    'MB': 'MB', 'MIDDLE': 'MB', 'MIDDLE BLOCKER': 'MB',
+    'RS': 'RS', 'RIGHT SIDE': 'RS', 'RIGHT SIDE HITTER': 'RS', 'OPP': 'RS', 'OPPOSITE': 'RS',
+    'L': 'L', 'LIBERO': 'L',
+    'DS': 'DS', 'DEFENSIVE SPECIALIST': 'DS',
+}
+
+YEAR_MAP = {
+    'Fr': 'Freshman', 'Fr.': 'Freshman', 'FR': 'Freshman',
+    'So': 'Sophomore', 'So.': 'Sophomore', 'SO': 'Sophomore',
+    'Jr': 'Junior', 'Jr.': 'Junior', 'JR': 'Junior',
+    'Sr': 'Senior', 'Sr.': 'Senior', 'SR': 'Senior',
+    'Gr': 'Graduate', 'Gr.': 'Graduate', 'GR': 'Graduate',
+    'R-Fr': 'Redshirt Freshman', 'R-Fr.': 'Redshirt Freshman',
+    'R-So': 'Redshirt Sophomore', 'R-So.': 'Redshirt Sophomore',
+    'R-Jr': 'Redshirt Junior', 'R-Jr.': 'Redshirt Junior',
+    'R-Sr': 'Redshirt Senior', 'R-Sr.': 'Redshirt Senior',
+    '1st': 'Freshman', 'First': 'Freshman',
+    '2nd': 'Sophomore', 'Second': 'Sophomore',
+    '3rd': 'Junior', 'Third': 'Junior',
+    '4th': 'Senior', 'Fourth': 'Senior',
+}
+
+WHITESPACE_RE = re.compile(r'\s+')
+SOCIAL_SUFFIX_RE = re.compile(r'\s*(Instagram|Twitter|Opens in a new window).*$')
+UNWANTED_SUFFIX_RE = re.compile(r'\s*(Full Bio|Instagram|Twitter|Opens in a new window).*$')
+
+# The label prefixes stripped by clean_field_labels(), as one alternation.
+# '^High school:' and '^Hometown:' are already covered by the unanchored form.
+FIELD_LABEL_RE = re.compile(
+    r'\b(?:Class|Hometown|High school|Previous College|Previous School|Ht\.?|Pos\.?|Major):\s*',
+    re.IGNORECASE
+)
+LEADING_NO_RE = re.compile(r'^No\.?:\s*', re.IGNORECASE)
+
+# Distinct values remembered per field by FieldExtractors.normalize_batch()
+NORMALIZE_CACHE_SIZE = 8192
+
+
 class FieldExtractors:
     """Common utilities for extracting player fields from text and HTML"""
 
@@ -122,16 +228,8 @@ class FieldExtractors:
         if not text:
             return ''
 
-        patterns = [
-            r'Jersey Number[:\s]+(\d+)',
-            r'#(\d{1,2})\b',
-            r'No\.?[:\s]*(\d{1,2})\b',
-            r'\b(\d{1,2})\s+(?=[A-Z])',
-            r'^\s*(\d{1,2})\s*$',
-        ]
-
-        for pattern in patterns:
-            match = re.search(pattern, text)
+        for pattern in JERSEY_PATTERNS:
+            match = pattern.search(text)
             if match:
                 return match.group(1)
         return ''
@@ -149,16 +247,8 @@ class FieldExtractors:
         if not text:
             return ''
 
-        patterns = [
-            r"(\d+['\′]\s*\d+[\"\″']{1,2}(?:\s*/\s*\d+\.\d+m)?)",
-            r"(\d+['\′]\s*\d+[\"\″']{1,2})",
-            r"(\d+-\d+)",
-            r"(\d+\.\d+m)",
-            r"Height:\s*([^\,\n]+)",
-        ]
-
-        for pattern in patterns:
-            match = re.search(pattern, text)
+        for pattern in HEIGHT_PATTERNS:
+            match = pattern.search(text)
             if match:
                 return match.group(1).strip()
         return ''
@@ -176,31 +266,12 @@ class FieldExtractors:
         text = text.strip()
 
         # Look for abbreviated position patterns
-        position_match = re.search(
-            r'\b(S|SETTER|OH|OUTSIDE|OUTSIDE HITTER|MB|MIDDLE|MIDDLE BLOCKER|'
-            r'RS|RIGHT SIDE|RIGHT SIDE HITTER|L|LIBERO|DS|DEFENSIVE SPECIALIST|'
-            r'OPP|OPPOSITE)\b',
-            text,
-            re.IGNORECASE
-        )
+        position_match = POSITION_RE.search(text)
         if position_match:
             pos = position_match.group(1).upper()
 
             # Normalize variations
-            if pos in ('S', 'SETTER'):
-                return 'S'
-            elif pos in ('OH', 'OUTSIDE', 'OUTSIDE HITTER'):
-                return 'OH'
-            elif pos in ('MB', 'MIDDLE', 'MIDDLE BLOCKER'):
-                return 'MB'
-            elif pos in ('RS', 'RIGHT SIDE', 'RIGHT SIDE HITTER', 'OPP', 'OPPOSITE'):
-                return 'RS'
-            elif pos in ('L', 'LIBERO'):
-                return 'L'
-            elif pos in ('DS', 'DEFENSIVE SPECIALIST'):
-                return 'DS'
-
-            return pos
+            return POSITION_MAP.get(pos, pos)
 
         return ''
 
@@ -210,24 +281,8 @@ class FieldExtractors:
         if not year_text:
             return ''
 
-        year_map = {
-            'Fr': 'Freshman', 'Fr.': 'Freshman', 'FR': 'Freshman',
-            'So': 'Sophomore', 'So.': 'Sophomore', 'SO': 'Sophomore',
-            'Jr': 'Junior', 'Jr.': 'Junior', 'JR': 'Junior',
-            'Sr': 'Senior', 'Sr.': 'Senior', 'SR': 'Senior',
-            'Gr': 'Graduate', 'Gr.': 'Graduate', 'GR': 'Graduate',
-            'R-Fr': 'Redshirt Freshman', 'R-Fr.': 'Redshirt Freshman',
-            'R-So': 'Redshirt Sophomore', 'R-So.': 'Redshirt Sophomore',
-            'R-Jr': 'Redshirt Junior', 'R-Jr.': 'Redshirt Junior',
-            'R-Sr': 'Redshirt Senior', 'R-Sr.': 'Redshirt Senior',
-            '1st': 'Freshman', 'First': 'Freshman',
-            '2nd': 'Sophomore', 'Second': 'Sophomore',
-            '3rd': 'Junior', 'Third': 'Junior',
-            '4th': 'Senior', 'Fourth': 'Senior',
-        }
-
         cleaned = year_text.strip()
-        return year_map.get(cleaned, year_text)
+        return YEAR_MAP.get(cleaned, year_text)
 
     @staticmethod
     def parse_hometown_school(text: str) -> Dict[str, str]:
@@ -245,8 +300,8 @@ class FieldExtractors:
             return result
 
         # Clean the text
-        text = re.sub(r'\s*(Instagram|Twitter|Opens in a new window).*$', '', text)
-        text = re.sub(r'\s+', ' ', text).strip()
+        text = SOCIAL_SUFFIX_RE.sub('', text)
+        text = WHITESPACE_RE.sub(' ', text).strip()
 
         # Pattern: City, State/Country followed by school info separated by /
         if '/' in text:
@@ -269,6 +324,18 @@ class FieldExtractors:
 
         return result
 
+    @staticmethod
+    def parse_hometown(text: str) -> Dict[str, Optional[str]]:
+        """
+        Split a hometown into city, state and country
+
+        Handles postal and AP-style states ("Omaha, Neb."), countries and
+        provinces ("Calgary, Alberta, Canada") and common misspellings.
+        Results are cached, so this is cheap enough to call for every player.
+        """
+        place = parse_hometown(text)
+        return {'city': place.city, 'state': place.state, 'country': place.country}
+
     @staticmethod
     def clean_text(text: str) -> str:
         """Clean and normalize text"""
@@ -276,10 +343,10 @@ class FieldExtractors:
             return ""
 
         # Remove extra whitespace and normalize
-        cleaned = re.sub(r'\s+', ' ', text.strip())
+        cleaned = WHITESPACE_RE.sub(' ', text.strip())
 
         # Remove common unwanted elements
-        cleaned = re.sub(r'\s*(Full Bio|Instagram|Twitter|Opens in a new window).*$', '', cleaned)
+        cleaned = UNWANTED_SUFFIX_RE.sub('', cleaned)
 
         # Strip common labelled prefixes
         cleaned = FieldExtractors.clean_field_labels(cleaned)
@@ -292,17 +359,44 @@ class FieldExtractors:
         if not text:
             return text
 
-        patterns = [
-            r'\bClass:\s*', r'\bHometown:\s*', r'\bHigh school:\s*',
-            r'\bPrevious College:\s*', r'\bPrevious School:\s*',
-            r'\bHt\.?:\s*', r'\bPos\.?:\s*', r'\bMajor:\s*',
-            r'^High school:\s*', r'^Hometown:\s*', r'^No\.?:\s*',
-        ]
+        text = FIELD_LABEL_RE.sub('', text).strip()
+        return LEADING_NO_RE.sub('', text).strip()
 
-        for p in patterns:
-            text = re.sub(p, '', text, flags=re.IGNORECASE).strip()
+    @staticmethod
+    def normalize_batch(values: Iterable[Optional[str]], field: str = 'text') -> List[str]:
+        """
+        Normalize a whole column of values at once
 
-        return text
+        Each distinct value is normalized once and the results are kept in a
+        bounded LRU cache, so the few hundred distinct positions, heights and
+        class years in a season are only processed the first time they appear.
+
+        Args:
+            values: Column of raw strings (None allowed)
+            field: 'text', 'position', 'height', 'year' or 'jersey'
+
+        Returns:
+            Normalized values, in the same order as the input
+        """
+        normalize = BATCH_NORMALIZERS[field]
+        values = list(values)
+        distinct = {v: normalize(v) for v in set(values)}
+        return [distinct[v] for v in values]
+
+    @staticmethod
+    def clear_batch_cache():
+        """Drop the values remembered by normalize_batch()"""
+        for normalize in BATCH_NORMALIZERS.values():
+            normalize.cache_clear()
+
+
+BATCH_NORMALIZERS = {
+    'text': lru_cache(maxsize=NORMALIZE_CACHE_SIZE)(FieldExtractors.clean_text),
+    'position': lru_cache(maxsize=NORMALIZE_CACHE_SIZE)(FieldExtractors.extract_position),
+    'height': lru_cache(maxsize=NORMALIZE_CACHE_SIZE)(FieldExtractors.extract_height),
+    'year': lru_cache(maxsize=NORMALIZE_CACHE_SIZE)(FieldExtractors.normalize_academic_year),
+    'jersey': lru_cache(maxsize=NORMALIZE_CACHE_SIZE)(FieldExtractors.extract_jersey_number),
+}
 
 
 # ============================================================================
@@ -359,7 +453,7 @@ class URLBuilder:
     @staticmethod
     def extract_base_domain(full_url: str) -> str:
         """Extract base domain from full URL"""
-        extracted = tldextract.extract(full_url)
+        extracted = split_domain(full_url)
 
         if extracted.subdomain:
             domain = f"{extracted.subdomain}.{extracted.domain}.{extracted.suffix}"
@@ -369,6 +463,34 @@ class URLBuilder:
         return f"https://{domain}"
 
 
+@lru_cache(maxsize=1)
+def domain_extractor():
+    """
+    tldextract, set up on first use
+
+    Importing tldextract and loading its suffix list costs about a second,
+    and only teams missing from the registry (or runs that rebuild it) need it.
+    """
+    import tldextract
+    # Configure tldextract to not fetch updates (to avoid 403 errors)
+    return tldextract.TLDExtract(suffix_list_urls=None)
+
+
+@lru_cache(maxsize=4096)
+def split_domain(url: str):
+    """tldextract's (subdomain, domain, suffix) for a URL"""
+    return domain_extractor()(url)
+
+
+def team_domain(team: Dict) -> str:
+    """Registered domain of a team's site (e.g. 'gozips.com'), for absolute player links"""
+    route = team_registry().route(team)
+    if route:
+        return route.domain
+    extracted = split_domain(team['url'])
+    return f"{extracted.domain}.{extracted.suffix}"
+
+
 # ============================================================================
 # TEAM CONFIGURATION
 # ============================================================================
@@ -379,7 +501,7 @@ class TeamConfig:
     # Teams requiring JavaScript rendering
     # These teams use fetch_url_with_javascript() + parse_roster()
     # Note: Teams with specific shotscraper_* functions are NOT in this list
-    JS_TEAMS = [
+    JS_TEAMS = frozenset([
         # Original JS teams (non-overlapping with specific scrapers)
         8, 31, 66, 72, 80, 224, 327, 334, 463, 513, 528, 623, 648, 694, 706, 725,
         735, 742, 809, 811, 1000,
@@ -403,7 +525,38 @@ class TeamConfig:
         1111,  # Greenville
         30081,  # Penn St. Harrisburg
         30244,  # Edward Waters
-    ]
+    ])
+
+    # Teams with their own fetch_and_parse_* or shotscraper_* function; these
+    # are routed before JS_TEAMS and the URL patterns (see strategy())
+    SCRAPER_TEAMS = {
+        77: 'byu',        # BYU - custom season format
+        630: 'san_jose',  # San Jose State
+        415: 'miami',     # Miami
+        147: 'clemson',   # Clemson
+        311: 'iowa_state',  # Iowa State
+        736: 'vandy',     # Vanderbilt
+        721: 'shotscraper_airforce',  # Air Force
+        556: 'shotscraper_data_tables',
+    }
+
+    # Shot-scraper JavaScript extraction, by page layout
+    SHOTSCRAPER_TEAMS = {
+        'shotscraper_table': frozenset([5, 308, 497, 554]),
+        'shotscraper_card': frozenset([
+            9, 71, 83, 96, 99, 156, 173, 180, 191, 234, 249, 257, 301, 306, 367, 387, 392, 400, 404,
+            418, 428, 441, 490, 521, 522, 559, 574, 603, 635, 664, 671, 676, 688, 690, 700, 719,
+            749, 758,
+        ]),
+        'shotscraper_list_item': frozenset([51, 248, 731]),
+        'shotscraper_roster_player': frozenset([37, 52, 175, 316, 487]),
+    }
+
+    # team ID -> strategy, for every team routed on its ID
+    STRATEGY_TEAMS = {
+        **{team_id: name for name, ids in SHOTSCRAPER_TEAMS.items() for team_id in ids},
+        **SCRAPER_TEAMS,
+    }
 
     # Team-specific URL formats
     TEAM_URL_FORMATS = {
@@ -449,6 +602,138 @@ class TeamConfig:
 
         return 'default'
 
+    @classmethod
+    def strategy(cls, team_id: int, team_url: str = '') -> str:
+        """
+        Name of the scraper scrape_team() routes a team to
+
+        Team-specific scrapers first, then JavaScript rendering, then the URL
+        pattern. The names are also the metrics attempt names.
+        """
+        if team_id in cls.STRATEGY_TEAMS:
+            return cls.STRATEGY_TEAMS[team_id]
+        if team_id in cls.JS_TEAMS:
+            return 'javascript'
+        if 'wvball' in team_url:
+            return 'wvball'
+        if 'w-baskbl' in team_url:
+            return 'w-baskbl'
+        return 'default'
+
+    @classmethod
+    def fingerprint(cls) -> str:
+        """Hash of the routing tables, so a cached registry notices edits to them"""
+        tables = [sorted(cls.JS_TEAMS), sorted(cls.STRATEGY_TEAMS.items()), sorted(cls.TEAM_URL_FORMATS.items())]
+        return hashlib.sha1(json.dumps(tables).encode()).hexdigest()
+
+
+# ============================================================================
+# TEAM REGISTRY
+# ============================================================================
+
+@dataclass(frozen=True)
+class TeamRoute:
+    """Everything scrape_team() and the parsers derive from a team's ID and URL"""
+    ncaa_id: int
+    url: str
+    base_domain: str  # https://athletics.example.edu
+    domain: str       # example.edu, the host player links are built on
+    url_format: str
+    strategy: str
+    javascript: bool
+
+    @classmethod
+    def from_team(cls, team: Dict) -> 'TeamRoute':
+        extracted = split_domain(team['url'])
+        return cls(
+            ncaa_id=team['ncaa_id'],
+            url=team['url'],
+            base_domain=URLBuilder.extract_base_domain(team['url']),
+            domain=f"{extracted.domain}.{extracted.suffix}",
+            url_format=TeamConfig.get_url_format(team['ncaa_id'], team['url']),
+            strategy=TeamConfig.strategy(team['ncaa_id'], team['url']),
+            javascript=TeamConfig.requires_javascript(team['ncaa_id']),
+        )
+
+
+class TeamRegistry:
+    """
+    Precomputed routes for every team in teams.json
+
+    Building it runs tldextract over every URL, so the result is cached in
+    REGISTRY_FILE, keyed by a hash of teams.json and of the TeamConfig tables;
+    later runs load that file instead and never import tldextract.
+    """
+
+    def __init__(self, routes: Iterable[TeamRoute] = ()):
+        self.routes: Dict[int, TeamRoute] = {route.ncaa_id: route for route in routes}
+
+    def __len__(self) -> int:
+        return len(self.routes)
+
+    def route(self, team: Dict) -> Optional[TeamRoute]:
+        """The precomputed route for a team, if its URL is still the one in the registry"""
+        route = self.routes.get(team.get('ncaa_id'))
+        if route and route.url == team.get('url'):
+            return route
+        return None
+
+    @classmethod
+    def build(cls, teams: List[Dict]) -> 'TeamRegistry':
+        return cls(TeamRoute.from_team(team) for team in teams if team.get('url'))
+
+    @staticmethod
+    def cache_key(teams_bytes: bytes) -> str:
+        return f"{REGISTRY_VERSION}:{hashlib.sha1(teams_bytes).hexdigest()}:{TeamConfig.fingerprint()}"
+
+    @classmethod
+    def load(cls, teams_file: str = TEAMS_FILE, cache_file: Optional[str] = REGISTRY_FILE) -> 'TeamRegistry':
+        """The registry for teams_file, from cache_file when it is current"""
+        try:
+            with open(teams_file, 'rb') as f:
+                teams_bytes = f.read()
+        except FileNotFoundError:
+            logger.debug(f"No {teams_file}; team routes will be computed as teams are scraped")
+            return cls()
+        key = cls.cache_key(teams_bytes)
+
+        if cache_file and os.path.exists(cache_file):
+            try:
+                with open(cache_file) as f:
+                    cached = json.load(f)
+                if cached.get('key') == key:
+                    return cls(TeamRoute(**route) for route in cached['routes'])
+            except (ValueError, TypeError, KeyError) as e:
+                logger.warning(f"Ignoring unreadable team registry {cache_file}: {e}")
+
+        registry = cls.build(json.loads(teams_bytes))
+        if cache_file:
+            registry.save(cache_file, key)
+        return registry
+
+    def save(self, cache_file: str, key: str):
+        payload = {'key': key, 'routes': [asdict(route) for route in self.routes.values()]}
+        temp_file = f"{cache_file}.tmp"
+        try:
+            with open(temp_file, 'w') as f:
+                json.dump(payload, f)
+            os.replace(temp_file, cache_file)
+        except OSError as e:
+            logger.warning(f"Could not cache the team registry in {cache_file}: {e}")
+
+
+@lru_cache(maxsize=1)
+def team_registry() -> TeamRegistry:
+    """The registry for TEAMS_FILE, loaded once per process"""
+    return TeamRegistry.load()
+
+
+def team_strategy(team: Dict) -> str:
+    route = team_registry().route(team)
+    if route:
+        return route.strategy
+    return TeamConfig.strategy(team['ncaa_id'], team['url'])
+
 
 # ============================================================================
 # LAZY JSON DECODER
@@ -470,7 +755,7 @@ class LazyDecoder(json.JSONDecoder):
 # SCRAPER UTILITIES
 # ============================================================================
 
-def fetch_url_with_javascript(url: str, timeout: int = 45) -> Optional[BeautifulSoup]:
+def render_url(url: str, timeout: int = 45) -> Optional[str]:
     """
     Fetch URL with JavaScript rendering using shot-scraper
 
@@ -482,62 +767,198 @@ def fetch_url_with_javascript(url: str, timeout: int = 45) -> Optional[Beautiful
         timeout: Timeout in seconds (default 45)
 
     Returns:
-        BeautifulSoup object or None if failed
+        Rendered HTML or None if failed
     """
+    # A failed render says nothing certain about the host, so only renders
+    # that succeed or time out feed back into its rate
+    throttle.controller.acquire(url)
+    start = time.perf_counter()
     try:
         # Use shot-scraper via uv to render JavaScript
-        result = subprocess.run(
-            ['uv', 'run', 'shot-scraper', 'html', url, '--wait', '3000'],
-            capture_output=True,
-            text=True,
-            timeout=timeout
-        )
+        with metrics.phase('render'):
+            result = subprocess.run(
+                ['uv', 'run', 'shot-scraper', 'html', url, '--wait', '3000'],
+                capture_output=True,
+                text=True,
+                timeout=timeout
+            )
 
         if result.returncode == 0:
-            return BeautifulSoup(result.stdout, 'html.parser')
+            throttle.controller.record(url, 200, time.perf_counter() - start)
+            metrics.add_bytes(len(result.stdout))
+            archive.record(url, result.stdout, archive.RENDERED)
+            return result.stdout
         else:
+            throttle.controller.release(url)
             logger.warning(f"shot-scraper returned code {result.returncode}: {result.stderr[:200]}")
             return None
 
     except subprocess.TimeoutExpired:
+        throttle.controller.record(url, None, time.perf_counter() - start)
         logger.warning(f"shot-scraper timeout after {timeout}s for {url}")
         return None
     except FileNotFoundError:
+        throttle.controller.release(url)
         logger.error("shot-scraper or uv not found. Install with: uv sync")
         return None
     except Exception as e:
+        throttle.controller.release(url)
         logger.error(f"shot-scraper error: {e}")
         return None
 
 
+def fetch_url_with_javascript(url: str, timeout: int = 45) -> Optional[BeautifulSoup]:
+    """render_url(), parsed"""
+    html = render_url(url, timeout)
+    return Page(html) if html else None
+
+
+def fetch_rendered(team: Dict, season: str, url: str) -> Optional[BeautifulSoup]:
+    """
+    The JavaScript-rendered page, reusing the stored snapshot (see
+    snapshots.py) when the static page it was rendered from hasn't changed
+
+    The static page costs one ordinary request; when it can't be had the
+    page is rendered anyway, and the snapshot kept for -reparse-only but
+    never reused.
+    """
+    store = snapshots.store
+    if store is None:
+        return fetch_url_with_javascript(url)
+
+    digest = ''
+    try:
+        response = fetch_url(url)
+        if response.status_code == 200:
+            digest = snapshots.static_hash(response.text)
+    except CircuitOpen:
+        raise
+    except Exception as e:
+        logger.info(f"No static page for {team['team']} ({e}), rendering without a snapshot check")
+
+    html = store.reusable(team['ncaa_id'], season, digest)
+    if html is not None:
+        logger.info(f"Static page unchanged for {team['team']}, reusing its snapshot")
+        metrics.attempt('snapshot')
+        return Page(html)
+
+    html = render_url(url)
+    if not html:
+        return None
+    store.save(team['ncaa_id'], season, url, digest, html)
+    return Page(html)
+
+
+def fetch_url_as_browser(url: str) -> str:
+    """
+    Fetch URL with a browser's headers (and TLS fingerprint, with curl_cffi)
+    when the default user agent gets a 403; see fallback.py
+
+    Without curl_cffi a host that still refuses gets one more try from curl,
+    whose TLS handshake differs from Python's.
+    """
+    metrics.attempt('browser_fetch')
+    result = fallback.client.fetch(url)
+    if result.status in (403, None) and not fallback.client.impersonate:
+        if result.error:
+            logger.warning(f"Browser-like fetch failed for {url}: {result.error}")
+        status, text = curl_get(url)
+    else:
+        status, text = result.status, result.text
+    # Block pages and failed attempts aren't the roster; don't archive them as one
+    if status == 200:
+        archive.record(url, text, status=status)
+    return text
+
+
+def fetch_first_as_browser(urls: List[str]) -> str:
+    """
+    fetch_url_as_browser() for several URLs a page may be at, fetched
+    concurrently (fallback.BrowserClient.fetch_many); the text of the first
+    that answers 200, or '' if none does
+    """
+    metrics.attempt('browser_fetch')
+    results = fallback.client.fetch_many(urls)
+    refused = []
+    for result in results:
+        if result.status == 200:
+            archive.record(result.url, result.text, status=200)
+            return result.text
+        if result.error:
+            logger.warning(f"Browser-like fetch failed for {result.url}: {result.error}")
+        if result.status in (403, None):
+            refused.append(result.url)
+    if fallback.client.impersonate:
+        return ''
+    for url in refused:
+        status, text = curl_get(url)
+        if status == 200:
+            archive.record(url, text, status=status)
+            return text
+    return ''
+
+
 def fetch_url_with_curl(url: str) -> str:
-    """Fetch URL using curl as a fallback when requests fails"""
+    """Fetch URL using curl as a last resort when requests fails"""
+    return curl_get(url)[1]
+
+
+def curl_get(url: str) -> Tuple[Optional[int], str]:
+    """(HTTP status, body) from curl; (None, '') if curl failed"""
+    metrics.attempt('curl')
+    throttle.controller.acquire(url)
+    start = time.perf_counter()
     try:
-        result = subprocess.check_output([
-            'curl', '-s', '-L', url,
-            '-H', 'User-Agent: Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            '-H', 'Accept: text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-            '--compressed'
-        ], timeout=30)
-        return result.decode('utf-8', errors='ignore')
+        with metrics.phase('download'):
+            result = subprocess.check_output([
+                'curl', '-s', '-L', url,
+                '-H', 'User-Agent: Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+                '-H', 'Accept: text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+                '--compressed', '-w', '\n%{http_code}'
+            ], timeout=REQUEST_TIMEOUT)
+        body, _, status = result.rpartition(b'\n')
+        throttle.controller.record(url, int(status) or None, time.perf_counter() - start)
+        metrics.add_bytes(len(body))
+        return int(status) or None, body.decode('utf-8', errors='ignore')
     except Exception as e:
+        throttle.controller.record(url, None, time.perf_counter() - start)
         logger.error(f"curl fetch error for {url}: {e}")
-        return ""
+        return None, ""
+
+
+def http_get(url: str, headers: Dict) -> requests.Response:
+    """requests.get under the host's rate limit, retrying throttled answers (see throttle.py)"""
+    r = throttle.controller.call(url, lambda: timed_get(url, headers), lambda r: r.status_code,
+                                 lambda r: throttle.retry_after(r.headers))
+    if r.status_code == 200:
+        archive.record(url, r.content, content_type=r.headers.get('Content-Type', 'text/html'))
+    return r
+
+
+def timed_get(url: str, headers: Dict) -> requests.Response:
+    """requests.get, timed into the connect and download phases of the current team"""
+    start = time.perf_counter()
+    r = requests.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+    total = time.perf_counter() - start
+    # r.elapsed stops when the response headers arrive; the rest is the body
+    connect = min(r.elapsed.total_seconds(), total)
+    metrics.add_phase('connect', connect)
+    metrics.add_phase('download', total - connect)
+    metrics.add_bytes(len(r.content))
+    return r
 
 
 def fetch_url(url: str, headers: Optional[Dict] = None) -> requests.Response:
-    """Fetch URL with standard headers, with curl fallback for 403 errors"""
+    """Fetch URL with standard headers, with a browser-like fallback for 403 errors"""
     if headers is None:
-        headers = {
-            "user-agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/95.0.4638.69 Safari/537.36"
-        }
+        headers = DEFAULT_HEADERS
 
-    r = requests.get(url, headers=headers)
+    r = http_get(url, headers)
 
-    # If we get 403, try curl as fallback
+    # If we get 403, try a browser-like fetch as fallback
     if r.status_code == 403:
-        logger.warning(f"Got 403 for {url}, trying curl fallback")
-        content = fetch_url_with_curl(url)
+        logger.warning(f"Got 403 for {url}, trying browser-like fallback")
+        content = fetch_url_as_browser(url)
         if content:
             # Create a mock response object
             class MockResponse:
@@ -553,7 +974,7 @@ def fetch_roster(base_url: str, season: str) -> Optional[BeautifulSoup]:
     """Fetch standard roster page"""
     url = f"{base_url}/roster/{season}"
     r = fetch_url(url)
-    return BeautifulSoup(r.text, features="html.parser")
+    return Page(r.text)
 
 
 def fetch_wbkb_roster(base_url: str, season: str) -> Optional[BeautifulSoup]:
@@ -562,18 +983,18 @@ def fetch_wbkb_roster(base_url: str, season: str) -> Optional[BeautifulSoup]:
     headers = {
         "user-agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/95.0.4638.69 Safari/537.36"
     }
-    r = requests.get(url, headers=headers)
+    r = http_get(url, headers)
 
-    # Try curl fallback on 403
+    # Try the browser-like fallback on 403
     if r.status_code == 403:
-        logger.warning(f"Got 403 for {url}, trying curl fallback")
-        content = fetch_url_with_curl(url)
+        logger.warning(f"Got 403 for {url}, trying browser-like fallback")
+        content = fetch_url_as_browser(url)
         if content:
-            return BeautifulSoup(content, features="html.parser")
+            return Page(content)
 
     if r.status_code == 404:
         return None
-    return BeautifulSoup(r.text, features="html.parser")
+    return Page(r.text)
 
 
 def fetch_baskbl_roster(base_url: str, season: str) -> BeautifulSoup:
@@ -585,39 +1006,47 @@ def fetch_baskbl_roster(base_url: str, season: str) -> BeautifulSoup:
     else:
         url = base_url + 'roster/?season=' + season
 
+    # Tried when the first URL is a 404 (a different page only for .../index URLs)
+    retry_url = base_url.replace('index', f"/{season}/roster")
+
     headers = {
         "user-agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/95.0.4638.69 Safari/537.36"
     }
-    r = requests.get(url, headers=headers)
+    r = http_get(url, headers)
 
-    # Try curl fallback on 403
+    # Try the browser-like fallback on 403, for the retry URL too in the same batch
     if r.status_code == 403:
-        logger.warning(f"Got 403 for {url}, trying curl fallback")
-        content = fetch_url_with_curl(url)
+        logger.warning(f"Got 403 for {url}, trying browser-like fallback")
+        content = fetch_first_as_browser([url] + ([retry_url] if 'index' in base_url else []))
         if content:
-            return BeautifulSoup(content, features="html.parser")
+            return Page(content)
 
     if r.status_code == 404:
-        url = base_url.replace('index', f"/{season}/roster")
-        r = requests.get(url, headers=headers)
-        # Try curl fallback on 403 for the retry URL too
+        url = retry_url
+        r = http_get(url, headers)
+        # Try the browser-like fallback on 403 for the retry URL too
         if r.status_code == 403:
-            logger.warning(f"Got 403 for {url}, trying curl fallback")
-            content = fetch_url_with_curl(url)
+            logger.warning(f"Got 403 for {url}, trying browser-like fallback")
+            content = fetch_url_as_browser(url)
             if content:
-                return BeautifulSoup(content, features="html.parser")
+                return Page(content)
 
-    return BeautifulSoup(r.text, features="html.parser")
+    return Page(r.text)
 
 
 def shotscraper_caller(team: Dict, season: str, url: str, javascript_code: str) -> List[Dict]:
     """Call shot-scraper with JavaScript code to extract roster data"""
     roster = []
+    throttle.controller.acquire(url)
+    start = time.perf_counter()
     try:
-        result = subprocess.check_output([
-            'shot-scraper', 'javascript', url, javascript_code,
-            "--user-agent", "Firefox"
-        ], timeout=60)
+        with metrics.phase('render'):
+            result = subprocess.check_output([
+                'shot-scraper', 'javascript', url, javascript_code,
+                "--user-agent", "Firefox"
+            ], timeout=60)
+        throttle.controller.record(url, 200, time.perf_counter() - start)
+        metrics.add_bytes(len(result))
         parsed_data = json.loads(result)
 
         for player in parsed_data:
@@ -627,12 +1056,15 @@ def shotscraper_caller(team: Dict, season: str, url: str, javascript_code: str)
 
         return parsed_data
     except subprocess.TimeoutExpired:
+        throttle.controller.record(url, None, time.perf_counter() - start)
         logger.error(f"shot-scraper timeout for {team.get('team', 'unknown')}")
         return []
     except FileNotFoundError:
+        throttle.controller.release(url)
         logger.error(f"shot-scraper not found in PATH for {team.get('team', 'unknown')}")
         return []
     except Exception as e:
+        throttle.controller.release(url)
         logger.error(f"shot-scraper error for {team.get('team', 'unknown')}: {e}")
         return []
 
@@ -641,10 +1073,12 @@ def shotscraper_caller(team: Dict, season: str, url: str, javascript_code: str)
 # PARSER FUNCTIONS
 # ============================================================================
 
+@metrics.timed('parse')
+@parsecache.memoized(Player)
 def parse_roster_baskbl(team: Dict, html: BeautifulSoup, season: str) -> List[Player]:
     """Parse basketball-style roster"""
     roster = []
-    er = tldextract.extract(team['url'])
+    domain = team_domain(team)
 
     thead = html.find('thead')
     if not thead:
@@ -706,16 +1140,18 @@ def parse_roster_baskbl(team: Dict, html: BeautifulSoup, season: str) -> List[Pl
             height=player_dict['height'],
             position=player_dict['position'],
             jersey=player_dict['jersey'],
-            url=f"https://www.{er.domain}.{er.suffix}{raw_player.find('a')['href']}",
+            url=f"https://www.{domain}{raw_player.find('a')['href']}",
             season=season
         ))
     return roster
 
 
+@metrics.timed('parse')
+@parsecache.memoized(Player)
 def parse_roster_wbkb(team: Dict, html: BeautifulSoup, season: str) -> List[Player]:
     """Parse women's basketball style roster with extensive filtering logic"""
     roster = []
-    er = tldextract.extract(team['url'])
+    domain = team_domain(team)
 
     # Find headers
     if team['ncaa_id'] == 30164:
@@ -852,16 +1288,18 @@ def parse_roster_wbkb(team: Dict, html: BeautifulSoup, season: str) -> List[Play
             height=player_dict['height'],
             position=player_dict['position'],
             jersey=player_dict['jersey'],
-            url=f"https://www.{er.domain}.{er.suffix}{raw_player.find('a')['href']}",
+            url=f"https://www.{domain}{raw_player.find('a')['href']}",
             season=season
         ))
     return roster
 
 
+@metrics.timed('parse')
+@parsecache.memoized(Player)
 def parse_roster(team: Dict, html: BeautifulSoup, season: str) -> List[Player]:
     """Parse standard Sidearm roster (li.sidearm-roster-player format)"""
     roster = []
-    er = tldextract.extract(team['url'])
+    domain = team_domain(team)
 
     try:
         players = html.find_all('li', {'class': 'sidearm-roster-player'})
@@ -945,7 +1383,7 @@ def parse_roster(team: Dict, html: BeautifulSoup, season: str) -> List[Player]:
             height=height,
             position=position,
             jersey=jersey,
-            url=f"https://www.{er.domain}.{er.suffix}{player.find('a')['href']}",
+            url=f"https://www.{domain}{player.find('a')['href']}",
             season=season
         ))
     return roster
@@ -961,7 +1399,7 @@ def parse_roster(team: Dict, html: BeautifulSoup, season: str) -> List[Player]:
 def fetch_and_parse_clemson(team: Dict, season: str) -> List[Dict]:
     """Clemson - Custom table format"""
     roster = []
-    er = tldextract.extract(team['url'])
+    domain = team_domain(team)
     url = f"{team['url']}/roster/season/{season[0:4]}"
     r = fetch_url(url)
     html = BeautifulSoup(r.text, features="html.parser")
@@ -985,7 +1423,7 @@ def fetch_and_parse_clemson(team: Dict, season: str) -> List[Dict]:
             'height': player_dict['height'],
             'position': player_dict['position'],
             'jersey': player_dict['jersey'],
-            'url': f"https://www.{er.domain}.{er.suffix}{player.find('a')['href']}",
+            'url': f"https://www.{domain}{player.find('a')['href']}",
             'season': season
         })
     return roster
@@ -1082,12 +1520,19 @@ def fetch_and_parse_sanjose(team: Dict, season: str) -> List[Dict]:
 
 def fetch_and_parse_iowa_state(team: Dict, season: str) -> List[Player]:
     """Iowa State - HTMLSession rendered"""
+    # requests_html pulls in pyppeteer; only this scraper needs it
+    from requests_html import HTMLSession
+
     roster = []
-    er = tldextract.extract(team['url'])
+    domain = team_domain(team)
     url = f"{team['url']}/roster/{season}"
     session = HTMLSession()
-    r = session.get(url)
-    r.html.render(timeout=30)
+    with metrics.phase('download'):
+        r = throttle.controller.call(url, lambda: session.get(url, timeout=REQUEST_TIMEOUT),
+                                     lambda r: r.status_code)
+    metrics.add_bytes(len(r.content))
+    with metrics.phase('render'):
+        r.html.render(timeout=30)
     players = r.html.find('li.sidearm-roster-list-item')
 
     for player in players:
@@ -1103,7 +1548,7 @@ def fetch_and_parse_iowa_state(team: Dict, season: str) -> List[Player]:
             height=player.find('span.sidearm-roster-list-item-height', first=True).text,
             position=player.find('span.sidearm-roster-list-item-position', first=True).text,
             jersey=player.find('span')[0].text,
-            url=f"https://www.{er.domain}.{er.suffix}{player.find('a', first=True).attrs['href']}",
+            url=f"https://www.{domain}{player.find('a', first=True).attrs['href']}",
             season=season
         ))
     return roster
@@ -1296,205 +1741,384 @@ def shotscraper_roster_player(team: Dict, season: str) -> List[Dict]:
 # MAIN SCRAPING LOGIC
 # ============================================================================
 
-def get_all_rosters(season: str, teams: List[int] = []) -> tuple:
+def player_row(player, season: str) -> list:
+    """Convert a Player (or dict from the JS scrapers) to a CSV row"""
+    if isinstance(player, Player):
+        player_dict = player.to_dict()
+        return [
+            player_dict['team_id'], player_dict['team'], player_dict['player_id'],
+            player_dict['name'], player_dict['year'], player_dict['hometown'],
+            player_dict['high_school'], player_dict['previous_school'],
+            player_dict['height'], player_dict['position'], player_dict['jersey'],
+            player_dict['url'], season
+        ]
+    # Handle dict format from JS scrapers
+    return [
+        player['team_id'], player['team'], player.get('id'),
+        player['name'], player['year'], player['hometown'],
+        player['high_school'], player['previous_school'],
+        player['height'], player['position'], player['jersey'],
+        player['url'], season
+    ]
+
+
+# Strategy name (TeamConfig.strategy) -> scraper, for the teams routed on their ID
+TEAM_SCRAPERS = {
+    'byu': fetch_and_parse_byu,
+    'san_jose': fetch_and_parse_sanjose,
+    'miami': fetch_and_parse_miami,
+    'clemson': fetch_and_parse_clemson,
+    'iowa_state': fetch_and_parse_iowa_state,
+    'vandy': fetch_and_parse_vandy,
+}
+
+SHOTSCRAPERS = {
+    'shotscraper_airforce': shotscraper_airforce,
+    'shotscraper_table': shotscraper_table,
+    'shotscraper_card': shotscraper_card,
+    'shotscraper_list_item': shotscraper_list_item,
+    'shotscraper_roster_player': shotscraper_roster_player,
+    'shotscraper_data_tables': shotscraper_data_tables,
+}
+
+
+def scrape_team(team: Dict, season: str) -> List:
+    """
+    Fetch and parse one team's roster, routing on team ID and URL pattern
+
+    Args:
+        team: Team entry from teams.json (needs ncaa_id, team and url)
+        season: Season string (e.g., '2023-24')
+
+    Returns:
+        List of Player objects or player dicts (from the JS scrapers); empty
+        if nothing could be parsed
+    """
+    roster = []
+    strategy = team_strategy(team)
+    metrics.attempt(strategy)
+
+    # Archive every page fetched for the team (see archive.py)
+    with archive.scope(team, season):
+        # SPECIFIC FUNCTION SCRAPERS (must come first!)
+        if strategy in TEAM_SCRAPERS:
+            # BYU - Custom season format
+            if strategy == 'byu':
+                season = f"{str(season)[0:5]}20{str(season[5:7])}"
+            roster = TEAM_SCRAPERS[strategy](team, season)
+
+        # SHOTSCRAPER WITH JAVASCRIPT EXTRACTION, standard fetch as fallback
+        elif strategy in SHOTSCRAPERS:
+            roster = SHOTSCRAPERS[strategy](team, season)
+            if not roster:
+                logger.info(f"Shotscraper failed for {team['team']}, trying standard fetch")
+                metrics.attempt('standard_fetch')
+                html = fetch_roster(team['url'], season)
+                roster = parse_roster(team, html, season)
+
+        # TEAMS NEEDING JAVASCRIPT RENDERING (fetch HTML then parse with BeautifulSoup)
+        elif strategy == 'javascript':
+            url = f"{team['url']}/roster/{season}"
+            html = fetch_rendered(team, season, url)
+            if html:
+                roster = parse_rendered(team, html, season)
+            else:
+                # If JS rendering fails, try standard fetching as fallback
+                logger.info(f"JS rendering failed for {team['team']}, trying standard fetch as fallback")
+                metrics.attempt('standard_fetch')
+                if 'wvball' in team['url']:
+                    html = fetch_wbkb_roster(team['url'], season)
+                    if html:
+                        roster = parse_roster_wbkb(team, html, season)
+                elif 'w-baskbl' in team['url']:
+                    html = fetch_baskbl_roster(team['url'], season)
+                    roster = parse_roster_baskbl(team, html, season)
+                else:
+                    html = fetch_roster(team['url'], season)
+                    roster = parse_roster(team, html, season)
+
+        # URL-BASED ROUTING
+        elif strategy == 'wvball':
+            html = fetch_roster(team['url'], season)
+            roster = parse_roster_page(team, html, season, strategy) if html else []
+        elif strategy == 'w-baskbl':
+            html = fetch_baskbl_roster(team['url'], season)
+            roster = parse_roster_baskbl(team, html, season)
+
+        # DEFAULT: Standard roster page
+        else:
+            html = fetch_roster(team['url'], season)
+            roster = parse_roster_page(team, html, season)
+
+    return roster
+
+
+def parse_roster_page(team: Dict, html: BeautifulSoup, season: str, strategy: str = 'default') -> List[Player]:
+    """Parse a page fetched by fetch_roster() for the default and wvball strategies"""
+    roster = parse_roster(team, html, season)
+    # wvball teams can use either standard Sidearm or table format; the
+    # standard Sidearm parser (most common) goes first
+    if not roster and strategy == 'wvball':
+        metrics.attempt('wbkb_table')
+        roster = parse_roster_wbkb(team, html, season)
+    return roster
+
+
+def parse_rendered(team: Dict, html: BeautifulSoup, season: str) -> List[Player]:
+    """Parse a JavaScript-rendered page, choosing the parser by URL pattern"""
+    if 'wvball' in team['url']:
+        return parse_roster_wbkb(team, html, season)
+    elif 'w-baskbl' in team['url']:
+        return parse_roster_baskbl(team, html, season)
+    return parse_roster(team, html, season)
+
+
+def scrapeable(team: Dict, season: str) -> bool:
+    """False for the teams.json entries a season scrape leaves out"""
+    if "url" not in team:
+        return False
+    if team['ncaa_id'] == 26107 and season == '2021-22':
+        return False
+    if 'roster' in team:
+        return False
+    # Skip specific teams
+    if team['ncaa_id'] == 532:
+        return False
+    return True
+
+
+def get_all_rosters(season: str, teams: List[int] = [], store: Optional[str] = None,
+                    run_metrics: Optional[metrics.RunMetrics] = None,
+                    profiler: Optional[TeamProfiler] = None,
+                    scheduler: Optional[TeamScheduler] = None,
+                    compression: Optional[str] = None) -> tuple:
     """
     Main function to scrape all rosters for a season
 
     Args:
         season: Season string (e.g., '2023-24')
         teams: Optional list of team IDs to scrape (if empty, scrapes all)
+        store: Optional SQLite database path; each team is also upserted there
+        run_metrics: Optional collector for per-team phase timings; a
+            summary is logged at the end either way
+        profiler: Optional TeamProfiler for the teams it selects
+        scheduler: Optional TeamScheduler to scrape teams concurrently,
+            costliest first; without one teams run one at a time in
+            teams.json order
+        compression: Optional 'gzip' or 'zstd' for the season CSV, which
+            then gets a .gz or .zst suffix (see output.py)
 
     Returns:
         Tuple of (unparsed_team_ids, skipped_team_ids)
+
+    Teams whose host circuit is open (see throttle.py) get a second pass at
+    the end, once their circuits are due to half-open.
     """
     unparsed = []
     skipped = []
 
     # Load teams
-    teams_json = json.loads(open('data/teams.json').read())
+    teams_json = json.loads(open(TEAMS_FILE).read())
     if len(teams) > 0:
         teams_json = [t for t in teams_json if t['ncaa_id'] in teams]
     teams_with_urls = [x for x in teams_json if "url" in x]
 
-    # Open CSV for writing
-    with open(f"data/rosters_{season}.csv", 'w') as output_file:
-        csv_file = csv.writer(output_file)
-        csv_file.writerow(['ncaa_id', 'team', 'player_id', 'name', 'year', 'hometown',
-                          'high_school', 'previous_school', 'height', 'position', 'jersey',
-                          'url', 'season'])
+    roster_store = RosterStore(store, check_same_thread=scheduler is None) if store else None
+    run_metrics = run_metrics or metrics.RunMetrics(hosts=throttle.controller)
+    if profiler:
+        profiler.choose(t['ncaa_id'] for t in teams_with_urls)
+
+    to_scrape = [team for team in teams_with_urls if scrapeable(team, season)]
+
+    # Written to a temp file and renamed into place once every team is in
+    with output.SeasonWriter(f"data/rosters_{season}.csv", ROSTER_COLUMNS, compression=compression) as season_file:
+        write_lock = threading.Lock()
+
+        def process_team(team: Dict) -> bool:
+            """Scrape and write one team; False if nothing was parsed"""
+            logger.info(f"Processing {team['team']}")
+            with run_metrics.team(team, season) as team_metrics:
+                with profiler.team(team, season) if profiler else nullcontext():
+                    roster = scrape_team(team, season)
+
+                    # Write to CSV
+                    if len(roster) == 0:
+                        return False
+                    with metrics.phase('normalize'):
+                        rows = [player_row(player, season) for player in roster]
+                    with metrics.phase('write'), write_lock:
+                        season_file.write_rows(rows)
+                        if roster_store:
+                            roster_store.upsert_team(team['ncaa_id'], season,
+                                                     [dict(zip(ROSTER_COLUMNS, row)) for row in rows])
+                    team_metrics.rows = len(rows)
+            return True
+
+        def in_order(batch: List[Dict]):
+            for team in batch:
+                try:
+                    yield team, process_team(team), None
+                except Exception as e:
+                    yield team, None, e
+
+        def run_pass(batch: List[Dict], final: bool) -> List[Dict]:
+            """Scrape a batch; returns the teams whose host circuit was open, unless final"""
+            deferred = []
+            results = scheduler.run(batch, process_team, team_strategy) if scheduler else in_order(batch)
+            for team, parsed, error in results:
+                if isinstance(error, CircuitOpen) and not final:
+                    logger.warning(f"Deferring {team['team']}: {error}")
+                    deferred.append(team)
+                elif error is not None:
+                    logger.error(f"Error processing {team['team']}: {error}")
+                    skipped.append(team['ncaa_id'])
+                elif not parsed:
+                    unparsed.append(team['ncaa_id'])
+            return deferred
+
+        deferred = run_pass(to_scrape, final=False)
+        if deferred:
+            # Second pass for teams whose host was failing, once its circuit half-opens
+            retry_at = throttle.controller.retry_at()
+            wait = min(max(retry_at - time.time(), 0), MAX_DEFERRED_WAIT) if retry_at else 0
+            logger.info(f"Retrying {len(deferred)} deferred teams in {wait:.0f}s")
+            time.sleep(wait)
+            run_pass(deferred, final=True)
+
+    if roster_store:
+        roster_store.close()
+
+    logger.info(f"Run summary\n{run_metrics.summary()}")
+    if parsecache.cache and parsecache.cache.hits + parsecache.cache.misses:
+        logger.info(f"Parse cache: {parsecache.cache.hits} hits, {parsecache.cache.misses} misses")
+    return [unparsed, skipped]
 
-        for team in teams_with_urls:
-            try:
-                if team['ncaa_id'] == 26107 and season == '2021-22':
-                    continue
-                if 'roster' in team:
-                    continue
-
-                logger.info(f"Processing {team['team']}")
-
-                # Route to appropriate scraper based on team ID
-                roster = []
-
-                # Skip specific teams
-                if team['ncaa_id'] == 532:
-                    continue
-
-                # SPECIFIC FUNCTION SCRAPERS (must come first!)
-                # BYU - Custom season format
-                if team['ncaa_id'] == 77:
-                    if str(season[0:1]):
-                        season = f"{str(season)[0:5]}20{str(season[5:7])}"
-                        roster = fetch_and_parse_byu(team, season)
-                # San Jose State
-                elif team['ncaa_id'] == 630:
-                    roster = fetch_and_parse_sanjose(team, season)
-                # Miami
-                elif team['ncaa_id'] == 415:
-                    roster = fetch_and_parse_miami(team, season)
-                # Clemson
-                elif team['ncaa_id'] == 147:
-                    roster = fetch_and_parse_clemson(team, season)
-                # Iowa State
-                elif team['ncaa_id'] == 311:
-                    roster = fetch_and_parse_iowa_state(team, season)
-                # Vanderbilt
-                elif team['ncaa_id'] == 736:
-                    roster = fetch_and_parse_vandy(team, season)
-                # Air Force
-                elif team['ncaa_id'] == 721:
-                    roster = shotscraper_airforce(team, season)
-                    if not roster:
-                        logger.info(f"Shotscraper failed for {team['team']}, trying standard fetch")
-                        html = fetch_roster(team['url'], season)
-                        roster = parse_roster(team, html, season)
-
-                # SHOTSCRAPER WITH JAVASCRIPT EXTRACTION
-                elif team['ncaa_id'] in [5, 308, 497, 554]:
-                    roster = shotscraper_table(team, season)
-                    if not roster:
-                        logger.info(f"Shotscraper failed for {team['team']}, trying standard fetch")
-                        html = fetch_roster(team['url'], season)
-                        roster = parse_roster(team, html, season)
-                elif team['ncaa_id'] in [9, 71, 83, 96, 99, 156, 173, 180, 191, 234, 249, 257,
-                                        301, 306, 367, 387, 392, 400, 404, 418, 428, 441, 490,
-                                        521, 522, 559, 574, 603, 635, 664, 671, 676, 688, 690,
-                                        700, 719, 749, 758]:
-                    roster = shotscraper_card(team, season)
-                    if not roster:
-                        logger.info(f"Shotscraper failed for {team['team']}, trying standard fetch")
-                        html = fetch_roster(team['url'], season)
-                        roster = parse_roster(team, html, season)
-                elif team['ncaa_id'] in [51, 248, 731]:
-                    roster = shotscraper_list_item(team, season)
-                    if not roster:
-                        logger.info(f"Shotscraper failed for {team['team']}, trying standard fetch")
-                        html = fetch_roster(team['url'], season)
-                        roster = parse_roster(team, html, season)
-                elif team['ncaa_id'] in [37, 52, 175, 316, 487]:
-                    roster = shotscraper_roster_player(team, season)
-                    if not roster:
-                        logger.info(f"Shotscraper failed for {team['team']}, trying standard fetch")
-                        html = fetch_roster(team['url'], season)
-                        roster = parse_roster(team, html, season)
-                elif team['ncaa_id'] == 556:
-                    roster = shotscraper_data_tables(team, season)
-                    if not roster:
-                        logger.info(f"Shotscraper failed for {team['team']}, trying standard fetch")
-                        html = fetch_roster(team['url'], season)
-                        roster = parse_roster(team, html, season)
-
-                # TEAMS NEEDING JAVASCRIPT RENDERING (fetch HTML then parse with BeautifulSoup)
-                elif TeamConfig.requires_javascript(team['ncaa_id']):
-                    url = f"{team['url']}/roster/{season}"
-                    html = fetch_url_with_javascript(url)
-                    if html:
-                        # Use appropriate parser based on URL pattern
-                        if 'wvball' in team['url']:
-                            roster = parse_roster_wbkb(team, html, season)
-                        elif 'w-baskbl' in team['url']:
-                            roster = parse_roster_baskbl(team, html, season)
-                        else:
-                            roster = parse_roster(team, html, season)
-                    else:
-                        # If JS rendering fails, try standard fetching as fallback
-                        logger.info(f"JS rendering failed for {team['team']}, trying standard fetch as fallback")
-                        if 'wvball' in team['url']:
-                            html = fetch_wbkb_roster(team['url'], season)
-                            if html:
-                                roster = parse_roster_wbkb(team, html, season)
-                        elif 'w-baskbl' in team['url']:
-                            html = fetch_baskbl_roster(team['url'], season)
-                            roster = parse_roster_baskbl(team, html, season)
-                        else:
-                            html = fetch_roster(team['url'], season)
-                            roster = parse_roster(team, html, season)
-
-                # URL-BASED ROUTING
-                elif 'wvball' in team['url']:
-                    # wvball teams can use either standard Sidearm or table format
-                    # Try standard fetch first
-                    html = fetch_roster(team['url'], season)
-                    roster = []
-                    if html:
-                        # Try standard Sidearm parser first (most common)
-                        roster = parse_roster(team, html, season)
-                        # If standard parser returns nothing, try wbkb table parser
-                        if not roster:
-                            roster = parse_roster_wbkb(team, html, season)
-                elif 'w-baskbl' in team['url']:
-                    html = fetch_baskbl_roster(team['url'], season)
-                    roster = parse_roster_baskbl(team, html, season)
 
-                # DEFAULT: Standard roster page
-                else:
-                    html = fetch_roster(team['url'], season)
-                    roster = parse_roster(team, html, season)
+def reparse_snapshots(season: str, teams: List[int] = []) -> tuple:
+    """
+    Run the parsers over the stored JavaScript snapshots, with no network
+    and no browser
 
-                # Write to CSV
-                if len(roster) > 0:
-                    for player in roster:
-                        if isinstance(player, Player):
-                            player_dict = player.to_dict()
-                            csv_file.writerow([
-                                player_dict['team_id'], player_dict['team'], player_dict['player_id'],
-                                player_dict['name'], player_dict['year'], player_dict['hometown'],
-                                player_dict['high_school'], player_dict['previous_school'],
-                                player_dict['height'], player_dict['position'], player_dict['jersey'],
-                                player_dict['url'], season
-                            ])
-                        else:
-                            # Handle dict format from JS scrapers
-                            csv_file.writerow([
-                                player['team_id'], player['team'], player.get('id'),
-                                player['name'], player['year'], player['hometown'],
-                                player['high_school'], player['previous_school'],
-                                player['height'], player['position'], player['jersey'],
-                                player['url'], season
-                            ])
-                else:
-                    unparsed.append(team['ncaa_id'])
-            except Exception as e:
-                logger.error(f"Error processing {team['team']}: {e}")
-                skipped.append(team['ncaa_id'])
+    Writes data/rosters_{season}_reparsed.csv and logs each team's player
+    count next to its count in data/rosters_{season}.csv, if there is one.
+
+    Returns:
+        Tuple of (parsed_team_ids, unparsed_team_ids)
+    """
+    store = snapshots.store or snapshots.SnapshotStore()
+    by_id = {t['ncaa_id']: t for t in json.loads(open(TEAMS_FILE).read()) if 'url' in t}
+    stored = [ncaa_id for ncaa_id in store.teams(season) if not teams or ncaa_id in teams]
+
+    previous = team_counts(f"data/rosters_{season}.csv")
+    parsed, unparsed = [], []
+    with output.SeasonWriter(f"data/rosters_{season}_reparsed.csv", ROSTER_COLUMNS) as season_file:
+        for ncaa_id in stored:
+            if ncaa_id not in by_id:
+                logger.warning(f"Snapshot for team {ncaa_id} has no teams.json entry")
                 continue
+            team = by_id[ncaa_id]
+            html = Page(store.load(ncaa_id, season))
+            roster = parse_rendered(team, html, season)
+            season_file.write_rows(player_row(player, season) for player in roster)
+            (parsed if roster else unparsed).append(ncaa_id)
+            logger.info(f"{team['team']}: {len(roster)} players (was {previous.get(str(ncaa_id), 'n/a')})")
+    return [parsed, unparsed]
 
-    return [unparsed, skipped]
+
+def reparse_archive(season: str, teams: List[int] = []) -> tuple:
+    """
+    Run the parsers over archived pages (see archive.py), with no network
+
+    Each team gets the newest archived copy of the page its strategy parses
+    (see archived_parser()), or of its fallback's page if that's all there
+    is. Teams on custom scrapers are left out, as are shot-scraper extractor
+    teams whose extractor worked, since neither parses a page. Pages are
+    read in archive order, one at a time. Writes data/rosters_{season}_archived.csv and logs each
+    team's player count next to its count in data/rosters_{season}.csv.
+
+    Returns:
+        Tuple of (parsed_team_ids, unparsed_team_ids)
+    """
+    page_archive = archive.store or archive.PageArchive()
+    teams_json = [t for t in json.loads(open(TEAMS_FILE).read()) if scrapeable(t, season)]
+    by_id = {t['ncaa_id']: t for t in teams_json if not teams or t['ncaa_id'] in teams}
+
+    # The newest page per team that its parser would have been given,
+    # preferring the primary page over a fallback's
+    chosen = {}
+    for entry in page_archive.lookup(season=season):
+        team = by_id.get(entry['ncaa_id'])
+        if team is None:
+            continue
+        choice = archived_parser(team, team_strategy(team), entry, season)
+        current = chosen.get(team['ncaa_id'])
+        if choice and (current is None or (choice[0], -entry['fetched_at']) < (current[1][0], -current[0]['fetched_at'])):
+            chosen[team['ncaa_id']] = (entry, choice)
+
+    previous = team_counts(f"data/rosters_{season}.csv")
+    parsed, unparsed = [], []
+    with output.SeasonWriter(f"data/rosters_{season}_archived.csv", ROSTER_COLUMNS) as season_file:
+        for entry, (_, parse) in sorted(chosen.values(), key=lambda c: (c[0]['segment'], c[0]['offset'])):
+            team = by_id[entry['ncaa_id']]
+            roster = parse(team, Page(page_archive.read(entry).text), season)
+            season_file.write_rows(player_row(player, season) for player in roster)
+            (parsed if roster else unparsed).append(team['ncaa_id'])
+            logger.info(f"{team['team']}: {len(roster)} players (was {previous.get(str(team['ncaa_id']), 'n/a')})")
+    missing = sorted(set(by_id) - set(chosen))
+    if missing:
+        logger.info(f"No archived page to parse for {len(missing)} teams")
+    return [parsed, unparsed]
+
+
+def archived_parser(team: Dict, strategy: str, entry, season: str) -> Optional[tuple]:
+    """
+    (rank, parser) for an archived page of the team, following scrape_team():
+    rank 0 for the page the strategy parses first, 1 for a fallback's page;
+    None if scrape_team() doesn't parse such a page for the team
+    """
+    fetched = entry['kind'] == archive.FETCHED
+    roster_url = f"{team['url']}/roster/{season}"
+    if strategy in TEAM_SCRAPERS:
+        return None
+    if strategy == 'javascript':
+        if not fetched:
+            return 0, parse_rendered
+        if 'wvball' in team['url']:
+            return (1, parse_roster_wbkb) if entry['url'] == team['url'].replace('index', season + '/roster?view=list') else None
+        if 'w-baskbl' in team['url']:
+            return 1, parse_roster_baskbl
+        return (1, parse_roster) if entry['url'] == roster_url else None
+    if not fetched:
+        return None
+    if strategy == 'w-baskbl':
+        # fetch_baskbl_roster() tries more than one URL
+        return 0, parse_roster_baskbl
+    if entry['url'] != roster_url:
+        return None
+    if strategy in SHOTSCRAPERS:
+        # The extractors return players, not pages; only their fallback is archived
+        return 1, parse_roster
+    return 0, lambda team, html, season: parse_roster_page(team, html, season, strategy)
+
+
+def team_counts(path: str) -> Dict[str, int]:
+    """Rows per ncaa_id in a season CSV (or its .gz or .zst), empty if there is none"""
+    counts = {}
+    path = output.existing(path)
+    if path:
+        with output.open_text(path) as f:
+            for row in csv.DictReader(f):
+                counts[row['ncaa_id']] = counts.get(row['ncaa_id'], 0) + 1
+    return counts
 
 
 def write_one_team(roster: List[Player], season: str):
-    """Write a single team's roster to CSV (for adding missed teams)"""
-    with open(f"rosters_{season}_adds.csv", 'a') as output_file:
-        csv_file = csv.writer(output_file)
-        for player in roster:
-            if isinstance(player, Player):
-                player_dict = player.to_dict()
-                csv_file.writerow([
-                    player_dict['team_id'], player_dict['team'], player_dict['player_id'],
-                    player_dict['name'], player_dict['year'], player_dict['hometown'],
-                    player_dict['high_school'], player_dict['previous_school'],
-                    player_dict['height'], player_dict['position'], player_dict['jersey'],
-                    player_dict['url'], season
-                ])
+    """
+    Append a single team's roster to data/rosters_{season}_adds.csv (for
+    adding missed teams); safe from several workers at once
+    """
+    output.append_rows(f"data/rosters_{season}_adds.csv", ROSTER_COLUMNS,
+                       [player_row(player, season) for player in roster if isinstance(player, Player)])
 
 
 # ============================================================================
@@ -1509,6 +2133,14 @@ if __name__ == "__main__":
 Examples:
   python rosters.py -season 2023-24
   python rosters.py -season 2023-24 -teams 255 326
+  python rosters.py -season 2023-24 -store data/rosters.db
+  python rosters.py -season 2023-24 -metrics data/metrics/scrape_2023-24
+  python rosters.py -season 2023-24 -teams 255 326 -profile data/profiles -profile-teams 255
+  python rosters.py -season 2023-24 -workers 8 -browser-workers 2
+  python rosters.py -season 2023-24 -clean
+  python rosters.py -season 2023-24 -compress gzip
+  python rosters.py -season 2023-24 -reparse-only
+  python rosters.py -season 2023-24 -reparse-archive
   python rosters.py -url https://example.com/sports/w-volley -season 2023-24
         """
     )
@@ -1518,10 +2150,61 @@ Examples:
                        help='Base URL for a single team')
     parser.add_argument('-teams', nargs='+', type=int, dest='teams',
                        help='List of team IDs to scrape (space-separated)')
+    parser.add_argument('-store', action='store', dest='store',
+                       help='Also upsert each team into this SQLite database (e.g. data/rosters.db)')
+    parser.add_argument('-metrics', action='store', dest='metrics',
+                       help='Write per-team phase timings to PREFIX.jsonl and a Prometheus snapshot to PREFIX.prom')
+    parser.add_argument('-profile', action='store', dest='profile',
+                       help='Profile the teams chosen below into this directory (sampled stacks, tracemalloc)')
+    parser.add_argument('-profile-teams', nargs='+', type=int, dest='profile_teams', default=[],
+                       help='Team IDs to profile')
+    parser.add_argument('-profile-sample', type=int, dest='profile_sample',
+                       help='Also profile a random sample of this many teams')
+    parser.add_argument('-profile-strategy', nargs='+', dest='profile_strategy', default=[],
+                       help='Profile teams routed to these strategies (e.g. javascript default)')
+    parser.add_argument('-workers', type=int, dest='workers',
+                       help='Scrape concurrently, costliest teams first, with this many HTTP workers')
+    parser.add_argument('-browser-workers', type=int, dest='browser_workers', default=1,
+                       help='Workers for shot-scraper and other browser-bound teams with -workers (default 1)')
+    parser.add_argument('-history', nargs='+', dest='history',
+                       help='Metrics JSONL files -workers estimates team costs from (default data/metrics/*.jsonl)')
+    parser.add_argument('-clean', action='store_true', dest='clean',
+                       help='Run the cleaning stage on the output (writes rosters_{season}_cleaned.csv)')
+    parser.add_argument('-compress', dest='compress', choices=sorted(output.SUFFIXES),
+                       help='Compress the season CSV (rosters_{season}.csv.gz or .csv.zst; zstd needs zstandard)')
+    parser.add_argument('-reparse-only', action='store_true', dest='reparse_only',
+                       help='Parse the stored JavaScript snapshots again, no fetching (writes rosters_{season}_reparsed.csv)')
+    parser.add_argument('-reparse-archive', action='store_true', dest='reparse_archive',
+                       help='Parse the archived roster pages again, no fetching (writes rosters_{season}_archived.csv)')
+    parser.add_argument('-no-archive', action='store_true', dest='no_archive',
+                       help='Don\'t append fetched and rendered pages to data/archive')
+    parser.add_argument('-no-snapshots', action='store_true', dest='no_snapshots',
+                       help='Render JavaScript teams every time, without reading or writing data/snapshots')
+    parser.add_argument('-no-parse-cache', action='store_true', dest='no_parse_cache',
+                       help='Parse every page, without reading or writing data/parse_cache.db')
+    parser.add_argument('-rerender', action='store_true', dest='rerender',
+                       help='Render JavaScript teams again even if their static page is unchanged')
 
     results = parser.parse_args()
 
-    if results.url:
+    if results.profile and not (results.profile_teams or results.profile_sample or results.profile_strategy):
+        parser.error("-profile needs -profile-teams, -profile-sample or -profile-strategy to choose teams")
+    if results.no_archive:
+        archive.store = None
+    if results.no_parse_cache:
+        parsecache.cache = None
+    if results.no_snapshots:
+        snapshots.store = None
+    elif results.rerender:
+        snapshots.store.max_age = 0
+
+    if results.reparse_only:
+        parsed, unparsed = reparse_snapshots(results.season, results.teams or [])
+        logger.info(f"Reparsed {len(parsed)} snapshots; no players in {unparsed}")
+    elif results.reparse_archive:
+        parsed, unparsed = reparse_archive(results.season, results.teams or [])
+        logger.info(f"Reparsed {len(parsed)} archived teams; no players in {unparsed}")
+    elif results.url:
         # Single team mode
         logger.info(f"Scraping single team: {results.url}")
         team = {'url': results.url, 'ncaa_id': 0, 'team': 'Single Team'}
@@ -1535,7 +2218,25 @@ Examples:
         logger.info(f"Starting bulk scrape for season {results.season}")
         if teams_to_scrape:
             logger.info(f"Scraping specific teams: {teams_to_scrape}")
-        unparsed, skipped = get_all_rosters(results.season, teams_to_scrape)
+        # Read the cost history before -metrics truncates a file it may include
+        scheduler = None
+        if results.workers:
+            cost_model = CostModel.from_files(results.history) if results.history else CostModel.from_history()
+            scheduler = TeamScheduler(cost_model, results.workers, results.browser_workers)
+        run_metrics = None
+        if results.metrics:
+            run_metrics = metrics.RunMetrics(f"{results.metrics}.jsonl", f"{results.metrics}.prom",
+                                             hosts=throttle.controller)
+        profiler = None
+        if results.profile:
+            profiler = TeamProfiler(results.profile, teams=results.profile_teams, sample=results.profile_sample,
+                                    strategies=results.profile_strategy)
+        unparsed, skipped = get_all_rosters(results.season, teams_to_scrape, store=results.store,
+                                            run_metrics=run_metrics, profiler=profiler, scheduler=scheduler,
+                                            compression=results.compress)
         logger.info(f"✓ Scraping complete")
         logger.info(f"Unparsed teams: {unparsed}")
         logger.info(f"Skipped teams: {skipped}")
+        if results.clean:
+            clean_file(output.with_suffix(f"data/rosters_{results.season}.csv", results.compress),
+                       f"data/rosters_{results.season}_cleaned.csv")
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Cost-aware scheduling of team scrapes
+
+Scraping teams in teams.json order leaves workers idle at the end of a
+concurrent run whenever a few slow shot-scraper teams come last. The
+scheduler instead:
+
+  - estimates each team's cost from past runs' metrics JSONL files (see
+    metrics.py): the median of the team's recent durations under its
+    current strategy, else the median for its strategy class, else a
+    default for the class
+  - splits teams into two lanes by strategy class, one for browser-bound
+    work (shot-scraper, requests_html) and one for plain HTTP fetches, each
+    with its own worker count so neither a browser nor the network sits idle
+  - dispatches each lane longest-first (LPT), so the slowest teams start
+    early and the short ones fill in around them; a browser worker with
+    nothing left in its lane takes HTTP work, never the other way round
+
+Strategy classes, from the strategy names TeamConfig.strategy() routes to:
+
+  static         default, wvball, w-baskbl, clemson (HTTP lane)
+  js_render      javascript: a full-page shot-scraper render, then parse_*
+  shot_scraper   the shotscraper_* extractors and the other team scrapers
+  requests_html  iowa_state (pyppeteer)
+
+Usage:
+    python src/rosters.py -season 2023-24 -workers 8 -browser-workers 2
+    python src/scheduler.py -workers 8 -browser-workers 2
+    python src/scheduler.py -history data/metrics/scrape_2023-24.jsonl -top 20
+"""
+
+import glob
+import heapq
+import queue
+import logging
+import argparse
+import statistics
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Callable
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================================
+# CONSTANTS
+# ============================================================================
+
+HISTORY_GLOB = 'data/metrics/*.jsonl'
+
+# Durations per team that make up its estimate, most recent first
+RECENT_RUNS = 5
+
+BROWSER, HTTP = 'browser', 'http'
+
+STATIC, JS_RENDER, SHOT_SCRAPER, REQUESTS_HTML = 'static', 'js_render', 'shot_scraper', 'requests_html'
+
+STRATEGY_CLASSES = {
+    'default': STATIC,
+    'wvball': STATIC,
+    'w-baskbl': STATIC,
+    'clemson': STATIC,
+    'javascript': JS_RENDER,
+    'iowa_state': REQUESTS_HTML,
+}
+
+LANES = {STATIC: HTTP, JS_RENDER: BROWSER, SHOT_SCRAPER: BROWSER, REQUESTS_HTML: BROWSER}
+
+# Seconds, for classes no past run has measured
+DEFAULT_COSTS = {STATIC: 2.0, JS_RENDER: 20.0, SHOT_SCRAPER: 45.0, REQUESTS_HTML: 35.0}
+
+
+def strategy_class(strategy: str) -> str:
+    return STRATEGY_CLASSES.get(strategy, SHOT_SCRAPER)
+
+
+# ============================================================================
+# COST MODEL
+# ============================================================================
+
+class CostModel:
+    """Expected seconds per team, from past runs"""
+
+    def __init__(self, records: Iterable[metrics.TeamMetrics] = ()):
+        by_team: Dict[tuple, List[metrics.TeamMetrics]] = {}
+        by_class: Dict[str, List[float]] = {}
+        for record in records:
+            if not record.strategy or not record.seconds:
+                continue
+            by_team.setdefault((record.ncaa_id, record.strategy), []).append(record)
+            by_class.setdefault(strategy_class(record.strategy), []).append(record.seconds)
+
+        # (ncaa_id, strategy) -> recent durations; a team whose routing
+        # changed starts over from its class estimate
+        self.team_seconds = {key: [r.seconds for r in sorted(group, key=lambda r: -r.started_at)[:RECENT_RUNS]]
+                             for key, group in by_team.items()}
+        self.class_seconds = {name: statistics.median(times) for name, times in by_class.items()}
+
+    @classmethod
+    def from_files(cls, paths: Iterable[str]) -> 'CostModel':
+        records = []
+        for path in paths:
+            try:
+                records.extend(metrics.load_jsonl(path))
+            except (OSError, ValueError, TypeError, KeyError) as e:
+                logger.warning(f"Skipping metrics history {path}: {e}")
+        return cls(records)
+
+    @classmethod
+    def from_history(cls, pattern: str = HISTORY_GLOB) -> 'CostModel':
+        return cls.from_files(sorted(glob.glob(pattern)))
+
+    def __len__(self) -> int:
+        return len(self.team_seconds)
+
+    def estimate(self, ncaa_id: int, strategy: str) -> float:
+        recent = self.team_seconds.get((ncaa_id, strategy))
+        if recent:
+            return statistics.median(recent)
+        name = strategy_class(strategy)
+        return self.class_seconds.get(name, DEFAULT_COSTS[name])
+
+
+# ============================================================================
+# SCHEDULER
+# ============================================================================
+
+@dataclass
+class Job:
+    team: Dict
+    strategy: str
+    lane: str
+    cost: float
+    position: int  # in the team list, for comparing with an unscheduled run
+
+
+def in_order(lanes: Dict[str, List[Job]]) -> Dict[str, List[Job]]:
+    """The same lanes in team-list order, as an unscheduled run would take them"""
+    return {lane: sorted(jobs, key=lambda job: job.position) for lane, jobs in lanes.items()}
+
+
+class TeamScheduler:
+    """Runs team scrapes longest-first on separate browser and HTTP lanes"""
+
+    def __init__(self, cost_model: Optional[CostModel] = None, http_workers: int = 4, browser_workers: int = 1):
+        self.cost_model = cost_model or CostModel()
+        self.workers = {HTTP: max(http_workers, 1), BROWSER: max(browser_workers, 1)}
+
+    def plan(self, teams: Iterable[Dict], strategy_of: Callable[[Dict], str]) -> Dict[str, List[Job]]:
+        """Jobs per lane, longest first"""
+        lanes: Dict[str, List[Job]] = {HTTP: [], BROWSER: []}
+        for position, team in enumerate(teams):
+            strategy = strategy_of(team)
+            lane = LANES[strategy_class(strategy)]
+            cost = self.cost_model.estimate(team['ncaa_id'], strategy)
+            lanes[lane].append(Job(team, strategy, lane, cost, position))
+        for jobs in lanes.values():
+            jobs.sort(key=lambda job: -job.cost)
+        return lanes
+
+    def makespan(self, lanes: Dict[str, List[Job]]) -> float:
+        """Estimated wall time of running `lanes` in their current order"""
+        pending = {lane: deque(jobs) for lane, jobs in lanes.items()}
+        free = [(0.0, lane, i) for lane in (BROWSER, HTTP) for i in range(self.workers[lane])]
+        heapq.heapify(free)
+        end = 0.0
+        while free:
+            at, lane, i = heapq.heappop(free)
+            job = self._next(pending, lane)
+            if job is None:
+                continue
+            end = max(end, at + job.cost)
+            heapq.heappush(free, (at + job.cost, lane, i))
+        return end
+
+    @staticmethod
+    def _next(pending: Dict[str, deque], lane: str) -> Optional[Job]:
+        # Browser workers help with HTTP work once their lane is empty; HTTP
+        # workers never start a browser
+        for source in ((BROWSER, HTTP) if lane == BROWSER else (HTTP,)):
+            if pending[source]:
+                return pending[source].popleft()
+        return None
+
+    def run(self, teams: Iterable[Dict], work: Callable[[Dict], Any],
+            strategy_of: Callable[[Dict], str]) -> Iterator[tuple]:
+        """
+        Call work(team) for every team, yielding (team, result, error) as they finish
+
+        error is the exception work() raised, if any (result is then None).
+        """
+        lanes = self.plan(teams, strategy_of)
+        total = sum(len(jobs) for jobs in lanes.values())
+        logger.info(f"Scheduling {total} teams: {len(lanes[HTTP])} HTTP on {self.workers[HTTP]} workers, "
+                    f"{len(lanes[BROWSER])} browser on {self.workers[BROWSER]}; estimated "
+                    f"{self.makespan(lanes):.0f}s longest-first vs {self.makespan(in_order(lanes)):.0f}s in order")
+
+        pending = {lane: deque(jobs) for lane, jobs in lanes.items()}
+        lock = threading.Lock()
+        done: queue.Queue = queue.Queue()
+
+        def worker(lane: str):
+            while True:
+                with lock:
+                    job = self._next(pending, lane)
+                if job is None:
+                    return
+                try:
+                    done.put((job.team, work(job.team), None))
+                except Exception as e:
+                    done.put((job.team, None, e))
+
+        threads = [threading.Thread(target=worker, args=(lane,), name=f"{lane}-{i}", daemon=True)
+                   for lane in (BROWSER, HTTP) for i in range(self.workers[lane])]
+        for thread in threads:
+            thread.start()
+        for _ in range(total):
+            yield done.get()
+        for thread in threads:
+            thread.join()
+
+
+# ============================================================================
+# MAIN ENTRY POINT
+# ============================================================================
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description='Show the schedule a concurrent scrape would use')
+    parser.add_argument('-history', nargs='+', dest='history',
+                        help=f'Metrics JSONL files to estimate costs from (default {HISTORY_GLOB})')
+    parser.add_argument('-workers', dest='workers', type=int, default=4, help='HTTP lane workers (default 4)')
+    parser.add_argument('-browser-workers', dest='browser_workers', type=int, default=1,
+                        help='Browser lane workers (default 1)')
+    parser.add_argument('-teams', nargs='+', type=int, dest='teams', help='Only these team IDs')
+    parser.add_argument('-top', dest='top', type=int, default=10, help='Costliest teams to list per lane')
+    results = parser.parse_args()
+
+    import json
+    import rosters
+
+    cost_model = CostModel.from_files(results.history) if results.history else CostModel.from_history()
+    teams = [t for t in json.load(open(rosters.TEAMS_FILE)) if t.get('url') and 'roster' not in t]
+    if results.teams:
+        teams = [t for t in teams if t['ncaa_id'] in results.teams]
+    scheduler = TeamScheduler(cost_model, results.workers, results.browser_workers)
+    lanes = scheduler.plan(teams, rosters.team_strategy)
+
+    print(f"{len(cost_model)} teams with history; class medians: "
+          + (', '.join(f"{c} {s:.1f}s" for c, s in sorted(cost_model.class_seconds.items())) or 'none'))
+    print(f"Estimated wall time: {scheduler.makespan(lanes):.0f}s longest-first, "
+          f"{scheduler.makespan(in_order(lanes)):.0f}s in teams.json order")
+    for lane, jobs in lanes.items():
+        print(f"\n{lane} lane: {len(jobs)} teams, {sum(j.cost for j in jobs):.0f}s of work "
+              f"on {scheduler.workers[lane]} workers")
+        for job in jobs[:results.top]:
+            print(f"  {job.cost:7.1f}s  {job.team['team']} ({job.team['ncaa_id']})  {job.strategy}")
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+School-name canonicalization for the high_school and previous_school columns
+
+"Hamilton HS", "Hamilton H.S." and "Hamilton High School" all reduce to the
+same match key; keys that still differ ("Goldey Beacom College" vs
+"Goldey-Beacom Coll") are clustered by fuzzy matching, but only against
+schools that share a distinctive token, so each new value is compared with a
+handful of candidates rather than every school seen so far. Previous schools
+that are NCAA programs are mapped to their ncaa_id from teams.json.
+
+Every resolved spelling is saved to data/school_map.csv (raw value ->
+canonical name, kind, ncaa_id). Later runs resolve known spellings by lookup
+and only match the new ones; hand edits to the map are kept.
+
+Usage:
+    python src/schools.py data/rosters_2025-26.csv
+    python src/schools.py data/rosters_2025-26.csv -o data/rosters_2025-26_schools.csv
+    python src/schools.py -map-only
+"""
+
+import re
+import csv
+import json
+import os
+import argparse
+import logging
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass, asdict
+from typing import List, Dict, Optional, Iterable
+
+from identity import jaro_winkler, season_files, DEFAULT_INPUTS
+from output import open_text, existing
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================================
+# CONSTANTS
+# ============================================================================
+
+TEAMS_FILE = 'data/teams.json'
+VB_TEAMS_FILE = 'data/vb_teams.csv'
+SCHOOL_MAP_FILE = 'data/school_map.csv'
+
+MAP_COLUMNS = ['column', 'raw', 'key', 'canonical', 'kind', 'ncaa_id']
+
+# Columns added by canonicalize_rows()
+SCHOOL_COLUMNS = ['high_school_canonical', 'previous_school_canonical', 'previous_school_ncaa_id']
+
+COLLEGE, HIGH_SCHOOL = 'college', 'high_school'
+
+# Two names are the same school when they differ in at most one distinctive
+# word, and that word is one typo away ("Manual" / "Manuel") and this long
+MIN_FUZZY_LENGTH = 6
+
+# Parenthesized notes such as "(Kan.)" or "(VA)" are not part of the name
+PAREN_RE = re.compile(r'\(.*?(\)|$)')
+STRIP_RE = re.compile(r"[.‘’`']")
+SEPARATOR_RE = re.compile(r'[-–/,]')
+
+# Abbreviations expanded before matching (applied to whole tokens)
+ABBREVIATIONS = {
+    'HS': 'HIGH SCHOOL',
+    'H S': 'HIGH SCHOOL',
+    'SR HIGH': 'HIGH',
+    'SENIOR HIGH': 'HIGH',
+    'UNIV': 'UNIVERSITY',
+    'U': 'UNIVERSITY',
+    'CC': 'COMMUNITY COLLEGE',
+    'JC': 'JUNIOR COLLEGE',
+    'CTC': 'COMMUNITY AND TECHNICAL COLLEGE',
+    'COLL': 'COLLEGE',
+    'ACAD': 'ACADEMY',
+    'INST': 'INSTITUTE',
+    'MT': 'MOUNT',
+    'FT': 'FORT',
+    '&': 'AND',
+}
+ABBREVIATION_RE = re.compile(r'(?<!\S)(' + '|'.join(re.escape(k) for k in sorted(ABBREVIATIONS, key=len, reverse=True)) + r')(?!\S)')
+
+# Words that say what kind of school it is rather than which one
+COLLEGE_WORDS = {'UNIVERSITY', 'COLLEGE', 'COMMUNITY', 'JUNIOR', 'INSTITUTE', 'TECHNICAL', 'STATE'}
+HIGH_SCHOOL_WORDS = {'HIGH', 'SCHOOL', 'ACADEMY', 'PREP', 'PREPARATORY'}
+GENERIC_WORDS = COLLEGE_WORDS | HIGH_SCHOOL_WORDS | {'THE', 'OF', 'AT', 'AND', 'SAINT'}
+
+
+# ============================================================================
+# NORMALIZATION
+# ============================================================================
+
+def school_key(name: Optional[str]) -> str:
+    """
+    Match key for a school name
+
+    Upper-case ASCII without punctuation, abbreviations expanded, "St." read
+    as State at the end of a name ("Montclair St.") and Saint elsewhere,
+    and "University of X" reordered to "X University".
+    """
+    if not name:
+        return ''
+    text = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode().upper()
+    text = SEPARATOR_RE.sub(' ', STRIP_RE.sub('', PAREN_RE.sub(' ', text)))
+    text = ' '.join(text.split())
+    text = ABBREVIATION_RE.sub(lambda m: ABBREVIATIONS[m.group(1)], text)
+    words = [w for w in text.split() if w != 'THE']
+    words = [('STATE' if i == len(words) - 1 else 'SAINT') if w == 'ST' else w for i, w in enumerate(words)]
+    if words[:2] == ['UNIVERSITY', 'OF'] and len(words) > 2:
+        words = words[2:] + ['UNIVERSITY']
+    return ' '.join(words)
+
+
+def distinctive_tokens(key: str) -> List[str]:
+    """Sorted tokens that identify the school rather than its kind"""
+    return sorted(w for w in key.split() if w not in GENERIC_WORDS and len(w) > 1)
+
+
+def block_keys(tokens: List[str]) -> List[tuple]:
+    """
+    Blocking keys: the distinctive tokens with each one left out in turn
+
+    Names that differ in at most one token share a block. One-word names
+    block on their first two letters instead.
+    """
+    if len(tokens) == 1:
+        return [(1, tokens[0][:2])]
+    return [(len(tokens),) + tuple(tokens[:i] + tokens[i + 1:]) for i in range(len(tokens))]
+
+
+def one_edit_apart(a: str, b: str) -> bool:
+    """Are two words one insertion, deletion, substitution or swap apart?"""
+    if abs(len(a) - len(b)) > 1:
+        return False
+    prefix = 0
+    while prefix < min(len(a), len(b)) and a[prefix] == b[prefix]:
+        prefix += 1
+    a_rest, b_rest = a[prefix:], b[prefix:]
+    if len(a) == len(b):
+        return a_rest[1:] == b_rest[1:] or (a_rest[:2] == b_rest[1::-1] and a_rest[2:] == b_rest[2:])
+    return a_rest[1:] == b_rest or a_rest == b_rest[1:]
+
+
+def same_school(a: List[str], b: List[str]) -> bool:
+    """Do two distinctive token lists differ by at most one misspelled token?"""
+    if len(a) != len(b):
+        return False
+    a_only = [t for t in a if t not in b]
+    b_only = [t for t in b if t not in a]
+    if len(a_only) != 1 or len(b_only) != 1:
+        return not a_only and not b_only
+    x, y = a_only[0], b_only[0]
+    return min(len(x), len(y)) >= MIN_FUZZY_LENGTH and one_edit_apart(x, y)
+
+
+def school_kind(key: str, default: str) -> str:
+    """College or high school, from the words in the name"""
+    words = set(key.split())
+    if words & HIGH_SCHOOL_WORDS:
+        return HIGH_SCHOOL
+    if words & COLLEGE_WORDS:
+        return COLLEGE
+    return default
+
+
+# ============================================================================
+# CANONICAL MAP
+# ============================================================================
+
+@dataclass
+class School:
+    """Canonical form of one raw spelling in one column"""
+    column: str
+    raw: str
+    key: str
+    canonical: str
+    kind: str
+    ncaa_id: str = ''
+
+
+def load_team_aliases(teams_file: str = TEAMS_FILE, vb_teams_file: str = VB_TEAMS_FILE) -> Dict[str, tuple]:
+    """
+    Match key -> (team name, ncaa_id) for every NCAA program
+
+    Each team is registered under its roster name, its stats name and the
+    "X University" form roster pages often use for previous schools.
+    """
+    with open(teams_file) as f:
+        teams = json.load(f)
+    names = []
+    for team in teams:
+        ncaa_id = str(team['ncaa_id'])
+        names.append((team['team'], team['team'], ncaa_id))
+        if team.get('stats_name'):
+            names.append((team['stats_name'], team['team'], ncaa_id))
+    if os.path.exists(vb_teams_file):
+        canonical = {n[2]: n[1] for n in names}
+        with open(vb_teams_file, newline='') as f:
+            for row in csv.DictReader(f):
+                names.append((row['team'], canonical.get(row['ncaa_id'], row['team']), row['ncaa_id']))
+
+    aliases: Dict[str, tuple] = {}
+    # Real names first so a generated "X University" never shadows a team's own name
+    for name, team, ncaa_id in names:
+        aliases.setdefault(school_key(name), (team, ncaa_id))
+    for name, team, ncaa_id in names:
+        key = school_key(name)
+        if not set(key.split()) & COLLEGE_WORDS - {'STATE'}:
+            aliases.setdefault(f"{key} UNIVERSITY", (team, ncaa_id))
+    aliases.pop('', None)
+    return aliases
+
+
+class SchoolMap:
+    """
+    Persistent (column, raw spelling) -> canonical school map
+
+    Spellings are kept per column because the same name means different
+    things there: "St. Thomas Aquinas" is a high school in high_school and
+    an NCAA program in previous_school.
+    """
+
+    def __init__(self, path: str = SCHOOL_MAP_FILE, teams_file: str = TEAMS_FILE):
+        self.path = path
+        self.teams = load_team_aliases(teams_file)
+        self.schools: Dict[tuple, School] = {}
+        # Schools by (kind, match key), and the schools each cluster is named
+        # after by block_keys(); fuzzy matches only compare against the latter
+        # so clusters can't drift one typo at a time
+        self.by_key: Dict[tuple, School] = {}
+        self.blocks: Dict[tuple, List[School]] = {}
+        self.added = 0
+        if os.path.exists(path):
+            self.load()
+
+    def load(self):
+        with open(self.path, newline='') as f:
+            for row in csv.DictReader(f):
+                self._remember(School(**{c: row[c] for c in MAP_COLUMNS}))
+        logger.info(f"Loaded {len(self.schools)} school spellings from {self.path}")
+
+    def save(self):
+        with open(self.path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=MAP_COLUMNS)
+            writer.writeheader()
+            for school in sorted(self.schools.values(), key=lambda s: (s.column, s.canonical, s.raw)):
+                writer.writerow(asdict(school))
+        logger.info(f"Saved {len(self.schools)} school spellings ({self.added} new) to {self.path}")
+
+    def _remember(self, school: School):
+        self.schools[(school.column, school.raw)] = school
+        if (school.kind, school.key) not in self.by_key:
+            self.by_key[(school.kind, school.key)] = school
+        if school.raw.strip() == school.canonical and not school.ncaa_id:
+            for block in block_keys(distinctive_tokens(school.key)):
+                self.blocks.setdefault((school.kind,) + block, []).append(school)
+
+    def _match(self, key: str, kind: str) -> Optional[School]:
+        """Closest cluster of the same kind whose name is one typo away"""
+        tokens = distinctive_tokens(key)
+        if not tokens:
+            return None
+        best, best_score = None, 0.0
+        for block in block_keys(tokens):
+            for school in self.blocks.get((kind,) + block, ()):
+                if not same_school(tokens, distinctive_tokens(school.key)):
+                    continue
+                similarity = jaro_winkler(key, school.key)
+                if similarity > best_score:
+                    best, best_score = school, similarity
+        return best
+
+    def resolve(self, raw: Optional[str], column: str = HIGH_SCHOOL) -> Optional[School]:
+        """Canonical school for one raw spelling, matching it only the first time"""
+        if not raw or raw == 'NA':
+            return None
+        if (column, raw) in self.schools:
+            return self.schools[(column, raw)]
+
+        key = school_key(raw)
+        if not key:
+            return None
+        kind = school_kind(key, HIGH_SCHOOL if column == HIGH_SCHOOL else COLLEGE)
+        if column != HIGH_SCHOOL and key in self.teams:
+            team, ncaa_id = self.teams[key]
+            school = School(column, raw, key, team, COLLEGE, ncaa_id)
+        else:
+            known = self.by_key.get((kind, key)) or self._match(key, kind)
+            if known:
+                school = School(column, raw, key, known.canonical, known.kind, known.ncaa_id)
+            else:
+                school = School(column, raw, key, raw.strip(), kind)
+        self._remember(school)
+        self.added += 1
+        return school
+
+    def resolve_column(self, values: Iterable[Optional[str]], column: str) -> List[Optional[School]]:
+        """
+        Resolve a whole column
+
+        New spellings are resolved most common first, so the spelling a
+        cluster is named after is the one rosters use most.
+        """
+        values = list(values)
+        new = Counter(v for v in values if v and (column, v) not in self.schools)
+        for raw, _ in new.most_common():
+            self.resolve(raw, column)
+        return [self.resolve(v, column) for v in values]
+
+
+def canonicalize_rows(rows: List[Dict[str, str]], school_map: SchoolMap) -> List[Dict[str, str]]:
+    """Add SCHOOL_COLUMNS to roster rows"""
+    high_schools = school_map.resolve_column((r.get('high_school') for r in rows), 'high_school')
+    previous = school_map.resolve_column((r.get('previous_school') for r in rows), 'previous_school')
+    for row, hs, prev in zip(rows, high_schools, previous):
+        row['high_school_canonical'] = hs.canonical if hs else ''
+        row['previous_school_canonical'] = prev.canonical if prev else ''
+        row['previous_school_ncaa_id'] = prev.ncaa_id if prev else ''
+    return rows
+
+
+# ============================================================================
+# MAIN ENTRY POINT
+# ============================================================================
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description='Canonicalize high school and previous school names')
+    parser.add_argument('inputs', nargs='*',
+                        help=f'Roster CSVs such as data/rosters_2025-26.csv (default: the season files in {DEFAULT_INPUTS})')
+    parser.add_argument('-o', dest='output', help='Output path when one input is given (default: <input>_schools.csv)')
+    parser.add_argument('-map', dest='map', default=SCHOOL_MAP_FILE,
+                        help=f'Canonical map to read and update (default {SCHOOL_MAP_FILE})')
+    parser.add_argument('-map-only', action='store_true', dest='map_only',
+                        help='Only update the canonical map, do not write CSVs')
+    results = parser.parse_args()
+    inputs = results.inputs or season_files()
+    if results.output and len(inputs) > 1:
+        parser.error('-o takes one input; without it each input gets its own <input>_schools.csv')
+
+    school_map = SchoolMap(results.map)
+    for path in inputs:
+        path = existing(path) or path
+        with open_text(path) as f:
+            reader = csv.DictReader(f)
+            fieldnames = [c for c in reader.fieldnames if c not in SCHOOL_COLUMNS] + SCHOOL_COLUMNS
+            rows = canonicalize_rows(list(reader), school_map)
+
+        matched = sum(1 for r in rows if r['previous_school_ncaa_id'])
+        with_previous = sum(1 for r in rows if r.get('previous_school'))
+        logger.info(f"{path}: {matched} of {with_previous} previous schools matched to an ncaa_id")
+
+        if not results.map_only:
+            output = results.output or re.sub(r'\.csv(\.gz|\.zst)?$', '', path) + '_schools.csv'
+            with open(output, 'w', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
+                writer.writeheader()
+                writer.writerows(rows)
+    school_map.save()
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Read-only roster query service
+
+Loads every season CSV once into a column-oriented snapshot with trigram
+indexes on name, hometown, high school and team, and serves JSON over HTTP:
+
+    GET /players?name=lopuyo
+    GET /players?hometown=omaha&season=2023-24&division=I
+    GET /players?high_school=millard&limit=20
+    GET /stats
+    POST /reload
+
+Substring queries of three or more characters intersect trigram posting
+lists and verify the candidates; shorter ones use a sorted-prefix index on
+words. A reload (POST /reload, or SIGHUP) builds a new snapshot in the
+background and swaps it in with one reference assignment, so requests in
+flight finish on the old snapshot and none are dropped.
+
+Seasons are normalized the way store.py does ('2023', '2023-24' and
+'2023-2024' are one season), and each team-season is served from one file:
+where two files have the same team for the same season (rosters_2023.csv
+and a later rosters_2023-24.csv rescrape), the file listed later wins, and
+for the default inputs that is the one written last.
+
+Usage:
+    python src/service.py
+    python src/service.py -port 8099 data/rosters_2023.csv data/rosters_2025-26.csv
+"""
+
+import os
+import re
+import csv
+import glob
+import json
+import time
+import signal
+import bisect
+import argparse
+import logging
+import threading
+import unicodedata
+from array import array
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from typing import List, Dict, Optional, Iterable
+
+from identity import normalize_season, season_files
+from output import open_text
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================================
+# CONSTANTS
+# ============================================================================
+
+DEFAULT_INPUTS = 'data/rosters_*.csv'
+VB_TEAMS_FILE = 'data/vb_teams.csv'
+DEFAULT_PORT = 8099
+
+COLUMNS = ['ncaa_id', 'team', 'player_id', 'name', 'year', 'hometown', 'high_school',
+           'previous_school', 'height', 'position', 'jersey', 'url', 'season', 'division',
+           'conference']
+
+# Columns searchable by substring
+INDEXED_COLUMNS = ['name', 'hometown', 'high_school', 'team']
+
+# Low-cardinality columns stored as codes into a value table
+ENCODED_COLUMNS = ['ncaa_id', 'team', 'year', 'position', 'season', 'division', 'conference']
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 5000
+
+NON_ALNUM_RE = re.compile(r'[^a-z0-9]+')
+
+
+def fold(text: Optional[str]) -> str:
+    """Lower-case ASCII with punctuation collapsed to single spaces"""
+    if not text:
+        return ''
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode().lower()
+    return NON_ALNUM_RE.sub(' ', text).strip()
+
+
+def trigrams(text: str) -> set:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+# ============================================================================
+# SNAPSHOT
+# ============================================================================
+
+class TextIndex:
+    """Trigram and word-prefix index over one folded text column"""
+
+    def __init__(self, values: List[str]):
+        self.values = values
+        postings: Dict[str, List[int]] = {}
+        words = []
+        for row, value in enumerate(values):
+            for gram in trigrams(value):
+                postings.setdefault(gram, []).append(row)
+            for word in set(value.split()):
+                words.append((word, row))
+        # Row IDs are appended in order, so each posting list is already sorted
+        self.postings = {g: array('I', rows) for g, rows in postings.items()}
+        words.sort()
+        self.words = [w for w, _ in words]
+        self.word_rows = array('I', (r for _, r in words))
+
+    def search(self, query: str) -> set:
+        """Rows whose value contains the folded query"""
+        query = fold(query)
+        if not query:
+            return set()
+        if len(query) < 3:
+            start = bisect.bisect_left(self.words, query)
+            rows = set()
+            for i in range(start, len(self.words)):
+                if not self.words[i].startswith(query):
+                    break
+                rows.add(self.word_rows[i])
+            return rows
+
+        grams = sorted(trigrams(query), key=lambda g: len(self.postings.get(g, ())))
+        if not grams or grams[0] not in self.postings:
+            return set()
+        candidates = set(self.postings[grams[0]])
+        for gram in grams[1:]:
+            candidates.intersection_update(self.postings.get(gram, ()))
+            if not candidates:
+                break
+        return {row for row in candidates if query in self.values[row]}
+
+
+class Snapshot:
+    """Immutable column store over a set of season files"""
+
+    def __init__(self, paths: Iterable[str], teams_file: str = VB_TEAMS_FILE):
+        """paths: season CSVs; a team-season in several of them is taken from the last"""
+        start = time.perf_counter()
+        self.paths = list(paths)
+        divisions = load_divisions(teams_file)
+
+        self.codes: Dict[str, array] = {c: array('I') for c in ENCODED_COLUMNS}
+        self.code_values: Dict[str, List[str]] = {c: [] for c in ENCODED_COLUMNS}
+        code_lookup: Dict[str, Dict[str, int]] = {c: {} for c in ENCODED_COLUMNS}
+        self.text: Dict[str, List[str]] = {c: [] for c in COLUMNS if c not in ENCODED_COLUMNS}
+
+        # (season, ncaa_id) -> the file its rows are taken from
+        sources: Dict[tuple, str] = {}
+        for path in reversed(self.paths):
+            with open_text(path) as f:
+                for row in csv.DictReader(f):
+                    if not row.get('name'):
+                        continue
+                    row['season'] = normalize_season(row.get('season'), default=path.rsplit('_', 1)[-1]) or ''
+                    if sources.setdefault((row['season'], row.get('ncaa_id')), path) != path:
+                        continue
+                    row['division'], row['conference'] = divisions.get(row.get('ncaa_id'), ('', ''))
+                    for column in ENCODED_COLUMNS:
+                        value = row.get(column) or ''
+                        lookup = code_lookup[column]
+                        if value not in lookup:
+                            lookup[value] = len(self.code_values[column])
+                            self.code_values[column].append(value)
+                        self.codes[column].append(lookup[value])
+                    for column in self.text:
+                        self.text[column].append(row.get(column) or '')
+
+        self.size = len(self.text['name'])
+        self.code_lookup = code_lookup
+        self.indexes = {c: TextIndex([fold(v) for v in self.column(c)]) for c in INDEXED_COLUMNS}
+        self.loaded_at = time.time()
+        self.build_seconds = time.perf_counter() - start
+
+    def column(self, name: str) -> List[str]:
+        if name in self.text:
+            return self.text[name]
+        values = self.code_values[name]
+        return [values[code] for code in self.codes[name]]
+
+    def value(self, column: str, row: int) -> str:
+        if column in self.text:
+            return self.text[column][row]
+        return self.code_values[column][self.codes[column][row]]
+
+    def record(self, row: int) -> Dict[str, str]:
+        return {c: self.value(c, row) for c in COLUMNS}
+
+    def search(self, filters: Dict[str, str], limit: int = DEFAULT_LIMIT) -> Dict:
+        """
+        Rows matching every filter
+
+        Text filters (INDEXED_COLUMNS) are substring matches; encoded columns
+        such as season and division must match exactly.
+        """
+        rows: Optional[set] = None
+        for column in INDEXED_COLUMNS:
+            if filters.get(column):
+                found = self.indexes[column].search(filters[column])
+                rows = found if rows is None else rows & found
+
+        exact = {}
+        for column in ENCODED_COLUMNS:
+            if column in INDEXED_COLUMNS or filters.get(column) is None:
+                continue
+            value = filters[column]
+            if column == 'season':
+                value = normalize_season(value) or value
+            code = self.code_lookup[column].get(value)
+            if code is None:
+                return {'count': 0, 'players': []}
+            exact[column] = code
+
+        candidates = sorted(rows) if rows is not None else range(self.size)
+        matches = [r for r in candidates if all(self.codes[c][r] == code for c, code in exact.items())]
+        return {'count': len(matches), 'players': [self.record(r) for r in matches[:limit]]}
+
+    def stats(self) -> Dict:
+        return {
+            'rows': self.size,
+            'files': self.paths,
+            'seasons': sorted(v for v in self.code_values['season'] if v),
+            'loaded_at': self.loaded_at,
+            'build_seconds': round(self.build_seconds, 3),
+        }
+
+
+def load_divisions(path: str = VB_TEAMS_FILE) -> Dict[str, tuple]:
+    """ncaa_id -> (division, conference)"""
+    with open(path, newline='') as f:
+        return {row['ncaa_id']: (row['division'], row['conference']) for row in csv.DictReader(f)}
+
+
+# ============================================================================
+# HTTP SERVICE
+# ============================================================================
+
+class RosterService:
+    """Holds the current snapshot and replaces it on reload"""
+
+    def __init__(self, paths: List[str]):
+        self.paths = paths
+        self.snapshot = Snapshot(self.resolve_paths())
+        self._reload_lock = threading.Lock()
+
+    def resolve_paths(self) -> List[str]:
+        paths = []
+        for pattern in self.paths:
+            if pattern == DEFAULT_INPUTS:
+                # The default glob would also pick up _cleaned, _reparsed, ... copies of each
+                # season, and would miss seasons written compressed. Oldest first, so the
+                # latest scrape of a team-season wins; on a tie, the '2023-24' spelling
+                # rosters.py writes now beats the older '2023'
+                paths.extend(sorted(season_files(pattern),
+                                    key=lambda path: (os.path.getmtime(path), '-' in os.path.basename(path), path)))
+            else:
+                paths.extend(sorted(glob.glob(pattern)))
+        return paths
+
+    def reload(self) -> bool:
+        """Build a new snapshot and swap it in; False if a reload is already running"""
+        if not self._reload_lock.acquire(blocking=False):
+            return False
+        try:
+            snapshot = Snapshot(self.resolve_paths())
+            # Single reference assignment: readers see the old or the new snapshot, never a mix
+            self.snapshot = snapshot
+            logger.info(f"Reloaded {snapshot.size} rows in {snapshot.build_seconds:.2f}s")
+            return True
+        finally:
+            self._reload_lock.release()
+
+    def reload_in_background(self) -> bool:
+        if self._reload_lock.locked():
+            return False
+        threading.Thread(target=self.reload, daemon=True).start()
+        return True
+
+
+def make_handler(service: RosterService):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status: int, body: Dict):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            snapshot = service.snapshot
+            if url.path == '/players':
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                unknown = set(params) - set(INDEXED_COLUMNS) - set(ENCODED_COLUMNS) - {'limit'}
+                if unknown:
+                    self._send(400, {'error': f"unknown parameters: {sorted(unknown)}"})
+                    return
+                try:
+                    limit = min(int(params.pop('limit', DEFAULT_LIMIT)), MAX_LIMIT)
+                except ValueError:
+                    self._send(400, {'error': 'limit must be an integer'})
+                    return
+                if limit < 1:
+                    self._send(400, {'error': 'limit must be at least 1'})
+                    return
+                start = time.perf_counter()
+                result = snapshot.search(params, limit)
+                result['ms'] = round((time.perf_counter() - start) * 1000, 2)
+                self._send(200, result)
+            elif url.path == '/stats':
+                self._send(200, snapshot.stats())
+            else:
+                self._send(404, {'error': 'not found'})
+
+        def do_POST(self):
+            if urlparse(self.path).path == '/reload':
+                started = service.reload_in_background()
+                self._send(202, {'reloading': True, 'started': started})
+            else:
+                self._send(404, {'error': 'not found'})
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+    return Handler
+
+
+# ============================================================================
+# MAIN ENTRY POINT
+# ============================================================================
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description='Read-only roster query service')
+    parser.add_argument('inputs', nargs='*', help=f'Season CSVs or globs (default {DEFAULT_INPUTS})')
+    parser.add_argument('-host', dest='host', default='127.0.0.1')
+    parser.add_argument('-port', dest='port', type=int, default=DEFAULT_PORT)
+    results = parser.parse_args()
+
+    service = RosterService(results.inputs or [DEFAULT_INPUTS])
+    snapshot = service.snapshot
+    logger.info(f"Loaded {snapshot.size} rows from {len(snapshot.paths)} files in {snapshot.build_seconds:.2f}s")
+
+    signal.signal(signal.SIGHUP, lambda *_: service.reload_in_background())
+
+    server = ThreadingHTTPServer((results.host, results.port), make_handler(service))
+    logger.info(f"Serving on http://{results.host}:{results.port}/players")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
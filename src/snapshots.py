@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Rendered-DOM snapshots for the teams that need a browser
+
+A shot-scraper render costs 20-45 seconds per JavaScript team, and until
+now every run, including every run to test a parse_roster_wbkb or
+parse_roster_baskbl fix, paid it again. The snapshot store keeps each
+render, gzipped, under data/snapshots/{season}/{ncaa_id}.html.gz, with a
+{ncaa_id}.json beside it recording the URL, when it was rendered and a hash
+of the static (unrendered) page it came from:
+
+  - rosters.fetch_rendered() fetches the static page first, an ordinary
+    request, and reuses the snapshot if the static page's hash still
+    matches and the snapshot is younger than MAX_AGE; otherwise it renders
+    and replaces the snapshot
+  - the hash skips nonces, CSRF tokens, cache-busting query strings,
+    comments and whitespace, which change on every request without the
+    roster changing
+  - MAX_AGE bounds how stale a snapshot can get on sites whose static shell
+    stays the same while the roster arrives from an API
+  - `rosters.py -reparse-only` runs the parsers over the stored snapshots
+    with no network and no browser
+
+The shotscraper_* extractors run their own JavaScript in the page and
+return players rather than HTML, so they aren't snapshotted.
+
+Usage:
+    python src/rosters.py -season 2023-24 -teams 630 -no-snapshots
+    python src/rosters.py -season 2023-24 -reparse-only
+    python src/snapshots.py -season 2023-24
+    python src/snapshots.py -season 2023-24 -team 630 > page.html
+"""
+
+import os
+import re
+import sys
+import gzip
+import json
+import time
+import hashlib
+import logging
+import argparse
+from typing import List, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================================
+# CONSTANTS
+# ============================================================================
+
+SNAPSHOT_DIR = 'data/snapshots'
+
+# Seconds after which a snapshot is rendered again even if the static page is unchanged
+MAX_AGE = 14 * 86400
+
+# Parts of a static page that change per request, not per roster
+VOLATILE_RES = [
+    re.compile(r'<!--.*?-->', re.DOTALL),
+    re.compile(r'\snonce="[^"]*"'),
+    re.compile(r'<meta[^>]+name="csrf[^"]*"[^>]*>', re.IGNORECASE),
+    re.compile(r'<input[^>]+name="__(?:VIEWSTATE|EVENTVALIDATION|RequestVerificationToken)[^"]*"[^>]*>'),
+    re.compile(r'([?&](?:v|ver|version|cb|_)=)[\w.-]+'),
+]
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+def static_hash(html: str) -> str:
+    """Hash of a static page with its per-request noise removed"""
+    for pattern in VOLATILE_RES:
+        html = pattern.sub(lambda m: m.group(1) if m.lastindex else '', html)
+    return hashlib.sha256(WHITESPACE_RE.sub(' ', html).strip().encode()).hexdigest()
+
+
+# ============================================================================
+# SNAPSHOT STORE
+# ============================================================================
+
+class SnapshotStore:
+    """Compressed rendered pages per team and season"""
+
+    def __init__(self, root: str = SNAPSHOT_DIR, max_age: float = MAX_AGE):
+        self.root = root
+        self.max_age = max_age
+
+    def _paths(self, ncaa_id: int, season: str) -> tuple:
+        base = os.path.join(self.root, season, str(ncaa_id))
+        return f"{base}.html.gz", f"{base}.json"
+
+    def meta(self, ncaa_id: int, season: str) -> Optional[Dict]:
+        """The snapshot's metadata, or None if there is no complete snapshot"""
+        html_path, meta_path = self._paths(ncaa_id, season)
+        if not os.path.exists(meta_path) or not os.path.exists(html_path):
+            return None
+        with open(meta_path) as f:
+            return json.load(f)
+
+    def load(self, ncaa_id: int, season: str) -> Optional[str]:
+        html_path, _ = self._paths(ncaa_id, season)
+        if self.meta(ncaa_id, season) is None:
+            return None
+        with gzip.open(html_path, 'rt', encoding='utf-8') as f:
+            return f.read()
+
+    def reusable(self, ncaa_id: int, season: str, digest: str) -> Optional[str]:
+        """The stored render if it came from a static page with this hash and isn't too old"""
+        meta = self.meta(ncaa_id, season)
+        if meta is None or not digest or meta['static_hash'] != digest:
+            return None
+        if time.time() - meta['rendered_at'] > self.max_age:
+            return None
+        return self.load(ncaa_id, season)
+
+    def save(self, ncaa_id: int, season: str, url: str, digest: str, html: str):
+        """Store a render; the metadata goes last, so a snapshot is never seen half-written"""
+        html_path, meta_path = self._paths(ncaa_id, season)
+        os.makedirs(os.path.dirname(html_path), exist_ok=True)
+        data = html.encode('utf-8')
+        with open(f"{html_path}.tmp", 'wb') as f:
+            f.write(gzip.compress(data, compresslevel=6, mtime=0))
+        os.replace(f"{html_path}.tmp", html_path)
+        meta = {'ncaa_id': ncaa_id, 'season': season, 'url': url, 'static_hash': digest,
+                'rendered_at': time.time(), 'bytes': len(data), 'stored_bytes': os.path.getsize(html_path)}
+        with open(f"{meta_path}.tmp", 'w') as f:
+            json.dump(meta, f)
+        os.replace(f"{meta_path}.tmp", meta_path)
+
+    def teams(self, season: str) -> List[int]:
+        """Team IDs with a snapshot for this season"""
+        directory = os.path.join(self.root, season)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(int(name[:-len('.html.gz')]) for name in os.listdir(directory)
+                      if name.endswith('.html.gz') and name[:-len('.html.gz')].isdigit()
+                      and os.path.exists(os.path.join(directory, name[:-len('.html.gz')] + '.json')))
+
+
+# Used by rosters.fetch_rendered(); None turns snapshots off
+store: Optional[SnapshotStore] = SnapshotStore()
+
+
+# ============================================================================
+# MAIN ENTRY POINT
+# ============================================================================
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description='List stored JavaScript renders, or print one')
+    parser.add_argument('-season', dest='season', required=True)
+    parser.add_argument('-team', dest='team', type=int, help='Print this team\'s rendered HTML')
+    parser.add_argument('-dir', dest='root', default=SNAPSHOT_DIR, help=f'Snapshot directory (default {SNAPSHOT_DIR})')
+    results = parser.parse_args()
+
+    snapshots = SnapshotStore(results.root)
+    if results.team is not None:
+        html = snapshots.load(results.team, results.season)
+        if html is None:
+            sys.exit(f"No snapshot for team {results.team} in {results.season}")
+        sys.stdout.write(html)
+    else:
+        now = time.time()
+        total, stored = 0, 0
+        for ncaa_id in snapshots.teams(results.season):
+            meta = snapshots.meta(ncaa_id, results.season)
+            total += meta['bytes']
+            stored += meta['stored_bytes']
+            print(f"{ncaa_id:>8}  {meta['bytes'] / 1024:8.0f} KB  {(now - meta['rendered_at']) / 86400:5.1f} days  "
+                  f"{meta['static_hash'][:12] or '(no static page)':<16}  {meta['url']}")
+        if total:
+            print(f"{total / 1024 / 1024:.1f} MB rendered, {stored / 1024 / 1024:.1f} MB stored")
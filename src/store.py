@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+SQLite roster store
+
+Keeps every scraped season in a single local database so cross-season
+questions ("all seasons for team 697") are an index lookup instead of a scan
+over every CSV in data/. Rosters are upserted one team at a time, so
+re-scraping a team replaces only that team's rows for that season (and
+its share of the aggregate cube, see cube.py). Seasons are stored in
+'2023-24' form whatever the CSV says ('2023', '2023-2024'), so the players
+table and the cube share one key per team-season.
+
+Usage:
+    python src/store.py import data/rosters_2022.csv data/finished_rosters.csv
+    python src/store.py query -team 697
+    python src/store.py query -name Lopuyo -season 2023-24
+    python src/store.py query -state NE
+"""
+
+import csv
+import sys
+import sqlite3
+import argparse
+import logging
+from typing import List, Dict, Any, Optional, Iterable
+
+from hometown import parse_hometown
+from identity import normalize_season
+from output import open_text, existing
+from cube import RosterCube
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================================
+# SCHEMA
+# ============================================================================
+
+DEFAULT_DB = 'data/rosters.db'
+
+# Columns written by get_all_rosters()
+ROSTER_COLUMNS = [
+    'ncaa_id', 'team', 'player_id', 'name', 'year', 'hometown', 'high_school',
+    'previous_school', 'height', 'position', 'jersey', 'url', 'season'
+]
+
+# Extra columns carried by geocoded files such as finished_rosters.csv
+GEO_COLUMNS = [
+    'latitude', 'longitude', 'city', 'state', 'county', 'country', 'zip',
+    'country_2', 'source'
+]
+
+# Derived columns kept for indexed lookups
+DERIVED_COLUMNS = ['last_name', 'hometown_state']
+
+STORE_COLUMNS = ROSTER_COLUMNS + DERIVED_COLUMNS + GEO_COLUMNS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS players (
+    id INTEGER PRIMARY KEY,
+    ncaa_id INTEGER NOT NULL,
+    team TEXT,
+    player_id TEXT,
+    name TEXT COLLATE NOCASE,
+    year TEXT,
+    hometown TEXT,
+    high_school TEXT,
+    previous_school TEXT,
+    height TEXT,
+    position TEXT,
+    jersey TEXT,
+    url TEXT,
+    season TEXT NOT NULL,
+    last_name TEXT COLLATE NOCASE,
+    hometown_state TEXT,
+    latitude REAL,
+    longitude REAL,
+    city TEXT,
+    state TEXT,
+    county TEXT,
+    country TEXT,
+    zip TEXT,
+    country_2 TEXT,
+    source TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_players_team_season ON players (ncaa_id, season);
+CREATE INDEX IF NOT EXISTS idx_players_player_id ON players (player_id);
+CREATE INDEX IF NOT EXISTS idx_players_name ON players (name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_players_last_name ON players (last_name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_players_hometown_state ON players (hometown_state);
+"""
+
+# R's write_csv() writes missing values as "NA"
+NULL_VALUES = ('', 'NA')
+
+
+def _null(value: Any) -> Any:
+    """Convert empty CSV cells to NULL"""
+    if value is None:
+        return None
+    if isinstance(value, str) and value.strip() in NULL_VALUES:
+        return None
+    return value
+
+
+def hometown_state(hometown: Optional[str]) -> Optional[str]:
+    """Postal state for a US hometown ("Omaha, Neb." -> "NE")"""
+    return parse_hometown(hometown).state
+
+
+# ============================================================================
+# ROSTER STORE
+# ============================================================================
+
+class RosterStore:
+    """Local SQLite backend for scraped rosters"""
+
+    def __init__(self, path: str = DEFAULT_DB, check_same_thread: bool = True):
+        # Pass check_same_thread=False to share the store between threads
+        # that serialize their own writes (get_all_rosters with a scheduler)
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=check_same_thread)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+        self.cube = RosterCube(self.conn)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _row_values(self, row: Dict[str, Any]) -> List[Any]:
+        """Order a roster dict by STORE_COLUMNS, filling derived columns"""
+        values = {c: _null(row.get(c)) for c in STORE_COLUMNS}
+        if values['last_name'] is None and values['name']:
+            values['last_name'] = values['name'].split()[-1]
+        if values['hometown_state'] is None:
+            values['hometown_state'] = values['state'] or hometown_state(values['hometown'])
+        return [values[c] for c in STORE_COLUMNS]
+
+    def upsert_team(self, ncaa_id: int, season: str, rows: Iterable[Dict[str, Any]]) -> int:
+        """
+        Replace one team's roster for one season
+
+        Args:
+            ncaa_id: Team ID
+            season: Season string as written to the CSV; stored in '2023-24'
+                form, so '2023' and '2023-2024' name the same team-season
+            rows: Player dicts keyed by ROSTER_COLUMNS (GEO_COLUMNS optional)
+
+        Returns:
+            Number of rows written
+        """
+        with self.conn:
+            return self._replace_team(ncaa_id, normalize_season(season) or season, rows)
+
+    def _replace_team(self, ncaa_id: int, season: str, rows: Iterable[Dict[str, Any]]) -> int:
+        """Delete and re-insert one team-season (and its cube cells) inside the caller's transaction"""
+        values = [self._row_values(dict(row, ncaa_id=ncaa_id, season=season)) for row in rows]
+        placeholders = ', '.join('?' for _ in STORE_COLUMNS)
+        self.conn.execute("DELETE FROM players WHERE ncaa_id = ? AND season = ?",
+                          (ncaa_id, season))
+        self.conn.executemany(
+            f"INSERT INTO players ({', '.join(STORE_COLUMNS)}) VALUES ({placeholders})",
+            values
+        )
+        self.cube.refresh_team(ncaa_id, season)
+        return len(values)
+
+    def import_csv(self, path: str) -> int:
+        """Import an existing roster CSV (any of the data/*.csv roster layouts, plain, .gz or .zst)"""
+        path = existing(path) or path
+        by_team: Dict[tuple, List[Dict[str, Any]]] = {}
+        with open_text(path) as f:
+            for row in csv.DictReader(f):
+                if not row.get('ncaa_id') or not row.get('season'):
+                    continue
+                # One key per team-season, whichever way the file spells the season
+                key = (int(row['ncaa_id']), normalize_season(row['season']) or row['season'])
+                by_team.setdefault(key, []).append(row)
+
+        total = 0
+        with self.conn:
+            for (ncaa_id, season), rows in by_team.items():
+                total += self._replace_team(ncaa_id, season, rows)
+        logger.info(f"Imported {total} rows for {len(by_team)} team-seasons from {path}")
+        return total
+
+    def query(self, ncaa_id: Optional[int] = None, season: Optional[str] = None,
+              player_id: Optional[str] = None, name: Optional[str] = None,
+              state: Optional[str] = None) -> List[sqlite3.Row]:
+        """
+        Look up players by any combination of indexed fields
+
+        `name` is a case-insensitive prefix match on either the full name or
+        the last name, so both can use their indexes.
+        """
+        clauses = []
+        params: List[Any] = []
+        if ncaa_id is not None:
+            clauses.append("ncaa_id = ?")
+            params.append(ncaa_id)
+        if season:
+            clauses.append("season = ?")
+            params.append(normalize_season(season) or season)
+        if player_id:
+            clauses.append("player_id = ?")
+            params.append(player_id)
+        if name:
+            prefix = name.replace('%', '') + '%'
+            clauses.append("(name LIKE ? OR last_name LIKE ?)")
+            params.extend([prefix, prefix])
+        if state:
+            clauses.append("hometown_state = ?")
+            params.append(state.upper())
+
+        sql = f"SELECT {', '.join(STORE_COLUMNS)} FROM players"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY season, ncaa_id, id"
+        return self.conn.execute(sql, params).fetchall()
+
+    def seasons(self) -> List[str]:
+        """Seasons currently in the store"""
+        return [r[0] for r in self.conn.execute("SELECT DISTINCT season FROM players ORDER BY season")]
+
+
+# ============================================================================
+# MAIN ENTRY POINT
+# ============================================================================
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description='SQLite roster store')
+    parser.add_argument('-db', action='store', dest='db', default=DEFAULT_DB,
+                        help=f'Path to the SQLite database (default {DEFAULT_DB})')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    import_cmd = commands.add_parser('import', help='Import existing roster CSV files')
+    import_cmd.add_argument('files', nargs='+', help='CSV files such as data/rosters_2023.csv')
+
+    query_cmd = commands.add_parser('query', help='Query the store and print CSV')
+    query_cmd.add_argument('-team', type=int, dest='team', help='NCAA team ID')
+    query_cmd.add_argument('-season', dest='season', help='Season string such as "2023-24"')
+    query_cmd.add_argument('-player', dest='player_id', help='Player ID from the team site')
+    query_cmd.add_argument('-name', dest='name', help='Player first- or last-name prefix (case-insensitive)')
+    query_cmd.add_argument('-state', dest='state', help='Hometown state, e.g. NE')
+
+    results = parser.parse_args()
+
+    with RosterStore(results.db) as store:
+        if results.command == 'import':
+            for path in results.files:
+                store.import_csv(path)
+        else:
+            rows = store.query(ncaa_id=results.team, season=results.season,
+                               player_id=results.player_id, name=results.name,
+                               state=results.state)
+            writer = csv.writer(sys.stdout)
+            writer.writerow(STORE_COLUMNS)
+            for row in rows:
+                writer.writerow(list(row))
+            logger.info(f"{len(rows)} rows")
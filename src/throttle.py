@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Per-host rate limiting, retries and circuit breaking
+
+Every request the scraper makes (requests, the browser-like fallback, curl
+and shot-scraper) goes through one HostController, which keeps for each
+host:
+
+  - a request rate, adapted AIMD-style: each good answer adds RATE_STEP
+    requests per second up to MAX_RATE, and each 429/403/5xx, timeout or
+    connection error halves it (down to MIN_RATE); a moving latency
+    average above SLOW_LATENCY also halves it
+  - retries for 429/5xx answers and failed connections, after a full-jitter
+    exponential backoff (or the host's Retry-After, if it sends one)
+  - a circuit breaker: after FAILURE_THRESHOLD failures in a row the circuit
+    opens and requests to the host raise CircuitOpen at once for
+    OPEN_SECONDS, then a single probe request is let through (half-open) and
+    closes the circuit again if it succeeds
+
+get_all_rosters sets teams that hit an open circuit aside and retries them
+in a second pass once the circuit is due to close. The waits and retries are
+recorded in each team's metrics (the wait phase, retries, throttled), and
+RunMetrics exports controller.snapshot() per host.
+
+Usage:
+    from throttle import controller
+
+    response = controller.call(url, lambda: requests.get(url), lambda r: r.status_code)
+
+    controller.acquire(url)
+    ...  # any other kind of request
+    controller.record(url, status, seconds)
+"""
+
+import time
+import random
+import logging
+import threading
+from dataclasses import dataclass, asdict
+from urllib.parse import urlparse
+from typing import List, Dict, Any, Optional, Callable
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================================
+# CONSTANTS
+# ============================================================================
+
+# Requests per second per host
+INITIAL_RATE = 2.0
+MAX_RATE = 10.0
+MIN_RATE = 0.1
+RATE_STEP = 0.5
+RATE_DECREASE = 0.5
+
+# Seconds; a host answering slower than this on average is treated as overloaded
+SLOW_LATENCY = 10.0
+LATENCY_SMOOTHING = 0.3
+
+MAX_RETRIES = 3
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 30.0
+
+FAILURE_THRESHOLD = 5
+OPEN_SECONDS = 120.0
+
+THROTTLE_STATUSES = {403, 429, 500, 502, 503, 504}
+# 403 goes to the browser-like fallback rather than being retried as is
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+
+class CircuitOpen(Exception):
+    """A request to a host whose circuit is open"""
+
+    def __init__(self, host: str, retry_at: float):
+        super().__init__(f"circuit open for {host}, retry in {max(retry_at - time.time(), 0):.0f}s")
+        self.host = host
+        self.retry_at = retry_at
+
+
+def host_of(url: str) -> str:
+    return urlparse(url).netloc.lower()
+
+
+# ============================================================================
+# HOST STATE
+# ============================================================================
+
+@dataclass
+class HostState:
+    host: str
+    rate: float = INITIAL_RATE
+    state: str = CLOSED
+    failures: int = 0  # in a row
+    requests: int = 0
+    throttled: int = 0
+    errors: int = 0
+    opened: int = 0
+    latency: float = 0.0
+    next_slot: float = 0.0  # time.monotonic() before which the next request waits
+    open_until: float = 0.0  # time.time(), so it can be reported
+    probing: bool = False
+
+
+class HostController:
+    """AIMD rate limits, backoff and circuit breakers for every host seen"""
+
+    def __init__(self, initial_rate: float = INITIAL_RATE, failure_threshold: int = FAILURE_THRESHOLD,
+                 open_seconds: float = OPEN_SECONDS, max_retries: int = MAX_RETRIES, seed: Optional[int] = None,
+                 key: Callable[[str], str] = host_of):
+        """key: maps a URL to the host its limits apply to"""
+        self.key = key
+        self.initial_rate = initial_rate
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.max_retries = max_retries
+        self.hosts: Dict[str, HostState] = {}
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+
+    def _host(self, host: str) -> HostState:
+        if host not in self.hosts:
+            self.hosts[host] = HostState(host, rate=self.initial_rate)
+        return self.hosts[host]
+
+    def acquire(self, url: str):
+        """
+        Wait for the host's next request slot
+
+        Raises CircuitOpen if the host's circuit is open, or half-open with
+        its probe request still out.
+        """
+        with self._lock:
+            state = self._host(self.key(url))
+            if state.state == OPEN:
+                if time.time() < state.open_until:
+                    raise CircuitOpen(state.host, state.open_until)
+                state.state = HALF_OPEN
+                state.probing = False
+            if state.state == HALF_OPEN:
+                if state.probing:
+                    raise CircuitOpen(state.host, state.open_until)
+                state.probing = True
+            now = time.monotonic()
+            start = max(now, state.next_slot)
+            state.next_slot = start + 1 / state.rate
+            state.requests += 1
+        if start > now:
+            with metrics.phase('wait'):
+                time.sleep(start - now)
+
+    def record(self, url: str, status: Optional[int], seconds: float):
+        """
+        Feed back one answer: an HTTP status, or None if the host never answered
+
+        404 and the other client errors say nothing about the host's load and
+        count as successes.
+        """
+        failed = status is None or status in THROTTLE_STATUSES
+        if failed:
+            metrics.add_throttled()
+        with self._lock:
+            state = self._host(self.key(url))
+            state.latency = (seconds if not state.latency else
+                             LATENCY_SMOOTHING * seconds + (1 - LATENCY_SMOOTHING) * state.latency)
+            if failed:
+                state.errors += status is None
+                state.throttled += status is not None
+                state.failures += 1
+                state.rate = max(MIN_RATE, state.rate * RATE_DECREASE)
+                if state.state == HALF_OPEN or state.failures >= self.failure_threshold:
+                    self._open(state)
+            else:
+                state.failures = 0
+                if state.state == HALF_OPEN:
+                    logger.info(f"Circuit closed for {state.host}")
+                    state.state = CLOSED
+                if state.latency > SLOW_LATENCY:
+                    state.rate = max(MIN_RATE, state.rate * RATE_DECREASE)
+                else:
+                    state.rate = min(MAX_RATE, state.rate + RATE_STEP)
+            state.probing = False
+
+    def _open(self, state: HostState):
+        state.state = OPEN
+        state.open_until = time.time() + self.open_seconds
+        state.opened += 1
+        logger.warning(f"Circuit open for {state.host} after {state.failures} failures; "
+                       f"failing fast for {self.open_seconds:.0f}s")
+
+    def release(self, url: str):
+        """Give back a slot taken by acquire() that never reached the host (e.g. a missing tool)"""
+        with self._lock:
+            state = self._host(self.key(url))
+            state.next_slot = max(time.monotonic(), state.next_slot - 1 / state.rate)
+            state.requests -= 1
+            state.probing = False
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Seconds to wait before retry number `attempt` (from 0)"""
+        if retry_after is not None:
+            return min(max(retry_after, 0.0), BACKOFF_CAP)
+        with self._lock:
+            return self._random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+    def call(self, url: str, send: Callable[[], Any], status_of: Callable[[Any], int],
+             retry_after_of: Callable[[Any], Optional[float]] = lambda response: None,
+             retry_errors: tuple = (OSError,)) -> Any:
+        """
+        send() under the host's rate limit, retrying throttled answers and errors
+
+        Returns the last response; re-raises the last error if every attempt
+        raised one of retry_errors.
+        """
+        for attempt in range(self.max_retries + 1):
+            self.acquire(url)
+            start = time.perf_counter()
+            try:
+                response = send()
+            except retry_errors as e:
+                self.record(url, None, time.perf_counter() - start)
+                if attempt == self.max_retries:
+                    raise
+                logger.warning(f"{type(e).__name__} for {url}, retrying")
+                delay = self.backoff(attempt)
+            else:
+                status = status_of(response)
+                self.record(url, status, time.perf_counter() - start)
+                if status not in RETRY_STATUSES or attempt == self.max_retries:
+                    return response
+                logger.warning(f"Got {status} for {url}, retrying")
+                delay = self.backoff(attempt, retry_after_of(response))
+            metrics.add_retry()
+            with metrics.phase('wait'):
+                time.sleep(delay)
+
+    def retry_at(self) -> Optional[float]:
+        """time.time() when the last open circuit is due to half-open, if any are open"""
+        with self._lock:
+            times = [s.open_until for s in self.hosts.values() if s.state == OPEN]
+        return max(times) if times else None
+
+    def snapshot(self) -> List[Dict]:
+        with self._lock:
+            return [{k: (round(v, 4) if isinstance(v, float) else v) for k, v in asdict(state).items()
+                     if k not in ('next_slot', 'probing')}
+                    for state in self.hosts.values()]
+
+
+def retry_after(headers) -> Optional[float]:
+    """A Retry-After header in seconds (the HTTP-date form is ignored)"""
+    value = headers.get('Retry-After') if headers is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+# Shared by every fetch in the process
+controller = HostController()
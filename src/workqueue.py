@@ -0,0 +1,649 @@
+#!/usr/bin/env python3
+"""
+Sharded backfills: a durable team x season work queue for many workers
+
+A backfill across SEASONS is tens of thousands of team-seasons, more than
+one process should scrape alone. The queue splits it into one item per
+team-season in a SQLite file, and any number of worker processes, on this
+machine or others, work through it:
+
+  - a worker leases a few items at a time; a lease runs out after
+    LEASE_SECONDS unless the worker's heartbeat thread extends it
+  - the worker scrapes each item with rosters.scrape_team() and hands back
+    the CSV rows and the item's metrics record (see metrics.py)
+  - a lease that runs out (a worker that crashed, hung or lost its network)
+    puts the item back up for lease; a late result from the worker that
+    lost it is discarded, so every item keeps exactly one result
+  - a scrape that raises goes back to pending until it has used
+    MAX_ATTEMPTS leases, then is marked failed; one that hit an open host
+    circuit (throttle.py) is not leased again until the circuit is due to
+    half-open
+  - items are leased season by season, so the workers at any moment are
+    spread over different teams' hosts rather than stacked on one
+
+Workers on the machine holding the file open it directly (SQLite's WAL mode
+and BEGIN IMMEDIATE transactions serialize them); workers elsewhere go
+through `serve`, which puts the same operations behind a small JSON HTTP
+API. Lease times are always the coordinator's clock, never a worker's.
+`serve` listens on 127.0.0.1 unless given -host; for workers elsewhere,
+give it and them the same -token (or WORKQUEUE_TOKEN), which every request
+must then carry as a bearer token.
+
+`merge` writes data/rosters_{season}.csv for each season from the stored
+results, in teams.json order and each team's page order, whatever order the
+workers finished in, and the items' metrics to
+data/metrics/backfill_{season}.jsonl, where the scheduler's cost model picks
+them up.
+
+Usage:
+    python src/workqueue.py enqueue -seasons 2023-24 2022-23
+    python src/workqueue.py enqueue -teams 255 326
+    python src/workqueue.py work -processes 4
+    python src/workqueue.py -token SECRET serve -host 0.0.0.0 -port 8097
+    python src/workqueue.py -token SECRET -queue http://coordinator:8097 work -processes 4
+    python src/workqueue.py status
+    python src/workqueue.py merge -seasons 2023-24 -store data/rosters.db
+    python src/workqueue.py requeue
+"""
+
+import os
+import csv
+import sys
+import hmac
+import json
+import time
+import socket
+import sqlite3
+import logging
+import argparse
+import threading
+import subprocess
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse
+from typing import List, Dict, Any, Optional, Iterable
+
+import requests
+
+import metrics
+import throttle
+from store import RosterStore, ROSTER_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================================
+# CONSTANTS
+# ============================================================================
+
+DEFAULT_QUEUE = 'data/backfill.db'
+DEFAULT_PORT = 8097
+TOKEN_ENV = 'WORKQUEUE_TOKEN'
+METRICS_DIR = 'data/metrics'
+
+# Seconds a lease lasts without a heartbeat; workers heartbeat every third of it
+LEASE_SECONDS = 120.0
+MAX_ATTEMPTS = 3
+# Seconds an idle worker waits before asking again while other workers hold leases
+POLL_SECONDS = 5.0
+
+PENDING, LEASED, DONE, FAILED = 'pending', 'leased', 'done', 'failed'
+STATES = [PENDING, LEASED, DONE, FAILED]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    ncaa_id INTEGER NOT NULL,
+    season TEXT NOT NULL,
+    position INTEGER NOT NULL,  -- in teams.json, for the merge order
+    team_json TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available_at REAL NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_expires REAL,
+    finished_at REAL,
+    error TEXT,
+    rows_json TEXT,
+    metrics_json TEXT,
+    UNIQUE (ncaa_id, season)
+);
+CREATE INDEX IF NOT EXISTS idx_items_state ON items (state, available_at);
+CREATE INDEX IF NOT EXISTS idx_items_season ON items (season, position);
+"""
+
+
+# ============================================================================
+# LOCAL QUEUE
+# ============================================================================
+
+class WorkQueue:
+    """The queue itself, in a SQLite file shared by every process on this machine"""
+
+    def __init__(self, path: str = DEFAULT_QUEUE, max_attempts: int = MAX_ATTEMPTS):
+        self.path = path
+        self.max_attempts = max_attempts
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Autocommit, so each operation below is exactly one explicit transaction
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self):
+        self.conn.close()
+
+    def _write(self, func):
+        """Run func(conn) in one BEGIN IMMEDIATE transaction, holding the write lock throughout"""
+        with self._lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                result = func(self.conn)
+            except BaseException:
+                self.conn.execute('ROLLBACK')
+                raise
+            self.conn.execute('COMMIT')
+            return result
+
+    def enqueue(self, teams: List[Dict], seasons: Iterable[str]) -> int:
+        """Add an item per team and season; items already queued are left as they are"""
+        items = [(team['ncaa_id'], season, position, json.dumps(team))
+                 for season in seasons for position, team in enumerate(teams)]
+
+        def insert(conn) -> int:
+            before = conn.total_changes
+            conn.executemany("INSERT OR IGNORE INTO items (ncaa_id, season, position, team_json) "
+                             "VALUES (?, ?, ?, ?)", items)
+            return conn.total_changes - before
+
+        return self._write(insert)
+
+    def lease(self, worker: str, count: int = 1, lease_seconds: float = LEASE_SECONDS) -> List[Dict]:
+        """
+        Up to `count` items for `worker`, leased for lease_seconds
+
+        Expired leases are taken back first: the item goes to `worker` if it
+        has attempts left and is marked failed otherwise.
+        """
+        def take(conn) -> List[Dict]:
+            now = time.time()
+            conn.execute(f"UPDATE items SET state = '{FAILED}', error = 'lease expired ' || attempts || ' times', "
+                         f"worker = NULL, finished_at = ? "
+                         f"WHERE state = '{LEASED}' AND lease_expires < ? AND attempts >= ?",
+                         (now, now, self.max_attempts))
+            rows = conn.execute(f"SELECT id, ncaa_id, season, team_json, attempts, worker FROM items "
+                                f"WHERE (state = '{PENDING}' AND available_at <= ?) "
+                                f"OR (state = '{LEASED}' AND lease_expires < ?) "
+                                f"ORDER BY id LIMIT ?", (now, now, count)).fetchall()
+            for row in rows:
+                if row['worker']:
+                    logger.warning(f"Lease on {row['ncaa_id']} {row['season']} held by {row['worker']} "
+                                   f"expired; reassigning to {worker}")
+            conn.executemany(f"UPDATE items SET state = '{LEASED}', worker = ?, lease_expires = ?, "
+                             f"attempts = attempts + 1 WHERE id = ?",
+                             [(worker, now + lease_seconds, row['id']) for row in rows])
+            return [{'id': row['id'], 'ncaa_id': row['ncaa_id'], 'season': row['season'],
+                     'team': json.loads(row['team_json']), 'attempts': row['attempts'] + 1} for row in rows]
+
+        return self._write(take)
+
+    def heartbeat(self, worker: str, ids: List[int], lease_seconds: float = LEASE_SECONDS) -> List[int]:
+        """Extend worker's leases on `ids`; returns the ids it still holds"""
+        def extend(conn) -> List[int]:
+            held = []
+            for item_id in ids:
+                cursor = conn.execute(f"UPDATE items SET lease_expires = ? "
+                                      f"WHERE id = ? AND worker = ? AND state = '{LEASED}'",
+                                      (time.time() + lease_seconds, item_id, worker))
+                if cursor.rowcount:
+                    held.append(item_id)
+            return held
+
+        return self._write(extend)
+
+    def complete(self, worker: str, item_id: int, rows: List[list], record: Optional[Dict] = None) -> bool:
+        """Store an item's result; False if worker no longer holds it (the result is dropped)"""
+        def finish(conn) -> bool:
+            cursor = conn.execute(f"UPDATE items SET state = '{DONE}', finished_at = ?, error = NULL, "
+                                  f"rows_json = ?, metrics_json = ? "
+                                  f"WHERE id = ? AND worker = ? AND state = '{LEASED}'",
+                                  (time.time(), json.dumps(rows), json.dumps(record) if record else None,
+                                   item_id, worker))
+            return cursor.rowcount == 1
+
+        return self._write(finish)
+
+    def fail(self, worker: str, item_id: int, error: str, retry_at: Optional[float] = None) -> str:
+        """
+        Give an item back after an error
+
+        Returns its new state: pending (leasable again from retry_at, if
+        given) while it has attempts left, failed after that, or '' if worker
+        no longer held it.
+        """
+        def release(conn) -> str:
+            row = conn.execute(f"SELECT attempts FROM items WHERE id = ? AND worker = ? AND state = '{LEASED}'",
+                               (item_id, worker)).fetchone()
+            if row is None:
+                return ''
+            state = PENDING if row['attempts'] < self.max_attempts else FAILED
+            conn.execute("UPDATE items SET state = ?, error = ?, worker = NULL, lease_expires = NULL, "
+                         "available_at = ?, finished_at = ? WHERE id = ?",
+                         (state, error, retry_at or 0, time.time() if state == FAILED else None, item_id))
+            return state
+
+        return self._write(release)
+
+    def remaining(self) -> int:
+        """Items not yet done or failed"""
+        with self._lock:
+            return self.conn.execute(f"SELECT COUNT(*) FROM items WHERE state IN ('{PENDING}', '{LEASED}')"
+                                     ).fetchone()[0]
+
+    def requeue(self, seasons: Optional[List[str]] = None) -> int:
+        """Put failed items back with their attempts reset"""
+        def reset(conn) -> int:
+            sql = (f"UPDATE items SET state = '{PENDING}', attempts = 0, available_at = 0, finished_at = NULL "
+                   f"WHERE state = '{FAILED}'")
+            if seasons:
+                sql += f" AND season IN ({','.join('?' * len(seasons))})"
+            return conn.execute(sql, seasons or []).rowcount
+
+        return self._write(reset)
+
+    def status(self) -> Dict[str, Any]:
+        """Item counts per season and state, the live leases and the failures"""
+        with self._lock:
+            seasons: Dict[str, Dict[str, int]] = {}
+            for row in self.conn.execute("SELECT season, state, COUNT(*) AS n, SUM(json_array_length(rows_json)) "
+                                         "AS players FROM items GROUP BY season, state ORDER BY season DESC"):
+                counts = seasons.setdefault(row['season'], dict.fromkeys(STATES + ['players'], 0))
+                counts[row['state']] = row['n']
+                counts['players'] += row['players'] or 0
+            leases = [dict(row) for row in self.conn.execute(
+                f"SELECT worker, COUNT(*) AS items, MIN(lease_expires) - ? AS expires_in FROM items "
+                f"WHERE state = '{LEASED}' GROUP BY worker ORDER BY worker", (time.time(),))]
+            failures = [dict(row) for row in self.conn.execute(
+                f"SELECT ncaa_id, season, attempts, error FROM items WHERE state = '{FAILED}' "
+                f"ORDER BY season DESC, position")]
+        return {'seasons': seasons, 'leases': leases, 'failed': failures}
+
+    def results(self, season: str) -> List[sqlite3.Row]:
+        """A season's items in teams.json order"""
+        with self._lock:
+            return self.conn.execute("SELECT ncaa_id, position, state, rows_json, metrics_json FROM items "
+                                     "WHERE season = ? ORDER BY position, ncaa_id", (season,)).fetchall()
+
+    def seasons(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self.conn.execute("SELECT DISTINCT season FROM items ORDER BY season DESC")]
+
+
+# ============================================================================
+# COORDINATOR AND REMOTE CLIENT
+# ============================================================================
+
+def make_handler(queue: WorkQueue, token: Optional[str] = None):
+    """
+    HTTP front for a WorkQueue: POST /lease, /heartbeat, /complete, /fail;
+    GET /status, /remaining. With a token, requests without it get a 401.
+    """
+    operations = {
+        '/lease': lambda body: {'items': queue.lease(body['worker'], body.get('count', 1),
+                                                     body.get('lease_seconds', LEASE_SECONDS))},
+        '/heartbeat': lambda body: {'held': queue.heartbeat(body['worker'], body['ids'],
+                                                            body.get('lease_seconds', LEASE_SECONDS))},
+        '/complete': lambda body: {'accepted': queue.complete(body['worker'], body['id'], body['rows'],
+                                                              body.get('metrics'))},
+        '/fail': lambda body: {'state': queue.fail(body['worker'], body['id'], body['error'],
+                                                   body.get('retry_at'))},
+    }
+
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status: int, body: Dict):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _authorized(self) -> bool:
+            if token is None or hmac.compare_digest(self.headers.get('Authorization', ''), f"Bearer {token}"):
+                return True
+            self._send(401, {'error': 'missing or wrong token'})
+            return False
+
+        def do_GET(self):
+            if not self._authorized():
+                return
+            path = urlparse(self.path).path
+            if path == '/status':
+                self._send(200, queue.status())
+            elif path == '/remaining':
+                self._send(200, {'remaining': queue.remaining()})
+            else:
+                self._send(404, {'error': 'not found'})
+
+        def do_POST(self):
+            if not self._authorized():
+                return
+            operation = operations.get(urlparse(self.path).path)
+            if operation is None:
+                self._send(404, {'error': 'not found'})
+                return
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+                self._send(200, operation(body))
+            except (ValueError, KeyError, TypeError) as e:
+                self._send(400, {'error': f"{type(e).__name__}: {e}"})
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+    return Handler
+
+
+class RemoteQueue:
+    """A WorkQueue served by `workqueue.py serve` on another machine"""
+
+    def __init__(self, url: str, timeout: float = 30, attempts: int = 5, token: Optional[str] = None):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+        self.attempts = attempts
+        self.session = requests.Session()
+        if token:
+            self.session.headers['Authorization'] = f"Bearer {token}"
+        self._lock = threading.Lock()
+
+    def _call(self, method: str, path: str, body: Optional[Dict] = None) -> Dict:
+        # Ride out a coordinator restart; every operation is safe to repeat
+        # except /complete and /fail, which a lost lease turns into no-ops
+        for attempt in range(self.attempts):
+            try:
+                with self._lock:
+                    r = self.session.request(method, f"{self.url}{path}", json=body, timeout=self.timeout)
+                r.raise_for_status()
+                return r.json()
+            except requests.ConnectionError as e:
+                if attempt == self.attempts - 1:
+                    raise
+                logger.warning(f"Coordinator unreachable ({e}), retrying")
+                time.sleep(2 ** attempt)
+
+    def lease(self, worker: str, count: int = 1, lease_seconds: float = LEASE_SECONDS) -> List[Dict]:
+        return self._call('POST', '/lease', {'worker': worker, 'count': count, 'lease_seconds': lease_seconds})['items']
+
+    def heartbeat(self, worker: str, ids: List[int], lease_seconds: float = LEASE_SECONDS) -> List[int]:
+        return self._call('POST', '/heartbeat', {'worker': worker, 'ids': ids, 'lease_seconds': lease_seconds})['held']
+
+    def complete(self, worker: str, item_id: int, rows: List[list], record: Optional[Dict] = None) -> bool:
+        return self._call('POST', '/complete', {'worker': worker, 'id': item_id, 'rows': rows,
+                                                'metrics': record})['accepted']
+
+    def fail(self, worker: str, item_id: int, error: str, retry_at: Optional[float] = None) -> str:
+        return self._call('POST', '/fail', {'worker': worker, 'id': item_id, 'error': error,
+                                            'retry_at': retry_at})['state']
+
+    def remaining(self) -> int:
+        return self._call('GET', '/remaining')['remaining']
+
+    def status(self) -> Dict[str, Any]:
+        return self._call('GET', '/status')
+
+    def close(self):
+        self.session.close()
+
+
+def open_queue(target: str, token: Optional[str] = None):
+    """A RemoteQueue for an http(s) URL, else the WorkQueue file at that path"""
+    if target.startswith(('http://', 'https://')):
+        return RemoteQueue(target, token=token)
+    return WorkQueue(target)
+
+
+# ============================================================================
+# WORKER
+# ============================================================================
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def process_item(queue, worker: str, item: Dict, run_metrics: metrics.RunMetrics) -> str:
+    """Scrape one leased item and report it; returns what became of it"""
+    import rosters
+
+    team, season = item['team'], item['season']
+    logger.info(f"Processing {team['team']} {season} (attempt {item['attempts']})")
+    try:
+        with run_metrics.team(team, season) as record:
+            roster = rosters.scrape_team(team, season)
+            with metrics.phase('normalize'):
+                rows = [rosters.player_row(player, season) for player in roster]
+            record.rows = len(rows)
+    except throttle.CircuitOpen as e:
+        logger.warning(f"Deferring {team['team']} {season}: {e}")
+        return queue.fail(worker, item['id'], f"CircuitOpen: {e}", retry_at=e.retry_at) or 'lost'
+    except Exception as e:
+        logger.error(f"Error processing {team['team']} {season}: {e}")
+        return queue.fail(worker, item['id'], f"{type(e).__name__}: {e}") or 'lost'
+    if not queue.complete(worker, item['id'], rows, record.to_dict()):
+        logger.warning(f"Lost the lease on {team['team']} {season}; discarding {len(rows)} rows")
+        return 'lost'
+    return DONE if rows else 'empty'
+
+
+def run_worker(queue, worker: Optional[str] = None, batch: int = 1, lease_seconds: float = LEASE_SECONDS,
+               poll_seconds: float = POLL_SECONDS) -> Counter:
+    """
+    Lease and scrape items until none are left anywhere in the queue
+
+    Returns counts of what became of the items this worker leased.
+    """
+    worker = worker or default_worker_id()
+    run_metrics = metrics.RunMetrics(hosts=throttle.controller)
+    outcomes: Counter = Counter()
+    held: set = set()
+    held_lock = threading.Lock()
+    stop = threading.Event()
+
+    def beat():
+        while not stop.wait(lease_seconds / 3):
+            with held_lock:
+                ids = sorted(held)
+            if not ids:
+                continue
+            try:
+                lost = set(ids) - set(queue.heartbeat(worker, ids, lease_seconds))
+            except Exception as e:
+                logger.warning(f"Heartbeat failed: {e}")
+                continue
+            if lost:
+                logger.warning(f"Leases on items {sorted(lost)} were taken back; their results will be dropped")
+
+    heartbeat = threading.Thread(target=beat, name='heartbeat', daemon=True)
+    heartbeat.start()
+    logger.info(f"Worker {worker} started")
+    try:
+        while True:
+            items = queue.lease(worker, batch, lease_seconds)
+            if not items:
+                # Leases held elsewhere may still expire and come back
+                if queue.remaining() == 0:
+                    break
+                time.sleep(poll_seconds)
+                continue
+            with held_lock:
+                held.update(item['id'] for item in items)
+            for item in items:
+                outcomes[process_item(queue, worker, item, run_metrics)] += 1
+                with held_lock:
+                    held.discard(item['id'])
+    finally:
+        stop.set()
+        heartbeat.join()
+
+    logger.info(f"Worker {worker} finished: {dict(outcomes)}\n{run_metrics.summary()}")
+    return outcomes
+
+
+def spawn_workers(target: str, processes: int, batch: int, lease_seconds: float,
+                  token: Optional[str] = None) -> int:
+    """Run `processes` worker processes on this machine; returns how many exited with an error"""
+    prefix = default_worker_id()
+    # Through the environment, so the token isn't on the children's command lines
+    env = dict(os.environ, **{TOKEN_ENV: token}) if token else None
+    children = [subprocess.Popen([sys.executable, os.path.abspath(__file__), '-queue', target, 'work',
+                                  '-id', f"{prefix}-{i}", '-batch', str(batch), '-lease', str(lease_seconds)],
+                                 env=env)
+                for i in range(processes)]
+    return sum(1 for child in children if child.wait() != 0)
+
+
+# ============================================================================
+# MERGE
+# ============================================================================
+
+def merge_season(queue: WorkQueue, season: str, output_dir: str = 'data', metrics_dir: str = METRICS_DIR,
+                 store: Optional[RosterStore] = None) -> Dict[str, int]:
+    """
+    Write a season's results to {output_dir}/rosters_{season}.csv
+
+    Rows are in teams.json order and each team's page order, so the file
+    depends only on the results, not on which worker finished when. Both
+    files are written to a temporary name and renamed into place.
+    """
+    items = queue.results(season)
+    counts = Counter(item['state'] for item in items)
+    path = os.path.join(output_dir, f"rosters_{season}.csv")
+    metrics_path = os.path.join(metrics_dir, f"backfill_{season}.jsonl")
+    os.makedirs(output_dir, exist_ok=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+    players = 0
+    with open(f"{path}.tmp", 'w', newline='') as output_file, open(f"{metrics_path}.tmp", 'w') as metrics_file:
+        csv_file = csv.writer(output_file)
+        csv_file.writerow(ROSTER_COLUMNS)
+        for item in items:
+            if item['state'] != DONE:
+                continue
+            rows = json.loads(item['rows_json'])
+            csv_file.writerows(rows)
+            players += len(rows)
+            if item['metrics_json']:
+                metrics_file.write(item['metrics_json'] + '\n')
+            if store and rows:
+                store.upsert_team(item['ncaa_id'], season, [dict(zip(ROSTER_COLUMNS, row)) for row in rows])
+    os.replace(f"{path}.tmp", path)
+    os.replace(f"{metrics_path}.tmp", metrics_path)
+    logger.info(f"Wrote {players} players from {counts[DONE]} teams to {path}")
+    return {'players': players, **{state: counts[state] for state in STATES}}
+
+
+# ============================================================================
+# MAIN ENTRY POINT
+# ============================================================================
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(process)d - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description='Sharded backfill work queue')
+    parser.add_argument('-queue', dest='queue', default=DEFAULT_QUEUE,
+                        help=f'Queue file, or a coordinator URL for work and status (default {DEFAULT_QUEUE})')
+    parser.add_argument('-token', dest='token', default=os.environ.get(TOKEN_ENV),
+                        help=f'Shared token for serve and its remote workers (default ${TOKEN_ENV})')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    enqueue_cmd = commands.add_parser('enqueue', help='Queue every team for some seasons')
+    enqueue_cmd.add_argument('-seasons', nargs='+', dest='seasons', help='Seasons to queue (default all of SEASONS)')
+    enqueue_cmd.add_argument('-teams', nargs='+', type=int, dest='teams', help='Only these team IDs')
+    enqueue_cmd.add_argument('-teams-file', dest='teams_file', help='teams.json-style file (default data/teams.json)')
+
+    work_cmd = commands.add_parser('work', help='Lease and scrape items until the queue is drained')
+    work_cmd.add_argument('-id', dest='id', help='Worker name (default HOST-PID)')
+    work_cmd.add_argument('-processes', dest='processes', type=int, default=1,
+                          help='Worker processes to start on this machine (default 1)')
+    work_cmd.add_argument('-batch', dest='batch', type=int, default=1, help='Items leased at a time (default 1)')
+    work_cmd.add_argument('-lease', dest='lease', type=float, default=LEASE_SECONDS,
+                          help=f'Lease length in seconds (default {LEASE_SECONDS:.0f})')
+
+    serve_cmd = commands.add_parser('serve', help='Serve the queue file to workers on other machines')
+    serve_cmd.add_argument('-host', dest='host', default='127.0.0.1',
+                           help='Address to listen on (default 127.0.0.1; 0.0.0.0 for workers elsewhere)')
+    serve_cmd.add_argument('-port', dest='port', type=int, default=DEFAULT_PORT)
+
+    commands.add_parser('status', help='Show progress per season, live leases and failures')
+
+    merge_cmd = commands.add_parser('merge', help='Write season CSVs and metrics from the results')
+    merge_cmd.add_argument('-seasons', nargs='+', dest='seasons', help='Seasons to merge (default all queued)')
+    merge_cmd.add_argument('-output-dir', dest='output_dir', default='data')
+    merge_cmd.add_argument('-metrics-dir', dest='metrics_dir', default=METRICS_DIR)
+    merge_cmd.add_argument('-store', dest='store', help='Also upsert every team into this SQLite database')
+    merge_cmd.add_argument('-partial', action='store_true', dest='partial',
+                           help='Merge seasons that still have pending or leased items')
+
+    requeue_cmd = commands.add_parser('requeue', help='Give failed items another MAX_ATTEMPTS leases')
+    requeue_cmd.add_argument('-seasons', nargs='+', dest='seasons')
+
+    results = parser.parse_args()
+
+    if results.command == 'work' and results.processes > 1:
+        sys.exit(1 if spawn_workers(results.queue, results.processes, results.batch, results.lease,
+                                    results.token) else 0)
+
+    queue = open_queue(results.queue, results.token)
+    if results.command in ('enqueue', 'serve', 'merge', 'requeue') and isinstance(queue, RemoteQueue):
+        parser.error(f"{results.command} needs the queue file, not a coordinator URL")
+
+    if results.command == 'enqueue':
+        import rosters
+        with open(results.teams_file or rosters.TEAMS_FILE) as f:
+            teams = json.load(f)
+        if results.teams:
+            teams = [t for t in teams if t['ncaa_id'] in results.teams]
+        seasons = results.seasons or rosters.SEASONS
+        for season in seasons:
+            added = queue.enqueue([t for t in teams if rosters.scrapeable(t, season)], [season])
+            logger.info(f"{season}: queued {added} new items")
+    elif results.command == 'work':
+        run_worker(queue, results.id, results.batch, results.lease)
+    elif results.command == 'serve':
+        if not results.token and results.host not in ('127.0.0.1', 'localhost', '::1'):
+            logger.warning(f"Serving on {results.host} without -token: anyone who can reach the port "
+                           f"can lease, complete and fail items")
+        server = ThreadingHTTPServer((results.host, results.port), make_handler(queue, results.token))
+        logger.info(f"Serving {results.queue} on http://{results.host}:{results.port}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        server.server_close()
+    elif results.command == 'status':
+        status = queue.status()
+        print(f"{'season':<10}" + ''.join(f"{s:>9}" for s in STATES) + f"{'players':>9}")
+        for season, counts in status['seasons'].items():
+            print(f"{season:<10}" + ''.join(f"{counts[s]:>9}" for s in STATES + ['players']))
+        for lease in status['leases']:
+            print(f"lease: {lease['worker']} holds {lease['items']}, next expiry in {lease['expires_in']:.0f}s")
+        for failure in status['failed']:
+            print(f"failed: {failure['ncaa_id']} {failure['season']} after {failure['attempts']}: {failure['error']}")
+    elif results.command == 'merge':
+        store = RosterStore(results.store) if results.store else None
+        for season in results.seasons or queue.seasons():
+            counts = queue.status()['seasons'].get(season)
+            if counts is None:
+                logger.warning(f"Nothing queued for {season}")
+                continue
+            if (counts[PENDING] or counts[LEASED]) and not results.partial:
+                logger.warning(f"Skipping {season}: {counts[PENDING] + counts[LEASED]} items unfinished "
+                               f"(use -partial to merge anyway)")
+                continue
+            merge_season(queue, season, results.output_dir, results.metrics_dir, store)
+        if store:
+            store.close()
+    elif results.command == 'requeue':
+        logger.info(f"Requeued {queue.requeue(results.seasons)} failed items")
+    queue.close()